@@ -10,32 +10,29 @@ import pandas as pd
 import dash
 import json
 import plotly.graph_objs as go
+import plotly.io as pio
 from plotly.subplots import make_subplots
 import numpy as np
 import plotly.colors as pclr
 import requests
-from urllib.parse import parse_qs
-
-## Diskcache
-import diskcache
-from dash.long_callback import DiskcacheLongCallbackManager
-cache = diskcache.Cache("./cache")
-long_callback_manager = DiskcacheLongCallbackManager(cache)
-
+from urllib.parse import parse_qs, urlencode
 
 from def_names import fuelsources, elsources, units_unit, units, costs, heat_types, capexopex, couplers
 import auxiliary as da
 import json_auxiliary as ja
+import result_cache as rc
+import downsampling as ds
+import simulation_jobs as sj
+import metrics as mt
+import profiling as pr
 import os
 
 
 
 server = Flask(__name__)
-app = dash.Dash(server=server, external_stylesheets=[dbc.themes.FLATLY], url_base_pathname='/dash-server/', long_callback_manager=long_callback_manager)
+app = dash.Dash(server=server, external_stylesheets=[dbc.themes.FLATLY], url_base_pathname='/dash-server/')
 app.title = 'Dashboard'
 
-df = pd.read_csv('https://raw.githubusercontent.com/plotly/datasets/master/gapminderDataFiveYear.csv')
-
 # r=open('output_1.json')
 # jsondata=json.load(r)
 
@@ -48,10 +45,25 @@ app.layout = html.Div([
         dcc.Location(id="url"),
         dcc.Store(id='simulationSetupStorage'),
         dcc.Store(id='timelineListStorage'),
+        dcc.Store(id='simulationJobStorage'),
+        dcc.Store(id='userStorage'),
+        dcc.Store(id='profilingStorage'),
+        dcc.Interval(id='jobInterval', interval=1000, disabled=True),
         dcc.Store(id='simulationResultStorage'),
+        dcc.Store(id='paretoStorage'),
+        dcc.Store(id='paretoJobStorage'),
+        dcc.Interval(id='paretoInterval', interval=1000, disabled=True),
+        *[dcc.Store(id='rendered-tab-{}'.format(i)) for i in range(1, 8)],
         html.H4("Description:", id="htmlTest"),
         html.P("", id="simulationInformation"),
         html.Progress(id="progress_bar", style= {'width': '99%', 'height': '25%'}),
+        html.P("", id="solverInformation"),
+        dcc.Dropdown(id="solverProfile", options=[{'label': 'Solver: ' + p, 'value': p} for p in da.SOLVER_PROFILES],
+                     value=da.DEFAULT_PROFILE, clearable=False, style={'width': '300px'}),
+        dcc.Dropdown(id="solveStrategy", options=[{'label': 'Strategy: ' + s, 'value': s} for s in da.SOLVE_STRATEGIES],
+                     value=da.DEFAULT_STRATEGY, clearable=False, style={'width': '300px'}),
+        html.Button("Cancel simulation", id="cancelButton", n_clicks=0),
+        html.Button("Accept current solution", id="acceptButton", n_clicks=0),
     ])),
     dcc.Loading(id="loadingResults", type="dot", children=[
     dbc.Card(id="resultCard",children=[
@@ -210,6 +222,24 @@ app.layout = html.Div([
                     )
                 ], label="Summary for csv-export", tab_id="tab-7"),
 
+                dbc.Tab(children=[
+                    dbc.CardBody(children=[
+                        dbc.Row(children=[
+                            dbc.Col(children=[
+                                html.P("Number of points:"),
+                                dcc.Input(id="paretoPoints", type="number", min=2, max=50, step=1, value=10),
+                                html.Button("Compute cost vs. CO2 front", id="paretoButton", n_clicks=0),
+                                html.P("", id="paretoStatus"),
+                                html.P("", id="paretoInformation"),
+                            ],width=12),
+                            dbc.Col(children=[
+                                dcc.Graph(id="ParetoPlot")
+                            ],width=12),
+                            dbc.Col(id="ParetoTable", width=12),
+                        ]),
+                    ]),
+                ], label="Pareto front - costs vs. CO2 emissions", tab_id="tab-8"),
+
             ],id="card-tabs", active_tab="tab-1")
     ], style= {'display': 'none'}
     ),
@@ -217,8 +247,116 @@ app.layout = html.Div([
 ])
 # ,style={'overflow': 'hidden'}
 
+##########################################################################
+# Simulation job api (for the Angular app, see simulation_jobs.py)
+##########################################################################
+def tokenUser(token):
+    # payload (id, admin, email) of a jwt of the api, None if it is missing or not valid
+    if not token:
+        return None
+    response = requests.get("http://api:3001/api/auth/checkJwt", headers={'X-Original-URI': '/?' + urlencode({'jwt': token})})
+    if response.status_code != 200:
+        return None
+    return response.json()
+
+def sessionUser():
+    # user of the request, from the jwt query parameter (as for the dashboard) or an Authorization: Bearer header
+    token = request.args.get('jwt') or request.headers.get('Authorization', '').replace('Bearer ', '', 1)
+    return tokenUser(token)
+
+def ownJob(job_id, user):
+    # job record if it belongs to the user (all jobs for admins)
+    job = sj.status(job_id)
+    if job is None or not (user['admin'] or job['user'] == str(user['id'])):
+        return None
+    return job
+
+@server.route('/dash-server/jobs', methods=['POST'])
+def submitJob():
+    # jobs run as the user of the session, only admins set a priority
+    user = sessionUser()
+    if user is None:
+        return jsonify({'error': 'not authenticated'}), 401
+    job_id = sj.submit(request.json['settings'], user=user['id'],
+                       priority=int(request.json.get('priority', 0)) if user['admin'] else 0,
+                       profile=request.json.get('profile'), strategy=request.json.get('strategy'),
+                       profiling=bool(request.json.get('profiling')) or request.args.get('profiling') == '1')
+    return jsonify(sj.status(job_id))
+
+@server.route('/dash-server/jobs', methods=['GET'])
+def listJobs():
+    # jobs of the user of the session, admins see all jobs or those of user_id
+    user = sessionUser()
+    if user is None:
+        return jsonify({'error': 'not authenticated'}), 401
+    owner = request.args.get('user_id') if user['admin'] else str(user['id'])
+    jobs = [job for job in sj.all_jobs() if owner is None or job['user'] == owner]
+    return jsonify(sorted(jobs, key=lambda job: job['submitted']))
+
+@server.route('/dash-server/jobs/<job_id>', methods=['GET'])
+def jobStatus(job_id):
+    user = sessionUser()
+    if user is None:
+        return jsonify({'error': 'not authenticated'}), 401
+    if ownJob(job_id, user) is None:
+        return jsonify({'error': 'unknown job'}), 404
+    return jsonify(sj.status(job_id, touch=request.args.get('touch') == '1'))
+
+@server.route('/dash-server/jobs/<job_id>/profile', methods=['GET'])
+def jobProfile(job_id):
+    # profile of a job submitted with profiling (see profiling.py), format=folded: collapsed stacks for flame graphs
+    user = sessionUser()
+    if user is None:
+        return jsonify({'error': 'not authenticated'}), 401
+    job = ownJob(job_id, user)
+    results = rc.get_results(job['result_key']) if job is not None and job['result_key'] else None
+    if results is None or 'profiling' not in results:
+        return jsonify({'error': 'no profile'}), 404
+    if request.args.get('format') == 'folded':
+        return results['profiling']['folded'], 200, {'Content-Type': 'text/plain'}
+    return jsonify(dict(results['profiling'], hot=pr.hot_functions(results['profiling']['folded'])))
+
+@server.route('/dash-server/jobs/<job_id>/accept', methods=['POST'])
+def acceptJob(job_id):
+    user = sessionUser()
+    if user is None:
+        return jsonify({'error': 'not authenticated'}), 401
+    if ownJob(job_id, user) is None:
+        return jsonify({'error': 'unknown job'}), 404
+    sj.accept(job_id)
+    return jsonify(sj.status(job_id))
+
+@server.route('/dash-server/jobs/<job_id>/cancel', methods=['POST'])
+def cancelJob(job_id):
+    user = sessionUser()
+    if user is None:
+        return jsonify({'error': 'not authenticated'}), 401
+    if ownJob(job_id, user) is None:
+        return jsonify({'error': 'unknown job'}), 404
+    sj.cancel(job_id)
+    return jsonify(sj.status(job_id))
+
+##########################################################################
+# Run metrics (see metrics.py), exposed as Prometheus text by the flask server
+##########################################################################
+@server.route('/dash-server/metrics', methods=['GET'])
+def runMetrics():
+    return mt.prometheus_text(), 200, {'Content-Type': 'text/plain; version=0.0.4'}
+
+@server.route('/dash-server/metrics/runs', methods=['GET'])
+def runRecords():
+    # records of single runs (settings, sizes, users), for admins only
+    user = sessionUser()
+    if user is None:
+        return jsonify({'error': 'not authenticated'}), 401
+    if not user['admin']:
+        return jsonify({'error': 'forbidden'}), 403
+    return jsonify(mt.records(int(request.args.get('limit', 100))))
+
 @app.callback(
     Output("simulationSetupStorage", "data"),
+    Output("userStorage", "data"),
+    Output("profilingStorage", "data"),
     Input("url", "pathname"),
     Input("url", "href")
 )
@@ -228,6 +366,7 @@ def getDataFromURL(pathname, href):
     '''
     Get the UserID from the href and use it to retreive the settings in the Database by calling the API
     Simulation Settings are stored in a dcc.Store Component --> triggers the next Callback automatically
+    The query parameter profiling=1 runs the simulation with the profiler (see profiling.py)
     '''
     path = href.split("?jwt=")[0]
     user_id = path.split("/")[-1]
@@ -236,148 +375,263 @@ def getDataFromURL(pathname, href):
     response = requests.get("http://api:3001/api/simulation-results/simulation/"+user_id+"/"+config_id)
     temp = response.json()
     dataDict = temp["data"][0]
-    return dataDict["settings"]
+    # jobs are queued under the user of the jwt, not of the path (see simulation_jobs.queue_order)
+    user = tokenUser(query_params.get("jwt", [""])[0])
+    if user is None:
+        raise dash.exceptions.PreventUpdate
+    return dataDict["settings"], str(user['id']), query_params.get("profiling", ["0"])[0] == "1"
     # return structure
 
-@app.long_callback(
+@app.callback(
+    Output("simulationJobStorage", "data"),
+    Output("jobInterval", "disabled"),
+    Output("progress_bar", "value"),
+    Output("progress_bar", "max"),
+    Output("progress_bar", "style"),
+    Output("htmlTest", "children"),
     Output("simulationResultStorage", "data"),
     Output("timelineListStorage", "data"),
     Output("simulationInformation", "children"),
+    Output("resultCard", "style"),
+    Output("solverInformation", "children"),
     Input("simulationSetupStorage", "data"),
-    running=[
-        (Output("htmlTest", "children"), "Simulation is running...", "Simulation is Finished! Building Diagrams ..."),
-        (Output("progress_bar", "style"),{"visibility": "visible", 'width': '99%', 'height': '25%'},{"visibility": "hidden"}),
-    ],
-    progress=[Output("progress_bar", "value"), Output("progress_bar", "max")],
-    prevent_intial_callback=True
-)
-def startSimulation(set_progress, data):
-
-    totalSteps = 9
-    count=0
-
-    count+=1
-    set_progress((str(count), str(totalSteps)))
-
-    os.chdir(os.path.dirname(os.path.realpath(__file__)))
-
-    timelines, period_list, label_list, no_timesteps, timeline_map = ja.read_timelines("tool_dekarpio_timelines.json")
-
-    #structure = ja.read_structure('tool_dekarpio_structure.json')
-    structure = json.loads(data)
-
-
-    count+=1
-    set_progress((str(count), str(totalSteps)))
-
-    sysParam = ja.read_parameters(structure['par'], structure['eco'], period_list, label_list, no_timesteps)
-
-    count+=1
-    set_progress((str(count), str(totalSteps)))
-
-    ini_out_str, res = ja.initialize_model(sysParam)
-
-    count+=1
-    set_progress((str(count), str(totalSteps)))
-
-    add_out_str, res = ja.add_units_and_nodes(res, structure, timelines, timeline_map)
-
-    count+=1
-    set_progress((str(count), str(totalSteps)))
-
-    bui_out_str, res = ja.build_pyomo_model(res)
-
-    count+=1
-    set_progress((str(count), str(totalSteps)))
-
-    #ja.print_active_units(res)
-
-    sol_out_str, slack_out_str, res = ja.solve_pyomo_model(res)
-
-    count+=1
-    set_progress((str(count), str(totalSteps)))
-
-    resultsdict = ja.return_results_dict(res)
-    #print(resultsdict.keys())
-
-
-    count+=1
-    set_progress((str(count), str(totalSteps)))
-
-    outString = ini_out_str + "\n" + add_out_str + "\n" + bui_out_str + "\n" + sol_out_str + "\n\n" + slack_out_str
-
-    return json.dumps(resultsdict), period_list, outString
-
-@app.callback(
-    Output('FigCostUnit', 'figure'),
-    Output('FigCostEso', 'figure'),
-    Output('your-graph3', 'figure'),
-    Output('LinePlotConsumptionEl', 'figure'),
-    Output('LinePlotConsumptionFuel', 'figure'),
-    Output('LinePlotPower', 'figure'),
-    Output('LinePlotHeat', 'figure'),
-    Output('Bilanz-1', 'figure'),
-    Output('Bilanz-2', 'figure'),
-    Output('Bilanz-3', 'figure'),
-    Output('Bilanz-4', 'figure'),
-    Output('Bilanz-5', 'figure'),
-    Output('Bilanz-6', 'figure'),
-    Output('Bilanz-7', 'figure'),
-    Output('Bilanz-8', 'figure'),
-    Output('Bilanz-9', 'figure'),
-    Output('Bilanz-10', 'figure'),
-    Output('PurchaseConsumptionPlot', 'figure'),
-    Output('ColDataTable', 'children'),
-    Output('SunBurst1', 'figure'),
-    Output('SunBurst2', 'figure'),
-    Output('SunBurst3', 'figure'),
-    Output('CostTable', 'children'),
-    Output('SummaryTable', 'children'),
-    Output("resultCard","style"),
-    Output("htmlTest", "children"),
-    #Input('htmlTest', 'data'),
-    Input('simulationResultStorage', 'data'),
-    State('timelineListStorage', 'data'),
+    Input("solverProfile", "value"),
+    Input("solveStrategy", "value"),
+    Input("jobInterval", "n_intervals"),
+    Input("cancelButton", "n_clicks"),
+    Input("acceptButton", "n_clicks"),
+    State("simulationJobStorage", "data"),
+    State("userStorage", "data"),
+    State("simulationResultStorage", "data"),
+    State("profilingStorage", "data"),
     prevent_initial_call=True
-    )
-def update_figure(jsonStorage, period_list):
+)
+def simulationJob(data, profile, strategy, n_intervals, n_cancel, n_accept, job_id, user_id, shownKey, profiling):
+    '''
+    The simulation runs as a job in the worker pool (see simulation_jobs.py), new settings submit a job, the interval
+    polls its status until it is finished. Polling also tells the pool that the job is still wanted. During the solve
+    the incumbent and gap of HiGHS are shown, "Accept current solution" stops the solve with the incumbent. Another
+    solver profile or solve strategy runs the simulation again. While the MIP solves, the results of its LP relaxation are shown as a preview.
+    '''
+    visible = {"visibility": "visible", 'width': '99%', 'height': '25%'}
+    hidden = {"visibility": "hidden"}
+    trigger = dash.callback_context.triggered_id
+    if trigger in ["simulationSetupStorage", "solverProfile", "solveStrategy"]:
+        if data is None:
+            raise dash.exceptions.PreventUpdate
+        if job_id is not None:
+            sj.cancel(job_id)
+        job_id = sj.submit(data, user=user_id, profile=profile, strategy=strategy, profiling=bool(profiling))
+    elif job_id is None:
+        raise dash.exceptions.PreventUpdate
+    elif trigger == "cancelButton":
+        sj.cancel(job_id)
+    elif trigger == "acceptButton":
+        sj.accept(job_id)
+
+    job = sj.status(job_id, touch=True)
+    if job is None:
+        return None, True, "0", "1", hidden, "Simulation job was not found.", dash.no_update, dash.no_update, "", dash.no_update, ""
+    count, total = job['progress']
+    solver = ""
+    if job['solver'] is not None and job['status'] == 'running':
+        s = job['solver']
+        solver = "HiGHS after {:.0f} s: best solution {}, bound {}, gap {}, {} nodes.".format(
+            s['time'], "-" if s['objective'] is None else "{:,.0f} EUR".format(s['objective']),
+            "-" if s['bound'] is None else "{:,.0f} EUR".format(s['bound']),
+            "-" if s['gap'] is None else "{:.2%}".format(s['gap']), s['nodes'])
+    if job['status'] == 'queued':
+        message = "Simulation is queued (position {}).".format(job['position'])
+    else:
+        message = job['message']
+    if job['status'] in ['queued', 'running'] and job['preview_key'] is not None:
+        message = "Preview - LP relaxation (lower bound of the costs), the exact solution replaces it when it is finished:"
+        if shownKey != job['preview_key']:
+            return job_id, False, str(count), str(total), visible, message, job['preview_key'], job['period_list'], job['preview_info'], {"display":"block"}, solver
+    if job['status'] in ['queued', 'running']:
+        return job_id, False, str(count), str(total), visible, message, dash.no_update, dash.no_update, dash.no_update, dash.no_update, solver
+    if job['status'] == 'done':
+        return job_id, True, str(count), str(total), hidden, "Simulation Results (MIP solution):", job['result_key'], job['period_list'], job['info'], {"display":"block"}, ""
+    return job_id, True, str(count), str(total), hidden, message, dash.no_update, dash.no_update, "", dash.no_update, ""
 
-    jsonStorage = json.loads(jsonStorage)
+##########################################################################
+# Tabs
+##########################################################################
+# The figures of a tab are built when the tab is shown, and kept as json in the result cache under the key of the
+# results (see rc.get_figures). Showing a tab again or reloading the page does not build them again. The rendered-<tab> store
+# holds the key of the results the tab currently shows. Long time series are sent downsampled (see downsampling.py),
+# zooming into such a figure requests the zoomed range in more detail.
+def buildTab1(jsonStorage, period_list):
     figCostUnit, dfCostUnit, sunBurstDf, capDF, sunBurstDfPos, sumDF = drawCostPlotUnit(jsonStorage)
     figCostEso, dfCostEso = drawCostPlotEso(jsonStorage)
     fig3 = drawCostPlotEcuEsu(jsonStorage)
-    fig4 = drawLinePlotPower(jsonStorage, period_list)
-    figconsume = drawLinePlotConsumption(jsonStorage, period_list)
-    figconsumefuel = drawLinePlotConsumptionF(jsonStorage, period_list)
-    fig5 = drawLinePlotHeat(jsonStorage, period_list)
+    table = dbc.Table.from_dataframe(dfCostEso, striped=True, bordered=True, hover=True, index=True)
+    return figCostUnit, figCostEso, fig3, table
 
-    ar = drawBilanzPlots(jsonStorage, period_list)
+def buildTab2(jsonStorage, period_list):
+    return drawLinePlotConsumption(jsonStorage, period_list), drawLinePlotConsumptionF(jsonStorage, period_list)
 
-    # print(dfCostEso)
+def buildTab3(jsonStorage, period_list):
+    return drawLinePlotPower(jsonStorage, period_list), drawLinePlotHeat(jsonStorage, period_list)
 
+def buildTab4(jsonStorage, period_list):
+    return tuple(drawBilanzPlots(jsonStorage, period_list))
 
+def buildTab5(jsonStorage, period_list):
+    return drawPurchaseConsumptionPlot(jsonStorage, period_list),
+
+def buildTab6(jsonStorage, period_list):
+    figCostUnit, dfCostUnit, sunBurstDf, capDF, sunBurstDfPos, sumDF = drawCostPlotUnit(jsonStorage)
     figSunBurstType = px.sunburst(sunBurstDfPos, path=['Capex/Opex', 'Cost Type'], values='Costs', color='Capex/Opex', color_discrete_sequence=px.colors.qualitative.Dark2)
     figSunBurstUnit = px.sunburst(sunBurstDfPos, path=['Capex/Opex', 'Unit'], values='Costs', color='Capex/Opex', color_discrete_sequence=px.colors.qualitative.Set2)
     figSunBurstUnitCosts = px.sunburst(sunBurstDfPos, path=['Unit', 'Cost Type'], values='Costs',  color='Unit', color_discrete_sequence=np.concatenate((px.colors.qualitative.Set3, px.colors.qualitative.Pastel), axis=None))
-
-    #energy_overview = drawPurchaseConsumptionPlot(jsonStorage, period_list)
-
-    table = dbc.Table.from_dataframe(dfCostEso, striped=True, bordered=True, hover=True, index=True)
-
-
-
     dashTable = dash.dash_table.DataTable(sunBurstDf.to_dict('records'), [{"name": i, "id": i} for i in sunBurstDf.columns], export_format="xlsx")
-    dashTable2 = dash.dash_table.DataTable(capDF.to_dict('records'), [{"name": i, "id": i} for i in capDF.columns], export_format="xlsx")
-    dashTable3 = dash.dash_table.DataTable(sumDF.to_dict('records'), [{"name": i, "id": i} for i in sumDF.columns], export_format="xlsx")
-
-
+    return figSunBurstType, figSunBurstUnit, figSunBurstUnitCosts, dashTable
 
+def buildTab7(jsonStorage, period_list):
+    figCostUnit, dfCostUnit, sunBurstDf, capDF, sunBurstDfPos, sumDF = drawCostPlotUnit(jsonStorage)
+    dashTable3 = dash.dash_table.DataTable(sumDF.to_dict('records'), [{"name": i, "id": i} for i in sumDF.columns], export_format="xlsx")
+    return dashTable3,
+
+tabs = {
+    'tab-1': (buildTab1, [('FigCostUnit', 'figure'), ('FigCostEso', 'figure'), ('your-graph3', 'figure'), ('ColDataTable', 'children')]),
+    'tab-2': (buildTab2, [('LinePlotConsumptionEl', 'figure'), ('LinePlotConsumptionFuel', 'figure')]),
+    'tab-3': (buildTab3, [('LinePlotPower', 'figure'), ('LinePlotHeat', 'figure')]),
+    'tab-4': (buildTab4, [('Bilanz-{}'.format(i), 'figure') for i in range(1, 11)]),
+    'tab-5': (buildTab5, [('PurchaseConsumptionPlot', 'figure')]),
+    'tab-6': (buildTab6, [('SunBurst1', 'figure'), ('SunBurst2', 'figure'), ('SunBurst3', 'figure'), ('CostTable', 'children')]),
+    'tab-7': (buildTab7, [('SummaryTable', 'children')]),
+}
+
+def tabFigures(tab_id, resultKey, period_list):
+    # outputs of a tab from the figure cache, built from the results if they are not cached. None if the results are
+    # not in the result cache either.
+    figures = rc.get_figures(resultKey, tab_id)
+    if figures is None:
+        jsonStorage = rc.get_results(resultKey)
+        if jsonStorage is None:
+            return None
+        build, outputs = tabs[tab_id]
+        figures = pio.json.to_json_plotly(build(jsonStorage, period_list))
+        rc.put_figures(resultKey, tab_id, figures)
+    return json.loads(figures)
+
+def register_tab(tab_id, outputs):
+    graphs = [component for component, prop in outputs if prop == 'figure']
+    @app.callback(
+        [Output(component, prop) for component, prop in outputs] + [Output('rendered-' + tab_id, 'data')],
+        Input('card-tabs', 'active_tab'),
+        Input('simulationResultStorage', 'data'),
+        [Input(graph, 'relayoutData') for graph in graphs],
+        State('timelineListStorage', 'data'),
+        State('rendered-' + tab_id, 'data'),
+        prevent_initial_call=True
+        )
+    def update_tab(active_tab, resultKey, *args):
+        *relayouts, period_list, rendered = args
+        if active_tab != tab_id or resultKey is None:
+            raise dash.exceptions.PreventUpdate
+        # zoom into a long time series: the zoomed range again with up to ds.POINTS_PER_TRACE points
+        zoomed = dash.callback_context.triggered_id
+        if zoomed in graphs:
+            x_range = ds.zoom_range(relayouts[graphs.index(zoomed)])
+            if x_range is False or rendered != resultKey:
+                raise dash.exceptions.PreventUpdate
+        elif rendered == resultKey:
+            raise dash.exceptions.PreventUpdate
+
+        figures = tabFigures(tab_id, resultKey, period_list)
+        if figures is None:     # results evicted from the result cache
+            raise dash.exceptions.PreventUpdate
+
+        for n, (component, prop) in enumerate(outputs):
+            if prop != 'figure':
+                continue
+            if zoomed in graphs and (component != zoomed or not ds.is_long(figures[n])):
+                figures[n] = dash.no_update
+                continue
+            figures[n] = ds.reduce_figure(figures[n], x_range=x_range if zoomed in graphs else None)
+            figures[n]['layout']['uirevision'] = resultKey     # keeps the zoom when the figure is replaced
+        return figures + [resultKey]
+
+for tab_id, (build, outputs) in tabs.items():
+    register_tab(tab_id, outputs)
 
+@app.callback(
+    Output("paretoJobStorage", "data"),
+    Output("paretoInterval", "disabled"),
+    Output("paretoButton", "disabled"),
+    Output("paretoStatus", "children"),
+    Output("paretoStorage", "data"),
+    Input("paretoButton", "n_clicks"),
+    Input("paretoInterval", "n_intervals"),
+    State("simulationSetupStorage", "data"),
+    State("paretoPoints", "value"),
+    State("solverProfile", "value"),
+    State("paretoJobStorage", "data"),
+    State("userStorage", "data"),
+    prevent_initial_call=True
+)
+def paretoJob(n_clicks, n_intervals, data, n_points, profile, job_id, user_id):
+    # the front is computed as a job of the worker pool (see simulation_jobs.run_pareto), the interval polls its status
+    if dash.callback_context.triggered_id == "paretoButton":
+        if data is None:
+            raise dash.exceptions.PreventUpdate
+        job_id = sj.submit(data, user=user_id, profile=profile, pareto=n_points)
+    elif job_id is None:
+        raise dash.exceptions.PreventUpdate
+
+    job = sj.status(job_id, touch=True)
+    if job is None:
+        return None, True, False, "Pareto job was not found.", dash.no_update
+    if job['status'] == 'queued':
+        return job_id, False, True, "Pareto front is queued (position {}).".format(job['position']), dash.no_update
+    if job['status'] == 'running':
+        count, total = job['progress']
+        return job_id, False, True, "Pareto front is computed (step {} of {}).".format(count, total), dash.no_update
+    if job['status'] == 'done':
+        return job_id, True, False, "", job['result_key']
+    return job_id, True, False, job['message'], dash.no_update
 
-    return figCostUnit, figCostEso, fig3, figconsume, figconsumefuel, fig4, fig5, \
-           ar[0], ar[1], ar[2], ar[3], ar[4], ar[5], ar[6], ar[7], ar[8], ar[9],\
-           drawPurchaseConsumptionPlot(jsonStorage, period_list), table, figSunBurstType, figSunBurstUnit, figSunBurstUnitCosts, \
-           dashTable, dashTable3, {"display":"block"}, "Simulation Results:"
+@app.callback(
+    Output("ParetoPlot", "figure"),
+    Output("ParetoTable", "children"),
+    Output("paretoInformation", "children"),
+    Input("paretoStorage", "data"),
+    prevent_initial_call=True
+)
+def update_pareto(paretoKey):
+    front = rc.get(paretoKey)
+    if front is None:       # evicted from the result cache
+        raise dash.exceptions.PreventUpdate
+    front = json.loads(front)
+    points = [p for p in front['points'] if p['feasible']]
+    df = pd.DataFrame({
+        'Emission cap in t': [p['cap'] for p in points],
+        'Fossil emissions in t': [p['em_fos'] for p in points],
+        'Biogenic emissions in t': [p['em_bio'] for p in points],
+        'Total annual costs in EUR': [p['total_real'] for p in points],
+        'MIP gap': [p['mip_gap'] for p in points],
+    }).round(2)
+
+    fig = go.Figure(go.Scatter(x=df['Fossil emissions in t'], y=df['Total annual costs in EUR'], mode='lines+markers'))
+    fig.update_layout(title='Total annual costs vs. fossil CO2 emissions',
+                      xaxis_title='Fossil CO2 emissions in t', yaxis_title='Total annual costs in EUR')
+    table = dash.dash_table.DataTable(df.to_dict('records'), [{"name": i, "id": i} for i in df.columns], export_format="xlsx")
+    info = "{} of {} points solved in {:.1f} seconds.".format(len(points), len(front['points']), front['time'])
+    return fig, table, info
+
+def timestep_index(n, fmt):
+    # labels of the time steps, plain time step numbers for series long enough to be downsampled
+    if n > ds.POINTS_PER_TRACE:
+        return np.arange(n)
+    return [fmt.format(timestep) for timestep in range(n)]
+
+def period_values(jsondata, arr, per):
+    # one period of a result sequence (see ja.return_results), empty if the sequence is not exported
+    if arr is None:
+        return np.zeros(0)
+    return arr[jsondata['periods'].index(per)]
 
 ##########################################################################
 # Cost Plot Functions
@@ -549,12 +803,8 @@ def drawCostPlotUnit(jsondata):
                 if 's' in jsondata['units'][unit]['var']['seq'].keys():
                     name = 'Max. real consumption of ' + str(units[unit])
                     dictfordf_sum[idSize].append(name)
-                    cont = 0
-                    for i, j in jsondata['units'][unit]['var']['seq']['s'].items():
-                        for element in jsondata['units'][unit]['var']['seq']['s'][i]['values']:
-                            if element > cont:
-                                cont = element
-                    consume = round(cont, 1)
+                    cont = np.nanmax(jsondata['units'][unit]['var']['seq']['s'], initial=0)
+                    consume = round(float(cont), 1)
                     dictfordf_sum[idType].append('Result')
                     dictfordf_sum[idValue].append(consume)
                     dictfordf_sum[idEinheit].append(units_unit[unit])
@@ -778,16 +1028,17 @@ def drawLinePlotPower(jsondata, period_list):
             pd.concat([
                 pd.DataFrame(
                     dict(
-                        values=seq['p'][per]['values'],
+                        values=values,
                         Unit=unit_long, Timeline=per
                     ),
-                    index=[f'{timestep:02g}:00' for timestep in seq['p'][per]['timesteps']]
+                    index=timestep_index(len(values), '{:02g}:00')
                 )
                 for per              in period_list
                 for unit_short, unit_long in units.items()
                 if unit_short             in jsondata['units'] #1
-                for seq                   in [jsondata['units'][unit_short]['var']['seq']] 
+                for seq                   in [jsondata['units'][unit_short]['var']['seq']]
                 if 'p' in seq
+                for values                in [period_values(jsondata, seq['p'], per)]
                 #1 raus wenn alle units mit json übergeben werden aktuell nur 4 units
             ]),
             color='Unit', symbol='Unit', markers=True,  facet_col='Timeline', line_shape='hvh',
@@ -812,16 +1063,17 @@ def drawLinePlotConsumption(jsondata, period_list):
             pd.concat([
                 pd.DataFrame(
                     dict(
-                        values=seq['s'][per]['values'],
+                        values=values,
                         Unit=unit_long, Timeline=per
                     ),
-                    index=[f'{timestep:02g}:00' for timestep in seq['s'][per]['timesteps']]
+                    index=timestep_index(len(values), '{:02g}:00')
                 )
                 for per              in period_list
                 for unit_short, unit_long in elsources.items()
                 if unit_short             in jsondata['units'] #1
                 for seq                   in [jsondata['units'][unit_short]['var']['seq']]
                 if 's' in seq
+                for values                in [period_values(jsondata, seq['s'], per)]
                 #1 raus wenn alle units mit json übergeben werden aktuell nur 4 units
             ]),
             color='Unit', symbol='Unit', markers=True,  facet_col='Timeline', line_shape='hvh',
@@ -845,16 +1097,17 @@ def drawLinePlotConsumptionF(jsondata, period_list):
             pd.concat([
                 pd.DataFrame(
                     dict(
-                        values=seq['s'][per]['values'],
+                        values=values,
                         Unit=unit_long, Timeline=per
                     ),
-                    index=[f'{timestep:02g}:00' for timestep in seq['s'][per]['timesteps']]
+                    index=timestep_index(len(values), '{:02g}:00')
                 )
                 for per              in period_list
                 for unit_short, unit_long in fuelsources.items()
                 if unit_short             in jsondata['units'] #1
                 for seq                   in [jsondata['units'][unit_short]['var']['seq']]
                 if 's' in seq
+                for values                in [period_values(jsondata, seq['s'], per)]
                 #1 raus wenn alle units mit json übergeben werden aktuell nur 4 units
             ]),
             color='Unit', symbol='Unit', markers=True,  facet_col='Timeline', line_shape='hvh',
@@ -880,12 +1133,10 @@ def drawLinePlotHeat(jsondata, period_list):
             pd.concat([
                 pd.DataFrame(
                     dict(
-                        values= jsondata['units'][unit_short]['var']['seq'][heat_short][per]['values'],
+                        values=values,
                         Unit=unit_long, Steamlevel = heat_long, Timeline=per
                     ),
-                    index=[f'{timestep:02g}:00'
-                           for timestep in jsondata['units'][unit_short]['var']['seq']
-                           [heat_short][per]['timesteps']]
+                    index=timestep_index(len(values), '{:02g}:00')
                 )
                 for per               in period_list
                 for unit_short, unit_long  in units.items()
@@ -893,6 +1144,7 @@ def drawLinePlotHeat(jsondata, period_list):
                 for heat_short, heat_long  in heat_types.items()
                 for seq                    in [jsondata['units'][unit_short]['var']['seq']]
                 if heat_short              in seq
+                for values                 in [period_values(jsondata, seq[heat_short], per)]
                 #1 raus wenn alle units mit json übergeben werden aktuell nur 4 units
 
             ]),
@@ -924,13 +1176,14 @@ def make_fig_Bilanz(jsondata, period_list, steam: str, side: str, alt_colors=Fal
             pd.concat([
                 pd.DataFrame(
                     dict(
-                        values=jsondata['nodes'][steam][side][unit][per]['values'],
+                        values=values,
                         Unit=unit, Timeline=per
                     ),
-                    index=[f'{timestep}:00' for timestep in jsondata['nodes'][steam][side][unit][per]['timesteps']]
+                    index=timestep_index(len(values), '{}:00')
                 )
                 for per in period_list
                 for unit in jsondata['nodes'][steam][side]
+                for values in [period_values(jsondata, jsondata['nodes'][steam][side][unit], per)]
             ]),
             color='Unit', facet_col='Timeline', 
             facet_col_wrap=facet_col_wrap, markers=True, symbol_sequence=symbol_sequence,
@@ -1026,7 +1279,7 @@ def drawPurchaseConsumptionPlot(jsondata, period_list):
 
                 for i, per in enumerate(period_list):
                     #print(seq[sequence].keys())
-                    sum_values += sum(seq[sequence][per]['values']) * jsondata['general']['weight'][str(i)] * 8760 / 24 # todo - mit params aus res.param updaten
+                    sum_values += np.nansum(period_values(jsondata, seq[sequence], per)) * jsondata['general']['weight'][str(i)] * 8760 / 24 # todo - mit params aus res.param updaten
                 dict_data[sequence] = sum_values
                 #dict_data = {sequence : sum_values}
             #df_temp = pd.DataFrame(dict_data,index=[unit_long])
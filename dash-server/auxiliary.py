@@ -5,7 +5,10 @@ import os
 import cloudpickle
 from matplotlib import gridspec
 import pyomo.environ as pyo
+from pyomo.core.expr.numeric_expr import LinearExpression
 from pathlib import Path
+import highs_backend as hb
+import matrix_model as mm
 
 
 def init_uvwi_param(unit):
@@ -394,6 +397,66 @@ def add_flexbound_param(system, unit, param):
     system.model.add_component(namestr, pyo.Param(system.model.set_sc, system.model.set_t, initialize=param_flex_init, default=param_flex_init, mutable=True))
     unit.param['flexbound'] = system.model.component(namestr)
 
+# Unit objectives of pyomo assembled systems are sparse cost vectors (matrix_model.LinExpr) per unit and cost category
+# over the columns of system.cost_vars, the pyomo variables that carry a cost, like the unit objectives of the matrix
+# assembly. System.build_model adds the system objective once as a single linear expression, after the solve a cost is
+# a dot product with cost_values(system). Coefficients are taken at build time, also from mutable parameters.
+
+def cost_cols(system, var):
+    # columns of the entries of a pyomo Var in system.cost_vars, shape (n_sc, n_ts) for sequences over (set_sc, set_t)
+    index = system.cost_index
+    cols = []
+    for v in var.values():
+        if id(v) not in index:      # keyed by id, pyomo variables are not hashable, cost_vars keeps them alive
+            index[id(v)] = len(system.cost_vars)
+            system.cost_vars.append(v)
+        cols.append(index[id(v)])
+    cols = np.array(cols, dtype=np.int64)
+    shape = (len(system.model.set_sc), len(system.model.set_t))
+    if var.dim() == 2 and cols.size == shape[0] * shape[1]:
+        return cols.reshape(shape)
+    return cols
+
+
+def cost_expr(system, terms, const=0.0):
+    # terms [(coef, pyomo Var)], coef: scalar or array broadcast to cost_cols(system, var)
+    return mm.LinExpr.from_terms([(coef if isinstance(coef, np.ndarray) else pyo.value(coef), cost_cols(system, var))
+                                  for coef, var in terms], const)
+
+
+def seq_coefs(system, f):
+    # (n_sc, n_ts) array of f(s, t), e.g. prices of a sequence parameter
+    return np.array([[pyo.value(f(s, t)) for t in system.model.set_t] for s in system.model.set_sc], dtype=float)
+
+
+def annual_weight(system, weight_factor=1):
+    # weight of a single (s, t) entry in the annual objectives, shape (n_sc, 1)
+    weight = np.array([system.param['sc'][s][0] for s in system.model.set_sc], dtype=float)[:, None]
+    return weight * weight_factor / system.param['dur_sc'] * 8760
+
+
+def linear_expression(system, expr):
+    # pyomo expression of a LinExpr, coefficients of the same variable summed up
+    coefs = expr.to_dense(len(system.cost_vars))
+    cols = np.flatnonzero(coefs)
+    return LinearExpression(constant=expr.const, linear_coefs=coefs[cols].tolist(),
+                            linear_vars=[system.cost_vars[k] for k in cols])
+
+
+def cost_values(system):
+    # solution values of system.cost_vars, unset variables (not in any constraint) are 0
+    return np.array([v.value if v.value is not None else 0.0 for v in system.cost_vars])
+
+
+def obj_value(system, expr):
+    # value of a unit objective in the current solution
+    if getattr(system, 'assembly', 'pyomo') == 'matrix':
+        return hb.value(system, expr)
+    if isinstance(expr, mm.LinExpr):
+        return expr.value(cost_values(system))
+    return pyo.value(expr)
+
+
 def add_obj_inv(system, unit):
     i = unit.param['interest_rate']
     n = unit.param['depreciation_period']
@@ -402,72 +465,132 @@ def add_obj_inv(system, unit):
     else:
         annuity_factor = 1/n
     # investment costs
+    terms = [(pyo.value(unit.param['inv_var']) * annuity_factor, unit.var['scalar']['cap'])]
     if unit.param['i_active']:
-        obj = (unit.param['inv_var'] * unit.var['scalar']['cap'] + unit.param['inv_fix'] * unit.var['scalar'][
-            'i']) * annuity_factor
-    else:
-        obj = unit.param['inv_var'] * unit.var['scalar']['cap'] * annuity_factor
-    
-    if 'exists' in unit.param.keys():
-        if unit.param['exists'] == 'True':
-            obj=0
-            
-
-    namestr = 'obj_' + unit.name + '_inv'
-    system.model.add_component(namestr, pyo.Objective(expr=obj))
-    system.model.component(namestr).deactivate()
-    unit.obj['inv'] = system.model.component(namestr)
+        terms.append((pyo.value(unit.param['inv_fix']) * annuity_factor, unit.var['scalar']['i']))
+    obj = cost_expr(system, terms)
+    if unit.param.get('exists') == 'True':
+        obj = mm.LinExpr()
+    unit.obj['inv'] = obj
 
 
 def add_obj_u_v_w(system, unit):
     # Fix OPEX
     if 'opex_fix' in unit.param and unit.param.get('opex_fix') > 0:
-        objective = sum(
-            unit.param['opex_fix'] * unit.var['seq']['u'][s, t] * system.param['sc'][s][0] for s in system.model.set_sc
-            for t in system.model.set_t) * system.param['tss'] / system.param['dur_sc'] * 8760
+        unit.obj['opex_fix'] = cost_expr(system, [(unit.param['opex_fix'] * annual_weight(system, system.param['tss']),
+                                                   unit.var['seq']['u'])])
     else:
-        objective = 0
-    namestr = 'obj_' + unit.name + '_opex_fix'
-    system.model.add_component(namestr, pyo.Objective(expr=objective))
-    system.model.component(namestr).deactivate()
-    unit.obj['opex_fix'] = system.model.component(namestr)
+        unit.obj['opex_fix'] = mm.LinExpr()
 
-    # Startup costs
-    if 'cost_susd' in unit.param:
-        if unit.param['cost_susd'][0] > 0:
-            objective = sum(unit.param['cost_susd'][0] * unit.var['seq']['v'][s, t] * system.param['sc'][s][0] for s in
-                            system.model.set_sc for t in system.model.set_t) / system.param['dur_sc'] * 8760
-        else:
-            objective = 0
-    else:
-        objective = 0
-    namestr = 'obj_' + unit.name + '_cost_SU'
-    system.model.add_component(namestr, pyo.Objective(expr=objective))
-    system.model.component(namestr).deactivate()
-    unit.obj['cost_SU'] = system.model.component(namestr)
-
-    # Shutdown costs
-    if 'cost_susd' in unit.param:
-        if unit.param['cost_susd'][1] > 0:
-            objective = sum(unit.param['cost_susd'][1] * unit.var['seq']['w'][s, t] * system.param['sc'][s][0] for s in
-                            system.model.set_sc for t in system.model.set_t) / system.param['dur_sc'] * 8760
+    # Startup and shutdown costs
+    for k, (key, var) in enumerate([('cost_SU', 'v'), ('cost_SD', 'w')]):
+        if 'cost_susd' in unit.param and unit.param['cost_susd'][k] > 0:
+            unit.obj[key] = cost_expr(system, [(unit.param['cost_susd'][k] * annual_weight(system),
+                                                unit.var['seq'][var])])
         else:
-            objective = 0
-    else:
-        objective = 0
-    namestr = 'obj_' + unit.name + '_cost_SD'
-    system.model.add_component(namestr, pyo.Objective(expr=objective))
-    system.model.component(namestr).deactivate()
-    unit.obj['cost_SD'] = system.model.component(namestr)
-
-
-def solve_model(system, solver='cplex', threads=1, mipgap=0):
+            unit.obj[key] = mm.LinExpr()
+
+
+def add_obj_total(unit, keys):
+    # total costs of a unit, the sum of its cost categories
+    obj = mm.LinExpr()
+    for k in keys:
+        if k in unit.obj:
+            obj = obj + unit.obj[k]
+    unit.obj['total'] = obj
+
+
+# Solver profiles, selected per simulation with sysParam['opt']['profile']. A profile is given solver independent and
+# translated to the options of each solver by solver_options:
+#   mipgap:     relative MIP gap at which the solve stops
+#   threads:    0: chosen by the solver
+#   presolve:   True / False
+#   heuristics: share of the branch and bound effort spent in primal heuristics (mip_heuristic_effort of HiGHS)
+#   parallel:   'on', 'choose' or 'off' (one thread, deterministic run)
+# 'balanced' keeps the defaults of HiGHS, which every simulation used before the profiles.
+SOLVER_PROFILES = {
+    'fast-preview': {'mipgap': 0.01, 'threads': 0, 'presolve': True, 'heuristics': 0.3, 'parallel': 'on'},
+    'balanced':     {'mipgap': 1e-4, 'threads': 0, 'presolve': True, 'heuristics': 0.05, 'parallel': 'choose'},
+    'exact':        {'mipgap': 0.0, 'threads': 1, 'presolve': True, 'heuristics': 0.05, 'parallel': 'off'},
+}
+DEFAULT_PROFILE = 'balanced'
+
+# Solve strategies, selected with sysParam['opt']['strategy']:
+#   mip:            the whole MIP with HiGHS
+#   relax-and-fix:  investment decisions from a relaxation, operation per period, then fix-and-optimize (see
+#                   highs_backend.relax_and_fix), only for matrix assembly
+SOLVE_STRATEGIES = ['mip', 'relax-and-fix']
+DEFAULT_STRATEGY = 'mip'
+
+
+def solver_profile(profile=None, threads=None, mipgap=None):
+    if profile is None:
+        profile = DEFAULT_PROFILE
+    if profile not in SOLVER_PROFILES:
+        raise ValueError('Unknown solver profile {}, use one of {}.'.format(profile, list(SOLVER_PROFILES)))
+    settings = dict(SOLVER_PROFILES[profile])
+    if threads is not None:
+        settings['threads'] = threads
+    if mipgap is not None:
+        settings['mipgap'] = mipgap
+    return settings
+
+
+def solver_options(solver, settings):
+    if solver == 'highs':
+        return {'mip_rel_gap': settings['mipgap'],
+                'threads': 1 if settings['parallel'] == 'off' else settings['threads'],
+                'presolve': 'on' if settings['presolve'] else 'off',
+                'mip_heuristic_effort': settings['heuristics'],
+                'parallel': settings['parallel']}
+    if solver == 'cplex':
+        # keys are cplex parameter paths with _ instead of spaces, e.g. set mip strategy heuristicfreq 5
+        return {'mipgap': settings['mipgap'],
+                'threads': 1 if settings['parallel'] == 'off' else settings['threads'],
+                'preprocessing_presolve': 'y' if settings['presolve'] else 'n',
+                'mip_strategy_heuristicfreq': 5 if settings['heuristics'] > 0.1 else 0,
+                'parallel': {'on': -1, 'choose': 0, 'off': 1}[settings['parallel']]}
+    if solver == 'cbc':
+        return {'ratio': settings['mipgap'],
+                'threads': 1 if settings['parallel'] == 'off' else settings['threads'],
+                'preprocess': 'sos' if settings['presolve'] else 'off',
+                'heuristicsOnOff': 'on' if settings['heuristics'] > 0 else 'off'}
+    if solver == 'glpk':
+        # glpsol has no threads, options without value are passed as flags (--nopresol)
+        options = {'mipgap': settings['mipgap'], 'presol' if settings['presolve'] else 'nopresol': ''}
+        if settings['heuristics'] > 0.1:
+            options.update(fpump='', proxy='')
+        return options
+    return {}
+
+
+def solve_model(system, solver='cplex', threads=None, mipgap=None, persistent=False, progress=None):
+    # threads and mipgap overwrite the values of the solver profile in system.param['opt']
+    profile = system.param['opt'].get('profile', DEFAULT_PROFILE)
+    strategy = system.param['opt'].get('strategy', DEFAULT_STRATEGY)
+    options = solver_options(solver, solver_profile(profile, threads, mipgap))
+    system.solver_settings = {'solver': solver, 'profile': profile, 'strategy': strategy, 'options': options,
+                              'relaxed': False}
+    if strategy not in SOLVE_STRATEGIES:
+        raise ValueError('Unknown solve strategy {}, use one of {}.'.format(strategy, SOLVE_STRATEGIES))
+    if strategy == 'relax-and-fix' and (getattr(system, 'assembly', 'pyomo') != 'matrix' or solver != 'highs'):
+        raise ValueError('Relax-and-fix is only available for systems with matrix assembly and highs.')
+    if getattr(system, 'assembly', 'pyomo') == 'matrix':
+        # array assembled systems have no pyomo model and are passed to highspy directly
+        if solver != 'highs':
+            raise ValueError('Systems with matrix assembly can only be solved with highs, not {}.'.format(solver))
+        if strategy == 'relax-and-fix':
+            return hb.relax_and_fix(system, options=options, progress=progress)
+        # progress: live MIP progress and early stop, see highs_backend.set_progress_callback
+        return hb.solve_model(system, options=options, persistent=persistent, progress=progress)
     if solver == 'highs':
         from pyomo.contrib import appsi
         opt = appsi.solvers.Highs()
         opt.highs_options = dict(time_limit=system.param['opt']['timelimit'],
                                  log_to_console='true',
+                                 **options
                                  )
+        hb.reset_scheduler(options['threads'])
         # opt.config(timelimit=600)
         system.model.results = opt.solve(system.model)
     else:
@@ -478,20 +601,16 @@ def solve_model(system, solver='cplex', threads=1, mipgap=0):
                                             warmstart=False,
                                             tee=True,
                                             timelimit=system.param['opt']['timelimit'],
-                                            options_string="mipgap={}".format(mipgap)
+                                            options=options
                                             )
         elif solver == 'glpk':
             system.model.result = opt.solve(system.model,
                                             # warmstart=False,
                                             tee=True,
                                             timelimit=system.param['opt']['timelimit'],
-                                            options_string="mipgap={}".format(mipgap)
+                                            options=options
                                             )
         elif solver == 'cbc':
-            options = {
-                'ratio': system.param['opt']['optimality_gap'],
-                'threads': threads
-            }
             system.model.result = opt.solve(system.model,
                                             warmstart=False,
                                             tee=True,
@@ -504,6 +623,17 @@ def solve_model(system, solver='cplex', threads=1, mipgap=0):
     return system
 
 
+def solve_relaxation(system, solver='highs'):
+    # LP relaxation (binaries continuous) as fast preview and lower bound of solve_model, only for matrix assembly
+    if getattr(system, 'assembly', 'pyomo') != 'matrix' or solver != 'highs':
+        raise ValueError('LP relaxations are only solved for systems with matrix assembly and highs.')
+    profile = system.param['opt'].get('profile', DEFAULT_PROFILE)
+    options = solver_options(solver, solver_profile(profile))
+    system.solver_settings = {'solver': solver, 'profile': profile, 'strategy': 'lp-relaxation', 'options': options,
+                              'relaxed': True}
+    return hb.solve_relaxation(system, options=options)
+
+
 def save_object(doom_object, name):
     namestr = './' + name + '.pkl'
     with open(os.path.abspath(namestr), mode='wb') as file:
@@ -569,6 +699,12 @@ def plot_unit_port_from_list(system, unit):
     plt.savefig(namestr, bbox_inches='tight', pad_inches=0)
 
 def plot_node_slack(system):
+    if getattr(system, 'assembly', 'pyomo') == 'matrix':
+        sum_slack = sum(hb.value(system, system.node[nodename].var['seq'][n]).sum() for nodename in system.node.keys()
+                        for n in ['slack_lhs', 'slack_rhs'])
+        print('sum of slack is:  %20.2f' % sum_slack)
+        return sum_slack if sum_slack > 1e-10 else 0
+
     max_slack = max([pyo.value(system.node[nodename].var['seq'][n][s, t]) for nodename in system.node.keys() for n in
                      ['slack_lhs', 'slack_rhs'] for s in system.model.set_sc for t in system.model.set_t])
     sum_slack = sum([pyo.value(system.node[nodename].var['seq'][n][s, t]) for nodename in system.node.keys() for n in
@@ -746,14 +882,14 @@ def plot_unit_inv_cost(system, unit):
     for n in unit:
         barnames.append(n)
         try:
-            y_plot.append(pyo.value(system.unit[n].obj['inv']))
+            y_plot.append(obj_value(system, system.unit[n].obj['inv']))
         except:
             print('')
 
     ax = plt.subplot()
     ax.bar(barnames, y_plot)
     ax.tick_params(labelrotation=30)
-    ax.set_title('Units; annual inv costs: ' + str(sum(pyo.value(system.unit[n].obj['inv']) for n in unit)))
+    ax.set_title('Units; annual inv costs: ' + str(sum(obj_value(system, system.unit[n].obj['inv']) for n in unit)))
     ax.set_ylabel('EUR')
     # plt.savefig('./plots/unit_sizes', bbox_inches='tight', pad_inches=0)
 
@@ -1055,7 +1191,7 @@ def write_results_summary(system, folder):      ## Author: Simon Dreymann
             f.write("\nCapacity: {:.3f} MW".format(sup.var['scalar']['cap'].value))
             f.write("\nCosts: ")
             for o in sup.obj.keys():
-                f.write("\n    {}: {:.3f} MEUR".format(o, pyo.value(sup.obj[o])/1e6))
+                f.write("\n    {}: {:.3f} MEUR".format(o, obj_value(system, sup.obj[o])/1e6))
 
         f.write("\n\n\nUnits:")
         for name, unit in other_units.items():
@@ -1087,7 +1223,7 @@ def write_results_summary(system, folder):      ## Author: Simon Dreymann
 
             f.write("\nCosts: ")
             for o in unit.obj.keys():
-                f.write("\n    {}: {:.3f} MEUR".format(o, pyo.value(unit.obj[o])/1e6))
+                f.write("\n    {}: {:.3f} MEUR".format(o, obj_value(system, unit.obj[o])/1e6))
 
         f.write("\n")
         f.close()
@@ -1114,7 +1250,7 @@ def write_full_results(system, folder):     ## Author: Simon Dreymann
             try:
                 s = '\nObjectives:'
                 for o in unit.obj.keys():
-                    s += '\n' + str(unit.obj[o]) + ': {} EUR'.format(pyo.value(unit.obj[o]))
+                    s += '\n' + o + ': {} EUR'.format(obj_value(system, unit.obj[o]))
                 f.write(s)
             except:
                 print('Objectives of Unit ' + name + ' could not be read/printed properly.')
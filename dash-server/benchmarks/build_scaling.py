@@ -0,0 +1,86 @@
+import os
+import sys
+import time
+import argparse
+import numpy as np
+
+SCRIPT_DIR = os.path.dirname(os.path.realpath(__file__))
+sys.path.append(os.path.normpath(os.path.join(SCRIPT_DIR, '..')))
+import classes as dc
+
+# Model build time of the pyomo rule assembly and the array assembly (matrix_model.py) for a growing number of time
+# steps per period. The system is a small steam network with the unit types used by the dash server:
+#   gas supply -> gas boiler -> steam node <- storage, steam node -> demand, electricity supply -> heat pump -> steam
+#
+# python benchmarks/build_scaling.py --n_ts 24 96 672 2190 --periods 3
+
+
+def make_param(n_ts, n_periods, assembly):
+    return {
+        'sc': {str(k): [1 / n_periods, 1] for k in range(n_periods)},
+        'tss': 24 / n_ts,
+        'n_ts_sc': n_ts,
+        'interest_rate': 0.05,
+        'depreciation_period': 20,
+        'cost_co2_fossil': 80,
+        'cost_co2_biogen': 0,
+        'free_certificate_fossil': 0,
+        'free_certificate_bio': 0,
+        'opt': {'timelimit': 600, 'optimality_gap': 0.00},
+        'assembly': assembly,
+    }
+
+
+def build_system(n_ts, n_periods, assembly):
+    rng = np.random.default_rng(0)
+    t = np.arange(n_ts) / n_ts
+    sc = [str(k) for k in range(n_periods)]
+
+    system = dc.System(make_param(n_ts, n_periods, assembly))
+    system.add_unit({'classname': 'Supply', 'name': 'gas', 'seq': {s: 30 + 5 * rng.random(n_ts) for s in sc},
+                     'cap_s': (0, 100), 'co2_fossil': 0.2})
+    system.add_unit({'classname': 'Supply', 'name': 'power', 'seq': {s: 60 + 40 * np.sin(2 * np.pi * t) for s in sc},
+                     'cap_s': (0, 100), 'cost_max_load': 1e4})
+    system.add_unit({'classname': 'GasBoiler', 'name': 'boiler', 'cap_q': (1, 30), 'lim_q': (0.3, 1),
+                     'lim_f': (0.35, 1.1), 'ramp_q': (0.5, 0.5), 'cost_susd': (100, 0), 'min_utdt_ts': (3, 2),
+                     'inv_fix': 1e5, 'inv_var': 5e4, 'T_in': 60, 'T_out': 180, 'pressure': 10e5, 'medium': 'Water'})
+    system.add_unit({'classname': 'HeatPump', 'name': 'heat_pump', 'cap_q_sink': (0, 10), 'lim_q_sink': (0.2, 1),
+                     'eta_comp': (0.5, 0.5), 'delta_T_sink': (5, 5), 'delta_T_source': (5, 5), 'max_susd': (1, 1),
+                     'T_sink_in': [60], 'T_sink_out': 120, 'pressure_sink': 5e5, 'medium_sink': 'Water',
+                     'T_source_in': [40], 'T_source_out': 25, 'pressure_source': 2e5, 'medium_source': 'Water',
+                     'inv_fix': 2e5, 'inv_var': 4e5})
+    system.add_unit({'classname': 'Storage', 'name': 'storage', 'cap_soc': (0, 50), 'lim_c/d': (10, 10),
+                     'eta_c/d': (0.95, 0.95), 'loss_soc': 0.001, 'inv_fix': 0, 'inv_var': 2e4})
+    system.add_unit({'classname': 'Demand', 'name': 'steam',
+                     'seq': {s: 10 + 5 * np.sin(2 * np.pi * (t + k / n_periods)) for k, s in enumerate(sc)}})
+    system.add_unit({'classname': 'Demand', 'name': 'waste_heat', 'seq': {s: 4 * np.ones(n_ts) for s in sc}})
+
+    system.add_node({'name': 'gas_node', 'type': '==', 'lhs': [['gas', 's']], 'rhs': [['boiler', 'f']]})
+    system.add_node({'name': 'power_node', 'type': '==', 'lhs': [['power', 's']], 'rhs': [['heat_pump', 'p']]})
+    system.add_node({'name': 'source_node', 'type': '<=', 'lhs': [['heat_pump', 'q_source']],
+                     'rhs': [['waste_heat', 'd']]})
+    system.add_node({'name': 'steam_node', 'type': '==',
+                     'lhs': [['boiler', 'q'], ['heat_pump', 'q_sink'], ['storage', 'd']],
+                     'rhs': [['steam', 'd'], ['storage', 'c']]})
+    system.build_model()
+    return system
+
+
+def run(n_ts_list, n_periods, assemblies):
+    print('{:>8} {:>8} {:>12} {:>12}'.format('n_ts_sc', 'periods', *assemblies))
+    for n_ts in n_ts_list:
+        times = []
+        for assembly in assemblies:
+            t = time.time()
+            build_system(n_ts, n_periods, assembly)
+            times.append(time.time() - t)
+        print('{:>8} {:>8} '.format(n_ts, n_periods) + ' '.join('{:>10.3f} s'.format(k) for k in times))
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Model build time of pyomo and array assembly.')
+    parser.add_argument('--n_ts', type=int, nargs='+', default=[24, 96, 672, 2190])
+    parser.add_argument('--periods', type=int, default=3)
+    parser.add_argument('--assembly', nargs='+', default=['pyomo', 'matrix'])
+    args = parser.parse_args()
+    run(args.n_ts, args.periods, args.assembly)
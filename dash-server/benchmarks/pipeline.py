@@ -0,0 +1,327 @@
+import io
+import os
+import sys
+import json
+import time
+import platform
+import argparse
+import datetime
+import resource
+import contextlib
+import multiprocessing
+import numpy as np
+
+SCRIPT_DIR = os.path.dirname(os.path.realpath(__file__))
+SERVER_DIR = os.path.normpath(os.path.join(SCRIPT_DIR, '..'))
+sys.path.append(SERVER_DIR)
+
+# End-to-end benchmark of the read -> build -> solve -> extract pipeline. Every case is one system with a timeline length
+# and a number of periods and runs in its own (spawned) process, so that the peak RSS belongs to the case. Reported are
+# the wall time and the peak RSS after every phase, the model size and the objective.
+#
+# Systems:
+#   tool            tool_dekarpio_structure.json with the pipeline of the dash server (json_auxiliary)
+#   delfort_simple  delfort_system_simple (scenario 0) built and solved with DOOM
+#   delfort         delfort_system built and solved with DOOM
+#   synthetic       systems of synthetic.py with `units` units (10 to 1000), day periods
+#
+# The profiles of the systems are resampled to n_ts timesteps per period: periods of up to 96 timesteps are one day
+# (24 h / n_ts resolution), longer periods have hourly timesteps (n_ts = 8760: one period is a year). Periods start at
+# equally spaced days of the source profiles (the typical days of tool_dekarpio_timelines.json in the order of the
+# year, the timeseries of the Delfort systems) and together represent 365 days.
+#
+# The results are written as json. With a baseline (an earlier results file) every phase time and peak RSS more than
+# threshold above the baseline, every changed objective and every case failing now is a regression and the run exits
+# with status 1. Phase times below min_time seconds are not compared (noise).
+#
+#   python benchmarks/pipeline.py --n_ts 24 96 --periods 1 3 --output baseline.json
+#   python benchmarks/pipeline.py --n_ts 24 96 --periods 1 3 --baseline baseline.json --threshold 0.25
+
+SYSTEMS = ['tool', 'delfort_simple', 'delfort', 'synthetic']
+N_TS = [24, 96, 8760]
+PERIODS = [1, 3]
+UNITS = [10, 30, 100, 300, 1000]     # of synthetic systems
+DENSITY = 0.1                       # of the connectors of synthetic systems
+THRESHOLD = 0.25        # relative increase of time and peak RSS
+MIN_TIME = 0.5          # seconds
+OBJECTIVE_TOL = 1e-4    # relative change of the objective
+STRUCTURE = os.path.join(SERVER_DIR, 'tool_dekarpio_structure.json')
+# economic settings of the frontend missing in older structure files: no decarbonization limit, no free certificates
+ECO_DEFAULTS = {'decarbonization_fossil': 'option1', 'decarbonization_bio': 'option1', 'free_certificate_fossil': 0,
+                'free_certificate_bio': 0}
+
+
+def peak_rss():
+    # peak resident set size of this process in MB (ru_maxrss is in kB on Linux)
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+class Phases:
+    def __init__(self):
+        self.phases = {}
+        self.tic = time.perf_counter()
+
+    @contextlib.contextmanager
+    def __call__(self, name):
+        tic = time.perf_counter()
+        yield
+        self.phases[name] = {'time': time.perf_counter() - tic, 'peak_rss_mb': peak_rss()}
+
+    def total(self):
+        return time.perf_counter() - self.tic
+
+
+def resample(values, step_hours, start, n_ts, hours):
+    # n_ts values from `start` hours on with a timestep of hours / n_ts, linear interpolation of the cyclic profile
+    # `values` with a timestep of step_hours
+    values = np.asarray(values, dtype=float)
+    return np.interp(start + np.arange(n_ts) * hours / n_ts, np.arange(len(values)) * step_hours, values,
+                     period=len(values) * step_hours)
+
+
+def period_hours(n_ts):
+    return 24 if n_ts <= 96 else n_ts
+
+
+def period_starts(n_hours, n_periods):
+    # start hour of every period, at full days
+    return [k * (n_hours // 24 // n_periods) * 24 for k in range(n_periods)]
+
+
+def model_size(system):
+    if getattr(system, 'assembly', 'pyomo') == 'matrix':
+        return system.matrix.size()
+    import pyomo.environ as pyo
+    variables = list(system.model.component_data_objects(pyo.Var, active=True))
+    return {'n_col': len(variables), 'n_row': system.model.nconstraints(),
+            'n_int': sum(1 for v in variables if v.is_integer() or v.is_binary()), 'nnz': None}
+
+
+def pyomo_status(results):
+    if hasattr(results, 'termination_condition'):
+        return str(results.termination_condition)      # appsi results
+    return str(results.solver.termination_condition)
+
+
+def run_structure(case, phases, structure, timelines, timeline_map, tss):
+    # phases of the dash server pipeline (see simulation_jobs.run_simulation) after reading the inputs
+    import json_auxiliary as ja
+    n_ts, n_periods = case['n_ts'], case['periods']
+    with phases('read_parameters'):
+        for key, value in ECO_DEFAULTS.items():
+            structure['eco']['eco1']['param'][0].setdefault(key, value)
+        period_list = [str(k) for k in range(n_periods)]
+        sysParam = ja.read_parameters(structure['par'], structure['eco'], period_list, period_list, n_ts,
+                                      {period: 365 / n_periods for period in period_list}, case['profile'])
+        sysParam['tss'] = tss
+        if case['assembly']:
+            sysParam['assembly'] = case['assembly']
+        if case['timelimit']:
+            sysParam['opt']['timelimit'] = case['timelimit']
+    with phases('initialize'):
+        _, res = ja.initialize_model(sysParam)
+    with phases('prune'):
+        _, pruned_structure = ja.prune_structure(res, structure, timelines, timeline_map)
+    with phases('add'):
+        _, res = ja.add_units_and_nodes(res, pruned_structure, timelines, timeline_map)
+    with phases('build'):
+        _, res = ja.build_pyomo_model(res)
+    with phases('solve'):
+        _, _, res = ja.solve_pyomo_model(res)
+    with phases('extract'):
+        ja.return_results(res)
+
+    if getattr(res, 'assembly', 'pyomo') == 'matrix':
+        status = res.matrix.status
+    else:
+        status = pyomo_status(res.model.results)
+    return {'assembly': getattr(res, 'assembly', 'pyomo'), 'size': model_size(res), 'units': len(res.unit),
+            'nodes': len(res.node), 'objective': float(ja.value_function(res)(res.obj['total'])), 'status': status}
+
+
+def run_tool(case, phases):
+    with phases('import'):
+        import json_auxiliary as ja
+        from dispatch import TIMELINES, year_profiles
+    n_ts, n_periods = case['n_ts'], case['periods']
+    hours = period_hours(n_ts)
+
+    with phases('read_timelines'):
+        medoids, _, _, _, timeline_map, _ = ja.read_timelines(TIMELINES)
+        structure = ja.read_structure(case['structure'])
+        year = year_profiles(TIMELINES)
+        n_hours = len(next(iter(year.values())))
+        timelines = [{column: resample(values, 1, start, n_ts, hours).tolist() for column, values in year.items()}
+                     for start in period_starts(n_hours, n_periods)]
+    return run_structure(case, phases, structure, timelines, timeline_map, hours / n_ts)
+
+
+def run_synthetic(case, phases):
+    # system of synthetic.py with day periods
+    with phases('import'):
+        import json_auxiliary
+        import synthetic
+    with phases('generate'):
+        structure, timelines, timeline_map = synthetic.make_system(
+            *synthetic.unit_counts(case['units']), density=case['density'], n_periods=case['periods'],
+            n_ts=case['n_ts'], seed=case['seed'])
+    result = run_structure(case, phases, structure, timelines['Medoid-Zeitreihen'], timeline_map, 24 / case['n_ts'])
+    return dict(result, connectors=len(structure['con']))
+
+
+def run_delfort(case, phases):
+    with phases('import'):
+        import pyomo.environ as pyo
+        import delfort_main
+        import delfort_sweep
+        import delfort_system
+        import delfort_system_simple
+    module = delfort_system_simple if case['system'] == 'delfort_simple' else delfort_system
+    n_ts, n_periods = case['n_ts'], case['periods']
+    hours = period_hours(n_ts)
+    settings = dict(delfort_sweep.settings, **{'time limit': case['timelimit'] or delfort_sweep.settings['time limit']})
+
+    with phases('read'):
+        if module is delfort_system_simple:
+            timeseries, step_hours = module.make_simple_timeseries(0), 1       # one day, hourly
+        else:
+            timeseries, step_hours = module.make_simple_timeseries(), 24      # one year, daily
+        sysParam = delfort_main.make_sys_param(timeseries, 0, settings)
+        starts = period_starts(len(timeseries) * step_hours, n_periods)
+        sysParam.update(
+            seq={column: {k + 1: resample(timeseries[column].values, step_hours, start, n_ts, hours)
+                          for k, start in enumerate(starts)} for column in sysParam['seq']},
+            sc={k + 1: [1 / n_periods, 1] for k in range(n_periods)},
+            tss=hours / n_ts,
+            n_ts_sc=n_ts)
+    with phases('build'):
+        res = module.build_system(sysParam)[0]
+    with phases('solve'):
+        res = delfort_main.da.solve_model(res, solver='highs', tee=False)
+    with phases('extract'):
+        delfort_sweep.variable_columns(res)
+        delfort_sweep.kpis(res)
+    return {'assembly': 'pyomo', 'size': model_size(res), 'objective': float(pyo.value(res.obj['total'])),
+            'status': pyomo_status(res.model.result)}
+
+
+def run_case(case):
+    # one case in a fresh process, output of the pipeline (prints of the model building) is dropped
+    os.chdir(SERVER_DIR)
+    phases = Phases()
+    result = dict(case, phases=phases.phases, error=None)
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            run_system = {'tool': run_tool, 'synthetic': run_synthetic}.get(case['system'], run_delfort)
+            result.update(run_system(case, phases))
+    except Exception as e:
+        result['error'] = '{}: {}'.format(type(e).__name__, e)
+    result.update(time=phases.total(), peak_rss_mb=peak_rss())
+    return result
+
+
+def case_name(case):
+    if case['system'] == 'synthetic':
+        return 'synthetic{}-{}x{}'.format(case['units'], case['n_ts'], case['periods'])
+    return '{}-{}x{}'.format(case['system'], case['n_ts'], case['periods'])
+
+
+def make_cases(systems, n_ts_list, periods_list, assembly=None, profile=None, timelimit=None, structure=STRUCTURE,
+               units_list=UNITS, density=DENSITY, seed=0):
+    # synthetic systems for every number of units in units_list
+    cases = []
+    for system in systems:
+        for units in units_list if system == 'synthetic' else [None]:
+            cases += [{'system': system, 'n_ts': n_ts, 'periods': periods, 'assembly': assembly, 'profile': profile,
+                       'timelimit': timelimit, 'structure': structure, 'units': units, 'density': density,
+                       'seed': seed}
+                      for n_ts in n_ts_list for periods in periods_list]
+    return cases
+
+
+def run(cases):
+    # every case in its own process, one after another
+    import highspy
+    import pyomo
+    results = {'created': datetime.datetime.now().isoformat(timespec='seconds'), 'host': platform.node(),
+               'python': platform.python_version(), 'pyomo': pyomo.__version__,
+               'highspy': getattr(highspy, '__version__', None), 'cases': {}}
+    ctx = multiprocessing.get_context('spawn')
+    with ctx.Pool(1, maxtasksperchild=1) as pool:
+        for case, result in zip(cases, pool.imap(run_case, cases)):
+            results['cases'][case_name(case)] = result
+            print_case(case_name(case), result)
+    return results
+
+
+def print_case(name, result):
+    if result['error']:
+        print('{:<24} failed: {}'.format(name, result['error']))
+        return
+    phases = ' '.join('{} {:.2f}'.format(phase, v['time']) for phase, v in result['phases'].items())
+    print('{:<24} {:8.2f} s {:8.0f} MB  {:>8} cols {:>8} rows  objective {:,.0f} ({})\n{:<24} {}'.format(
+        name, result['time'], result['peak_rss_mb'], result['size']['n_col'], result['size']['n_row'],
+        result['objective'], result['status'], '', phases))
+
+
+def compare(results, baseline, threshold=THRESHOLD, min_time=MIN_TIME, objective_tol=OBJECTIVE_TOL):
+    # regressions of the results against the baseline as messages, cases missing in the baseline are not compared
+    regressions = []
+    for name, result in results['cases'].items():
+        base = baseline['cases'].get(name)
+        if base is None:
+            continue
+        if result['error']:
+            if not base['error']:
+                regressions.append('{}: failed ({})'.format(name, result['error']))
+            continue
+        if base['error']:
+            continue
+        for phase, value in result['phases'].items():
+            t = base['phases'].get(phase, {}).get('time')
+            if t is not None and value['time'] > max(t * (1 + threshold), t + min_time):
+                regressions.append('{}: {} took {:.2f} s, baseline {:.2f} s (+{:.0%})'.format(
+                    name, phase, value['time'], t, value['time'] / max(t, 1e-9) - 1))
+        if result['peak_rss_mb'] > base['peak_rss_mb'] * (1 + threshold):
+            regressions.append('{}: peak RSS {:.0f} MB, baseline {:.0f} MB (+{:.0%})'.format(
+                name, result['peak_rss_mb'], base['peak_rss_mb'], result['peak_rss_mb'] / base['peak_rss_mb'] - 1))
+        change = abs(result['objective'] - base['objective']) / max(abs(base['objective']), 1e-9)
+        if change > objective_tol:
+            regressions.append('{}: objective {:,.2f}, baseline {:,.2f} ({:.2%} change)'.format(
+                name, result['objective'], base['objective'], change))
+    return regressions
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='End-to-end benchmark of the read, build, solve and extract phases.')
+    parser.add_argument('--systems', nargs='+', default=SYSTEMS[:2], choices=SYSTEMS)
+    parser.add_argument('--n_ts', type=int, nargs='+', default=N_TS, help='timesteps per period')
+    parser.add_argument('--periods', type=int, nargs='+', default=PERIODS)
+    parser.add_argument('--structure', default=STRUCTURE, help='structure of the tool system')
+    parser.add_argument('--units', type=int, nargs='+', default=UNITS, help='of the synthetic systems')
+    parser.add_argument('--density', type=float, default=DENSITY, help='of the connectors of the synthetic systems')
+    parser.add_argument('--seed', type=int, default=0, help='of the synthetic systems')
+    parser.add_argument('--assembly', default=None, choices=['pyomo', 'matrix'], help='of the tool system')
+    parser.add_argument('--profile', default=None, help='solver profile of the tool system')
+    parser.add_argument('--timelimit', type=float, default=None, help='seconds per solve')
+    parser.add_argument('--output', default=os.path.join(SCRIPT_DIR, 'pipeline_results.json'))
+    parser.add_argument('--baseline', default=None, help='results file to compare with')
+    parser.add_argument('--threshold', type=float, default=THRESHOLD)
+    parser.add_argument('--min_time', type=float, default=MIN_TIME)
+    args = parser.parse_args()
+
+    results = run(make_cases(args.systems, args.n_ts, args.periods, args.assembly, args.profile, args.timelimit,
+                               args.structure, args.units, args.density, args.seed))
+    with open(args.output, 'w') as f:
+        json.dump(results, f, indent=2)
+    print('Results written to {}.'.format(args.output))
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.threshold, args.min_time)
+        for message in regressions:
+            print('REGRESSION ' + message)
+        if regressions:
+            sys.exit(1)
+        print('No regressions against {} (threshold {:.0%}).'.format(args.baseline, args.threshold))
@@ -0,0 +1,271 @@
+import os
+import copy
+import json
+import argparse
+import datetime
+import numpy as np
+
+SCRIPT_DIR = os.path.dirname(os.path.realpath(__file__))
+SERVER_DIR = os.path.normpath(os.path.join(SCRIPT_DIR, '..'))
+
+# Synthetic energy systems for scaling tests, in the schema of tool_dekarpio_structure.json with matching timelines and
+# timeline map. Every unit and collector is a copy of a unit (template) of the sample structure with a new number,
+# e.g. eso_eso31_nga is a copy of eso_eso1_nga. add_units_and_nodes derives classnames, ports and node types from
+# names and descriptions, copies keep them and stay valid. Conversion units cycle through all descriptions (solid and
+# multi-fuel boilers, gas and steam turbines, heat pumps) before templates repeat.
+#
+# Connectors: for every connector of the sample, each pair of copies of its two ends is connected with probability
+# `density`, and every copy gets at least one connector of each kind its template has. Demand inputs and outputs name
+# exactly one element, they are connected to one random copy of their element.
+#
+# Timelines: n_periods days with n_ts timesteps. A period is a random typical day of the sample timelines, every
+# source and demand with a profile gets its own column (the template's column times a random factor plus noise).
+#
+#   structure, timelines, timeline_map = make_system(*unit_counts(100), density=0.1, seed=1)
+#   python benchmarks/synthetic.py 100 --density 0.1 --seed 1 -o synthetic_100
+
+STRUCTURE = os.path.join(SERVER_DIR, 'tool_dekarpio_structure.json')
+TIMELINES = os.path.join(SERVER_DIR, 'tool_dekarpio_timelines.json')
+TIMELINE_MAP = os.path.join(SERVER_DIR, 'tool_dekarpio_timeline_map.json')
+GROUPS = ['eso', 'ecu', 'esu', 'dem', 'col']
+UNITS = ['eso', 'ecu', 'esu', 'dem']
+DENSITY = 0.1
+NOISE = 0.05        # standard deviation of the profile noise, relative to the profile mean
+YEAR = 2022
+
+
+def load(path):
+    with open(path) as f:
+        return json.load(f)
+
+
+def unit_counts(units, template=None):
+    # numbers of sources, conversion units, storages, demands and collectors for `units` units in the proportions of
+    # the template structure, at least one of each and every collector of the template
+    template = template or load(STRUCTURE)
+    sizes = np.array([len(template[group]) for group in UNITS], dtype=float)
+    counts = np.maximum(np.round(units * sizes / sizes.sum()).astype(int), 1)
+    n_col = max(len(template['col']), int(round(units * len(template['col']) / sizes.sum())))
+    return tuple(int(n) for n in counts) + (n_col,)
+
+
+def template_order(rng, group, templates):
+    # every template once (conversion units round robin over their descriptions), then random templates
+    keys = list(templates)
+    rng.shuffle(keys)
+    if group == 'ecu':
+        kinds = {}
+        for key in keys:
+            kinds.setdefault(templates[key]['description'], []).append(key)
+        keys = [key for row in zip(*[k + [None] * (len(keys) - len(k)) for k in kinds.values()])
+                for key in row if key is not None]
+    return keys
+
+
+def element_name(obj):
+    return obj['ID'].split('_')[-1]
+
+
+def copy_units(rng, template, counts, required):
+    # {group: {key: object}} of the copies and {new ID: template ID}. required: template IDs copied first (the sources
+    # demands are connected to directly)
+    groups = {}
+    origin = {}
+    for group, n in zip(GROUPS, counts):
+        templates = template[group]
+        order = template_order(rng, group, templates)
+        order = sorted(order, key=lambda k: templates[k]['ID'] not in required)
+        groups[group] = {}
+        for i in range(n):
+            source = templates[order[i]] if i < len(order) else templates[order[rng.integers(len(order))]]
+            obj = copy.deepcopy(source)
+            key = group + str(i + 1)
+            obj['ID'] = '{}_{}_{}'.format(group, key, element_name(source))
+            if group != 'col':
+                obj['param'][0]['integrate'] = True
+            groups[group][key] = obj
+            origin[obj['ID']] = source['ID']
+    return groups, origin
+
+
+def connect(rng, template, groups, origin, density):
+    # connectors (left ID, right ID) in the order of the template connectors
+    copies = {}
+    for new, old in origin.items():
+        copies.setdefault(old, []).append(new)
+    demand_ends = {}    # (demand copy, template element) -> element copy, one per demand input and output
+    cons = []
+    for con in template['con'].values():
+        _, left, right = con['ID'].split('-')
+        lefts, rights = copies.get(left, []), copies.get(right, [])
+        if not lefts or not rights:
+            continue
+        if left.startswith('dem') or right.startswith('dem'):
+            dem_copies, others = (lefts, rights) if left.startswith('dem') else (rights, lefts)
+            for dem in dem_copies:
+                other = others[rng.integers(len(others))]
+                demand_ends[dem, right if left.startswith('dem') else left] = other
+                cons.append((dem, other) if left.startswith('dem') else (other, dem))
+            continue
+        pairs = rng.random((len(lefts), len(rights))) < density
+        pairs[np.arange(len(lefts)), rng.integers(len(rights), size=len(lefts))] = True
+        pairs[rng.integers(len(lefts), size=len(rights)), np.arange(len(rights))] = True
+        cons += [(lefts[i], rights[j]) for i, j in zip(*np.nonzero(pairs))]
+    return cons, demand_ends
+
+
+def make_structure(n_eso, n_ecu, n_esu, n_dem, n_col=None, density=DENSITY, seed=0, template=None):
+    # structure with n_eso sources, n_ecu conversion units, n_esu storages, n_dem demands and n_col collectors
+    # (at least the collectors of the template), returns the structure and {new ID: template ID}
+    rng = np.random.default_rng(seed)
+    template = template or load(STRUCTURE)
+    n_col = max(n_col or 0, len(template['col']))
+    required = set()
+    for con in template['con'].values():
+        _, left, right = con['ID'].split('-')
+        if right.startswith('dem') and left.startswith('eso'):
+            required.add(left)
+    groups, origin = copy_units(rng, template, [n_eso, n_ecu, n_esu, n_dem, n_col], required)
+    cons, demand_ends = connect(rng, template, groups, origin, density)
+
+    structure = {'eso': groups['eso'], 'par': copy.deepcopy(template['par']), 'eco': copy.deepcopy(template['eco']),
+                 'con': {}, 'col': {}, 'ecu': groups['ecu'], 'esu': groups['esu'], 'dem': groups['dem']}
+    incoming, outgoing = {}, {}
+    for n, (left, right) in enumerate(cons):
+        con_id = 'con-{}-{}'.format(left, right)
+        structure['con']['con' + str(n + 1)] = {'ID': con_id, 'inp': left, 'out': right}
+        outgoing.setdefault(left, []).append((right, con_id))
+        incoming.setdefault(right, []).append((left, con_id))
+
+    for key, obj in groups['col'].items():
+        structure['col'][key] = {
+            'ID': obj['ID'],
+            'inp': {'input' + str(k + 1): {'con': con_id, 'active': True}
+                    for k, (_, con_id) in enumerate(incoming.get(obj['ID'], []))},
+            'out': {'output' + str(k + 1): {'con': con_id, 'active': True}
+                    for k, (_, con_id) in enumerate(outgoing.get(obj['ID'], []))}}
+
+    # elements of the units as in the frontend, shares of the template element
+    for group in ['ecu', 'esu']:
+        for obj in groups[group].values():
+            for side, ends in [('inp', incoming), ('out', outgoing)]:
+                shares = {entry['element']: entry.get('max_share') for entry in obj[side].values()}
+                prefix = 'input' if side == 'inp' else 'output'
+                obj[side] = {}
+                for k, (element, _) in enumerate(ends.get(obj['ID'], [])):
+                    entry = {'element': element}
+                    if group == 'ecu':
+                        entry['max_share'] = shares.get(origin[element], 1)
+                    else:
+                        entry['active'] = True
+                    obj[side][prefix + str(k + 1)] = entry
+    for obj in groups['dem'].values():
+        for side in ['inp', 'out']:
+            for entry in obj[side].values():
+                entry['element'] = demand_ends.get((obj['ID'], entry['element']), entry['element'])
+
+    # steam levels list their collectors and the connectors of these collectors
+    for par in structure['par'].values():
+        level = par['ID'].split('_')[-1]
+        cols = [obj['ID'] for obj in groups['col'].values() if element_name(obj).startswith(level)]
+        entries = [{'element': col} for col in cols]
+        entries += [{'con': con_id} for col in cols for _, con_id in incoming.get(col, []) + outgoing.get(col, [])]
+        par['inp'] = {'input' + str(k + 1): entry for k, entry in enumerate(entries)}
+    return structure, origin
+
+
+def make_timeline_map(structure, origin, template_map=None):
+    # {source or demand port: column}, every profile that is not constant gets a column of its own. Returns the map
+    # and {column: template column}
+    template_map = template_map or load(TIMELINE_MAP)
+    timeline_map = {}
+    columns = {}
+    names = [(obj['ID'], origin[obj['ID']]) for obj in structure['eso'].values()]
+    for obj in structure['dem'].values():
+        for port in list(obj['inp']) + list(obj['out']):
+            names.append((obj['ID'] + '_' + port, origin[obj['ID']] + '_' + port))
+    for name, template_name in names:
+        column = template_map[template_name]
+        if column != 'Konstant':
+            columns[name + ' (normiert)'] = column
+            column = name + ' (normiert)'
+        timeline_map[name] = column
+    for key, column in template_map.items():
+        if key.startswith('flex_'):
+            timeline_map[key] = column
+    return timeline_map, columns
+
+
+def make_timelines(columns, n_periods=3, n_ts=24, seed=0, template=None):
+    # timelines in the format of timeseries_aggregation: n_periods random typical days of the template resampled to
+    # n_ts timesteps, the template columns and the columns {column: template column} with a random factor and noise
+    rng = np.random.default_rng(seed)
+    template = template or load(TIMELINES)
+    medoids = template['Medoid-Zeitreihen']
+    days = rng.integers(len(medoids), size=n_periods)
+    factors = {column: rng.uniform(0.8, 1.2) for column in columns}
+
+    def resample(values):
+        values = np.asarray(values, dtype=float)
+        return np.interp(np.arange(n_ts) * len(values) / n_ts, np.arange(len(values)), values, period=len(values))
+
+    periods = []
+    for day in days:
+        period = {column: resample(values) for column, values in medoids[day].items()}
+        for column, source in columns.items():
+            values = period[source] * factors[column]
+            values = values + rng.normal(0, NOISE * max(values.mean(), 1e-9), n_ts)
+            period[column] = np.clip(values, 0, None)
+        periods.append({column: values.tolist() for column, values in period.items()})
+
+    dates = [datetime.date(YEAR, 1, 1) + datetime.timedelta(days=d) for d in range(365)]
+    labels = np.concatenate([np.arange(n_periods), rng.integers(n_periods, size=365 - n_periods)])
+    rng.shuffle(labels)
+    counts = np.bincount(labels, minlength=n_periods)
+    return {
+        'Medoid-Zeitreihen': periods,
+        'Label-Sequenz': {d.isoformat(): int(l) for d, l in zip(dates, labels)},
+        'Gewichte': {str(c): int(n) for c, n in enumerate(counts)},
+    }
+
+
+def make_system(n_eso, n_ecu, n_esu, n_dem, n_col=None, density=DENSITY, n_periods=3, n_ts=24, seed=0):
+    # structure, timelines and timeline map of a synthetic system, see make_structure and make_timelines
+    structure, origin = make_structure(n_eso, n_ecu, n_esu, n_dem, n_col, density, seed)
+    timeline_map, columns = make_timeline_map(structure, origin)
+    timelines = make_timelines(columns, n_periods, n_ts, seed)
+    return structure, timelines, timeline_map
+
+
+def summary(structure):
+    return ', '.join('{} {}'.format(len(structure[group]), group) for group in GROUPS + ['con'])
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Synthetic structure, timelines and timeline map for scaling tests.')
+    parser.add_argument('units', type=int, nargs='?', default=None,
+                        help='total number of units in the proportions of tool_dekarpio_structure.json')
+    parser.add_argument('--eso', type=int, default=None)
+    parser.add_argument('--ecu', type=int, default=None)
+    parser.add_argument('--esu', type=int, default=None)
+    parser.add_argument('--dem', type=int, default=None)
+    parser.add_argument('--col', type=int, default=None)
+    parser.add_argument('--density', type=float, default=DENSITY, help='probability of each possible connector')
+    parser.add_argument('--periods', type=int, default=3)
+    parser.add_argument('--n_ts', type=int, default=24)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('-o', '--output', default='synthetic', help='directory of the json files')
+    args = parser.parse_args()
+
+    counts = list(unit_counts(args.units or 52))
+    for n, value in enumerate([args.eso, args.ecu, args.esu, args.dem, args.col]):
+        if value is not None:
+            counts[n] = value
+    structure, timelines, timeline_map = make_system(*counts, density=args.density, n_periods=args.periods,
+                                                     n_ts=args.n_ts, seed=args.seed)
+    os.makedirs(args.output, exist_ok=True)
+    for name, data in [('structure.json', structure), ('timelines.json', timelines),
+                       ('timeline_map.json', timeline_map)]:
+        with open(os.path.join(args.output, name), 'w') as f:
+            json.dump(data, f, indent=2, ensure_ascii=False)
+    print('{} written to {}.'.format(summary(structure), args.output))
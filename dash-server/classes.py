@@ -1,6 +1,8 @@
+import time
 import pyomo.environ as pyo
-import CoolProp.CoolProp as CP    # CoolProp Units: SI -- J, kg, K, Pa, ...
+import fluid_properties as fp    # CoolProp Units: SI -- J, kg, K, Pa, ...
 import auxiliary as da
+import matrix_model as mm
 import numpy as np
 
 
@@ -13,6 +15,19 @@ class System:
         self.port = dict()
         self.con = dict()
         self.obj = dict()
+        self.timing = dict()  # classname: [count, seconds] of add_unit and add_node
+
+        self.param['n_sc'] = len(self.param['sc'])  # number of scenarios
+        self.param['dur_sc'] = self.param['n_ts_sc'] * self.param['tss']  # duration of one scenario in hours
+        self.param['dur_total'] = self.param['n_sc'] * self.param['dur_sc']  # total duration in hours
+        self.param['n_ts_total'] = self.param['n_sc'] * self.param['n_ts_sc']  # total number of time steps
+
+        # 'pyomo': units build pyomo components, 'matrix': units add numpy blocks to one sparse matrix (matrix_model)
+        self.assembly = self.param.get('assembly', 'pyomo')
+        if self.assembly == 'matrix':
+            self.model = None
+            self.matrix = mm.MatrixModel(self)
+            return
 
         if model is None:
             self.model = pyo.ConcreteModel()
@@ -23,21 +38,73 @@ class System:
         self.model.set_t = pyo.Set(initialize=range(self.param['n_ts_sc']))
         self.model.set_te = pyo.Set(initialize=range(self.param['n_ts_sc']+1))
         self.model.set_sc = pyo.Set(initialize=self.param['sc'].keys())
-        self.param['n_sc'] = len(self.param['sc'])  # number of scenarios
-        self.param['dur_sc'] = self.param['n_ts_sc'] * self.param['tss']  # duration of one scenario in hours
-        self.param['dur_total'] = self.param['n_sc'] * self.param['dur_sc']  # total duration in hours
-        self.param['n_ts_total'] = self.param['n_sc'] * self.param['n_ts_sc']  # total number of time steps
+
+        # pyomo variables with costs, the columns of the unit objectives (see auxiliary.cost_cols)
+        self.cost_vars = []
+        self.cost_index = dict()
 
     def add_unit(self, param):
-        self.unit[param['name']] = globals()[param['classname']](param, self)
+        tic = time.perf_counter()
+        if self.assembly == 'matrix':
+            self.unit[param['name']] = mm.add_unit(self, param)
+        else:
+            self.unit[param['name']] = globals()[param['classname']](param, self)
+        self._count_time(param['classname'], tic)
 
     def add_node(self, param):
-        self.node[param['name']] = Node(param, self)
+        tic = time.perf_counter()
+        if self.assembly == 'matrix':
+            param['classname'] = 'Node'
+            self.node[param['name']] = mm.add_unit(self, param)
+        else:
+            self.node[param['name']] = Node(param, self)
+        self._count_time('Node', tic)
+
+    def _count_time(self, classname, tic):
+        entry = self.timing.setdefault(classname, [0, 0.0])
+        entry[0] += 1
+        entry[1] += time.perf_counter() - tic
 
     # def add_con(self, param):
     #     self.con[param['name']] = Node(param, self)
 
+    def add_share_con(self, name, lhs, rhs, share, sense='=='):
+        # lhs port (sense) share * rhs port, ports are given as (unit, port)
+        lhs_port = self.unit[lhs[0]].port[lhs[1]]
+        rhs_port = self.unit[rhs[0]].port[rhs[1]]
+        if self.assembly == 'matrix':
+            bounds = {'==': (0, 0), '<=': (-np.inf, 0), '>=': (0, np.inf)}[sense]
+            self.con[name] = self.matrix.add_rows('system', name, [(1, lhs_port), (-share, rhs_port)], *bounds)
+            return
+
+        def con_rule(m, s, t):
+            if sense == '<=':
+                return lhs_port[s, t] <= share * rhs_port[s, t]
+            elif sense == '>=':
+                return lhs_port[s, t] >= share * rhs_port[s, t]
+            return lhs_port[s, t] == share * rhs_port[s, t]
+
+        self.model.add_component(name, pyo.Constraint(self.model.set_sc, self.model.set_t, rule=con_rule))
+        self.con[name] = self.model.component(name)
+
+    def add_obj_limit_con(self, name, key, limit):
+        # sum of the unit objectives 'key' (e.g. co2_total_fossil) <= limit
+        units = [u for u in self.unit.values() if key in u.obj]
+        if self.assembly == 'matrix':
+            expr = sum((u.obj[key] for u in units), mm.LinExpr())
+            # one row, the third axis of the cols is summed
+            terms = [(expr.coefs.reshape(1, 1, -1), expr.cols.reshape(1, 1, -1))]
+            self.con[name] = self.matrix.add_rows('system', name, terms, hi=limit - expr.const)
+            return
+        expr = sum((u.obj[key] for u in units), mm.LinExpr())
+        self.model.add_component(name, pyo.Constraint(expr=da.linear_expression(self, expr) <= limit))
+        self.con[name] = self.model.component(name)
+
     def build_model(self):
+        if self.assembly == 'matrix':
+            self._build_matrix_model()
+            return
+
         # Build system constraints
         for u in self.unit:
             for c in self.unit[u].con:
@@ -52,34 +119,47 @@ class System:
                 namestr = 'con_' + n + '_' + c
                 self.model.add_component(namestr, self.node[n].con[c])
 
-        # Build system objective
-        obj = 0
-        obj_real = 0
+        # Build system objective, once from the cost vectors of all units and nodes
+        obj_real = mm.LinExpr()
         if self.param['free_certificate_fossil'] > 0:
-            obj -= self.param['free_certificate_fossil'] * self.param['cost_co2_fossil']
             obj_real -= self.param['free_certificate_fossil'] * self.param['cost_co2_fossil']
-
         if self.param['free_certificate_bio'] > 0:
-            obj -= self.param['free_certificate_bio'] * self.param['cost_co2_biogen']
             obj_real -= self.param['free_certificate_bio'] * self.param['cost_co2_biogen']
 
         for u in self.unit:
             if 'total' in self.unit[u].obj.keys():
-                obj += self.unit[u].obj['total'].expr
-                obj_real += self.unit[u].obj['total'].expr
+                obj_real += self.unit[u].obj['total']
                 # small costs for variables in order to reduce equivalent solutions
                 # for v in self.unit[u].var['seq'].keys():
                 #     obj += 1 * 1e-7 * sum(self.unit[u].var['seq'][v][i] for i in self.unit[u].var['seq'][v].keys())
+        obj = obj_real
         for n in self.node:
             if 'total' in self.node[n].obj.keys():
-                obj += self.node[n].obj['total'].expr
-        namestr = 'obj_system_total'
-        self.model.add_component(namestr, pyo.Objective(expr=obj))
-        self.obj['total'] = self.model.component('obj_system_total')
-        namestr = 'obj_system_total_real'
-        self.model.add_component(namestr, pyo.Objective(expr=obj_real))
-        self.model.component(namestr).deactivate()
-        self.obj['total_real'] = self.model.component('obj_system_total_real')
+                obj += self.node[n].obj['total']
+        self.model.add_component('obj_system_total', pyo.Objective(expr=da.linear_expression(self, obj)))
+        self.obj['total'] = obj
+        self.obj['total_real'] = obj_real
+
+    def _build_matrix_model(self):
+        self.matrix.finalize(self.matrix_objective())
+
+    def matrix_objective(self):
+        obj_real = mm.LinExpr()
+        if self.param['free_certificate_fossil'] > 0:
+            obj_real -= self.param['free_certificate_fossil'] * self.param['cost_co2_fossil']
+        if self.param['free_certificate_bio'] > 0:
+            obj_real -= self.param['free_certificate_bio'] * self.param['cost_co2_biogen']
+
+        for u in self.unit:
+            if 'total' in self.unit[u].obj.keys():
+                obj_real += self.unit[u].obj['total']
+        obj = obj_real
+        for n in self.node:
+            if 'total' in self.node[n].obj.keys():
+                obj += self.node[n].obj['total']
+        self.obj['total'] = obj
+        self.obj['total_real'] = obj_real
+        return obj
 
 
 class Unit:
@@ -117,9 +197,9 @@ class MultifuelBoiler(Unit):                            ## WARNING: currently on
             else:
                 self.param['max_susd'] = (1, 1)
 
-        self.param['h_in'] = CP.PropsSI('H', 'T', self.param['T_in'] + 273.15, 'P', self.param['p_in'],
+        self.param['h_in'] = fp.PropsSI('H', 'T', self.param['T_in'] + 273.15, 'P', self.param['p_in'],
                                         self.param['medium'])*1e3    # mJ/kg.K
-        self.param['h_levels'] = CP.PropsSI('H', 'T', self.param['T_levels'] + 273.15*np.ones(len(self.param['T_levels'])), 'P', self.param['p_levels'],
+        self.param['h_levels'] = fp.PropsSI('H', 'T', self.param['T_levels'] + 273.15*np.ones(len(self.param['T_levels'])), 'P', self.param['p_levels'],
                                          self.param['medium'])*1e3   # # mJ/kg.K
         # todo h_levels currently not used, still: prepared for missing mass constraint
 
@@ -228,15 +308,7 @@ class MultifuelBoiler(Unit):                            ## WARNING: currently on
         da.add_obj_inv(system, self)
 
         # Total objective, which is assigned directly to unit
-        obj = 0
-        obj += self.obj['opex_fix'].expr
-        obj += self.obj['cost_SU'].expr
-        obj += self.obj['cost_SD'].expr
-        obj += self.obj['inv']
-        namestr = 'obj_' + self.name + '_total'
-        system.model.add_component(namestr, pyo.Objective(expr=obj))
-        system.model.component(namestr).deactivate()
-        self.obj['total'] = system.model.component(namestr)
+        da.add_obj_total(self, ['opex_fix', 'cost_SU', 'cost_SD', 'inv'])
 
 class GasBoiler(Unit):
     def __init__(self, param, system):
@@ -257,9 +329,9 @@ class GasBoiler(Unit):
             else:
                 self.param['max_susd'] = (1, 1)
 
-        self.param['h_in'] = CP.PropsSI('H', 'T', self.param['T_in'] + 273.15, 'P', self.param['pressure'],
+        self.param['h_in'] = fp.PropsSI('H', 'T', self.param['T_in'] + 273.15, 'P', self.param['pressure'],
                                         self.param['medium'])*1e3    # mJ/kg.K
-        self.param['h_out'] = CP.PropsSI('H', 'T', self.param['T_out'] + 273.15, 'P', self.param['pressure'],
+        self.param['h_out'] = fp.PropsSI('H', 'T', self.param['T_out'] + 273.15, 'P', self.param['pressure'],
                                          self.param['medium'])*1e3   # # mJ/kg.K
 
         # Variables
@@ -294,15 +366,7 @@ class GasBoiler(Unit):
         da.add_obj_inv(system, self)
 
         # Total objective, which is assigned directly to unit
-        obj = 0
-        obj += self.obj['opex_fix'].expr
-        obj += self.obj['cost_SU'].expr
-        obj += self.obj['cost_SD'].expr
-        obj += self.obj['inv']
-        namestr = 'obj_' + self.name + '_total'
-        system.model.add_component(namestr, pyo.Objective(expr=obj))
-        system.model.component(namestr).deactivate()
-        self.obj['total'] = system.model.component(namestr)
+        da.add_obj_total(self, ['opex_fix', 'cost_SU', 'cost_SD', 'inv'])
 
 class InternalCombustionEngine(Unit):
     def __init__(self, param, system):
@@ -362,15 +426,7 @@ class InternalCombustionEngine(Unit):
         da.add_obj_inv(system, self)
 
         # Total objective, which is assigned directly to unit
-        obj = 0
-        obj += self.obj['opex_fix'].expr
-        obj += self.obj['cost_SU'].expr
-        obj += self.obj['cost_SD'].expr
-        obj += self.obj['inv']
-        namestr = 'obj_' + self.name + '_total'
-        system.model.add_component(namestr, pyo.Objective(expr=obj))
-        system.model.component(namestr).deactivate()
-        self.obj['total'] = system.model.component(namestr)
+        da.add_obj_total(self, ['opex_fix', 'cost_SU', 'cost_SD', 'inv'])
 
 class GasTurbine(Unit): #to do: in steam turbine convert
     def __init__(self, param, system):
@@ -434,15 +490,7 @@ class GasTurbine(Unit): #to do: in steam turbine convert
         da.add_obj_inv(system, self)
 
         # Total objective, which is assigned directly to unit
-        obj = 0
-        obj += self.obj['opex_fix'].expr
-        obj += self.obj['cost_SU'].expr
-        obj += self.obj['cost_SD'].expr
-        obj += self.obj['inv']
-        namestr = 'obj_' + self.name + '_total'
-        system.model.add_component(namestr, pyo.Objective(expr=obj))
-        system.model.component(namestr).deactivate()
-        self.obj['total'] = system.model.component(namestr)
+        da.add_obj_total(self, ['opex_fix', 'cost_SU', 'cost_SD', 'inv'])
 
 class BackPressureSteamTurbine(Unit): #to do: in steam turbine convert
     def __init__(self, param, system):
@@ -504,15 +552,7 @@ class BackPressureSteamTurbine(Unit): #to do: in steam turbine convert
         da.add_obj_inv(system, self)
 
         # Total objective, which is assigned directly to unit
-        obj = 0
-        obj += self.obj['opex_fix'].expr
-        obj += self.obj['cost_SU'].expr
-        obj += self.obj['cost_SD'].expr
-        obj += self.obj['inv']
-        namestr = 'obj_' + self.name + '_total'
-        system.model.add_component(namestr, pyo.Objective(expr=obj))
-        system.model.component(namestr).deactivate()
-        self.obj['total'] = system.model.component(namestr)
+        da.add_obj_total(self, ['opex_fix', 'cost_SU', 'cost_SD', 'inv'])
 
         # to do - integrate isentropic eff and extraction level
 
@@ -541,14 +581,14 @@ class BackPressureSteamTurbine_new(Unit): #todo final check
                 self.param['max_susd'] = (1, 1)
 
         # Enthalpies (h_0 = feedwater, h_in = livesteam, h_out = of levels
-        self.param['h_0'] = CP.PropsSI('H', 'T', self.param['T_0'] + 273.15,
+        self.param['h_0'] = fp.PropsSI('H', 'T', self.param['T_0'] + 273.15,
                                        'P', self.param['p_0'], self.param['medium'])/1e6        # MJ/kg
-        self.param['h_in'] = CP.PropsSI('H', 'T', self.param['T_in'] + 273.15,
+        self.param['h_in'] = fp.PropsSI('H', 'T', self.param['T_in'] + 273.15,
                                         'P', self.param['p_in'], self.param['medium'])/1e6      # MJ/kg
 
         self.param['h_out'] = dict()                                                            # calculate specific enthalpy of different (extraction levels)
         for i, n in enumerate(self.param['share_out']):
-            self.param['h_out'][n] = CP.PropsSI('H', 'T', self.param['T_levels'][i], 'P', self.param['p_levels'][i],
+            self.param['h_out'][n] = fp.PropsSI('H', 'T', self.param['T_levels'][i], 'P', self.param['p_levels'][i],
                                                       self.param['medium'])/1e6
 
         # Variables
@@ -620,15 +660,7 @@ class BackPressureSteamTurbine_new(Unit): #todo final check
         da.add_obj_inv(system, self)
 
         # Total objective, which is assigned directly to unit
-        obj = 0
-        obj += self.obj['opex_fix'].expr
-        obj += self.obj['cost_SU'].expr
-        obj += self.obj['cost_SD'].expr
-        obj += self.obj['inv']
-        namestr = 'obj_' + self.name + '_total'
-        system.model.add_component(namestr, pyo.Objective(expr=obj))
-        system.model.component(namestr).deactivate()
-        self.obj['total'] = system.model.component(namestr)
+        da.add_obj_total(self, ['opex_fix', 'cost_SU', 'cost_SD', 'inv'])
 
         # to do - integrate isentropic eff and extraction level
 
@@ -659,19 +691,19 @@ class CondensingSteamTurbine_new(Unit): #todo final check
         # Enthalpies (h_0 = feedwater and condensate, h_in = livesteam, h_out = of levels, here only extraction
 
         # self.param['T_cond'] = param['T_cond']
-        # self.param['h_out'] = CP.PropsSI('H', 'T', param['T_cond'] + 273.15, 'Q', 0, 'Water')/1e6
+        # self.param['h_out'] = fp.PropsSI('H', 'T', param['T_cond'] + 273.15, 'Q', 0, 'Water')/1e6
         # self.param['T_in'] = param['T_in']
         # self.param['P_in'] = param['P_in']
-        # self.param['h_in']  = CP.PropsSI('H', 'T', param['T_in'] + 273.15, 'P',param['P_in'], 'Water')/1e6
+        # self.param['h_in']  = fp.PropsSI('H', 'T', param['T_in'] + 273.15, 'P',param['P_in'], 'Water')/1e6
 
-        self.param['h_0'] = CP.PropsSI('H', 'T', self.param['T_0'] + 273.15,
+        self.param['h_0'] = fp.PropsSI('H', 'T', self.param['T_0'] + 273.15,
                                        'P', self.param['p_0'], self.param['medium'])/1e6        # MJ/kg
-        self.param['h_in'] = CP.PropsSI('H', 'T', self.param['T_in'] + 273.15,
+        self.param['h_in'] = fp.PropsSI('H', 'T', self.param['T_in'] + 273.15,
                                         'P', self.param['p_in'], self.param['medium'])/1e6      # MJ/kg
 
         self.param['h_out'] = dict()                                                            # MJ/kg,  specific enthalpy of different (extraction) levels
         for i, n in enumerate(self.param['share_out']):
-            self.param['h_out'][n] = CP.PropsSI('H', 'T', self.param['T_levels'][i], 'P', self.param['p_levels'][i],
+            self.param['h_out'][n] = fp.PropsSI('H', 'T', self.param['T_levels'][i], 'P', self.param['p_levels'][i],
                                                       self.param['medium'])/1e6
 
         # Variables
@@ -742,15 +774,7 @@ class CondensingSteamTurbine_new(Unit): #todo final check
         da.add_obj_inv(system, self)
 
         # Total objective, which is assigned directly to unit
-        obj = 0
-        obj += self.obj['opex_fix'].expr
-        obj += self.obj['cost_SU'].expr
-        obj += self.obj['cost_SD'].expr
-        obj += self.obj['inv']
-        namestr = 'obj_' + self.name + '_total'
-        system.model.add_component(namestr, pyo.Objective(expr=obj))
-        system.model.component(namestr).deactivate()
-        self.obj['total'] = system.model.component(namestr)
+        da.add_obj_total(self, ['opex_fix', 'cost_SU', 'cost_SD', 'inv'])
 
         # to do - integrate isentropic eff and extraction level
 
@@ -761,10 +785,10 @@ class CondensingSteamTurbine(Unit): #to do: in steam turbine convert
         # Parameters
         da.init_uvwi_param(self)
         self.param['T_cond'] = param['T_cond']
-        self.param['h_out'] = CP.PropsSI('H', 'T', param['T_cond'] + 273.15, 'Q', 0, 'Water')/1e6
+        self.param['h_out'] = fp.PropsSI('H', 'T', param['T_cond'] + 273.15, 'Q', 0, 'Water')/1e6
         self.param['T_in'] = param['T_in']
         self.param['P_in'] = param['P_in']
-        self.param['h_in']  = CP.PropsSI('H', 'T', param['T_in'] + 273.15, 'P',param['P_in'], 'Water')/1e6
+        self.param['h_in']  = fp.PropsSI('H', 'T', param['T_in'] + 273.15, 'P',param['P_in'], 'Water')/1e6
 
         if 'lim_p' in self.param:
             if self.param['lim_p'][0] > 0:
@@ -831,15 +855,7 @@ class CondensingSteamTurbine(Unit): #to do: in steam turbine convert
         da.add_obj_inv(system, self)
 
         # Total objective, which is assigned directly to unit
-        obj = 0
-        obj += self.obj['opex_fix'].expr
-        obj += self.obj['cost_SU'].expr
-        obj += self.obj['cost_SD'].expr
-        obj += self.obj['inv']
-        namestr = 'obj_' + self.name + '_total'
-        system.model.add_component(namestr, pyo.Objective(expr=obj))
-        system.model.component(namestr).deactivate()
-        self.obj['total'] = system.model.component(namestr)
+        da.add_obj_total(self, ['opex_fix', 'cost_SU', 'cost_SD', 'inv'])
 
 class HeatRecoveryBoiler(Unit):
     # Abhitzekessel
@@ -901,15 +917,7 @@ class HeatRecoveryBoiler(Unit):
         da.add_obj_inv(system, self)
 
         # Total objective, which is assigned directly to unit
-        obj = 0
-        obj += self.obj['opex_fix'].expr
-        obj += self.obj['cost_SU'].expr
-        obj += self.obj['cost_SD'].expr
-        obj += self.obj['inv']
-        namestr = 'obj_' + self.name + '_total'
-        system.model.add_component(namestr, pyo.Objective(expr=obj))
-        system.model.component(namestr).deactivate()
-        self.obj['total'] = system.model.component(namestr)
+        da.add_obj_total(self, ['opex_fix', 'cost_SU', 'cost_SD', 'inv'])
 
 class Electrolyser(Unit):
     def __init__(self, param, system):
@@ -977,15 +985,7 @@ class Electrolyser(Unit):
         da.add_obj_inv(system, self)
 
         # Total objective, which is assigned directly to unit
-        obj = 0
-        obj += self.obj['opex_fix'].expr
-        obj += self.obj['cost_SU'].expr
-        obj += self.obj['cost_SD'].expr
-        obj += self.obj['inv']
-        namestr = 'obj_' + self.name + '_total'
-        system.model.add_component(namestr, pyo.Objective(expr=obj))
-        system.model.component(namestr).deactivate()
-        self.obj['total'] = system.model.component(namestr)
+        da.add_obj_total(self, ['opex_fix', 'cost_SU', 'cost_SD', 'inv'])
 
 class Compressor(Unit):
     """
@@ -1059,15 +1059,7 @@ class Compressor(Unit):
         da.add_obj_inv(system, self)
 
         # Total objective, which is assigned directly to unit
-        obj = 0
-        obj += self.obj['opex_fix'].expr
-        obj += self.obj['cost_SU'].expr
-        obj += self.obj['cost_SD'].expr
-        obj += self.obj['inv']
-        namestr = 'obj_' + self.name + '_total'
-        system.model.add_component(namestr, pyo.Objective(expr=obj))
-        system.model.component(namestr).deactivate()
-        self.obj['total'] = system.model.component(namestr)
+        da.add_obj_total(self, ['opex_fix', 'cost_SU', 'cost_SD', 'inv'])
 
 class Burner(Unit):
     def __init__(self, param, system):
@@ -1117,15 +1109,7 @@ class Burner(Unit):
         da.add_obj_inv(system, self)
 
         # Total objective, which is assigned directly to unit
-        obj = 0
-        obj += self.obj['opex_fix'].expr
-        obj += self.obj['cost_SU'].expr
-        obj += self.obj['cost_SD'].expr
-        obj += self.obj['inv']
-        namestr = 'obj_' + self.name + '_total'
-        system.model.add_component(namestr, pyo.Objective(expr=obj))
-        system.model.component(namestr).deactivate()
-        self.obj['total'] = system.model.component(namestr)
+        da.add_obj_total(self, ['opex_fix', 'cost_SU', 'cost_SD', 'inv'])
 
 class ElectrodeBoiler(Unit):
     def __init__(self, param, system):
@@ -1146,14 +1130,14 @@ class ElectrodeBoiler(Unit):
             else:
                 self.param['max_susd'] = (1, 1)
 
-        self.param['h_in'] = CP.PropsSI('H', 'T', self.param['T_in'] + 273.15, 'P', self.param['pressure'],
+        self.param['h_in'] = fp.PropsSI('H', 'T', self.param['T_in'] + 273.15, 'P', self.param['pressure'],
                                         self.param['medium']) #*1e3 #Todo check, correction by sk 231122
-        # self.param['h_out'] = CP.PropsSI('H', 'T', self.param['T_out'] + 273.15, 'P', self.param['pressure'],
+        # self.param['h_out'] = fp.PropsSI('H', 'T', self.param['T_out'] + 273.15, 'P', self.param['pressure'],
         #                                  self.param['medium'])
-        if round(CP.PropsSI('T', 'Q',  1, 'P', self.param['pressure'], 'WATER')-273.15,4) == round(self.param['T_out'],4):
-            self.param['h_out'] = CP.PropsSI('H', 'Q',  1, 'P', self.param['pressure'], 'WATER')#*1e3 #Todo check, correction by sk 231122
+        if round(fp.PropsSI('T', 'Q',  1, 'P', self.param['pressure'], 'WATER')-273.15,4) == round(self.param['T_out'],4):
+            self.param['h_out'] = fp.PropsSI('H', 'Q',  1, 'P', self.param['pressure'], 'WATER')#*1e3 #Todo check, correction by sk 231122
         else:
-            self.param['h_out'] = CP.PropsSI('H', 'T',  self.param['T_out']+273.15, 'P', self.param['pressure'], 'WATER') #*1e3 #Todo check, correction by sk 231122
+            self.param['h_out'] = fp.PropsSI('H', 'T',  self.param['T_out']+273.15, 'P', self.param['pressure'], 'WATER') #*1e3 #Todo check, correction by sk 231122
 
         da.add_inv_param(system, self, param)
 
@@ -1188,15 +1172,7 @@ class ElectrodeBoiler(Unit):
         da.add_obj_inv(system, self)
 
         # Total objective, which is assigned directly to unit
-        obj = 0
-        obj += self.obj['opex_fix'].expr
-        obj += self.obj['cost_SU'].expr
-        obj += self.obj['cost_SD'].expr
-        obj += self.obj['inv']
-        namestr = 'obj_' + self.name + '_total'
-        system.model.add_component(namestr, pyo.Objective(expr=obj))
-        system.model.component(namestr).deactivate()
-        self.obj['total'] = system.model.component(namestr)
+        da.add_obj_total(self, ['opex_fix', 'cost_SU', 'cost_SD', 'inv'])
 
 class Cooler(Unit):
     def __init__(self, param, system):
@@ -1217,9 +1193,9 @@ class Cooler(Unit):
             else:
                 self.param['max_susd'] = (1, 1)
 
-        self.param['h_in'] = CP.PropsSI('H', 'T', self.param['T_in'] + 273.15, 'P', self.param['pressure'],
+        self.param['h_in'] = fp.PropsSI('H', 'T', self.param['T_in'] + 273.15, 'P', self.param['pressure'],
                                         self.param['medium'])
-        self.param['h_out'] = CP.PropsSI('H', 'T', self.param['T_out'] + 273.15, 'P', self.param['pressure'],
+        self.param['h_out'] = fp.PropsSI('H', 'T', self.param['T_out'] + 273.15, 'P', self.param['pressure'],
                                          self.param['medium'])
 
         # Variables
@@ -1258,12 +1234,7 @@ class Cooler(Unit):
         da.add_obj_inv(system, self)
 
         # Total objective, which is assigned directly to unit
-        obj = 0
-        obj += self.obj['inv'].expr
-        namestr = 'obj_' + self.name + '_total'
-        system.model.add_component(namestr, pyo.Objective(expr=obj))
-        system.model.component(namestr).deactivate()
-        self.obj['total'] = system.model.component(namestr)
+        da.add_obj_total(self, ['inv'])
 
 class CHP(Unit):
     def __init__(self, param, system):
@@ -1286,12 +1257,12 @@ class CHP(Unit):
 
         self.param['h_in'] = dict()
         for i, n in enumerate(self.param['T_in']):
-            self.param['h_in'][n] = CP.PropsSI('H', 'T', n + 273.15, 'P', self.param['pressure'][i],
+            self.param['h_in'][n] = fp.PropsSI('H', 'T', n + 273.15, 'P', self.param['pressure'][i],
                                                     self.param['medium'][i])
 
         self.param['h_out'] = dict()
         for i, n in enumerate(self.param['T_in']):
-            self.param['h_out'][n] = CP.PropsSI('H', 'T', self.param['T_out'][self.param['T_in'].index(n)] + 273.15, 'P', self.param['pressure'][i],
+            self.param['h_out'][n] = fp.PropsSI('H', 'T', self.param['T_out'][self.param['T_in'].index(n)] + 273.15, 'P', self.param['pressure'][i],
                                                       self.param['medium'][i])
 
         # Variables
@@ -1349,15 +1320,7 @@ class CHP(Unit):
         da.add_obj_inv(system, self)
 
         # Total objective, which is assigned directly to unit
-        obj = 0
-        obj += self.obj['opex_fix'].expr
-        obj += self.obj['cost_SU'].expr
-        obj += self.obj['cost_SD'].expr
-        obj += self.obj['inv'].expr
-        namestr = 'obj_' + self.name + '_total'
-        system.model.add_component(namestr, pyo.Objective(expr=obj))
-        system.model.component(namestr).deactivate()
-        self.obj['total'] = system.model.component(namestr)
+        da.add_obj_total(self, ['opex_fix', 'cost_SU', 'cost_SD', 'inv'])
 
 class HeatPump_new(Unit):
     def __init__(self, param, system):
@@ -1375,7 +1338,7 @@ class HeatPump_new(Unit):
         #
         #     self.param['h_{}_{}'.format(side, inout)] = dict()
         #     for i, n in enumerate(self.param['T_{}_{}'.format(side, inout)]):
-        #         self.param['h_{}_{}'.format(side, inout)][n] = CP.PropsSI('H', 'T', n + 273.15, 'P', self.param['pressure_{}'.format(side)][i],
+        #         self.param['h_{}_{}'.format(side, inout)][n] = fp.PropsSI('H', 'T', n + 273.15, 'P', self.param['pressure_{}'.format(side)][i],
         #                                                 self.param['medium_{}'.format(side)])
 
         # self.param['lim_p'] = tuple(self.param['lim_q_sink'][k] / self.param['COP'][k] for k in range(2))
@@ -1571,15 +1534,7 @@ class HeatPump_new(Unit):
         # obj += self.obj['inv']
 
         # Total objective, which is assigned directly to unit
-        obj = 0
-        obj += self.obj['opex_fix'].expr
-        obj += self.obj['cost_SU'].expr
-        obj += self.obj['cost_SD'].expr
-        obj += self.obj['inv']
-        namestr = 'obj_' + self.name + '_total'
-        system.model.add_component(namestr, pyo.Objective(expr=obj))
-        system.model.component(namestr).deactivate()
-        self.obj['total'] = system.model.component(namestr)
+        da.add_obj_total(self, ['opex_fix', 'cost_SU', 'cost_SD', 'inv'])
 
 class HeatPump(Unit):
     def __init__(self, param, system):
@@ -1589,17 +1544,15 @@ class HeatPump(Unit):
 
         da.init_uvwi_param(self)
 
-        self.param['h_sink_in'] = dict()
-        for n in self.param['T_sink_in']:
-            self.param['h_sink_in'][n] = CP.PropsSI('H', 'T', n + 273.15, 'P', self.param['pressure_sink'],
-                                                    self.param['medium_sink']) / 1e6                                    # MJ/kg
-        self.param['h_source_in'] = dict()
-        for n in self.param['T_source_in']:
-            self.param['h_source_in'][n] = CP.PropsSI('H', 'T', n + 273.15, 'P', self.param['pressure_source'],
-                                                      self.param['medium_source']) / 1e6                                # MJ/kg
-        self.param['h_sink_out'] = CP.PropsSI('H', 'T', self.param['T_sink_out'] + 273.15, 'P',
+        h = fp.PropsSI('H', 'T', np.add(self.param['T_sink_in'], 273.15), 'P', self.param['pressure_sink'],
+                       self.param['medium_sink']) / 1e6                                                                 # MJ/kg
+        self.param['h_sink_in'] = dict(zip(self.param['T_sink_in'], h.tolist()))
+        h = fp.PropsSI('H', 'T', np.add(self.param['T_source_in'], 273.15), 'P', self.param['pressure_source'],
+                       self.param['medium_source']) / 1e6                                                               # MJ/kg
+        self.param['h_source_in'] = dict(zip(self.param['T_source_in'], h.tolist()))
+        self.param['h_sink_out'] = fp.PropsSI('H', 'T', self.param['T_sink_out'] + 273.15, 'P',
                                               self.param['pressure_sink'], self.param['medium_sink']) / 1e6             # MJ/kg
-        self.param['h_source_out'] = CP.PropsSI('H', 'T', self.param['T_source_out'] + 273.15, 'P',
+        self.param['h_source_out'] = fp.PropsSI('H', 'T', self.param['T_source_out'] + 273.15, 'P',
                                                 self.param['pressure_source'], self.param['medium_source']) / 1e6       # MJ/kg
         self.param['COP'] = tuple(
             self.param['eta_comp'][k] * (self.param['T_sink_out'] + self.param['delta_T_sink'][k] + 273.15) /
@@ -1617,7 +1570,7 @@ class HeatPump(Unit):
 
         if 'max_susd' not in self.param:
             if self.param['v_w_active']:
-                self.param['max_susd'] = (self.param['lim_q_qink'][0], self.param['lim_q_qink'][0])
+                self.param['max_susd'] = (self.param['lim_q_sink'][0], self.param['lim_q_sink'][0])
             else:
                 self.param['max_susd'] = (1, 1)
 
@@ -1712,15 +1665,7 @@ class HeatPump(Unit):
         #     'i']) / param['depreciation_period']
 
         # Total objective, which is assigned directly to unit
-        obj = 0
-        obj += self.obj['opex_fix'].expr
-        obj += self.obj['cost_SU'].expr
-        obj += self.obj['cost_SD'].expr
-        obj += self.obj['inv']
-        namestr = 'obj_' + self.name + '_total'
-        system.model.add_component(namestr, pyo.Objective(expr=obj))
-        system.model.component(namestr).deactivate()
-        self.obj['total'] = system.model.component(namestr)
+        da.add_obj_total(self, ['opex_fix', 'cost_SU', 'cost_SD', 'inv'])
 
 class HeatPumpSimple(Unit):
     # deprecated?
@@ -1744,7 +1689,7 @@ class HeatPumpSimple(Unit):
 
         if 'max_susd' not in self.param:
             if self.param['v_w_active']:
-                self.param['max_susd'] = (self.param['lim_q_qink'][0], self.param['lim_q_qink'][0])
+                self.param['max_susd'] = (self.param['lim_q_sink'][0], self.param['lim_q_sink'][0])
             else:
                 self.param['max_susd'] = (1, 1)
 
@@ -1788,15 +1733,7 @@ class HeatPumpSimple(Unit):
 
         da.add_obj_u_v_w(system, self)
         da.add_obj_inv(system, self)
-        obj = 0
-        obj += self.obj['opex_fix'].expr
-        obj += self.obj['cost_SU'].expr
-        obj += self.obj['cost_SD'].expr
-        obj += self.obj['inv']
-        namestr = 'obj_' + self.name + '_total'
-        system.model.add_component(namestr, pyo.Objective(expr=obj))
-        system.model.component(namestr).deactivate()
-        self.obj['total'] = system.model.component(namestr)
+        da.add_obj_total(self, ['opex_fix', 'cost_SU', 'cost_SD', 'inv'])
 
 class VapourCompression(Unit):
     def __init__(self, param, system):
@@ -1814,19 +1751,19 @@ class VapourCompression(Unit):
         self.param['FW P_in'] = param['FW P_in']  # Pa
         self.param['eta'] = param['eta']  # -
 
-        self.param['T_isentrop'] = CP.PropsSI('T', 'S', CP.PropsSI('S', 'P', param['P_in'], 'Q', 1, 'Water'), 'P', param['P_out'], 'Water')-273.15    # °C
-        self.param['h_in'] = CP.PropsSI('H', 'T', self.param['T_in']+273.15, 'P', param['P_in'], 'WATER') / 1e6                                       # MJ/kg
-        self.param['h_isentrop'] = CP.PropsSI('H', 'T', self.param['T_isentrop']+273.15, 'P', param['P_out'], 'WATER') / 1e6                          # MJ/kg
-        self.param['h_corrected'] = (self.param['h_isentrop'] - CP.PropsSI('H','P', param['P_in'], 'Q', 1, 'Water') / 1e6)/param['eta'] + CP.PropsSI('H', 'P', param['P_in'], 'Q', 1, 'Water') / 1e6 # MJ/kg
+        self.param['T_isentrop'] = fp.PropsSI('T', 'S', fp.PropsSI('S', 'P', param['P_in'], 'Q', 1, 'Water'), 'P', param['P_out'], 'Water')-273.15    # °C
+        self.param['h_in'] = fp.PropsSI('H', 'T', self.param['T_in']+273.15, 'P', param['P_in'], 'WATER') / 1e6                                       # MJ/kg
+        self.param['h_isentrop'] = fp.PropsSI('H', 'T', self.param['T_isentrop']+273.15, 'P', param['P_out'], 'WATER') / 1e6                          # MJ/kg
+        self.param['h_corrected'] = (self.param['h_isentrop'] - fp.PropsSI('H','P', param['P_in'], 'Q', 1, 'Water') / 1e6)/param['eta'] + fp.PropsSI('H', 'P', param['P_in'], 'Q', 1, 'Water') / 1e6 # MJ/kg
 
         self.param['dh'] = self.param['h_corrected'] - self.param['h_in']                                                                             # MJ/kg
 
-        self.param['h_FW'] = CP.PropsSI('H', 'T',  param['FW T_in']+273.15, 'P', param['FW P_in'], 'WATER') / 1e6                                     # MJ/kg
+        self.param['h_FW'] = fp.PropsSI('H', 'T',  param['FW T_in']+273.15, 'P', param['FW P_in'], 'WATER') / 1e6                                     # MJ/kg
 
-        if round(CP.PropsSI('T', 'Q',  1, 'P', param['P_out'], 'WATER')-273.15,4) == round(param['T_out'],4):           # enthalpy at saturation curve after freshwater addition
-            self.param['h_target'] = CP.PropsSI('H', 'Q',  1, 'P', param['P_out'], 'WATER') / 1e6                                                     # MJ/kg
+        if round(fp.PropsSI('T', 'Q',  1, 'P', param['P_out'], 'WATER')-273.15,4) == round(param['T_out'],4):           # enthalpy at saturation curve after freshwater addition
+            self.param['h_target'] = fp.PropsSI('H', 'Q',  1, 'P', param['P_out'], 'WATER') / 1e6                                                     # MJ/kg
         else:
-            self.param['h_target'] = CP.PropsSI('H', 'T', param['T_out']+273.15, 'P', param['P_out'], 'WATER') / 1e6                                 # MJ/kg
+            self.param['h_target'] = fp.PropsSI('H', 'T', param['T_out']+273.15, 'P', param['P_out'], 'WATER') / 1e6                                 # MJ/kg
 
         # from h_target * (m_in + m_FW) = h_corrected * m_in + h_FW * m_FW
         self.param['FW fraction'] = (self.param['h_target'] - self.param['h_corrected']) / (self.param['h_FW'] - self.param['h_target'])              # [-]
@@ -1927,15 +1864,7 @@ class VapourCompression(Unit):
         #     'i']) / param['depreciation_period']
 
         # Total objective, which is assigned directly to unit
-        obj = 0
-        obj += self.obj['opex_fix'].expr
-        obj += self.obj['cost_SU'].expr
-        obj += self.obj['cost_SD'].expr
-        obj += self.obj['inv']
-        namestr = 'obj_' + self.name + '_total'
-        system.model.add_component(namestr, pyo.Objective(expr=obj))
-        system.model.component(namestr).deactivate()
-        self.obj['total'] = system.model.component(namestr)
+        da.add_obj_total(self, ['opex_fix', 'cost_SU', 'cost_SD', 'inv'])
 
 class VapourCompressionEnhanced(Unit):
     def __init__(self, param, system):
@@ -1956,27 +1885,27 @@ class VapourCompressionEnhanced(Unit):
 
         self.param['stage'] = param['stage'] # currently not used
 
-        self.param['T_isentrop'] = CP.PropsSI('T', 'S', CP.PropsSI('S', 'P', param['P_in'], 'Q', 1, 'Water'), 'P', param['P_out'], 'Water')-273.15    # °C
-        self.param['h_in'] = CP.PropsSI('H', 'T', self.param['T_in'] + 273.15, 'P', param['P_in'], 'WATER') / 1e6                                       # MJ/kg
+        self.param['T_isentrop'] = fp.PropsSI('T', 'S', fp.PropsSI('S', 'P', param['P_in'], 'Q', 1, 'Water'), 'P', param['P_out'], 'Water')-273.15    # °C
+        self.param['h_in'] = fp.PropsSI('H', 'T', self.param['T_in'] + 273.15, 'P', param['P_in'], 'WATER') / 1e6                                       # MJ/kg
 
-        self.param['h_isentrop'] = CP.PropsSI('H', 'T', self.param['T_isentrop']+273.15, 'P', param['P_out'], 'WATER') / 1e6                          # MJ/kg
-        self.param['h_corrected_FL'] = (self.param['h_isentrop'] - CP.PropsSI('H','P', param['P_in'], 'Q', 1, 'Water') / 1e6)/param['eta'][1] + CP.PropsSI('H', 'P', param['P_in'], 'Q', 1, 'Water') / 1e6 # MJ/kg
-        self.param['h_corrected_PL'] = (self.param['h_isentrop'] - CP.PropsSI('H','P', param['P_in'], 'Q', 1, 'Water') / 1e6)/param['eta'][0] + CP.PropsSI('H', 'P', param['P_in'], 'Q', 1, 'Water') / 1e6 # MJ/kg
+        self.param['h_isentrop'] = fp.PropsSI('H', 'T', self.param['T_isentrop']+273.15, 'P', param['P_out'], 'WATER') / 1e6                          # MJ/kg
+        self.param['h_corrected_FL'] = (self.param['h_isentrop'] - fp.PropsSI('H','P', param['P_in'], 'Q', 1, 'Water') / 1e6)/param['eta'][1] + fp.PropsSI('H', 'P', param['P_in'], 'Q', 1, 'Water') / 1e6 # MJ/kg
+        self.param['h_corrected_PL'] = (self.param['h_isentrop'] - fp.PropsSI('H','P', param['P_in'], 'Q', 1, 'Water') / 1e6)/param['eta'][0] + fp.PropsSI('H', 'P', param['P_in'], 'Q', 1, 'Water') / 1e6 # MJ/kg
 
         self.param['dh_FL'] = self.param['h_corrected_FL'] - self.param['h_in']                                                                       # MJ/kg
         self.param['dh_PL'] = self.param['h_corrected_PL'] - self.param['h_in']                                                                       # MJ/kg
 
-        self.param['h_FW'] = CP.PropsSI('H', 'T',  param['FW T_in']+273.15, 'P', param['FW P_in'], 'WATER') / 1e6                                     # MJ/kg
+        self.param['h_FW'] = fp.PropsSI('H', 'T',  param['FW T_in']+273.15, 'P', param['FW P_in'], 'WATER') / 1e6                                     # MJ/kg
 
-        if round(CP.PropsSI('T', 'Q',  1, 'P', param['P_out'], 'WATER')-273.15,4) == round(param['T_in']+param['T_lift'],4):           # enthalpy at saturation curve after freshwater addition
-            self.param['h_target_FL'] = CP.PropsSI('H', 'Q',  1, 'P', param['P_out'], 'WATER') / 1e6                                                     # MJ/kg
+        if round(fp.PropsSI('T', 'Q',  1, 'P', param['P_out'], 'WATER')-273.15,4) == round(param['T_in']+param['T_lift'],4):           # enthalpy at saturation curve after freshwater addition
+            self.param['h_target_FL'] = fp.PropsSI('H', 'Q',  1, 'P', param['P_out'], 'WATER') / 1e6                                                     # MJ/kg
         else:
-            self.param['h_target_FL'] = CP.PropsSI('H', 'T',  param['T_in']+param['T_lift']+273.15, 'P', param['P_out'], 'WATER') / 1e6                                 # MJ/kg
+            self.param['h_target_FL'] = fp.PropsSI('H', 'T',  param['T_in']+param['T_lift']+273.15, 'P', param['P_out'], 'WATER') / 1e6                                 # MJ/kg
 
-        if round(CP.PropsSI('T', 'Q',  1, 'P', param['P_out'], 'WATER')-273.15,4) == round(param['T_in']+param['T_lift']-param['T_drop'],4):           # enthalpy at saturation curve after freshwater addition
-            self.param['h_target_PL'] = CP.PropsSI('H', 'Q',  1, 'P', param['P_out'], 'WATER') / 1e6                                                     # MJ/kg
+        if round(fp.PropsSI('T', 'Q',  1, 'P', param['P_out'], 'WATER')-273.15,4) == round(param['T_in']+param['T_lift']-param['T_drop'],4):           # enthalpy at saturation curve after freshwater addition
+            self.param['h_target_PL'] = fp.PropsSI('H', 'Q',  1, 'P', param['P_out'], 'WATER') / 1e6                                                     # MJ/kg
         else:
-            self.param['h_target_PL'] = CP.PropsSI('H', 'T',  param['T_in']+param['T_lift']-param['T_drop']+273.15, 'P', param['P_out'], 'WATER') / 1e6                                 # MJ/kg
+            self.param['h_target_PL'] = fp.PropsSI('H', 'T',  param['T_in']+param['T_lift']-param['T_drop']+273.15, 'P', param['P_out'], 'WATER') / 1e6                                 # MJ/kg
 
         # from h_target * (m_in + m_FW) = h_corrected * m_in + h_FW * m_FW
         self.param['FW fraction_FL'] = (self.param['h_target_FL'] - self.param['h_corrected_FL']) / (self.param['h_FW'] - self.param['h_target_FL'])              # [-]
@@ -2166,15 +2095,7 @@ class VapourCompressionEnhanced(Unit):
         #     'i']) / param['depreciation_period']
 
         # Total objective, which is assigned directly to unit
-        obj = 0
-        obj += self.obj['opex_fix'].expr
-        obj += self.obj['cost_SU'].expr
-        obj += self.obj['cost_SD'].expr
-        obj += self.obj['inv']
-        namestr = 'obj_' + self.name + '_total'
-        system.model.add_component(namestr, pyo.Objective(expr=obj))
-        system.model.component(namestr).deactivate()
-        self.obj['total'] = system.model.component(namestr)
+        da.add_obj_total(self, ['opex_fix', 'cost_SU', 'cost_SD', 'inv'])
 
 class Photovoltaic(Unit):
     def __init__(self, param, system):
@@ -2227,12 +2148,7 @@ class Photovoltaic(Unit):
         da.add_obj_inv(system, self)
 
         # Total objective, which is assigned directly to unit
-        obj = 0
-        obj += self.obj['inv']
-        namestr = 'obj_' + self.name + '_total'
-        system.model.add_component(namestr, pyo.Objective(expr=obj))
-        system.model.component(namestr).deactivate()
-        self.obj['total'] = system.model.component(namestr)
+        da.add_obj_total(self, ['inv'])
 
 class WindTurbinePark(Unit):
     def __init__(self, param, system):
@@ -2282,12 +2198,7 @@ class WindTurbinePark(Unit):
         da.add_obj_inv(system, self)
 
         # Total objective, which is assigned directly to unit
-        obj = 0
-        obj += self.obj['inv']
-        namestr = 'obj_' + self.name + '_total'
-        system.model.add_component(namestr, pyo.Objective(expr=obj))
-        system.model.component(namestr).deactivate()
-        self.obj['total'] = system.model.component(namestr)
+        da.add_obj_total(self, ['inv'])
 
 class SolarThermal(Unit):
     def __init__(self, param, system):
@@ -2319,12 +2230,10 @@ class SolarThermal(Unit):
         if self.param['cap_area'][0] > 0:
             self.param['i_active'] = True
 
-        self.param['h_in'] = dict()
-        for n in self.param['T_in']:
-            self.param['h_in'][n] = CP.PropsSI('H', 'T', n + 273.15, 'P', self.param['pressure'], self.param['medium'])
-        self.param['h_out'] = dict()
-        for n in self.param['T_out']:
-            self.param['h_out'][n] = CP.PropsSI('H', 'T', n + 273.15, 'P', self.param['pressure'], self.param['medium'])
+        for side in ['in', 'out']:
+            T = self.param['T_' + side]
+            h = fp.PropsSI('H', 'T', np.add(T, 273.15), 'P', self.param['pressure'], self.param['medium'])
+            self.param['h_' + side] = dict(zip(T, h.tolist()))
 
         # Variables
         self.var['seq'] = dict()
@@ -2400,16 +2309,11 @@ class SolarThermal(Unit):
         self.con[namestr] = pyo.Constraint(system.model.set_sc, system.model.set_t, rule=con_rule)
 
         # Objectives
-        self.obj['inv'] = (self.param['inv_var'] * self.var['scalar']['cap'] + self.param['inv_fix'] * self.var['scalar'][
-            'i']) / param['depreciation_period']
+        self.obj['inv'] = da.cost_expr(system, [(self.param['inv_var'] / param['depreciation_period'], self.var['scalar']['cap']),
+                                                (self.param['inv_fix'] / param['depreciation_period'], self.var['scalar']['i'])])
 
         # Total objective, which is assigned directly to unit
-        obj = 0
-        obj += self.obj['inv']
-        namestr = 'obj_' + self.name + '_total'
-        system.model.add_component(namestr, pyo.Objective(expr=obj))
-        system.model.component(namestr).deactivate()
-        self.obj['total'] = system.model.component(namestr)
+        da.add_obj_total(self, ['inv'])
 
 class HeatRecovery(Unit):
     def __init__(self, param, system):
@@ -2421,9 +2325,9 @@ class HeatRecovery(Unit):
         if self.param['cap_q'][0] > 0:
             self.param['i_active'] = True
 
-        self.param['h_in'] = CP.PropsSI('H', 'T', self.param['T_in'] + 273.15, 'P', self.param['pressure'],
+        self.param['h_in'] = fp.PropsSI('H', 'T', self.param['T_in'] + 273.15, 'P', self.param['pressure'],
                                         self.param['medium'])
-        self.param['h_out'] = CP.PropsSI('H', 'T', self.param['T_out'] + 273.15, 'P', self.param['pressure'],
+        self.param['h_out'] = fp.PropsSI('H', 'T', self.param['T_out'] + 273.15, 'P', self.param['pressure'],
                                          self.param['medium'])
 
         # Variables
@@ -2470,12 +2374,7 @@ class HeatRecovery(Unit):
         da.add_obj_inv(system, self)
 
         # Total objective, which is assigned directly to unit
-        obj = 0
-        obj += self.obj['inv']
-        namestr = 'obj_' + self.name + '_total'
-        system.model.add_component(namestr, pyo.Objective(expr=obj))
-        system.model.component(namestr).deactivate()
-        self.obj['total'] = system.model.component(namestr)
+        da.add_obj_total(self, ['inv'])
 
 class Storage(Unit):
     def __init__(self, param, system):
@@ -2541,12 +2440,7 @@ class Storage(Unit):
         da.add_obj_inv(system, self)
 
         # Total objective, which is assigned directly to unit
-        obj = 0
-        obj += self.obj['inv']
-        namestr = 'obj_' + self.name + '_total'
-        system.model.add_component(namestr, pyo.Objective(expr=obj))
-        system.model.component(namestr).deactivate()
-        self.obj['total'] = system.model.component(namestr)
+        da.add_obj_total(self, ['inv'])
 
 class PeriodStorage(Unit):
     def __init__(self, param, system):
@@ -2620,17 +2514,46 @@ class PeriodStorage(Unit):
         namestr = 'con_' + self.name + '_es_balance_' + 'soc_p'
         system.model.add_component(namestr, pyo.Constraint(self.param['set_n_period'], rule=con_rule))
 
-        # op_lim
+        # op_lim, soc at t2 of every period from the soc at its start and the charging of its typical period up to t2
+        # soc_p_form 'sum': each row sums the charging up to t2 itself, O(n_period * n_ts_sc**2) nonzeros
+        # soc_p_form 'cumulative': the discounted sums are states soc_cum of the typical periods, shared by all periods
+        # mapped to them, O((n_period + n_sc) * n_ts_sc) nonzeros. Without losses soc_cum is the intraperiod soc.
+        a = 1 - system.param['tss'] * self.param['loss_soc']
+        if self.param.get('soc_p_form', 'sum') == 'cumulative':
+            if self.param['loss_soc'] == 0:
+                def soc_cum(s, t2):
+                    return self.var['seq']['soc'][s, t2] - self.var['seq']['soc'][s, 0]
+            else:
+                self.var['seq']['soc_cum'] = pyo.Var(system.model.set_sc, system.model.set_t, domain=pyo.Reals)
+                namestr = 'var_' + self.name + '_soc_cum'
+                system.model.add_component(namestr, self.var['seq']['soc_cum'])
+
+                def con_rule(m, s, t):
+                    if t == 0:
+                        return self.var['seq']['soc_cum'][s, t] == 0
+                    return self.var['seq']['soc_cum'][s, t] - self.var['seq']['soc_cum'][s, t - 1] == a**(t - 1) * (
+                        self.param['eta_c/d'][0] * self.var['seq']['c'][s, t - 1] - 1 / self.param['eta_c/d'][1] *
+                        self.var['seq']['d'][s, t - 1]) * system.param['tss']
+                namestr = 'con_' + self.name + '_' + 'soc_cum'
+                system.model.add_component(namestr, pyo.Constraint(system.model.set_sc, system.model.set_t, rule=con_rule))
+
+                def soc_cum(s, t2):
+                    return self.var['seq']['soc_cum'][s, t2]
+
+            def soc_p_t2(t_p, t2):
+                return a**t2 * self.var['seq']['soc_p'][t_p] + soc_cum(self.param['set_period'][t_p], t2)
+        else:
+            def soc_p_t2(t_p, t2):
+                return a**t2 * self.var['seq']['soc_p'][t_p] + sum(a**t * (self.param['eta_c/d'][0] * self.var['seq']['c'][self.param['set_period'][t_p], t] - 1 / self.param['eta_c/d'][1] * self.var['seq']['d'][self.param['set_period'][t_p], t]) for t in range(t2)) * system.param['tss']
+
         def con_rule(m, t_p, t2):
-            # return (1 - system.param['tss'] * self.param['loss_soc'])**(t2) * self.var['seq']['soc_p'][t_p] + sum((1 - system.param['tss'] * self.param['loss_soc'])**(t2) * (self.param['eta_c/d'][0] * self.var['seq']['c'][self.param['set_period'][t_p], t] - 1 / self.param['eta_c/d'][1] * self.var['seq']['d'][self.param['set_period'][t_p], t]) for t in range(t2)) * system.param['tss'] <= self.var['scalar']['cap']
-            return (1 - system.param['tss'] * self.param['loss_soc'])**t2 * self.var['seq']['soc_p'][t_p] + sum((1 - system.param['tss'] * self.param['loss_soc'])**t * (self.param['eta_c/d'][0] * self.var['seq']['c'][self.param['set_period'][t_p], t] - 1 / self.param['eta_c/d'][1] * self.var['seq']['d'][self.param['set_period'][t_p], t]) for t in range(t2)) * system.param['tss'] <= self.var['scalar']['cap']
+            return soc_p_t2(t_p, t2) <= self.var['scalar']['cap']
         namestr = 'con_' + self.name + '_' + 'soc_p_max'
         system.model.add_component(namestr, pyo.Constraint(self.param['set_n_period'], system.model.set_t, rule=con_rule))
 
         # op_lim1
         def con_rule(m, t_p, t2):
-            # return (1 - system.param['tss'] * self.param['loss_soc'])**(t2) * self.var['seq']['soc_p'][t_p] + sum((1 - system.param['tss'] * self.param['loss_soc'])**(t2) * (self.param['eta_c/d'][0] * self.var['seq']['c'][self.param['set_period'][t_p], t] - 1 / self.param['eta_c/d'][1] * self.var['seq']['d'][self.param['set_period'][t_p], t]) for t in range(t2)) * system.param['tss'] <= self.var['scalar']['cap']
-            return (1 - system.param['tss'] * self.param['loss_soc'])**t2 * self.var['seq']['soc_p'][t_p] + sum((1 - system.param['tss'] * self.param['loss_soc'])**t * (self.param['eta_c/d'][0] * self.var['seq']['c'][self.param['set_period'][t_p], t] - 1 / self.param['eta_c/d'][1] * self.var['seq']['d'][self.param['set_period'][t_p], t]) for t in range(t2)) * system.param['tss'] >= 0
+            return soc_p_t2(t_p, t2) >= 0
         namestr = 'con_' + self.name + '_' + 'soc_p_max2'
         system.model.add_component(namestr, pyo.Constraint(self.param['set_n_period'], system.model.set_t, rule=con_rule))
 
@@ -2644,12 +2567,7 @@ class PeriodStorage(Unit):
         da.add_obj_inv(system, self)
 
         # Total objective, which is assigned directly to unit
-        obj = 0
-        obj += self.obj['inv']
-        namestr = 'obj_' + self.name + '_total'
-        system.model.add_component(namestr, pyo.Objective(expr=obj))
-        system.model.component(namestr).deactivate()
-        self.obj['total'] = system.model.component(namestr)
+        da.add_obj_total(self, ['inv'])
 
 class PeriodStorageSimple(Unit):
     def __init__(self, param, system):
@@ -2766,13 +2684,8 @@ class PeriodStorageSimple(Unit):
         #     'i']) / param['depreciation_period']
 
         # Total objective, which is assigned directly to unit
-        obj = 0
-        obj += self.obj['inv']
-        obj += (pyo.summation(self.var['seq']['d']) + pyo.summation(self.var['seq']['c'])) * 1e-5
-        namestr = 'obj_' + self.name + '_total'
-        system.model.add_component(namestr, pyo.Objective(expr=obj))
-        system.model.component(namestr).deactivate()
-        self.obj['total'] = system.model.component(namestr)
+        da.add_obj_total(self, ['inv'])
+        self.obj['total'] += da.cost_expr(system, [(1e-5, self.var['seq']['d']), (1e-5, self.var['seq']['c'])])
 
 class PeriodStorageSimple_CETES(Unit):
     def __init__(self, param, system):
@@ -2907,17 +2820,13 @@ class PeriodStorageSimple_CETES(Unit):
 
         # Objectives
         # da.add_obj_inv(system, self)
-        self.obj['inv'] = (self.param['inv_var_cap'] * self.var['scalar']['cap'] + self.param['inv_var_load'] * self.var['scalar']['c_d_max'] + self.param['inv_fix'] * self.var['scalar'][
-            'i']) / param['depreciation_period']
+        self.obj['inv'] = da.cost_expr(system, [(self.param['inv_var_cap'] / param['depreciation_period'], self.var['scalar']['cap']),
+                                                (self.param['inv_var_load'] / param['depreciation_period'], self.var['scalar']['c_d_max']),
+                                                (self.param['inv_fix'] / param['depreciation_period'], self.var['scalar']['i'])])
 
         # Total objective, which is assigned directly to unit
-        obj = 0
-        obj += self.obj['inv']
-        obj += (pyo.summation(self.var['seq']['d']) + pyo.summation(self.var['seq']['c'])) * 1e-5
-        namestr = 'obj_' + self.name + '_total'
-        system.model.add_component(namestr, pyo.Objective(expr=obj))
-        system.model.component(namestr).deactivate()
-        self.obj['total'] = system.model.component(namestr)
+        da.add_obj_total(self, ['inv'])
+        self.obj['total'] += da.cost_expr(system, [(1e-5, self.var['seq']['d']), (1e-5, self.var['seq']['c'])])
 
 class StratifiedMultiLayer(Unit):
     # Multi layer stratified storage
@@ -2930,9 +2839,8 @@ class StratifiedMultiLayer(Unit):
         if self.param['cap_soc'][0] > 0:
             self.param['i_active'] = True
 
-        self.param['H'] = dict()
-        for i in self.param['T']:
-            self.param['H'][i] = CP.PropsSI('H', 'T', i + 273.15, 'P', self.param['pressure'], self.param['medium'])
+        H = fp.PropsSI('H', 'T', np.add(self.param['T'], 273.15), 'P', self.param['pressure'], self.param['medium'])
+        self.param['H'] = dict(zip(self.param['T'], H.tolist()))
 
         # Variables
         self.var['seq'] = dict()
@@ -2998,13 +2906,7 @@ class StratifiedMultiLayer(Unit):
         da.add_obj_inv(system, self)
 
         # Total objective, which is assigned directly to unit
-        obj = 0
-        obj += self.obj['inv']
-        # obj += self.obj['opex_var'].expr
-        namestr = 'obj_' + self.name + '_total'
-        system.model.add_component(namestr, pyo.Objective(expr=obj))
-        system.model.component(namestr).deactivate()
-        self.obj['total'] = system.model.component(namestr)
+        da.add_obj_total(self, ['inv'])     # 'opex_var'
 
 class Demand(Unit):
     def __init__(self, param, system):
@@ -3031,23 +2933,17 @@ class Demand(Unit):
             self.con[namestr] = pyo.Constraint(system.model.set_sc, system.model.set_t, rule=con_rule)
 
         # Objectives
-        obj = 0
-        namestr = 'obj_' + self.name + '_total'
-        system.model.add_component(namestr, pyo.Objective(expr=obj))
-        system.model.component(namestr).deactivate()
-        self.obj['total'] = system.model.component(namestr)
+        da.add_obj_total(self, [])
 
 class HeatDemand(Unit):
     def __init__(self, param, system):
         Unit.__init__(self, param, system)
 
         # Parameters
-        self.param['h_in'] = dict()
-        for n in self.param['T_in']:
-            self.param['h_in'][n] = CP.PropsSI('H', 'T', n + 273.15, 'P', self.param['pressure'], self.param['medium'])
-        self.param['h_out'] = dict()
-        for n in self.param['T_out']:
-            self.param['h_out'][n] = CP.PropsSI('H', 'T', n + 273.15, 'P', self.param['pressure'], self.param['medium'])
+        for side in ['in', 'out']:
+            T = self.param['T_' + side]
+            h = fp.PropsSI('H', 'T', np.add(T, 273.15), 'P', self.param['pressure'], self.param['medium'])
+            self.param['h_' + side] = dict(zip(T, h.tolist()))
 
         # Variables
         self.var['seq'] = dict()
@@ -3110,11 +3006,7 @@ class HeatDemand(Unit):
                                                rule=con_rule)
 
         # Objectives
-        obj = 0
-        namestr = 'obj_' + self.name + '_total'
-        system.model.add_component(namestr, pyo.Objective(expr=obj))
-        system.model.component(namestr).deactivate()
-        self.obj['total'] = system.model.component(namestr)
+        da.add_obj_total(self, [])
 
 class Supply(Unit):
     def __init__(self, param, system):
@@ -3215,99 +3107,30 @@ class Supply(Unit):
 
 
         # Objectives
-        obj = sum(
-            self.var['seq']['s'][s, t] * self.param['seq'][s, t] * system.param['sc'][s][0] for s in system.model.set_sc
-            for t in system.model.set_t) / system.param['dur_sc'] * 8760
-        namestr = 'obj_' + self.name + '_energy'
-        system.model.add_component(namestr, pyo.Objective(expr=obj))
-        system.model.component(namestr).deactivate()
-        self.obj['energy'] = system.model.component(namestr)
+        seq = self.var['seq']
+        self.obj['energy'] = da.cost_expr(system, [(da.seq_coefs(system, lambda s, t: self.param['seq'][s, t])
+                                                    * da.annual_weight(system), seq['s'])])
 
         # add costs for additional features, max power investment co2 factors
         if 'cap_existing' in self.param.keys():
-            obj = (self.var['scalar']['dec_cap_expansion'] * self.param['cost_fix_ex'] +
-                   self.var['scalar']['cap_expansion'] * self.param['cost_max_ex']) / system.param['depreciation_period']
-            namestr = 'obj_' + self.name + '_inv'
-            system.model.add_component(namestr, pyo.Objective(expr=obj))
-            system.model.component(namestr).deactivate()
-            self.obj['inv'] = system.model.component(namestr)
-
-        if 'co2_biogen' in self.param.keys():
-            obj = sum(
-                self.var['seq']['m_co2_biogen'][s, t] * system.param['sc'][s][0] for s in system.model.set_sc
-                for t in system.model.set_t) * system.param['cost_co2_biogen'] / system.param['dur_sc'] * 8760
-            namestr = 'obj_' + self.name + '_co2_biogen'
-            system.model.add_component(namestr, pyo.Objective(expr=obj))
-            system.model.component(namestr).deactivate()
-            self.obj['co2_biogen'] = system.model.component(namestr)
-
-            obj_mass = sum(
-                self.var['seq']['m_co2_biogen'][s, t] * system.param['sc'][s][0] for s in system.model.set_sc
-                for t in system.model.set_t) / system.param['dur_sc'] * 8760
-            namestr = 'obj_mass_' + self.name + '_co2_biogen'
-            system.model.add_component(namestr, pyo.Objective(expr=obj_mass))
-            system.model.component(namestr).deactivate()
-            self.obj['mass_biogen'] = system.model.component(namestr)
+            self.obj['inv'] = da.cost_expr(system, [
+                (self.param['cost_fix_ex'] / system.param['depreciation_period'], self.var['scalar']['dec_cap_expansion']),
+                (self.param['cost_max_ex'] / system.param['depreciation_period'], self.var['scalar']['cap_expansion'])])
 
-        if 'co2_fossil' in self.param.keys():
-            obj = sum(
-                self.var['seq']['m_co2_fossil'][s, t] * system.param['sc'][s][0] for s in system.model.set_sc
-                for t in system.model.set_t) * system.param['cost_co2_fossil'] / system.param['dur_sc'] * 8760
-            namestr = 'obj_' + self.name + '_co2_fossil'
-            system.model.add_component(namestr, pyo.Objective(expr=obj))
-            system.model.component(namestr).deactivate()
-            self.obj['co2_fossil'] = system.model.component(namestr)
-
-            obj_mass =sum(
-                self.var['seq']['m_co2_fossil'][s, t] * system.param['sc'][s][0] for s in system.model.set_sc
-                for t in system.model.set_t) / system.param['dur_sc'] * 8760
-            namestr = 'obj_mass_' + self.name + '_co2_fossil'
-            system.model.add_component(namestr, pyo.Objective(expr=obj_mass))
-            system.model.component(namestr).deactivate()
-            self.obj['mass_fossil'] = system.model.component(namestr)
+        for co2, mass in [('co2_biogen', 'mass_biogen'), ('co2_fossil', 'mass_fossil')]:
+            if co2 in self.param.keys():
+                self.obj[co2] = da.cost_expr(system, [(da.annual_weight(system, system.param['cost_' + co2]),
+                                                       seq['m_' + co2])])
+                self.obj[mass] = da.cost_expr(system, [(da.annual_weight(system), seq['m_' + co2])])
 
         # add costs for peak load (annual costs)
 
         if 'cost_max_load' in self.param:
-            obj = self.var['scalar']['cap'] * self.param['cost_max_load']
-            namestr = 'obj_' + self.name + '_max_s'
-            system.model.add_component(namestr, pyo.Objective(expr=obj))
-            system.model.component(namestr).deactivate()
-            self.obj['max_s'] = system.model.component(namestr)
-
-        obj = 0
-        obj += self.obj['energy'].expr
-        if 'cost_max_load' in self.param:
-            obj += self.obj['max_s'].expr
-        if 'cap_existing' in self.param:
-            obj += self.obj['inv'].expr
-        if 'co2_biogen' in self.param:
-            obj += self.obj['co2_biogen'].expr
-        if 'co2_fossil' in self.param:
-            obj += self.obj['co2_fossil'].expr
-
-        namestr = 'obj_' + self.name + '_total'
-        system.model.add_component(namestr, pyo.Objective(expr=obj))
-        system.model.component(namestr).deactivate()
-        self.obj['total'] = system.model.component(namestr)
-
-        obj_co2 = 0
-        if 'co2_biogen' in self.param:
-            obj_co2 += self.obj['mass_biogen'].expr
-
-        namestr = 'obj_co2' + self.name + '_co2_total_bio'
-        system.model.add_component(namestr, pyo.Objective(expr=obj_co2))
-        system.model.component(namestr).deactivate()
-        self.obj['co2_total_bio'] = system.model.component(namestr)
-
-        obj_co2 = 0
-        if 'co2_fossil' in self.param:
-            obj_co2 += self.obj['mass_fossil'].expr
-
-        namestr = 'obj_co2' + self.name + '_co2_total_fossil'
-        system.model.add_component(namestr, pyo.Objective(expr=obj_co2))
-        system.model.component(namestr).deactivate()
-        self.obj['co2_total_fossil'] = system.model.component(namestr)
+            self.obj['max_s'] = da.cost_expr(system, [(self.param['cost_max_load'], self.var['scalar']['cap'])])
+
+        da.add_obj_total(self, ['energy', 'max_s', 'inv', 'co2_biogen', 'co2_fossil'])
+        self.obj['co2_total_bio'] = self.obj.get('mass_biogen', mm.LinExpr()) + 0
+        self.obj['co2_total_fossil'] = self.obj.get('mass_fossil', mm.LinExpr()) + 0
 
     def get_supply(self, system):
         return sum(
@@ -3319,9 +3142,9 @@ class DistrictHeating(Unit):
         Unit.__init__(self, param, system)
 
         # Parameters
-        self.param['h_in'] = CP.PropsSI('H', 'T', self.param['T_in'] + 273.15, 'P', self.param['pressure'],
+        self.param['h_in'] = fp.PropsSI('H', 'T', self.param['T_in'] + 273.15, 'P', self.param['pressure'],
                                         self.param['medium'])
-        self.param['h_out'] = CP.PropsSI('H', 'T', self.param['T_out'] + 273.15, 'P', self.param['pressure'],
+        self.param['h_out'] = fp.PropsSI('H', 'T', self.param['T_out'] + 273.15, 'P', self.param['pressure'],
                                          self.param['medium'])
 
         if 'cap_q' not in self.param:
@@ -3359,29 +3182,13 @@ class DistrictHeating(Unit):
         da.add_cap_lim(self, ['q'])
 
         # Objectives
-        obj = sum(
-            self.var['seq']['q'][s, t] * self.param['seq'][s][t] * system.param['sc'][s][0] for s in system.model.set_sc
-            for t in system.model.set_t) / system.param['dur_sc'] * 8760
-        namestr = 'obj_' + self.name + '_energy'
-        system.model.add_component(namestr, pyo.Objective(expr=obj))
-        system.model.component(namestr).deactivate()
-        self.obj['energy'] = system.model.component(namestr)
+        self.obj['energy'] = da.cost_expr(system, [(da.seq_coefs(system, lambda s, t: self.param['seq'][s][t])
+                                                    * da.annual_weight(system), self.var['seq']['q'])])
 
         if 'cost_max_q' in self.param:
-            obj = self.var['scalar']['cap'] * self.param['cost_max_q']
-            namestr = 'obj_' + self.name + '_max_q'
-            system.model.add_component(namestr, pyo.Objective(expr=obj))
-            system.model.component(namestr).deactivate()
-            self.obj['max_q'] = system.model.component(namestr)
-
-        obj = 0
-        obj += self.obj['energy'].expr
-        if 'cost_max_q' in self.param:
-            obj += self.obj['max_q'].expr
-        namestr = 'obj_' + self.name + '_total'
-        system.model.add_component(namestr, pyo.Objective(expr=obj))
-        system.model.component(namestr).deactivate()
-        self.obj['total'] = system.model.component(namestr)
+            self.obj['max_q'] = da.cost_expr(system, [(self.param['cost_max_q'], self.var['scalar']['cap'])])
+
+        da.add_obj_total(self, ['energy', 'max_q'])
 
 class GeothermalPlant(Unit):
     def __init__(self, param, system):
@@ -3394,7 +3201,7 @@ class GeothermalPlant(Unit):
         if self.param['d_boundaries'][0] > 0:
             self.param['i_active'] = True
 
-        self.param['c_p'] = CP.PropsSI('C', 'T', param['T_amb'] + 273.15,
+        self.param['c_p'] = fp.PropsSI('C', 'T', param['T_amb'] + 273.15,
                                        'P', 101325, 'Water')                           # J/kg.K
 
         # Variables
@@ -3456,13 +3263,7 @@ class GeothermalPlant(Unit):
         da.add_obj_inv(system, self)
 
         # Total objective, which is assigned directly to unit
-        obj = 0
-        obj += self.obj['opex_fix'].expr
-        obj += self.obj['inv']
-        namestr = 'obj_' + self.name + '_total'
-        system.model.add_component(namestr, pyo.Objective(expr=obj))
-        system.model.component(namestr).deactivate()
-        self.obj['total'] = system.model.component(namestr)
+        da.add_obj_total(self, ['opex_fix', 'inv'])
 
 class CascadicHeatExchanger(Unit):
     def __init__(self, param, system):
@@ -3493,11 +3294,7 @@ class CascadicHeatExchanger(Unit):
         self.con[namestr] = pyo.Constraint(system.model.set_sc, system.model.set_t, rule=con_rule)
 
         # Objective
-        obj = 0
-        namestr = 'obj_' + self.name + '_total'
-        system.model.add_component(namestr, pyo.Objective(expr=obj))
-        system.model.component(namestr).deactivate()
-        self.obj['total'] = system.model.component(namestr)
+        da.add_obj_total(self, [])
 
 class Coupler(Unit):
     def __init__(self, param, system):
@@ -3528,11 +3325,7 @@ class Coupler(Unit):
         self.con[namestr] = pyo.Constraint(system.model.set_sc, system.model.set_t, rule=con_rule)
 
         # Objective
-        obj = 0
-        namestr = 'obj_' + self.name + '_total'
-        system.model.add_component(namestr, pyo.Objective(expr=obj))
-        system.model.component(namestr).deactivate()
-        self.obj['total'] = system.model.component(namestr)
+        da.add_obj_total(self, [])
 
 class Node(Unit):
     def __init__(self, param, system):
@@ -3576,20 +3369,10 @@ class Node(Unit):
 
         # Objectives
         big_m = 1e8
-        obj = big_m * sum(self.var['seq'][n][s, t] for n in ['slack_lhs', 'slack_rhs'] for s in system.model.set_sc
-                          for t in system.model.set_t)
-        namestr = 'obj_' + self.name + '_slack'
-        system.model.add_component(namestr, pyo.Objective(expr=obj))
-        system.model.component(namestr).deactivate()
-        self.obj['slack'] = system.model.component(namestr)
+        self.obj['slack'] = da.cost_expr(system, [(big_m, self.var['seq'][n]) for n in ['slack_lhs', 'slack_rhs']])
 
         # Total objective, which is assigned directly to unit
-        obj = 0
-        obj += self.obj['slack'].expr
-        namestr = 'obj_' + self.name + '_total'
-        system.model.add_component(namestr, pyo.Objective(expr=obj))
-        system.model.component(namestr).deactivate()
-        self.obj['total'] = system.model.component(namestr)
+        da.add_obj_total(self, ['slack'])
 
 class GridService(Unit):
     def __init__(self, param, system):
@@ -3707,39 +3490,25 @@ class GridService(Unit):
 
         # ==============================================================================================================
         # Linear cost function
-        power_costs = 0
-        energy_spec_costs = 0
-        try:
-            power_costs = sum(power_price[s][t] * self.var['seq']['p_res'][s, t] for s in system.model.set_sc for t in system.model.set_t) * system.param['tss'] / gs_duration
-        except:
-            print('power price is scalar')
-            power_costs = sum(power_price * self.var['seq']['p_res'][s, t] for s in system.model.set_sc for t in system.model.set_t) * system.param['tss'] / gs_duration
-
-        if param['type'] in ['SRL neg', 'SRL pos']:
+        def price_coefs(price, name):
             try:
-                energy_spec_costs = sum(energy_price[s][t] * self.var['seq']['p_pos'][s, t] for s in system.model.set_sc for t in system.model.set_t) * system.param['tss'] \
-                                    + sum(energy_price[s][t] * self.var['seq']['p_neg'][s, t] for s in system.model.set_sc for t in system.model.set_t) * system.param['tss']
+                return da.seq_coefs(system, lambda s, t: price[s][t])
             except:
-                print('energy price is scalar')
-                energy_spec_costs = sum(energy_price * self.var['seq']['p_pos'][s, t] for s in system.model.set_sc for t in system.model.set_t) * system.param['tss'] \
-                                    + sum(energy_price * self.var['seq']['p_neg'][s, t] for s in system.model.set_sc for t in system.model.set_t) * system.param['tss']
-
-        energy_costs = power_costs + energy_spec_costs
-
+                print(name + ' price is scalar')
+                return price
 
+        terms = [(price_coefs(power_price, 'power') * system.param['tss'] / gs_duration, self.var['seq']['p_res'])]
+        if param['type'] in ['SRL neg', 'SRL pos']:
+            energy_coefs = price_coefs(energy_price, 'energy') * system.param['tss']
+            terms += [(energy_coefs, self.var['seq']['p_pos']), (energy_coefs, self.var['seq']['p_neg'])]
 
         # energy_costs = energy_costs * 365*24 / ((model.set_timesteps[-1]+1)*settings['stepsize'])
 
         #work_costs = np.multiply(energy_price, power)
         #energy_costs = (power_price*max_power) + (summation(work_costs) * settings['stepsize'])
 
-        self.energy_costs = energy_costs
-
-        obj = self.energy_costs
-        namestr = 'obj_' + self.name + '_energy'
-        system.model.add_component(namestr, pyo.Objective(expr=obj))
-        system.model.component(namestr).deactivate()
-        self.obj['energy'] = system.model.component(namestr)
+        self.energy_costs = da.cost_expr(system, terms)
+        self.obj['energy'] = self.energy_costs
 
 #-----------------------#
 ### ADDITIONS FOR UPM ###
@@ -3835,15 +3604,7 @@ class PaperMachine(Unit):
         ## fixme define costs constraints, etc.!
 
         # Total objective, which is assigned directly to unit
-        obj = 0
-        #obj += self.obj['opex_fix'].expr
-        #obj += self.obj['cost_SU'].expr
-        #obj += self.obj['cost_SD'].expr
-        #obj += self.obj['inv']
-        namestr = 'obj_' + self.name + '_total'
-        system.model.add_component(namestr, pyo.Objective(expr=obj))
-        system.model.component(namestr).deactivate()
-        self.obj['total'] = system.model.component(namestr)
+        da.add_obj_total(self, [])
 
 class GroundWood(Unit):
     def __init__(self, param, system):
@@ -4072,19 +3833,10 @@ class HoursRegime(Unit):
 
         # Objectives
         ## add costs for 7000 hours regime violation penalty
-        obj = (self.var['scalar']['penalty'] * self.param['cost_violation'])
-        namestr = 'obj_' + self.name + '_penalty'
-        system.model.add_component(namestr, pyo.Objective(expr=obj))
-        system.model.component(namestr).deactivate()
-        self.obj['penalty'] = system.model.component(namestr)
+        self.obj['penalty'] = da.cost_expr(system, [(self.param['cost_violation'], self.var['scalar']['penalty'])])
 
 
-        obj = 0
-        obj += self.obj['penalty'].expr
-        namestr = 'obj_' + self.name + '_total'
-        system.model.add_component(namestr, pyo.Objective(expr=obj))
-        system.model.component(namestr).deactivate()
-        self.obj['total'] = system.model.component(namestr)
+        da.add_obj_total(self, ['penalty'])
 
 class PersonelCost(Unit):
     def __init__(self, param, system):
@@ -4113,17 +3865,9 @@ class PersonelCost(Unit):
             self.con[namestr] = pyo.Constraint(system.model.set_sc, set_days, rule=con_rule)
 
         # Objective
-        obj = sum(self.var['seq']['o'][s, t] * self.param['seq'][s, t] for s in system.model.set_sc for t in system.model.set_t)
-        namestr = 'obj_' + self.name + '_holiday'
-        system.model.add_component(namestr, pyo.Objective(expr=obj))
-        system.model.component(namestr).deactivate()
-        self.obj['holiday'] = system.model.component(namestr)
+        self.obj['holiday'] = da.cost_expr(system, [(da.seq_coefs(system, lambda s, t: self.param['seq'][s, t]),
+                                                     self.var['seq']['o'])])
 
 
         # Total objective, which is assigned directly to unit
-        obj = 0
-        obj += self.obj['holiday'].expr
-        namestr = 'obj_' + self.name + '_total'
-        system.model.add_component(namestr, pyo.Objective(expr=obj))
-        system.model.component(namestr).deactivate()
-        self.obj['total'] = system.model.component(namestr)
+        da.add_obj_total(self, ['holiday'])
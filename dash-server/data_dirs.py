@@ -0,0 +1,12 @@
+import os
+
+# Directories of the disk caches, the job queue and the run metrics of the dash server, kept outside the source tree:
+# DATA_DIR/<name> with DATA_DIR from DEKARPIO_DATA_DIR (default ~/.cache/dekarpio), a single directory can be moved
+# with DEKARPIO_<NAME>, e.g. DEKARPIO_RESULT_CACHE=/srv/result_cache. The web server and the worker pool
+# (simulation_jobs.py) exchange jobs and results through these directories and need the same settings.
+
+DATA_DIR = os.environ.get('DEKARPIO_DATA_DIR', os.path.join(os.path.expanduser('~'), '.cache', 'dekarpio'))
+
+
+def data_dir(name):
+    return os.environ.get('DEKARPIO_' + name.upper(), os.path.join(DATA_DIR, name))
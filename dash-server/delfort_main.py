@@ -23,32 +23,7 @@ import DOOM.classes as dc
 import DOOM.auxiliary as da
 
 
-def run_case():
-
-    scenario_nr = 0
-
-    # OPTIMIZATION
-    # ==================================================================================================================
-    # ==================================================================================================================
-
-    # ==================================================================================================================
-    # General settings
-    # ==================================================================================================================
-
-    settings = {
-        'optimization type': 'linear',  # 'linear', 'quadratic'
-        'time limit': 18000,
-    }
-
-    # ==================================================================================================================
-    # Prepare Case-Study
-    # ==================================================================================================================
-
-    timeseries = delfort_system_simple.make_simple_timeseries(scenario_nr)
-
-    # DOOM -------------------------------------------------------------------------------
-    print('import finished')
-
+def make_sys_param(timeseries, scenario_nr, settings, interest_rate=0.0):
     sum_weight = 1
     u_w_dict = dict()
     period_list = [1]
@@ -71,12 +46,42 @@ def run_case():
                 'tss': 0.25,  # tss: timestep
                 'n_ts_sc': len(timeseries),  # n_ts_sc: nr. of timesteps per scenario/period
 
-                'interest_rate': 0.0,
+                'interest_rate': interest_rate,
                 'depreciation_period': 10,
                 'opt': {
                     'timelimit': settings['time limit'],
                 }
                 }
+    return sysParam
+
+
+def run_case():
+
+    scenario_nr = 0
+
+    # OPTIMIZATION
+    # ==================================================================================================================
+    # ==================================================================================================================
+
+    # ==================================================================================================================
+    # General settings
+    # ==================================================================================================================
+
+    settings = {
+        'optimization type': 'linear',  # 'linear', 'quadratic'
+        'time limit': 18000,
+    }
+
+    # ==================================================================================================================
+    # Prepare Case-Study
+    # ==================================================================================================================
+
+    timeseries = delfort_system_simple.make_simple_timeseries(scenario_nr)
+
+    # DOOM -------------------------------------------------------------------------------
+    print('import finished')
+
+    sysParam = make_sys_param(timeseries, scenario_nr, settings)
 
     # ==================================================================================================================
     # ENERGY SYSTEM
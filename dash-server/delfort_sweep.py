@@ -0,0 +1,132 @@
+import os
+import time
+import argparse
+import itertools
+import contextlib
+import numpy as np
+import pandas as pd
+import pyomo.environ as pyo
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import delfort_main
+import delfort_system_simple
+
+# Scenario sweep for delfort_system_simple. Every combination of scenario number and parameter overrides is one case,
+# cases are built and solved with HiGHS in a pool of worker processes. Each finished case is written to
+# <out_dir>/case_<n>.npz (one array per unit variable, log in case_<n>.log), the KPI table of all finished cases is
+# rewritten to <out_dir>/kpi.csv after every case. workers * threads should not exceed the number of cores.
+#
+#   cases = make_grid([0, 4, 6], cost_co2=[70, 150], interest_rate=[0.0, 0.05])
+#   kpi = run_sweep(cases, 'sweep', workers=8, threads=2)
+
+SCRIPT_DIR = os.path.dirname(os.path.realpath(__file__))
+OVERRIDES = delfort_system_simple.price_names + ['cost_co2', 'interest_rate']
+
+settings = {
+    'optimization type': 'linear',  # 'linear', 'quadratic'
+    'time limit': 18000,
+}
+
+
+def make_grid(scenarios, **overrides):
+    for key in overrides:
+        if key not in OVERRIDES:
+            raise ValueError('Unknown override {}, use one of {}.'.format(key, OVERRIDES))
+    cases = []
+    for n, values in enumerate(itertools.product(scenarios, *overrides.values())):
+        case = {'case': n, 'scenario': values[0]}
+        case.update(zip(overrides.keys(), values[1:]))
+        cases.append(case)
+    return cases
+
+
+def variable_columns(res):
+    columns = {}
+    for name, unit in res.unit.items():
+        for kind in ['seq', 'scalar']:
+            for v, var in unit.var.get(kind, {}).items():
+                values = [np.nan if x is None else x for x in var.get_values().values()]
+                columns[name + '/' + v] = np.array(values, dtype=float)
+    return columns
+
+
+def kpis(res):
+    result = {'TAC': pyo.value(res.obj['total'])}
+    weights = {s: w[0] for s, w in res.param['sc'].items()}
+    for name, unit in res.unit.items():
+        if isinstance(unit, delfort_system_simple.dc.Supply):
+            s = unit.var['seq']['s']
+            result['energy_' + name] = sum(weights[k[0]] * (s[k].value or 0) for k in s) * res.param['tss']
+            result['cost_' + name] = pyo.value(unit.obj['total'])
+        if 'cap' in unit.var.get('scalar', {}):
+            result['cap_' + name] = unit.var['scalar']['cap'].value
+    return result
+
+
+def solve_case(case, out_dir, threads=1):
+    row = dict(case)
+    path = os.path.join(out_dir, 'case_{}'.format(case['case']))
+    with open(path + '.log', 'w') as log, contextlib.redirect_stdout(log):
+        try:
+            tic = time.perf_counter()
+            overrides = {k: v for k, v in case.items() if k in delfort_system_simple.price_names + ['cost_co2']}
+            timeseries = delfort_system_simple.make_simple_timeseries(case['scenario'], overrides)
+            sysParam = delfort_main.make_sys_param(timeseries, case['scenario'], settings,
+                                                   interest_rate=case.get('interest_rate', 0.0))
+            res, units, unit_port, units_energy_plot = delfort_system_simple.build_system(sysParam)
+            row['build_s'] = time.perf_counter() - tic
+
+            tic = time.perf_counter()
+            res = delfort_main.da.solve_model(res, solver='highs', threads=threads, tee=False)
+            row['solve_s'] = time.perf_counter() - tic
+            row['status'] = str(res.model.result.termination_condition).split('.')[-1]
+
+            row.update(kpis(res))
+            np.savez_compressed(path + '.npz', **variable_columns(res))
+        except Exception as e:
+            row['status'] = 'error: {}'.format(e)
+    return row
+
+
+def init_worker():
+    # relative data paths of delfort_system_simple, e.g. traun_wetterdaten_2019.csv
+    os.chdir(SCRIPT_DIR)
+
+
+def run_sweep(cases, out_dir, workers=None, threads=1):
+    out_dir = os.path.abspath(out_dir)
+    os.makedirs(out_dir, exist_ok=True)
+    workers = workers or max(1, (os.cpu_count() or 1) // threads)
+
+    rows = []
+    kpi = pd.DataFrame()
+    with ProcessPoolExecutor(max_workers=workers, initializer=init_worker) as pool:
+        futures = [pool.submit(solve_case, case, out_dir, threads) for case in cases]
+        for future in as_completed(futures):
+            row = future.result()
+            rows.append(row)
+            kpi = pd.DataFrame(rows).sort_values('case').reset_index(drop=True)
+            kpi.to_csv(os.path.join(out_dir, 'kpi.csv'), index=False)
+            print('case {} ({}/{}): {}'.format(row['case'], len(rows), len(cases), row['status']))
+    return kpi
+
+
+def parse_values(text):
+    return [float(x) for x in text.split(',')]
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Solve delfort_system_simple for a grid of scenarios.')
+    parser.add_argument('scenarios', type=int, nargs='+')
+    for key in OVERRIDES:
+        parser.add_argument('--' + key.replace('_', '-'), type=parse_values, metavar='V1,V2,...')
+    parser.add_argument('--workers', type=int, default=None, help='parallel cases, default: cores / threads')
+    parser.add_argument('--threads', type=int, default=1, help='HiGHS threads per case')
+    parser.add_argument('-o', '--output', default='sweep')
+    args = parser.parse_args()
+
+    overrides = {key: getattr(args, key) for key in OVERRIDES if getattr(args, key) is not None}
+    cases = make_grid(args.scenarios, **overrides)
+    tic = time.perf_counter()
+    kpi = run_sweep(cases, args.output, workers=args.workers, threads=args.threads)
+    print(kpi.to_string(index=False))
+    print('{} cases in {:.1f} seconds'.format(len(cases), time.perf_counter() - tic))
@@ -18,6 +18,10 @@ import DOOM.classes as dc
 import DOOM.auxiliary as da
 
 
+# Prices, see get_scenario_prices
+price_names = ['price_el', 'price_gas', 'price_h2', 'price_biomass', 'price_biogas']
+ef_gas = 0.20196        # [t/MWh], CO2 emissions of natural gas
+
 # # Existing Units
 # # ================================================================================================================
 
@@ -859,7 +863,10 @@ def build_system(sysParam):
 
     return res, units, unit_port, units_energy_plot
 
-def make_simple_timeseries(scenario_nr):
+def make_simple_timeseries(scenario_nr, overrides=None):
+    # overrides: prices replacing the ones of the scenario, e.g. {'price_el': 200, 'cost_co2': 100}, see
+    # get_scenario_prices
+    overrides = overrides or {}
     # 1 year long timeseries
     start = pd.to_datetime('1st of January, 2022, 0:00')
     end = pd.to_datetime('1st of January, 2022, 23:00')
@@ -891,13 +898,10 @@ def make_simple_timeseries(scenario_nr):
     df['supply_waste_heat_1'] = np.ones(len(df.Datetime)) * wh1
 
     # Supplies
-    [price_el, price_gas, price_h2, price_biomass, price_biogas] = get_scenario_prices(scenario_nr)
+    prices = get_scenario_prices(scenario_nr, overrides)
 
-    df['price_el'] = np.ones(len(df.Datetime)) * price_el
-    df['price_gas'] = np.ones(len(df.Datetime)) * price_gas
-    df['price_h2'] = np.ones(len(df.Datetime)) * price_h2
-    df['price_biomass'] = np.ones(len(df.Datetime)) * price_biomass
-    df['price_biogas'] = np.ones(len(df.Datetime)) * price_biogas
+    for name, price in zip(price_names, prices):
+        df[name] = np.ones(len(df.Datetime)) * price
 
     # Solar irradiance
 
@@ -918,90 +922,107 @@ def make_simple_timeseries(scenario_nr):
 
     return df
 
-def get_scenario_prices(scenario_nr):
+def get_scenario_prices(scenario_nr, overrides=None):
+    # overrides: {price name or 'cost_co2': value} replacing the prices of the scenario. 'price_gas' is the natural gas
+    # price without CO2 certificates, the certificates are added with cost_co2 like for the scenario prices
+    overrides = overrides or {}
     scenarios = [
         [   # scenario 0
             400,                   # [€/MWh], electricity price
-            170 + 0.20196 * 70,    # [€/MWh], natural gas price + Certificate price (CO2)
+            170,                   # [€/MWh], natural gas price without CO2 certificates
             300,                   # [€/MWh], hydrogen price
             50,                    # [€/MWh], biomass price
             140,                   # [€/MWh], biogas (biomethane) price
+            70,                    # [€/t], CO2 certificate price
          ],
 
         [   # scenario 1
             400,                   # electricity price
-            170 + 0.20196 * 1e5,   # natural gas price
+            170,                   # natural gas price without CO2 certificates
             300,                   # hydrogen price
             50,                    # biomass price
             140,                   # biogas (biomethane) price
+            1e5,                   # CO2 certificate price
          ],
 
         [   # scenario 2
             400,                   # electricity price
-            170 + 0.20196 * 70,    # natural gas price
+            170,                   # natural gas price without CO2 certificates
             300,                   # hydrogen price
             50,                    # biomass price
             140,                   # biogas (biomethane) price
+            70,                    # CO2 certificate price
          ],
 
         [  # scenario 3
             400,                   # electricity price
-            170 + 0.20196 * 1e5,   # natural gas price
+            170,                   # natural gas price without CO2 certificates
             300,                   # hydrogen price
             50,                    # biomass price
             140,                   # biogas (biomethane) price
+            1e5,                   # CO2 certificate price
         ],
 
         [  # scenario 4
             150,                   # electricity price
-            200 + 0.20196 * 70,    # natural gas price
+            200,                   # natural gas price without CO2 certificates
             300,                   # hydrogen price
             50,                    # biomass price
             140,                   # biogas (biomethane) price
+            70,                    # CO2 certificate price
         ],
         [  # scenario 5
             400,                   # electricity price
-            170 + 0.20196 * 1e5,   # natural gas price
+            170,                   # natural gas price without CO2 certificates
             300,                   # hydrogen price
             50,                    # biomass price
             140,                   # biogas (biomethane) price
+            1e5,                   # CO2 certificate price
         ],
 
         [   # scenario 6
             285,                   # [€/MWh], electricity price
-            170 + 0.20196 * 70,    # [€/MWh], natural gas price + Certificate price (CO2)
+            170,                   # [€/MWh], natural gas price without CO2 certificates
             300,                   # [€/MWh], hydrogen price
             50,                    # [€/MWh], biomass price
             140,                   # [€/MWh], biogas (biomethane) price
+            70,                    # [€/t], CO2 certificate price
          ],
 
         [  # scenario 7
             150,                   # electricity price
-            200 + 0.20196 * 70,    # natural gas price
+            200,                   # natural gas price without CO2 certificates
             300,                   # hydrogen price
             50,                    # biomass price
             140,                   # biogas (biomethane) price
+            70,                    # CO2 certificate price
         ],
 
         [   # scenario 8
             400,                   # [€/MWh], electricity price
-            170 + 0.20196 * 70,    # [€/MWh], natural gas price + Certificate price (CO2)
+            170,                   # [€/MWh], natural gas price without CO2 certificates
             184,                   # [€/MWh], hydrogen price
             50,                    # [€/MWh], biomass price
             140,                   # [€/MWh], biogas (biomethane) price
+            70,                    # [€/t], CO2 certificate price
          ],
 
         [  # scenario 9
             150,  # electricity price
-            170 + 0.20196 * 70,  # natural gas price
+            170,  # natural gas price without CO2 certificates
             100,  # hydrogen price
             50,  # biomass price
             140,  # biogas (biomethane) price
+            70,  # CO2 certificate price
         ],
 
     ]
 
-    [price_el, price_gas, price_h2, price_biomass, price_biogas] = scenarios[scenario_nr]
+    prices = dict(zip(price_names + ['cost_co2'], scenarios[scenario_nr]))
+    prices.update(overrides)
+    [price_el, price_gas_base, price_h2, price_biomass, price_biogas, price_co2] = [
+        prices[name] for name in price_names + ['cost_co2']]
+    price_gas = price_gas_base + ef_gas * price_co2     # natural gas price + Certificate price (CO2)
 
     return [price_el, price_gas, price_h2, price_biomass, price_biogas]
 
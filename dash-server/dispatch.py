@@ -0,0 +1,257 @@
+import os
+import json
+import time
+import argparse
+import multiprocessing
+import numpy as np
+import pandas as pd
+from concurrent.futures import ProcessPoolExecutor
+import auxiliary as da
+import highs_backend as hb
+import json_auxiliary as ja
+import model_template as tp
+import timeseries_aggregation as ta
+
+# Full-year dispatch of an optimized design. The design is optimized on typical periods, here its capacities and
+# investment decisions (all scalar variables) are fixed and the operation is solved for every hour of the year in
+# rolling windows: each window spans `window` timesteps, its first `commit` timesteps are kept and the next window starts
+# there. The state of charge of storages at the commit point is the fixed start of the next window.
+#
+# Every window is one period of a System with matrix assembly. Constraints that close a period cyclically (storage
+# balance, start up / shut down logic, minimum up and down times and ramps from the last timestep to the first, marked
+# by the assembly in matrix.wrap) are dropped, windows start from the carried state of charge instead. All windows have the same matrix and only differ in
+# profiles and fixed start values: a segment assembles one window System and one persistent HiGHS model, the following
+# windows only overwrite the values of the units with profiles and the start values (see model_template). The last
+# window ends with the year, it does not wrap around to its start.
+#
+# The year can be split into segments which start from a fixed state of charge (soc_start * storage capacity). Segments
+# are independent and are rolled in parallel worker processes.
+#
+# The profiles of the year are read from hourly csv files (timeseries_aggregation.read_profiles), one column per column
+# of the timelines. year_profiles, the year put together from the typical days, is only a fallback without them.
+#
+#   design, structure = ... solved System with matrix assembly and the structure it was built from
+#   profiles = read_year_profiles(['weather_2019.csv', 'prices_demands_2019.csv'], timelines)
+#   year = dispatch_year(design, structure, timeline_map, profiles, segments=12)
+#
+#   python dispatch.py --profiles weather_2019.csv prices_demands_2019.csv --window 48 --commit 24 --segments 12
+#   python dispatch.py --typical-days --segments 12 --workers 4
+
+SCRIPT_DIR = os.path.dirname(os.path.realpath(__file__))
+TIMELINES = os.path.join(SCRIPT_DIR, 'tool_dekarpio_timelines.json')
+WINDOW = 48     # timesteps
+COMMIT = 24     # timesteps
+
+
+def read_year_profiles(paths, timelines, columns=None):
+    # full year profiles {column: array} for the columns of the timelines from csv files with a timestamp column, joined
+    # on their timestamps. columns: {column of the timelines: column of the csv files} for differently named columns,
+    # 'Konstant' is added if missing. Raises ValueError if a column of the timelines is not found.
+    df = pd.concat([ta.read_profiles(path) for path in paths], axis=1).interpolate(limit_direction='both')
+    for column, csv_column in (columns or {}).items():
+        df[column] = df[csv_column]
+    if 'Konstant' not in df:
+        df['Konstant'] = 1.0
+    missing = [column for column in timelines[0] if column not in df]
+    if missing:
+        raise ValueError('Columns {} of the timelines are not in {}.'.format(missing, paths))
+    return {column: df[column].to_numpy(dtype=float) for column in timelines[0]}
+
+
+def year_profiles(path):
+    # fallback without hourly profiles: the year of a timelines file put together from its typical periods in the order
+    # of 'Label-Sequenz', days with label -1 are skipped like in read_timelines
+    with open(path) as f:
+        data = json.load(f)
+    medoids = data['Medoid-Zeitreihen']
+    days = [label for date, label in sorted(data['Label-Sequenz'].items()) if label != -1]
+    return {column: np.concatenate([np.asarray(medoids[day][column], dtype=float) for day in days])
+            for column in medoids[0]}
+
+
+def column_steps(matrix):
+    # timestep of every column (axis 1 of its column block), -1 for scalar columns
+    step = np.full(matrix.n_col, -1)
+    for owner, name, shape, offset in matrix.col_names:
+        if len(shape) >= 2:
+            step[offset:offset + int(np.prod(shape))] = np.indices(shape)[1].ravel()
+    return step
+
+
+def wrap_rows(matrix):
+    # rows that wrap around from the end of the period to its start, as marked by the assembly (MatrixModel.add_rows)
+    return np.flatnonzero(matrix.wrap)
+
+
+def design_values(system):
+    # values of all scalar variables (capacities, investment decisions, ...) of a solved System
+    get_value = ja.value_function(system)
+    return {name: {var: float(get_value(v)) for var, v in unit.var.get('scalar', {}).items()}
+            for name, unit in system.unit.items()}
+
+
+def time_costs(system, x, steps=None, col_step=None):
+    # costs of the timestep columns (without node slacks) of the first `steps` timesteps, per year of operation,
+    # col_step: column_steps of the system if known
+    obj = system.obj['total_real']
+    step = (column_steps(system.matrix) if col_step is None else col_step)[obj.cols]
+    keep = step >= 0 if steps is None else (step >= 0) & (step < steps)
+    return float(np.dot(obj.coefs[keep], x[obj.cols[keep]]))
+
+
+def window_param(structure, n_ts, tss, profile=None):
+    sysParam = ja.read_parameters(structure['par'], structure['eco'], ['0'], ['0'], n_ts, {'0': 1}, profile)
+    sysParam.update(sc={'0': [1.0, 1]}, tss=tss, assembly='matrix')
+    return sysParam
+
+
+def record_window(structure, timeline_map, timelines, sysParam):
+    # configuration of one window (see model_template.Recorder), timelines: {column: values} of the window
+    ini_out_str, recorder = tp.initialize_model(sysParam)
+    pru_out_str, structure = ja.prune_structure(recorder, structure, [timelines], timeline_map)
+    add_out_str, recorder = ja.add_units_and_nodes(recorder, structure, [timelines], timeline_map)
+    return recorder
+
+
+def fix_window(system, design, soc, rows):
+    # design values fixed, cyclic rows (see wrap_rows) dropped, storages start from soc {unit: value}
+    matrix = system.matrix
+    for name, unit in system.unit.items():
+        for var, col in unit.var.get('scalar', {}).items():
+            if var in design.get(name, {}):
+                matrix.lb[col] = matrix.ub[col] = design[name][var]
+        if name in soc:
+            col = unit.var['seq']['soc'][0, 0]
+            matrix.lb[col] = matrix.ub[col] = soc[name]
+    matrix.row_lo[rows] = -np.inf
+    matrix.row_hi[rows] = np.inf
+
+
+def roll_segment(structure, timeline_map, profiles, starts, window, commit, tss, design, soc_start, profile=None):
+    # rolls the windows starting at `starts` one after another, returns the committed values of all sequences. The
+    # System of the first window is the template of all others, they only assemble the units with other profiles again
+    # (model_template.Template.apply). The last window of the year is shorter and gets its own template.
+    n = len(next(iter(profiles.values())))
+    options = dict(da.solver_options('highs', da.solver_profile(profile)), log_to_console=False)
+    soc = None
+    templates = {}      # window length -> (Template, cyclic rows, column_steps)
+    params = {}
+    seq = {}
+    result = {'costs': 0.0, 'slack': 0.0, 'windows': 0, 'reused': 0}
+    for start in starts:
+        n_ts = min(window, n - start)
+        steps = min(commit, n_ts)
+        idx = start + np.arange(n_ts)
+        if n_ts not in params:
+            params[n_ts] = window_param(structure, n_ts, tss, profile)
+        recorder = record_window(structure, timeline_map, {c: v[idx].tolist() for c, v in profiles.items()},
+                                 params[n_ts])
+        template, rows, col_step = templates.get(n_ts, (None, None, None))
+        if template is None or template.apply(recorder) is None:
+            template = tp.Template(recorder)
+            rows, col_step = wrap_rows(template.system.matrix), column_steps(template.system.matrix)
+            templates[n_ts] = template, rows, col_step
+        system = template.system
+        if soc is None:
+            soc = {name: soc_start * design[name].get('cap', 0.0) for name, unit in system.unit.items()
+                   if 'soc' in unit.var.get('seq', {})}
+        fix_window(system, design, soc, rows)
+        hb.solve_model(system, options=options, persistent=True)
+        x = system.matrix.x
+
+        for name, unit in system.unit.items():
+            for var, cols in unit.var.get('seq', {}).items():
+                seq.setdefault(name, {}).setdefault(var, []).append(x[cols[0, :steps]])
+        result['costs'] += time_costs(system, x, steps, col_step) * system.param['dur_sc'] / 8760
+        result['slack'] += sum(x[unit.var['seq'][k][0, :steps]].sum() for unit in system.node.values()
+                               for k in ['slack_lhs', 'slack_rhs']) * tss
+        result['windows'] += 1
+        result['reused'] += bool(system.matrix.persistent['reused'])
+        if steps < n_ts:
+            soc = {name: x[system.unit[name].var['seq']['soc'][0, steps]] for name in soc}
+    result['seq'] = {name: {var: np.concatenate(parts) for var, parts in unit.items()} for name, unit in seq.items()}
+    return result
+
+
+def dispatch_year(design, structure, timeline_map, profiles, window=WINDOW, commit=COMMIT, segments=1, workers=1,
+                  soc_start=0.5, profile=None):
+    # design: solved System, structure: the structure it was built from, profiles: {column: full year values}
+    # with the timestep of the design. Returns the full year sequences of all units and nodes and summary values.
+    if commit > window:
+        raise ValueError('The committed part ({}) cannot be longer than the window ({}).'.format(commit, window))
+    tic = time.time()
+    tss = design.param['tss']
+    values = design_values(design)
+    profiles = {column: np.asarray(v, dtype=float) for column, v in profiles.items()}    # also a pandas DataFrame
+    n = len(next(iter(profiles.values())))
+    starts = np.array_split(np.arange(0, n, commit), segments)
+    tasks = [(structure, timeline_map, profiles, list(s), window, commit, tss, values, soc_start, profile)
+             for s in starts if len(s)]
+
+    if workers > 1:
+        with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('fork')) as pool:
+            parts = list(pool.map(roll_segment, *zip(*tasks)))
+    else:
+        parts = [roll_segment(*task) for task in tasks]
+
+    seq = {name: {var: np.concatenate([p['seq'][name][var] for p in parts]) for var in unit}
+           for name, unit in parts[0]['seq'].items()}
+    design_costs = None
+    if getattr(design, 'assembly', 'pyomo') == 'matrix':
+        design_costs = time_costs(design, design.matrix.x)
+    return {
+        'n_ts': n,
+        'tss': tss,
+        'window': window,
+        'commit': commit,
+        'segments': len(tasks),
+        'windows': sum(p['windows'] for p in parts),
+        'reused': sum(p['reused'] for p in parts),
+        'operating_costs': sum(p['costs'] for p in parts),                # EUR for the n_ts timesteps
+        'design_operating_costs': design_costs,                           # EUR/a of the typical periods
+        'slack': sum(p['slack'] for p in parts),                          # MWh not balanced at the nodes
+        'seq': seq,
+        'time': time.time() - tic,
+    }
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Optimize a design on the typical periods and dispatch it for the full year.')
+    parser.add_argument('structure', nargs='?', default=os.path.join(SCRIPT_DIR, 'tool_dekarpio_structure.json'))
+    parser.add_argument('--timelines', default=TIMELINES)
+    parser.add_argument('--profiles', nargs='+', default=[], help='hourly csv files with the columns of the timelines')
+    parser.add_argument('--column', action='append', default=[], metavar='TIMELINE=CSV',
+                        help='column of the timelines taken from a differently named csv column')
+    parser.add_argument('--typical-days', action='store_true',
+                        help='without hourly profiles: the year put together from the typical days of the timelines')
+    parser.add_argument('--window', type=int, default=WINDOW)
+    parser.add_argument('--commit', type=int, default=COMMIT)
+    parser.add_argument('--segments', type=int, default=1, help='independent parts of the year with fixed start soc')
+    parser.add_argument('--workers', type=int, default=1)
+    parser.add_argument('--profile', default=None, choices=list(da.SOLVER_PROFILES))
+    args = parser.parse_args()
+    if not args.profiles and not args.typical_days:
+        parser.error('hourly --profiles are required, or --typical-days to use the typical days of the timelines')
+    args.profiles = [os.path.abspath(path) for path in args.profiles]
+
+    os.chdir(SCRIPT_DIR)
+    timelines, period_list, label_list, no_timesteps, timeline_map, weights = ja.read_timelines(args.timelines)
+    structure = ja.read_structure(args.structure)
+    sysParam = ja.read_parameters(structure['par'], structure['eco'], period_list, label_list, no_timesteps, weights,
+                                  args.profile)
+    ini_out_str, res = ja.initialize_model(sysParam)
+    pru_out_str, structure = ja.prune_structure(res, structure, timelines, timeline_map)
+    add_out_str, res = ja.add_units_and_nodes(res, structure, timelines, timeline_map)
+    bui_out_str, res = ja.build_pyomo_model(res)
+    sol_out_str, slack_out_str, res = ja.solve_pyomo_model(res)
+
+    if args.profiles:
+        profiles = read_year_profiles(args.profiles, timelines, dict(column.split('=', 1) for column in args.column))
+    else:
+        profiles = year_profiles(args.timelines)
+    year = dispatch_year(res, structure, timeline_map, profiles, args.window, args.commit, args.segments, args.workers,
+                         profile=args.profile)
+    print('{} windows ({} segments) in {:.1f} seconds'.format(year['windows'], year['segments'], year['time']))
+    print('operating costs of {} h: {:,.0f} EUR, design estimate: {:,.0f} EUR/a'.format(
+        year['n_ts'] * year['tss'], year['operating_costs'], year['design_operating_costs']))
+    print('unbalanced energy at the nodes: {:.2f} MWh'.format(year['slack']))
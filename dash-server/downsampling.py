@@ -0,0 +1,170 @@
+import base64
+import numpy as np
+
+# Server side reduction of long time series in plotly figures, which are given as json dicts (e.g. from
+# plotly.io.json.to_json_plotly). Scatter traces with more than points_per_trace points are downsampled and drawn with
+# WebGL (scattergl):
+#   lines:          LTTB (largest triangle three buckets), keeps the visual shape of the line
+#   stacked areas:  min-max buckets of the stack total, all traces of a stack keep the same x values. They stay svg
+#                   traces, scattergl has no stackgroup.
+# With x_range only the points inside the range (and one on each side) are reduced, so zooming in shows more detail
+# down to full resolution. x_range needs numeric x values.
+
+POINTS_PER_TRACE = 2000
+PER_POINT = ['customdata', 'text', 'hovertext']
+
+
+def lttb(x, y, n_out):
+    # LTTB on equally wide buckets for the rows of y (n_traces, n) with the common x values x (n,), returns the
+    # indices of the selected points (n_traces, <= n_out). The first and the last point are always kept.
+    y = np.atleast_2d(np.nan_to_num(y))
+    k, n = y.shape
+    if n_out >= n or n_out < 3:
+        return np.tile(np.arange(n), (k, 1))
+    width = -(-(n - 2) // (n_out - 2))
+    nb = -(-(n - 2) // width)
+    pos = 1 + np.arange(nb * width).reshape(nb, width)
+    valid = pos < n - 1
+    pos = np.minimum(pos, n - 2)
+    xb, yb = x[pos], y[:, pos]
+    count = valid.sum(axis=1)
+    # average of every bucket, the last point follows the last bucket
+    xm = np.append((xb * valid).sum(axis=1) / count, x[-1])
+    ym = np.concatenate([(yb * valid).sum(axis=2) / count, y[:, -1:]], axis=1)
+
+    idx = np.empty((k, nb + 2), dtype=int)
+    idx[:, 0], idx[:, -1] = 0, n - 1
+    rows = np.arange(k)
+    a = np.zeros(k, dtype=int)
+    for b in range(nb):
+        xa, ya = x[a][:, None], y[rows, a][:, None]
+        area = np.abs((xa - xm[b + 1]) * (yb[:, b] - ya) - (xa - xb[b]) * (ym[:, b + 1:b + 2] - ya))
+        area[:, ~valid[b]] = -1
+        a = pos[b][area.argmax(axis=1)]
+        idx[:, b + 1] = a
+    return idx
+
+
+def min_max(x, y, n_out):
+    # indices of the minimum and the maximum of equally wide buckets, the first and the last point are always kept
+    n = len(y)
+    if n_out >= n or n_out < 4:
+        return np.arange(n)
+    y = np.nan_to_num(y)
+    width = -(-n // ((n_out - 2) // 2))
+    nb = -(-n // width)
+    buckets = np.pad(y, (0, nb * width - n), mode='edge').reshape(nb, width)
+    start = np.arange(nb) * width
+    idx = np.concatenate([[0, n - 1], start + buckets.argmin(axis=1), start + buckets.argmax(axis=1)])
+    return np.unique(np.minimum(idx, n - 1))
+
+
+def array(values):
+    # array of a plotly json data array, plain list or typed array ({'dtype': ..., 'bdata': ...})
+    if isinstance(values, dict) and 'bdata' in values:
+        arr = np.frombuffer(base64.b64decode(values['bdata']), dtype=np.dtype(values['dtype']))
+        if 'shape' in values:
+            arr = arr.reshape([int(s) for s in str(values['shape']).split(',')])
+        return arr
+    arr = np.asarray(values)
+    if arr.dtype == object:
+        try:
+            arr = arr.astype(float)     # None -> nan
+        except (TypeError, ValueError):
+            pass
+    return arr
+
+
+def is_numeric(arr):
+    return np.issubdtype(arr.dtype, np.number)
+
+
+def select(x, y, points_per_trace, x_range, method):
+    # indices of the points to keep, for every row of y if y is 2d
+    idx = np.arange(y.shape[-1])
+    if x_range is not None and is_numeric(x):
+        inside = np.flatnonzero((x >= x_range[0]) & (x <= x_range[1]))
+        if len(inside):
+            idx = np.arange(max(inside[0] - 1, 0), min(inside[-1] + 2, len(idx)))
+    if len(idx) > points_per_trace:
+        position = x[idx].astype(float) if is_numeric(x) else idx.astype(float)
+        return idx[method(position, y[..., idx].astype(float), points_per_trace)]
+    return np.broadcast_to(idx, y.shape[:-1] + idx.shape)
+
+
+def json_values(arr):
+    values = arr.tolist()
+    if is_numeric(arr):
+        for i in np.flatnonzero(np.isnan(arr.astype(float))):
+            values[i] = None
+    return values
+
+
+def set_points(trace, x, y, idx, webgl):
+    n = len(y)
+    trace['x'] = json_values(x[idx])
+    trace['y'] = json_values(y[idx])
+    for key in PER_POINT:
+        if isinstance(trace.get(key), (list, dict)):
+            values = array(trace[key])
+            if len(values) == n:
+                trace[key] = json_values(values[idx])
+    if webgl:
+        trace['type'] = 'scattergl'
+        trace['mode'] = 'lines'
+
+
+def is_long(fig, points_per_trace=POINTS_PER_TRACE):
+    return any(len(array(t['y'])) > points_per_trace for t in fig.get('data', [])
+               if t.get('type', 'scatter') in ['scatter', 'scattergl'] and 'y' in t)
+
+
+def reduce_figure(fig, points_per_trace=POINTS_PER_TRACE, x_range=None):
+    # copy of the figure json with all traces reduced to points_per_trace points (within x_range). Lines with the same
+    # x values are reduced together.
+    fig = dict(fig, data=[dict(t) for t in fig.get('data', [])])
+    lines = {}
+    stacks = {}
+    for trace in fig['data']:
+        if trace.get('type', 'scatter') not in ['scatter', 'scattergl'] or 'y' not in trace:
+            continue
+        y = array(trace['y'])
+        x = array(trace['x']) if 'x' in trace else np.arange(len(y))
+        if len(y) <= points_per_trace:
+            continue
+        if trace.get('stackgroup'):
+            stacks.setdefault((trace['stackgroup'], trace.get('xaxis', 'x')), []).append((trace, x, y))
+        else:
+            lines.setdefault((x.dtype.str, x.tobytes()), []).append((trace, x, y))
+
+    for traces in lines.values():
+        x = traces[0][1]
+        idx = select(x, np.array([y.astype(float) for _, _, y in traces]), points_per_trace, x_range, lttb)
+        for (trace, x, y), row in zip(traces, idx):
+            set_points(trace, x, y, row, webgl=True)
+
+    for traces in stacks.values():
+        if len(set(len(y) for _, _, y in traces)) > 1:      # traces of different length, reduce each on its own
+            for trace, x, y in traces:
+                set_points(trace, x, y, select(x, y, points_per_trace, x_range, min_max), webgl=False)
+            continue
+        x = traces[0][1]
+        total = np.nansum([np.abs(y.astype(float)) for _, _, y in traces], axis=0)
+        idx = select(x, total, points_per_trace, x_range, min_max)
+        for trace, x, y in traces:
+            set_points(trace, x, y, idx, webgl=False)
+    return fig
+
+
+def zoom_range(relayout):
+    # x range of a relayoutData event: [x0, x1] after zooming, None after a reset of the axes (autorange) and
+    # False for all other events (e.g. autosize, zoom of the y axis only)
+    for key, value in (relayout or {}).items():
+        if key.startswith('xaxis') and key.endswith('.range[0]'):
+            return [value, relayout[key[:-3] + '[1]']]
+        if key.startswith('xaxis') and key.endswith('.range'):
+            return list(value)
+    for key in relayout or {}:
+        if key.startswith('xaxis') and key.endswith('.autorange'):
+            return None
+    return False
@@ -0,0 +1,126 @@
+import os
+import numpy as np
+import diskcache
+import CoolProp.CoolProp as CP    # CoolProp Units: SI -- J, kg, K, Pa, ...
+import data_dirs as dd
+
+# Memoised drop-in for CoolProp's PropsSI. The same (fluid, T, p) states are evaluated by many units and again in
+# every run, so results are kept in this process and in a disk cache shared by all worker processes. Array inputs are
+# evaluated in one CoolProp call for all states that are not cached yet. With use_tables('BICUBIC&HEOS') or
+# use_tables('TTSE&HEOS') batches of at least min_table_batch states of pure fluids are evaluated with CoolProp's
+# tabular backends instead of HEOS (faster, relative deviation ~1e-5, tables are built once per fluid).
+#
+#   fp.PropsSI('H', 'T', 373.15, 'P', 1e5, 'Water')                   -> float, as CP.PropsSI
+#   fp.PropsSI('H', 'T', np.array([...]), 'P', 1e5, 'Water')          -> array
+#   fp.stats()                                                         -> lookup counters and hit rate
+
+CACHE_DIR = os.path.join(dd.data_dir('property_cache'), CP.get_global_param_string('version'))
+
+disk_cache = True           # False: memoise in this process only
+table_backend = None        # None: HEOS for everything, 'BICUBIC&HEOS' / 'TTSE&HEOS': tables for large batches
+min_table_batch = 100
+
+counters = {'calls': 0, 'states': 0, 'memory': 0, 'disk': 0, 'computed': 0}
+
+_memory = {}
+_disk = None
+
+
+def get_disk_cache():
+    global _disk
+    if _disk is None:
+        _disk = diskcache.Cache(CACHE_DIR)
+    return _disk
+
+
+def use_tables(backend='BICUBIC&HEOS', min_batch=100):
+    global table_backend, min_table_batch
+    table_backend, min_table_batch = backend, min_batch
+
+
+def stats():
+    result = dict(counters)
+    hits = result['memory'] + result['disk']
+    result['hit_rate'] = hits / result['states'] if result['states'] else 0.0
+    return result
+
+
+def clear(disk=False):
+    _memory.clear()
+    for key in counters:
+        counters[key] = 0
+    if disk:
+        get_disk_cache().clear()
+
+
+def PropsSI(*args):
+    counters['calls'] += 1
+    if len(args) == 2:      # trivial outputs, e.g. PropsSI('pcrit', 'Water')
+        output, fluid = args
+        return float(_evaluate(output, '', np.zeros(1), '', np.zeros(1), fluid)[0])
+
+    output, name1, value1, name2, value2, fluid = args
+    if np.ndim(value1) == 0 and np.ndim(value2) == 0:
+        return float(_evaluate(output, name1, np.array([float(value1)]), name2, np.array([float(value2)]), fluid)[0])
+
+    value1, value2 = np.broadcast_arrays(np.asarray(value1, dtype=float), np.asarray(value2, dtype=float))
+    values = _evaluate(output, name1, value1.ravel(), name2, value2.ravel(), fluid)
+    return values.reshape(value1.shape)
+
+
+def _evaluate(output, name1, value1, name2, value2, fluid):
+    # values of all states, CoolProp is only called once for the states found in neither cache
+    n = len(value1)
+    counters['states'] += n
+    backend = 'HEOS'
+    if table_backend and n >= min_table_batch and '::' not in fluid and name1:
+        backend = table_backend
+
+    keys = [(backend, fluid, output, name1, a, name2, b) for a, b in zip(value1.tolist(), value2.tolist())]
+    values = np.empty(n)
+    missing = []
+    for k, key in enumerate(keys):
+        val = _memory.get(key)
+        if val is None:
+            missing.append(k)
+        else:
+            values[k] = val
+    counters['memory'] += n - len(missing)
+
+    if missing and disk_cache:
+        cache = get_disk_cache()
+        remaining = []
+        for k in missing:
+            val = cache.get(keys[k])
+            if val is None:
+                remaining.append(k)
+            else:
+                values[k] = _memory[keys[k]] = val
+        counters['disk'] += len(missing) - len(remaining)
+        missing = remaining
+
+    if missing:
+        idx = np.array(missing)
+        computed = _compute(output, name1, value1[idx], name2, value2[idx], fluid, backend)
+        values[idx] = computed
+        counters['computed'] += len(missing)
+        for k, val in zip(missing, computed.tolist()):
+            _memory[keys[k]] = val
+        if disk_cache:
+            with cache.transact():
+                for k, val in zip(missing, computed.tolist()):
+                    cache.set(keys[k], val)
+    return values
+
+
+def _compute(output, name1, value1, name2, value2, fluid, backend):
+    if not name1:
+        return np.array([CP.PropsSI(output, fluid)])
+    if backend != 'HEOS':
+        try:
+            return np.asarray(CP.PropsSI(output, name1, value1, name2, value2, backend + '::' + fluid), dtype=float)
+        except ValueError:      # no tables for this fluid / output, fall back to HEOS
+            pass
+    if len(value1) == 1:
+        return np.array([CP.PropsSI(output, name1, value1[0], name2, value2[0], fluid)])
+    return np.asarray(CP.PropsSI(output, name1, value1, name2, value2, fluid), dtype=float)
@@ -0,0 +1,353 @@
+import time
+import hashlib
+from collections import OrderedDict
+import numpy as np
+import highspy
+
+# Solves a System assembled with param['assembly'] = 'matrix' (see matrix_model.py) directly with highspy. The sparse
+# matrix, bounds and costs are passed as arrays, no pyomo expressions or appsi translation are involved. The primal
+# solution is stored in system.matrix.x, unit objectives and results are evaluated from it.
+
+
+def make_lp(matrix, relax=False):
+    # relax: all integer columns continuous (LP relaxation)
+    lp = highspy.HighsLp()
+    lp.num_col_ = matrix.n_col
+    lp.num_row_ = matrix.n_row
+    lp.col_cost_ = matrix.c
+    lp.col_lower_ = matrix.lb
+    lp.col_upper_ = matrix.ub
+    lp.row_lower_ = matrix.row_lo
+    lp.row_upper_ = matrix.row_hi
+    lp.offset_ = matrix.c0
+
+    a = matrix.A.tocsc()
+    a.eliminate_zeros()
+    lp.a_matrix_.format_ = highspy.MatrixFormat.kColwise
+    lp.a_matrix_.start_ = a.indptr
+    lp.a_matrix_.index_ = a.indices
+    lp.a_matrix_.value_ = a.data
+    if matrix.integrality.any() and not relax:
+        lp.integrality_ = [highspy.HighsVarType.kInteger if k else highspy.HighsVarType.kContinuous
+                           for k in matrix.integrality]
+    return lp
+
+
+scheduler_threads = None      # threads of the global HiGHS scheduler of this process
+
+
+def reset_scheduler(threads):
+    # the threads of HiGHS are shared by all instances of a process and only change with a new scheduler
+    global scheduler_threads
+    if threads != scheduler_threads:
+        highspy.Highs.resetGlobalScheduler(True)
+        scheduler_threads = threads
+
+
+def set_options(h, options):
+    for key, value in options.items():
+        h.setOptionValue(key, value)
+    if 'threads' in options:
+        reset_scheduler(options['threads'])
+
+
+def make_highs(system, options=None, relax=False):
+    h = highspy.Highs()
+    set_options(h, options or {})
+    h.passModel(make_lp(system.matrix, relax))
+    return h
+
+
+def read_solution(system, h):
+    matrix = system.matrix
+    matrix.status = h.modelStatusToString(h.getModelStatus())
+    if h.getInfo().primal_solution_status == 0:     # no feasible point, e.g. time limit without incumbent
+        raise RuntimeError('HiGHS did not find a feasible solution (status: {}).'.format(matrix.status))
+    matrix.x = np.array(h.getSolution().col_value)
+    matrix.objective = h.getInfo().objective_function_value
+    matrix.mip_gap = h.getInfo().mip_gap if matrix.integrality.any() else 0.0
+    return matrix.x
+
+
+def solve_model(system, options=None, persistent=False, progress=None):
+    highs_options = dict(time_limit=float(system.param['opt']['timelimit']),
+                         log_to_console=True)
+    highs_options.update(options or {})
+
+    if persistent:
+        model = get_persistent_model(system)
+        h = model.highs
+        h.resetOptions()        # no options of the previous solve, e.g. another solver profile
+        set_options(h, highs_options)
+        model.warm_start()
+    else:
+        h = make_highs(system, highs_options)
+    if progress is not None:
+        set_progress_callback(h, progress)
+    try:
+        h.run()
+    finally:
+        if progress is not None:
+            clear_progress_callback(h)
+    x = read_solution(system, h)
+    if persistent:
+        model.x = x
+    system.highs = h
+    return system
+
+
+RELAXATION_TIME_LIMIT = 30.0   # seconds, the relaxation is a preview and must not hold back the MIP
+
+
+def solve_relaxation(system, options=None):
+    # LP relaxation of the MIP: binaries (u, v, w, i, dec_cap_expansion) continuous between their bounds, node slacks as
+    # in the MIP. Its objective is a lower bound of the MIP objective. The loaded MIP of a persistent model is not used.
+    # Raises RuntimeError if it is not solved to optimality within RELAXATION_TIME_LIMIT (or the time limit of the MIP).
+    highs_options = dict(log_to_console=False)
+    highs_options.update(options or {})
+    highs_options['time_limit'] = min(float(system.param['opt']['timelimit']), RELAXATION_TIME_LIMIT)
+    h = make_highs(system, highs_options, relax=True)
+    h.run()
+    if h.getModelStatus() != highspy.HighsModelStatus.kOptimal:
+        raise RuntimeError('HiGHS did not solve the LP relaxation (status: {}).'.format(
+            h.modelStatusToString(h.getModelStatus())))
+    read_solution(system, h)
+    system.matrix.mip_gap = 0.0
+    return system
+
+
+# --- relax-and-fix / fix-and-optimize -------------------------------------------------------------------------------
+# MIP heuristic for design problems with few investment binaries (i, dec_cap_expansion: integer scalar columns) and many
+# operational binaries (u of every period and timestep). All stages run on one HiGHS instance, between them only
+# integrality and bounds of the binaries change:
+#   1. investment binaries integer, operational binaries relaxed -> investment decisions and a lower bound of the MIP
+#   2. relax-and-fix over the periods: binaries of period k integer, of earlier periods fixed, of later ones relaxed
+#   3. fix-and-optimize: the investment binaries free with all operational ones fixed, then the binaries of one period
+#      free with all others fixed, repeated while the costs improve (at most max_rounds)
+# The stages of 3 start from the best solution, so its costs never increase. The periods share capacities, storage and
+# emission limits and are solved one after another.
+
+def integer_columns(matrix):
+    # investment binaries (scalar columns) and the operational binaries of every period (axis 0 of the column blocks)
+    period = np.full(matrix.n_col, -1)
+    for owner, name, shape, offset in matrix.col_names:
+        if shape:
+            n = int(np.prod(shape))
+            period[offset:offset + n] = np.repeat(np.arange(shape[0]), n // shape[0])
+    integer = matrix.integrality.astype(bool)
+    return np.flatnonzero(integer & (period < 0)), [np.flatnonzero(integer & (period == k)) for k in range(matrix.n_sc)]
+
+
+def relax_and_fix(system, options=None, progress=None, max_rounds=3):
+    matrix = system.matrix
+    highs_options = dict(time_limit=float(system.param['opt']['timelimit']),
+                         log_to_console=False)
+    highs_options.update(options or {})
+    h = make_highs(system, highs_options)
+    deadline = time.time() + highs_options['time_limit']
+
+    binaries = np.flatnonzero(matrix.integrality)
+    lb, ub = matrix.lb[binaries], matrix.ub[binaries]
+    invest, periods = integer_columns(matrix)
+    invest = np.isin(binaries, invest)
+    periods = [np.isin(binaries, cols) for cols in periods]
+
+    # an accepted solution only ends the improvement stage, stages 1 and 2 are needed for a feasible solution
+    state = {'improve': False, 'stop': False}
+    if progress is not None:
+        def stage_progress(info):
+            state['stop'] = bool(progress(info)) or state['stop']
+            return state['stop'] and state['improve']
+        set_progress_callback(h, stage_progress)
+
+    def solve(integer, fixed, x=None):
+        # integer, fixed: masks of the binaries, fixed ones are set to round(x), all others are relaxed
+        h.changeColsIntegrality(len(binaries), binaries, np.array([highspy.HighsVarType.kInteger if k else
+                                                                   highspy.HighsVarType.kContinuous for k in integer]))
+        value = np.round(x[binaries]) if x is not None else lb
+        h.changeColsBounds(len(binaries), binaries, np.where(fixed, value, lb), np.where(fixed, value, ub))
+        if x is not None:
+            solution = highspy.HighsSolution()
+            solution.col_value = x
+            h.setSolution(solution)
+        h.setOptionValue('time_limit', max(deadline - time.time(), 1.0))
+        h.run()
+        info = h.getInfo()
+        if info.primal_solution_status == 0:
+            return None, np.inf, -np.inf
+        bound = info.mip_dual_bound if integer.any() else info.objective_function_value
+        return np.array(h.getSolution().col_value), info.objective_function_value, bound
+
+    def feasible(x):
+        if x is None:
+            raise RuntimeError('Relax-and-fix did not find a feasible solution (status: {}).'.format(
+                h.modelStatusToString(h.getModelStatus())))
+        return x
+
+    try:
+        x, objective, bound = solve(invest, np.zeros(len(binaries), dtype=bool))
+        fixed = invest.copy()
+        for period in periods:
+            x, objective, _ = solve(period, fixed, feasible(x))
+            fixed |= period
+        feasible(x)
+
+        state['improve'] = True
+        rounds = 0
+        for rounds in range(1, max_rounds + 1):
+            improved = False
+            for free in [invest] + periods:
+                if not free.any() or state['stop'] or time.time() >= deadline:
+                    continue
+                x_new, objective_new, _ = solve(free, ~free, x)
+                if x_new is not None and objective_new < objective - 1e-9 * max(abs(objective), 1.0):
+                    x, objective, improved = x_new, objective_new, True
+            if not improved:
+                break
+    finally:
+        if progress is not None:
+            clear_progress_callback(h)
+
+    matrix.x = x
+    matrix.objective = objective
+    matrix.mip_gap = max(objective - bound, 0.0) / max(abs(objective), 1e-9)
+    matrix.status = 'Relax-and-fix ({} rounds)'.format(rounds)
+    system.highs = h
+    return system
+
+
+# --- solver progress --------------------------------------------------------------------------------------------------
+# progress(info) is called for every improving MIP solution and at most every PROGRESS_INTERVAL seconds during branch
+# and bound, info: {'event': 'improving' | 'update', 'time', 'objective' (incumbent), 'bound', 'gap', 'nodes'}, None
+# for values HiGHS does not know yet. If progress returns True, HiGHS stops and the current incumbent is the solution
+# (model status 'Interrupted by user').
+
+PROGRESS_INTERVAL = 1.0     # seconds
+PROGRESS_EVENTS = ['kCallbackMipImprovingSolution', 'kCallbackMipInterrupt']
+
+
+def finite(value):
+    return float(value) if np.isfinite(value) else None
+
+
+def set_progress_callback(h, progress):
+    state = {'last': -np.inf, 'stop': False}
+
+    def callback(callback_type, message, data_out, data_in, user_data):
+        improving = int(callback_type) == int(highspy.cb.HighsCallbackType.kCallbackMipImprovingSolution)
+        if improving or data_out.running_time - state['last'] >= PROGRESS_INTERVAL:
+            state['last'] = data_out.running_time
+            info = {
+                'event': 'improving' if improving else 'update',
+                'time': data_out.running_time,
+                'objective': finite(data_out.objective_function_value if improving else data_out.mip_primal_bound),
+                'bound': finite(data_out.mip_dual_bound),
+                'gap': finite(data_out.mip_gap),
+                'nodes': int(data_out.mip_node_count),
+            }
+            state['stop'] = bool(progress(info)) or state['stop']
+        if state['stop'] and data_in is not None:   # only interrupt callbacks can stop the solve
+            data_in.user_interrupt = True
+
+    h.setCallback(callback, None)
+    for event in PROGRESS_EVENTS:
+        h.startCallback(getattr(highspy.cb.HighsCallbackType, event))
+
+
+def clear_progress_callback(h):
+    for event in PROGRESS_EVENTS:
+        h.stopCallback(getattr(highspy.cb.HighsCallbackType, event))
+    h.setCallback(None, None)
+
+
+# --- persistent models ------------------------------------------------------------------------------------------------
+# All configurations of one tool_dekarpio structure share the same units, nodes and connectors; they only differ in
+# integrate flags, capacities, prices and shares. These end up in column bounds, costs, row bounds and coefficients
+# of an otherwise identical matrix. A worker process therefore keeps the loaded HiGHS instance of such a matrix and
+# applies a new configuration as changes to it instead of passing a new model. The assembled System is kept as well
+# (model_template.py), so a new configuration only assembles the units whose parameters changed.
+
+persistent_models = OrderedDict()   # structure key -> PersistentModel, per worker process
+max_persistent_models = 4
+
+
+def structure_key(matrix):
+    key = hashlib.sha1('{} {}'.format(matrix.n_col, matrix.n_row).encode())
+    for arr in [matrix.A.indptr, matrix.A.indices, matrix.integrality]:
+        key.update(np.ascontiguousarray(arr).tobytes())
+    return key.hexdigest()
+
+
+class PersistentModel:
+    def __init__(self, system):
+        self.highs = make_highs(system)
+        self.x = None
+        self.n_reused = 0
+        self.changes = {}
+        self._store(system.matrix)
+
+    def _store(self, matrix):
+        self.lb, self.ub = matrix.lb.copy(), matrix.ub.copy()
+        self.c, self.c0 = matrix.c.copy(), matrix.c0
+        self.row_lo, self.row_hi = matrix.row_lo.copy(), matrix.row_hi.copy()
+        self.data = matrix.A.data.copy()
+
+    def apply(self, system):
+        # push the differences between the loaded matrix and the one of the new configuration
+        matrix = system.matrix
+        h = self.highs
+
+        idx = np.flatnonzero((matrix.lb != self.lb) | (matrix.ub != self.ub))
+        if len(idx):
+            h.changeColsBounds(len(idx), idx, matrix.lb[idx], matrix.ub[idx])
+        self.changes = {'col_bounds': len(idx)}
+
+        idx = np.flatnonzero(matrix.c != self.c)
+        if len(idx):
+            h.changeColsCost(len(idx), idx, matrix.c[idx])
+        if matrix.c0 != self.c0:
+            h.changeObjectiveOffset(matrix.c0)
+        self.changes['costs'] = len(idx)
+
+        idx = np.flatnonzero((matrix.row_lo != self.row_lo) | (matrix.row_hi != self.row_hi))
+        if len(idx):
+            h.changeRowsBounds(len(idx), idx, matrix.row_lo[idx], matrix.row_hi[idx])
+        self.changes['row_bounds'] = len(idx)
+
+        idx = np.flatnonzero(matrix.A.data != self.data)
+        rows = np.searchsorted(matrix.A.indptr, idx, side='right') - 1
+        for r, c, v in zip(rows, matrix.A.indices[idx], matrix.A.data[idx]):
+            h.changeCoeff(int(r), int(c), float(v))
+        self.changes['coefficients'] = len(idx)
+
+        self._store(matrix)
+        self.n_reused += 1
+
+    def warm_start(self):
+        # previous solution as start point, HiGHS discards it if it is infeasible for the new configuration
+        if self.x is not None:
+            solution = highspy.HighsSolution()
+            solution.col_value = self.x
+            self.highs.setSolution(solution)
+
+
+def get_persistent_model(system):
+    key = structure_key(system.matrix)
+    model = persistent_models.get(key)
+    if model is None:
+        model = PersistentModel(system)
+        persistent_models[key] = model
+        while len(persistent_models) > max_persistent_models:
+            persistent_models.popitem(last=False)
+    else:
+        model.apply(system)
+        persistent_models.move_to_end(key)
+    system.matrix.persistent = {'key': key, 'reused': model.n_reused, 'changes': model.changes}
+    return model
+
+
+def value(system, expr):
+    # value of a matrix_model.LinExpr or of an index array in the current solution
+    if hasattr(expr, 'value'):
+        return expr.value(system.matrix.x)
+    return system.matrix.x[expr]
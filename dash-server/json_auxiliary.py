@@ -1,11 +1,15 @@
 import json
 import time
+import types
 
 # import pandas as pd
 import numpy as np
 import pyomo.environ as pyo
 import classes as dc
 import auxiliary as da
+import highs_backend as hb
+import matrix_model as mm
+import fluid_properties as fp
 import CoolProp.CoolProp as CP
 
 def read_timelines(path):
@@ -26,7 +30,10 @@ def read_timelines(path):
 
     labels = delete_minus_one(labels)
     label_list = [str(x) for x in labels.values()]
-    period_list = [str(x) for x in np.unique(label_list)]
+    period_list = sorted(set(label_list), key=int)
+
+    # number of days represented by each period, written by timeseries_aggregation.py
+    weights = all.get('Gewichte')
 
     no_timesteps = 0
     for day in timelines:
@@ -34,7 +41,7 @@ def read_timelines(path):
             if len(k) > no_timesteps:
                 no_timesteps = len(k)
 
-    return timelines, period_list, label_list, no_timesteps, timeline_map
+    return timelines, period_list, label_list, no_timesteps, timeline_map, weights
 
 # def return_param_dict(system, filepath=None):
 #     paramdict = {}
@@ -50,119 +57,78 @@ def read_timelines(path):
 #             json.dump(paramdict, f, indent=2)
 
 def return_results_dict(system, filepath=None):
+    # json layout of return_results, every sequence as {period: {'timesteps': [...], 'values': [...]}}
+    results = return_results(system)
+    periods = results.pop('periods')
+    for uv in results['units'].values():
+        uv['var']['seq'] = {vk: seq_results(periods, arr) for vk, arr in uv['var']['seq'].items()}
+    for nv in results['nodes'].values():
+        for side in ['lhs', 'rhs']:
+            nv[side] = {pk: seq_results(periods, arr) for pk, arr in nv[side].items()}
+
+    if filepath == None:
+        return results
+    else:
+        with open(filepath, 'w') as f:
+            json.dump(results, f, indent=2)
+
+
+def solver_information(system):
+    # solver, profile and options of the solve, kept with the results to reproduce and compare runs
+    info = dict(getattr(system, 'solver_settings', {}))
+    if getattr(system, 'assembly', 'pyomo') == 'matrix':
+        info.update(status=system.matrix.status, mip_gap=system.matrix.mip_gap)
+    return info
+
+
+def return_results(system):
+    # results of a solved system with the sequences as numpy arrays of shape (n_periods, n_ts), row k belongs to
+    # period results['periods'][k] (see result_arrays). Stored as is by result_cache.put_results.
     resultsdict = {}
     #resultsdict.update({'total': {}}) TAC; em fos, em bio, co2preis, co2zert (bio und fos).depr and interest rate) TODO
 
     #TODO FR
-    sum_weight = 365                        # days per year
-    days_off = system.param['days_off']
-    year = [185, 90, 90]
     weight_list = {}
-    for n, i in enumerate(year):
-        weight_list[n]=year[n]/sum_weight*(sum_weight-days_off)/sum_weight
+    for n, period in enumerate(system.param['set_period']):
+        weight_list[n] = system.param['sc'][period][0]
 
     resultsdict.update({'general': {}})
     resultsdict['general'].update({'weight': weight_list})
+    resultsdict['general'].update({'solver': solver_information(system)})
+
+    get_value = value_function(system)
 
     resultsdict.update({'objectives': {}})
     for ok, ov in system.obj.items():
-        resultsdict['objectives'].update({ok: pyo.value(ov)})
+        resultsdict['objectives'].update({ok: get_value(ov)})
 
     em_fossil = 0
     em_biogen = 0
     for uk, uv in system.unit.items():
         if 'co2_total_fossil' in uv.obj.keys():
-            em_fossil += pyo.value(uv.obj['co2_total_fossil'])
+            em_fossil += get_value(uv.obj['co2_total_fossil'])
         if 'co2_total_bio' in uv.obj.keys():
-            em_biogen += pyo.value(uv.obj['co2_total_bio'])
+            em_biogen += get_value(uv.obj['co2_total_bio'])
     resultsdict['objectives'].update({'em_fos': em_fossil})
     resultsdict['objectives'].update({'em_bio': em_biogen})
     # print(resultsdict['objectives'])
 
     # print(system.unit.items())
-    resultsdict.update({'units': {}})
-    for uk, uv in system.unit.items():      #units contains eso, ecu, esu, dem and couplers(!)
-
-
+    arrays = result_arrays(system)
+    resultsdict.update({'periods': arrays['periods']})
 
+    resultsdict.update({'units': {}})
+    for uk, ua in arrays['units'].items():
         resultsdict['units'].update({uk: {}})
-        resultsdict['units'][uk].update({'obj': {},
-                                        'var': {'seq': {},
-                                                'scalar': {}},
+        resultsdict['units'][uk].update({'obj': ua['obj'],
+                                        'var': {'seq': ua['seq'], 'scalar': ua['scalar']},
                                         'param':{}
                                         })
-        if 'integration' in uv.param:
-            # print('yes')
-            resultsdict['units'][uk].update({'integ': uv.param['integration']})
-            resultsdict['units'][uk].update({'exist': uv.param['existing']})
-
-        for ok, ov in uv.obj.items():
-            resultsdict['units'][uk]['obj'].update({ok: pyo.value(ov)})
-        if 'seq' in uv.var.keys():
-            for vk, vv in uv.var['seq'].items():
-                resultsdict['units'][uk]['var']['seq'].update({vk: {}})
-                periods = []
-                tempdict = vv.get_values()
-                # todo: get periods from global parameters or timeline info
-                for tuple_ in tempdict.keys():
-                    if isinstance(tuple_, tuple) and len(tuple_) == 2:          # syntax (period_name, time_step)
-                        periods.append(str(tuple_[0]))
-                    elif isinstance(tuple_, tuple) and len(tuple_) == 3:        # syntax (period_name, time_step, level)
-                        periods.append(str(tuple_[0]))
-                    elif isinstance(tuple_, int):        # syntax (period_number) --> soc_p from period storages
-                        periods.append(str(tuple_))
-                    else:
-                        raise TypeError('Unknown Variable type {} in unit {} (classname {}). Check input file.'.format(
-                            vk, uk, uv.param['classname']
-                        ))
-                periods = set(periods)
-                for period in periods:
-                    resultsdict['units'][uk]['var']['seq'][vk].update({period: {}})
-                    resultsdict['units'][uk]['var']['seq'][vk][period].update({'timesteps': [],
-                                                                               'values': []})
-                for tuple_, value in tempdict.items():
-                    if isinstance(tuple_, tuple) and len(tuple_) == 2:         # syntax (period_name, time_step)
-                        period = str(tuple_[0])
-                        timestep = tuple_[1]
-                        resultsdict['units'][uk]['var']['seq'][vk][period]['timesteps'].append(timestep)
-                        resultsdict['units'][uk]['var']['seq'][vk][period]['values'].append(value)
-                    elif isinstance(tuple_, int):
-                        resultsdict['units'][uk]['var']['seq'][vk][period]['values'].append(value)
-
-        if 'scalar' in uv.var.keys():
-            for vk, vv in uv.var['scalar'].items():
-                resultsdict['units'][uk]['var']['scalar'].update({vk: vv.value})
-
-    #print(resultsdict['units'])
-
-    resultsdict.update({'nodes': {}})
-    for nk, nv in system.node.items():
-        resultsdict['nodes'].update({nk: {}})
-        resultsdict['nodes'][nk].update({'lhs': {},
-                                         'rhs': {}})
+        if 'integ' in ua:
+            resultsdict['units'][uk].update({'integ': ua['integ']})
+            resultsdict['units'][uk].update({'exist': ua['exist']})
 
-        for side in ['lhs', 'rhs']:
-            for j in nv.param[side]:
-                [unit_name, port, _] = j
-                unit_port_name = unit_name + '_' + port
-                resultsdict['nodes'][nk][side].update({unit_port_name: {}})
-
-                periods = []
-                tempdict = system.unit[unit_name].port[port].get_values()
-                for tuple_ in tempdict.keys():
-                    periods.append(str(tuple_[0]))
-                periods = set(periods)
-                for period in periods:
-                    resultsdict['nodes'][nk][side][unit_port_name].update({period: {}})
-                    resultsdict['nodes'][nk][side][unit_port_name][period].update({'timesteps': [],
-                                                                                   'values': []})
-                for tuple_, value in tempdict.items():
-                    period = str(tuple_[0])
-                    timestep = tuple_[1]
-                    resultsdict['nodes'][nk][side][unit_port_name][period]['timesteps'].append(timestep)
-                    resultsdict['nodes'][nk][side][unit_port_name][period]['values'].append(value)
-
-            pass
+    resultsdict.update({'nodes': arrays['nodes']})
 
     resultsdict.update({'params': {}})
     for pk in system.param.keys():
@@ -173,11 +139,106 @@ def return_results_dict(system, filepath=None):
                   'cost_gas_grid', 'cost_power_grid']:
             resultsdict['params'].update({pk: system.param[pk]})
 
-    if filepath == None:
-        return resultsdict
+    return resultsdict
+
+
+def result_arrays(system):
+    # solution of all units and node ports as numpy arrays of shape (n_periods, n_ts), nan where the solver reported
+    # no value. Units, couplers and node entries removed by prune_structure are reported as zeros, in the order of the
+    # complete structure.
+    arrays = {'periods': [str(s) for s in system.param['sc']], 'units': {}, 'nodes': {}}
+    pruned = getattr(system, 'pruned', None)
+    layout = pruned['layout'] if pruned else system
+    zeros = pruned_zeros(system) if pruned else {}
+    zero_port = np.zeros((len(system.param['sc']), system.param['n_ts_sc']))
+
+    get_value = value_function(system)
+    for uk in layout.unit:      #units contains eso, ecu, esu, dem and couplers(!)
+        if uk in zeros:
+            arrays['units'][uk] = zeros[uk]
+            continue
+        uv = system.unit[uk]
+        ua = {'obj': {ok: get_value(ov) for ok, ov in uv.obj.items()},
+              'seq': {vk: seq_array(system, vv) for vk, vv in uv.var.get('seq', {}).items()},
+              'scalar': {vk: float(get_value(vv)) if system.assembly == 'matrix' else vv.value
+                         for vk, vv in uv.var.get('scalar', {}).items()}}
+        if 'integration' in uv.param:
+            ua.update({'integ': uv.param['integration'], 'exist': uv.param['existing']})
+        arrays['units'][uk] = ua
+
+    nodes = [(name, args[0]) for method, name, args in layout.calls if method == 'add_node'] if pruned else \
+        [(nk, nv.param) for nk, nv in system.node.items()]
+    ports = {}      # the same port usually appears in several nodes
+    for nk, param in nodes:
+        arrays['nodes'][nk] = {'lhs': {}, 'rhs': {}}
+        for side in ['lhs', 'rhs']:
+            for unit_name, port, *_ in param[side]:
+                if (unit_name, port) not in ports:
+                    ports[unit_name, port] = zero_port if unit_name in zeros else \
+                        seq_array(system, system.unit[unit_name].port[port], sum_levels=True)
+                arrays['nodes'][nk][side][unit_name + '_' + port] = ports[unit_name, port]
+    return arrays
+
+
+def seq_array(system, var, sum_levels=False):
+    # (n_periods, n_ts) values of an indexed variable. (period, time_step, level) variables are summed over the levels
+    # with sum_levels, otherwise they are not exported (None). Variables indexed by period number (soc_p of period
+    # storages) are returned as an array of shape (n_periods,).
+    if getattr(system, 'assembly', 'pyomo') == 'matrix':
+        if var.ndim == 3 and not sum_levels:
+            return None
+        vals = hb.value(system, var)
+        if var.ndim == 3:
+            vals, var = vals.sum(axis=2), var[:, :, 0]
+        vals[system.matrix.unused[var]] = np.nan
+        return vals
+
+    keys = list(var.keys())
+    vals = np.array([v.value for v in var.values()], dtype=float)    # None -> nan
+    if not keys:
+        return np.zeros((len(system.param['sc']), 0))
+    if not isinstance(keys[0], tuple):
+        return vals
+    if len(keys[0]) == 3 and not sum_levels:
+        return None
+    if len(keys[0]) not in [2, 3]:
+        raise TypeError('Unknown index {} of variable {}.'.format(keys[0], var.name))
+    period_no = {s: k for k, s in enumerate(system.param['sc'])}
+    columns = list(zip(*keys))
+    rows = np.array([period_no[s] for s in columns[0]])
+    steps = np.array(columns[1])
+    if len(keys[0]) == 2:
+        arr = np.full((len(period_no), steps.max() + 1), np.nan)
+        arr[rows, steps] = vals
     else:
-        with open(filepath, 'w') as f:
-            json.dump(resultsdict, f, indent=2)
+        arr = np.zeros((len(period_no), steps.max() + 1))
+        np.add.at(arr, (rows, steps), vals)
+    return arr
+
+
+def seq_results(periods, arr):
+    # json layout of a seq_array: {period: {'timesteps': [...], 'values': [...]}}, missing values as None
+    if arr is None:
+        return {period: {'timesteps': [], 'values': []} for period in periods}
+    if arr.ndim == 1:
+        return {period: {'timesteps': [], 'values': [None if np.isnan(value) else value]}
+                for period, value in zip(periods, arr.tolist())}
+    results = {}
+    timesteps = list(range(arr.shape[1]))
+    for period, row in zip(periods, arr):
+        values = row.tolist()
+        for t in np.flatnonzero(np.isnan(row)):
+            values[t] = None
+        results[period] = {'timesteps': timesteps, 'values': values}
+    return results
+
+
+def value_function(system):
+    if getattr(system, 'assembly', 'pyomo') == 'matrix':
+        return lambda expr: hb.value(system, expr)
+    # unit objectives are cost vectors over system.cost_vars (see auxiliary.cost_cols), all evaluated with one vector
+    x = da.cost_values(system)
+    return lambda expr: expr.value(x) if isinstance(expr, mm.LinExpr) else pyo.value(expr)
 
 
 def get_active_units(system):
@@ -225,7 +286,8 @@ def read_structure(path):
     return structure
 
 
-def read_parameters(param_dict, eco_dict, period_list, label_list, no_timesteps):
+def read_parameters(param_dict, eco_dict, period_list, label_list, no_timesteps, weights=None, profile=None,
+                    strategy=None):
     # ==================================================================================================================
     # HELPER FUNCTIONS
     # ==================================================================================================================
@@ -239,19 +301,22 @@ def read_parameters(param_dict, eco_dict, period_list, label_list, no_timesteps)
     # ==================================================================================================================
     # FUNCTION BODY
     # ==================================================================================================================
-    # sum_weight = len(label_list)        # days per year
-    sum_weight = 365                        # days per year
+    # days per period from the timelines file, otherwise the hand-made weights of the three legacy typical days
+    if weights:
+        year = [weights[period] for period in period_list]
+    else:
+        year = [185, 90, 90]
+    sum_weight = sum(year)                  # days per year
     if 'operation_days' in eco_dict['eco1']['param'][0]:
         days_off = 365 - eco_dict['eco1']['param'][0]['operation_days']
     else:
         days_off = 30
 
     print(['daysoff:', days_off])
-    year = [185, 90, 90]
     corr_year = {}
 
-    for n, i in enumerate(year):
-        corr_year[str(n)] = [year[n]/sum_weight*(sum_weight-days_off)/sum_weight, round(year[n]/sum_weight*(sum_weight-days_off))]
+    for n, period in enumerate(period_list):
+        corr_year[period] = [year[n]/sum_weight*(sum_weight-days_off)/sum_weight, round(year[n]/sum_weight*(sum_weight-days_off))]
 
 
     # u_w_dict = dict()
@@ -314,8 +379,10 @@ def read_parameters(param_dict, eco_dict, period_list, label_list, no_timesteps)
         'decarb_target_bio': decarb_target2,
         'days_off': days_off,
         'opt': {'timelimit': 600,
-                'optimality_gap': 0.00},
-        'expansion_costs': 5e4      # todo: €/MW ???
+                'profile': profile or da.DEFAULT_PROFILE,     # solver profile, see auxiliary.SOLVER_PROFILES
+                'strategy': strategy or da.DEFAULT_STRATEGY},  # see auxiliary.SOLVE_STRATEGIES
+        'expansion_costs': 5e4,     # todo: €/MW ???
+        'assembly': 'matrix'        # 'matrix': numpy blocks solved by highspy directly, 'pyomo': pyomo rule callbacks
     }
 
 
@@ -355,6 +422,115 @@ def initialize_model(sysParam):
     return out_str, res
 
 
+class Recorder:
+    # stands in for a System in prune_structure and add_units_and_nodes
+    def __init__(self, param):
+        self.param = param
+        self.unit = dict()      # name -> namespace with the param of the unit, read by add_nodes
+        self.calls = []         # (System method, name, arguments)
+        self.pruned = None
+
+    def _record(self, method, name, *args):
+        # not copied, add_units_and_nodes creates new parameter dicts for every call and does not change them later
+        self.calls.append((method, name, args))
+
+    def add_unit(self, param):
+        self.unit[param['name']] = types.SimpleNamespace(param=param)
+        self._record('add_unit', param['name'], param)
+
+    def add_node(self, param):
+        self._record('add_node', param['name'], param)
+
+    def add_share_con(self, name, lhs, rhs, share, sense='=='):
+        self._record('add_share_con', name, name, lhs, rhs, share, sense)
+
+    def add_obj_limit_con(self, name, key, limit):
+        self._record('add_obj_limit_con', name, name, key, limit)
+
+
+def prune_structure(system, structure, tl, tl_map):
+    # Units which are not integrated only get zero capacities / demands in add_units_and_nodes, but still all their
+    # variables, binaries, constraints and node entries. They are removed from the structure together with the
+    # connectors ending at a removed unit and the collectors left without inputs or outputs (repeated until nothing
+    # changes). The units and nodes of the complete structure are recorded (without assembling them), result_arrays
+    # reports the removed ones as zeros.
+    tic = time.time()
+
+    def is_integrated(group, obj):
+        # same checks as check_eso/ecu/esu/process_integration in add_units_and_nodes
+        if group == 'ecu':
+            return not obj['param'][0]['integrate'] == False
+        return obj['param'][0]['integrate'] == True
+
+    pruned = {'units': [], 'con': [], 'col': []}
+    pruned_structure = dict(structure)
+    for group in ['eso', 'ecu', 'esu', 'dem']:
+        pruned_structure[group] = {}
+        for key, obj in structure[group].items():
+            if is_integrated(group, obj):
+                pruned_structure[group][key] = obj
+            else:
+                pruned['units'].append(obj['ID'])
+
+    dead = set(pruned['units'])
+    con = dict(structure['con'])
+    col = dict(structure['col'])
+    changed = True
+    while changed:
+        changed = False
+        for key, con_obj in list(con.items()):
+            _, left, right = con_obj['ID'].split('-')
+            if left in dead or right in dead:
+                del con[key]
+                pruned['con'].append(con_obj['ID'])
+                changed = True
+
+        ends = [con_obj['ID'].split('-')[1:] for con_obj in con.values()]
+        col_out = set(left for left, _ in ends)
+        col_in = set(right for _, right in ends)
+        for key, col_obj in list(col.items()):
+            if col_obj['ID'] not in col_in or col_obj['ID'] not in col_out:
+                del col[key]
+                dead.add(col_obj['ID'])
+                pruned['col'].append(col_obj['ID'])
+                changed = True
+
+    pruned_structure['con'] = con
+    pruned_structure['col'] = col
+
+    system.pruned = None
+    if pruned['units'] or pruned['con'] or pruned['col']:
+        _, layout = add_units_and_nodes(Recorder(system.param), structure, tl, tl_map)
+        pruned['layout'] = layout
+        system.pruned = pruned
+    toc = time.time()
+
+    out_str = "Pruned {} not integrated units, {} connectors and {} collectors in {:.2f} seconds.".format(
+        len(pruned['units']), len(pruned['con']), len(pruned['col']), toc-tic)
+    return out_str, pruned_structure
+
+
+def pruned_zeros(system):
+    # results of the units removed by prune_structure: every variable and objective zero. The layout of their
+    # variables is assembled once per system from the recorded parameters, without nodes and constraints between units.
+    pruned = system.pruned
+    if 'zeros' not in pruned:
+        scratch = dc.System(dict(system.param, assembly='matrix'))
+        zeros = {}
+        for name, unit in pruned['layout'].unit.items():
+            if name in system.unit:
+                continue
+            uv = mm.add_unit(scratch, dict(unit.param))
+            ua = {'obj': {ok: 0.0 for ok in uv.obj},
+                  'seq': {vk: None if vv.ndim == 3 else np.zeros(vv.shape) for vk, vv in uv.var.get('seq', {}).items()},
+                  'scalar': {vk: 0.0 for vk in uv.var.get('scalar', {})}}
+            if 'integration' in uv.param:
+                ua.update({'integ': uv.param['integration'], 'exist': uv.param['existing']})
+            zeros[name] = ua
+        pruned['zeros'] = zeros
+    return pruned['zeros']
+
+
 def add_units_and_nodes(system, structure, tl, tl_map):
     # ==================================================================================================================
     # HELPER FUNCTIONS
@@ -604,19 +780,10 @@ def add_units_and_nodes(system, structure, tl, tl_map):
         sys.add_unit(tempParam)
         # print(sys.unit['eso_supply_electric'].param['cost_max_load'])
 
-        co2_bio = 0
-        for u in sys.unit:
-            if 'co2_total_bio' in sys.unit[u].obj.keys():
-                co2_bio += sys.unit[u].obj['co2_total_bio'].expr
-        expr_co2_bio = (co2_bio <= sys.param['decarb_rate_bio'] + sys.param['free_certificate_bio'] * sys.param['decarb_rate_bio'])
-        sys.model.con_limit_bio_emissions = pyo.Constraint(expr=expr_co2_bio)
-
-        co2_fossil = 0
-        for u in sys.unit:
-            if 'co2_total_fossil' in sys.unit[u].obj.keys():
-                co2_fossil += sys.unit[u].obj['co2_total_fossil'].expr
-        expr_co2_fossil = (co2_fossil <= sys.param['decarb_rate_fossil'] + sys.param['free_certificate_fossil']*sys.param['decarb_rate_fossil'])
-        sys.model.con_limit_fos_emissions = pyo.Constraint(expr=expr_co2_fossil)
+        sys.add_obj_limit_con('con_limit_bio_emissions', 'co2_total_bio',
+                              sys.param['decarb_rate_bio'] + sys.param['free_certificate_bio'] * sys.param['decarb_rate_bio'])
+        sys.add_obj_limit_con('con_limit_fos_emissions', 'co2_total_fossil',
+                              sys.param['decarb_rate_fossil'] + sys.param['free_certificate_fossil'] * sys.param['decarb_rate_fossil'])
 
 
         return sys
@@ -1187,6 +1354,7 @@ def add_units_and_nodes(system, structure, tl, tl_map):
                     'inv_fix': esuparam['inv_fix'],  #
                     'inv_var': esuparam['invest_cap'],  #
                     # --- :                 esuparam['inv_power']       # todo class or da.add_inv needs to be adapted
+                    'soc_p_form': esuparam.get('soc_p_form', 'sum'),  # 'cumulative': linear size soc_p limits
 
                     ## other entries needed for unit definition
                     'set_period': sys.param['set_period']  # todo: should be given by timelines
@@ -1299,7 +1467,8 @@ def add_units_and_nodes(system, structure, tl, tl_map):
             if sys.unit[ecu_name].param['classname'] == 'GasBoiler':
                 return dict({'heat': 'q'})
             elif sys.unit[ecu_name].param['classname'] == 'GasTurbine':
-                return dict({'fuel': 'q', 'power': 'p'})
+                # q: exhaust heat, to heat collectors or as fuel of a heat recovery boiler
+                return dict({'heat': 'q', 'power': 'p'})
             elif sys.unit[ecu_name].param['classname'] == 'BackPressureSteamTurbine':
                 return dict({'heat': 'q_out', 'power': 'p'})
             elif sys.unit[ecu_name].param['classname'] == 'CondensingSteamTurbine':
@@ -1522,11 +1691,9 @@ def add_units_and_nodes(system, structure, tl, tl_map):
 
                     if 'fuel' in ecu_in_ports:
 
-                        def con_rule(m, s, t):
-                            return sys.unit[coupler_name].var['seq']['out'][s, t, ecu_in_node_name] <= sys.unit[right].param[carrier] * sys.unit[right].var['seq']['f'][s, t]
                         namestr = 'con_limit_fuel_input-' + left + '-in-' + right
                         #print(namestr)
-                        sys.model.add_component(namestr, pyo.Constraint(system.model.set_sc, system.model.set_t, rule=con_rule))
+                        sys.add_share_con(namestr, (coupler_name, out_port_name), (right, 'f'), sys.unit[right].param[carrier], '<=')
 
 
 
@@ -1654,8 +1821,6 @@ def add_units_and_nodes(system, structure, tl, tl_map):
                     ecu_out_ports = get_ecu_out_ports(left)
 
                     if collector_type == 'heat':
-                        def con_rule(m, s, t):
-                            return sys.unit[coupler_name].var['seq']['in'][s, t, ecu_out_node_name] == sys.unit[left].param[level] * sys.unit[left].var['seq'][ecu_out_ports['heat']][s, t]
                         namestr = 'con_limit_heat-' + level + '-out-' + left + '_to_' + right
                         # print('START NEW UNIT')
                         # print(left)
@@ -1663,7 +1828,9 @@ def add_units_and_nodes(system, structure, tl, tl_map):
                         # print(sys.unit[left].param[level])
                         # print(ecu_out_node_name)
                         # print(coupler_name)
-                        sys.model.add_component(namestr, pyo.Constraint(system.model.set_sc, system.model.set_t, rule=con_rule))
+                        # units without max_share_out_<level> (e.g. gas turbines) may feed all their heat to the collector
+                        if level in sys.unit[left].param:
+                            sys.add_share_con(namestr, (coupler_name, in_port_name), (left, ecu_out_ports['heat']), sys.unit[left].param[level])
 
 
                 elif 'ecu' in right:
@@ -1675,9 +1842,9 @@ def add_units_and_nodes(system, structure, tl, tl_map):
                         ecu_out_node_name = left + 'q_out_node'
                     elif 'ele' in right:  # is an electricity collector, therefore take the p port
                         ecu_out_node_name = left + 'p_out_node'
-                    elif 'hrb' in right:  # is an electricity collector, therefore take the p port
+                    elif 'hrb' in right:  # is a heat recovery boiler, therefore take the exhaust heat of the gas turbine
                         ecu_in_node_name = right + '_fuel_in_node'
-                        ecu_out_node_name = left + '_fuel_out_node'
+                        ecu_out_node_name = left + '_heat_out_node'
 
                     else:
                         raise KeyError('Connector {} does not match model logic. Check input file'.format(
@@ -1800,11 +1967,9 @@ def add_units_and_nodes(system, structure, tl, tl_map):
 
                     if 'fuel' in ecu_in_ports:
 
-                        def con_rule(m, s, t):
-                            return sys.unit[coupler_name].var['seq']['out'][s, t, ecu_in_node_name] <= sys.unit[right].param[carrier] * sys.unit[right].var['seq']['f'][s, t]
                         namestr = 'con_limit_fuel_input-' + left + '-in-' + right
                         #print(namestr)
-                        sys.model.add_component(namestr, pyo.Constraint(system.model.set_sc, system.model.set_t, rule=con_rule))
+                        sys.add_share_con(namestr, (coupler_name, out_port_name), (right, 'f'), sys.unit[right].param[carrier], '<=')
 
 
                 elif 'esu' in right:
@@ -2010,7 +2175,9 @@ def add_units_and_nodes(system, structure, tl, tl_map):
     # print('Couplerdict:')
     # print(couplers.keys())
 
-    out_str = "Added units and nodes in {:.2f} seconds.".format(toc-tic)
+    props = fp.stats()
+    out_str = "Added units and nodes in {:.2f} seconds (fluid properties: {} states, {:.0%} cached).".format(
+        toc-tic, props['states'], props['hit_rate'])
 
     return out_str, system
 
@@ -2023,14 +2190,30 @@ def build_pyomo_model(system: dc.System):
     return out_str, system
 
 
-def solve_pyomo_model(system: dc.System):
+def solve_lp_relaxation(system: dc.System):
+    tic = time.time()
+    system = da.solve_relaxation(system)
+    toc = time.time()
+    out_str = "Solved LP relaxation in {:.2f} seconds, lower bound of the total costs: {:,.0f} EUR. ".format(
+        toc-tic, system.matrix.objective)
+    return out_str, system
+
+
+def solve_pyomo_model(system: dc.System, progress=None):
     tic = time.time()
     solver = 'highs'
-    system = da.solve_model(system, solver=solver)
+    system = da.solve_model(system, solver=solver, persistent=True, progress=progress)
     toc = time.time()
     a = da.plot_node_slack(system)
 
-    out_str = "Solved model with {} in {:.2f} seconds. ".format(solver, toc-tic)
+    out_str = "Solved model with {} ({}, {}) in {:.2f} seconds. ".format(
+        solver, system.solver_settings['strategy'], system.solver_settings['profile'], toc-tic)
+    if system.solver_settings['strategy'] == 'relax-and-fix':
+        out_str += "Heuristic solution, at most {:.2%} above the optimum. ".format(system.matrix.mip_gap)
+    if getattr(system, 'assembly', 'pyomo') == 'matrix' and getattr(system.matrix, 'persistent', {}).get('reused'):
+        out_str += "Reused loaded model ({} changed values). ".format(sum(system.matrix.persistent['changes'].values()))
+    if getattr(system, 'assembly', 'pyomo') == 'matrix' and system.matrix.status == 'Interrupted by user':
+        out_str += "Solution accepted early with a MIP gap of {:.2%}. ".format(system.matrix.mip_gap)
 
     out_str2 = """
     Sum of slack variables necessary to solve model is {:.2f}. If this is > 0 result is not physical.""".format(a)
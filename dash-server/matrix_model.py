@@ -0,0 +1,794 @@
+import numpy as np
+import scipy.sparse as sp
+import fluid_properties as fp    # CoolProp Units: SI -- J, kg, K, Pa, ...
+import auxiliary as da
+
+# Array based counterpart of the pyomo unit classes in classes.py. Every unit adds its variables as blocks of column
+# indices with shape (n_sc, n_ts) and its constraints as coefficient arrays over whole blocks, so assembly cost no
+# longer grows with one python callback per (s, t) index. The unit objects keep the names of classes.py (var, port,
+# con, obj, param), so the json parser and node definitions work unchanged for both assembly modes.
+
+
+class LinExpr:
+    # sparse linear expression sum(coef * x[cols]) + const, used for unit objectives and system level limits
+    def __init__(self, cols=None, coefs=None, const=0.0):
+        self.cols = np.zeros(0, dtype=np.int64) if cols is None else np.asarray(cols, dtype=np.int64).ravel()
+        self.coefs = np.zeros(0) if coefs is None else np.asarray(coefs, dtype=float).ravel()
+        self.const = float(const)
+
+    @classmethod
+    def from_terms(cls, terms, const=0.0):
+        cols, coefs = [], []
+        for coef, idx in terms:
+            idx = np.asarray(idx, dtype=np.int64)
+            cols.append(idx.ravel())
+            coefs.append(np.broadcast_to(np.asarray(coef, dtype=float), idx.shape).ravel())
+        if not cols:
+            return cls(const=const)
+        return cls(np.concatenate(cols), np.concatenate(coefs), const)
+
+    def __add__(self, other):
+        if isinstance(other, LinExpr):
+            return LinExpr(np.concatenate([self.cols, other.cols]), np.concatenate([self.coefs, other.coefs]),
+                           self.const + other.const)
+        return LinExpr(self.cols, self.coefs, self.const + other)
+
+    __radd__ = __add__
+
+    def __sub__(self, other):
+        return self + (-1) * other
+
+    def __mul__(self, factor):
+        return LinExpr(self.cols, self.coefs * factor, self.const * factor)
+
+    __rmul__ = __mul__
+
+    def __neg__(self):
+        return self * -1
+
+    def to_dense(self, n_col):
+        return np.bincount(self.cols, weights=self.coefs, minlength=n_col)
+
+    def value(self, x):
+        return self.const + float(np.dot(self.coefs, np.asarray(x)[self.cols]))
+
+
+class MatrixModel:
+    def __init__(self, system):
+        self.sc = list(system.param['sc'].keys())
+        self.n_sc = len(self.sc)
+        self.n_ts = system.param['n_ts_sc']
+        self.weight = np.array([system.param['sc'][s][0] for s in self.sc], dtype=float)[:, None]
+
+        self.n_col = 0
+        self.lb = np.zeros(1024)
+        self.ub = np.zeros(1024)
+        self.integrality = np.zeros(1024, dtype=np.int8)
+        self.col_names = []     # (unit, var, shape, offset) per block, used for diagnostics and result mapping
+
+        self.n_row = 0
+        self._rows, self._cols, self._vals, self._lo, self._hi, self._wrap = [], [], [], [], [], []
+        self.row_names = []     # (owner, con, first row, number of rows)
+        self.wrap = None        # rows that close a period cyclically, see add_rows
+
+        self.A = None
+        self.c = None
+        self.c0 = 0.0
+
+    # --- columns ------------------------------------------------------------------------------------------------------
+    def _reserve(self, n):
+        if self.n_col + n > len(self.lb):
+            size = max(2 * len(self.lb), self.n_col + n)
+            for attr in ['lb', 'ub', 'integrality']:
+                old = getattr(self, attr)
+                new = np.zeros(size, dtype=old.dtype)
+                new[:self.n_col] = old[:self.n_col]
+                setattr(self, attr, new)
+
+    def add_var(self, owner, name, shape=None, lb=0.0, ub=np.inf, binary=False):
+        # shape None adds a scalar variable, otherwise shape is appended to (n_sc, n_ts)
+        if shape is None:
+            full_shape = ()
+        else:
+            full_shape = (self.n_sc, shape) if np.isscalar(shape) else (self.n_sc,) + tuple(shape)
+        n = int(np.prod(full_shape, dtype=np.int64))
+        self._reserve(n)
+        idx = np.arange(self.n_col, self.n_col + n, dtype=np.int64)
+        self.lb[idx] = np.broadcast_to(lb, full_shape).ravel() if full_shape else lb
+        self.ub[idx] = np.broadcast_to(ub, full_shape).ravel() if full_shape else ub
+        if binary:
+            self.integrality[idx] = 1
+            self.lb[idx] = np.maximum(self.lb[idx], 0)
+            self.ub[idx] = np.minimum(self.ub[idx], 1)
+        self.col_names.append((owner, name, full_shape, self.n_col))
+        self.n_col += n
+        if not full_shape:
+            return int(idx[0])
+        return idx.reshape(full_shape)
+
+    def add_seq(self, owner, name, extra=None, lb=0.0, ub=np.inf, binary=False, n_ts=None):
+        n_ts = self.n_ts if n_ts is None else n_ts
+        shape = (n_ts,) if extra is None else (n_ts, extra)
+        return self.add_var(owner, name, shape, lb, ub, binary)
+
+    def add_scalar(self, owner, name, lb=0.0, ub=np.inf, binary=False):
+        return self.add_var(owner, name, None, lb, ub, binary)
+
+    def set_bounds(self, cols, lb=None, ub=None):
+        cols = np.asarray(cols, dtype=np.int64)
+        if lb is not None:
+            self.lb[cols] = np.maximum(self.lb[cols], np.broadcast_to(lb, cols.shape))
+        if ub is not None:
+            self.ub[cols] = np.minimum(self.ub[cols], np.broadcast_to(ub, cols.shape))
+
+    # --- rows ---------------------------------------------------------------------------------------------------------
+    def add_rows(self, owner, name, terms, lo=-np.inf, hi=np.inf, wrap=False):
+        # terms: list of (coef, cols). Rows span at most (n_sc, n_ts); cols with a third axis (e.g. coupler or
+        # heat pump level indices) are summed over that axis, their coef broadcasts against the full cols shape.
+        # wrap: mask of the rows (broadcast like lo and hi) that refer from the end of a period to its start.
+        shapes = [np.shape(lo), np.shape(hi)]
+        for coef, idx in terms:
+            shapes.append(np.shape(idx)[:2] if np.ndim(idx) > 2 else np.broadcast_shapes(np.shape(coef), np.shape(idx)))
+        shape = np.broadcast_shapes(*shapes)
+        n = int(np.prod(shape, dtype=np.int64))
+        row_idx = np.arange(n, dtype=np.int64).reshape(shape)
+        for coef, idx in terms:
+            idx = np.asarray(idx, dtype=np.int64)
+            extra = idx.shape[2:]
+            full = shape + extra
+            idx = np.broadcast_to(idx, full)
+            coef = np.broadcast_to(np.asarray(coef, dtype=float), full)
+            rows = np.broadcast_to(row_idx.reshape(shape + (1,) * len(extra)), full)
+            # zero coefficients are kept, so the sparsity pattern does not depend on parameter values
+            self._rows.append(rows.ravel() + self.n_row)
+            self._cols.append(idx.ravel())
+            self._vals.append(coef.ravel())
+        self._lo.append(np.broadcast_to(np.asarray(lo, dtype=float), shape).ravel())
+        self._hi.append(np.broadcast_to(np.asarray(hi, dtype=float), shape).ravel())
+        self._wrap.append(np.broadcast_to(np.asarray(wrap, dtype=bool), shape).ravel())
+        rng = (self.n_row, n)
+        self.row_names.append((owner, name) + rng)
+        self.n_row += n
+        return rng
+
+    # --- model --------------------------------------------------------------------------------------------------------
+    def finalize(self, objective):
+        if self._rows:
+            rows, cols, vals = np.concatenate(self._rows), np.concatenate(self._cols), np.concatenate(self._vals)
+        else:
+            rows, cols, vals = np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64), np.zeros(0)
+        self.A = sp.csr_matrix((vals, (rows, cols)), shape=(self.n_row, self.n_col))
+        self.A.sum_duplicates()
+        self.row_lo = np.concatenate(self._lo) if self._lo else np.zeros(0)
+        self.row_hi = np.concatenate(self._hi) if self._hi else np.zeros(0)
+        self.wrap = np.concatenate(self._wrap) if self._wrap else np.zeros(0, dtype=bool)
+        self.lb = self.lb[:self.n_col]
+        self.ub = self.ub[:self.n_col]
+        self.integrality = self.integrality[:self.n_col]
+        self.set_objective(objective)
+
+    def set_objective(self, objective):
+        self.c = objective.to_dense(self.n_col)
+        self.c0 = objective.const
+        # columns that appear in no constraint and not in the objective are never seen by a solver (pyomo reports None)
+        used = np.bincount(self.A.indices[self.A.data != 0], minlength=self.n_col) > 0
+        self.unused = ~used & (self.c == 0) & (self.lb != self.ub)
+
+    def reassemble(self, owner, build, name=None):
+        # assembles the blocks of owner (only its row block name, if given) once more with build(), e.g. a unit with
+        # new parameters. build has to add the same column and row blocks as the first assembly, their bounds,
+        # coefficients and row bounds are overwritten in place. Returns False if the blocks or their sparsity pattern
+        # differ, the model is partly overwritten then and has to be assembled anew.
+        cols = [block for block in self.col_names if block[0] == owner] if name is None else []
+        rows = [block for block in self.row_names if block[0] == owner and name in [None, block[1]]]
+        state = (self.n_col, self.n_row, len(self.col_names), len(self.row_names), len(self._rows), len(self._lo))
+        c0 = cols[0][3] if cols else self.n_col
+        c1 = self.n_col if not cols else cols[-1][3] + int(np.prod(cols[-1][2], dtype=np.int64))
+        r0 = rows[0][2] if rows else self.n_row
+        r1 = rows[-1][2] + rows[-1][3] if rows else self.n_row
+        integrality = self.integrality[c0:c1].copy()
+        self.n_col, self.n_row = c0, r0
+        try:
+            build()
+            if self.col_names[state[2]:] != cols or self.row_names[state[3]:] != rows:
+                return False
+            if not np.array_equal(self.integrality[c0:c1], integrality):
+                return False
+
+            new = slice(state[4], None)
+            if self._rows[new]:
+                r, c, v = np.concatenate(self._rows[new]), np.concatenate(self._cols[new]), np.concatenate(self._vals[new])
+            else:
+                r, c, v = np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64), np.zeros(0)
+            block = sp.csr_matrix((v, (r - r0, c)), shape=(r1 - r0, state[0]))
+            block.sum_duplicates()
+            start, end = self.A.indptr[r0], self.A.indptr[r1]
+            if not (np.array_equal(block.indptr, self.A.indptr[r0:r1 + 1] - start)
+                    and np.array_equal(block.indices, self.A.indices[start:end])):
+                return False
+            self.A.data[start:end] = block.data
+            if r1 > r0:
+                self.row_lo[r0:r1] = np.concatenate(self._lo[state[5]:])
+                self.row_hi[r0:r1] = np.concatenate(self._hi[state[5]:])
+                self.wrap[r0:r1] = np.concatenate(self._wrap[state[5]:])
+            return True
+        finally:
+            self.n_col, self.n_row = state[:2]
+            del self.col_names[state[2]:], self.row_names[state[3]:]
+            del self._rows[state[4]:], self._cols[state[4]:], self._vals[state[4]:]
+            del self._lo[state[5]:], self._hi[state[5]:], self._wrap[state[5]:]
+
+    def size(self):
+        return {'n_col': self.n_col, 'n_row': self.n_row, 'n_int': int(self.integrality[:self.n_col].sum()),
+                'nnz': int(sum(len(v) for v in self._vals)) if self.A is None else int(self.A.nnz)}
+
+
+class ArrayUnit:
+    def __init__(self, param, system):
+        self.name = param['name']
+        self.var = dict()
+        self.port = dict()
+        self.con = dict()
+        self.obj = dict()
+        self.param = param
+
+        da.set_general_param(system, self)
+
+
+# --- helpers, mirror the constraint builders in auxiliary.py ----------------------------------------------------------
+
+def nxt(idx):
+    # index block shifted to [s, mod(t + 1, n_ts)]
+    return np.roll(idx, -1, axis=1)
+
+
+def last_step(system):
+    # rows with nxt terms: the last timestep refers to the first one of its period
+    return np.arange(system.param['n_ts_sc']) == system.param['n_ts_sc'] - 1
+
+
+def back_window(system, n):
+    # timesteps t, t - 1, ..., t - n + 1 of every row (mod n_ts) and the rows that wrap around to the end of the period
+    t = np.arange(system.param['n_ts_sc'])
+    return np.mod(t[:, None] - np.arange(n)[None, :], system.param['n_ts_sc']), t < n - 1
+
+
+def add_seq(system, unit, name, **kwargs):
+    unit.var['seq'][name] = system.matrix.add_seq(unit.name, name, **kwargs)
+    return unit.var['seq'][name]
+
+
+def add_scalar(system, unit, name, **kwargs):
+    unit.var['scalar'][name] = system.matrix.add_scalar(unit.name, name, **kwargs)
+    return unit.var['scalar'][name]
+
+
+def add_con(system, unit, name, terms, lo=-np.inf, hi=np.inf, wrap=False):
+    unit.con[name] = system.matrix.add_rows(unit.name, name, terms, lo, hi, wrap)
+
+
+def add_var_uvwi(system, unit):
+    if unit.param['u_active']:
+        add_seq(system, unit, 'u', binary=True)
+    if unit.param['v_w_active']:
+        add_seq(system, unit, 'v', ub=1)
+        add_seq(system, unit, 'w', ub=1)
+    if unit.param['i_active']:
+        if 'exists' in unit.param:
+            if unit.param['exists']:
+                add_scalar(system, unit, 'i', lb=1, ub=1)
+            else:
+                add_scalar(system, unit, 'i', ub=1)
+        else:
+            add_scalar(system, unit, 'i', binary=True)
+
+
+def add_var_a_v(system, unit):
+    if 'a_req' in unit.param:
+        add_scalar(system, unit, 'area')
+    if 'v_req' in unit.param:
+        add_scalar(system, unit, 'volume')
+
+
+def add_con_a_v(system, unit, depend='cap'):
+    sc = unit.var['scalar']
+    for key, var in [('a_req', 'area'), ('v_req', 'volume')]:
+        if key in unit.param:
+            add_con(system, unit, key, [(1, sc[var]), (-unit.param[key][0], sc['i']),
+                                        (-unit.param[key][1], sc[depend])], 0, 0)
+
+
+def add_logic_uvw(system, unit):
+    if unit.param['u_active'] and unit.param['v_w_active']:
+        u, v, w = (unit.var['seq'][k] for k in 'uvw')
+        add_con(system, unit, 'logic', [(1, nxt(u)), (-1, u), (-1, nxt(v)), (1, nxt(w))], 0, 0, last_step(system))
+        add_min_utdt(system, unit)
+
+
+def add_min_utdt(system, unit):
+    if unit.param['v_w_active']:
+        u, v, w = (unit.var['seq'][k] for k in 'uvw')
+        window, wrap = back_window(system, unit.param['min_utdt_ts'][0])
+        add_con(system, unit, 'MIN_UT', [(1, v[:, window]), (-1, u)], hi=0, wrap=wrap)
+        window, wrap = back_window(system, unit.param['min_utdt_ts'][1])
+        add_con(system, unit, 'MIN_DT', [(1, w[:, window]), (1, u)], hi=1, wrap=wrap)
+
+
+def add_simple_m_q(system, unit):
+    seq = unit.var['seq']
+    add_con(system, unit, 'm_q', [(1, seq['q']), (-(unit.param['h_out'] - unit.param['h_in']) / 1e6, seq['m'])], 0, 0)
+
+
+def add_cap_lim(system, unit, varname):
+    cap = unit.var['scalar']['cap']
+    for n in varname:
+        lim = unit.param['cap_' + n]
+        if unit.param['i_active'] and 'i' in unit.var['scalar']:
+            i = unit.var['scalar']['i']
+            add_con(system, unit, 'cap_' + n + '_max', [(1, cap), (-lim[1], i)], hi=0)
+            add_con(system, unit, 'cap_' + n + '_min', [(1, cap), (-lim[0], i)], lo=0)
+        else:
+            # constant capacity limits are plain column bounds
+            system.matrix.set_bounds(cap, lb=lim[0], ub=lim[1])
+
+
+def add_op_lim(system, unit, varname):
+    seq = unit.var['seq']
+    cap = unit.var['scalar']['cap']
+    for n in varname:
+        q = seq[n][:, :system.param['n_ts_sc']]
+        if unit.param['u_active'] and unit.param['v_w_active']:
+            lim, c_max, susd = unit.param['lim_' + n], unit.param['cap_' + n][1], unit.param['max_susd']
+            add_con(system, unit, n + '_max1', [(1, q), (-lim[1], cap)], hi=0)
+            add_con(system, unit, n + '_max2', [(1, q), (-c_max * lim[1], seq['u'])], hi=0)
+            add_con(system, unit, n + '_max3', [(1, q), (-susd[0], cap), (c_max * (lim[1] - susd[0]), seq['v'])],
+                    hi=c_max * (lim[1] - susd[0]))
+            add_con(system, unit, n + '_max4', [(1, q), (-susd[1], cap), (c_max * (lim[1] - susd[1]), nxt(seq['w']))],
+                    hi=c_max * (lim[1] - susd[1]), wrap=last_step(system))
+            add_con(system, unit, n + '_min1', [(1, q), (-lim[0], cap), (-c_max * lim[0], seq['u'])],
+                    lo=-c_max * lim[0])
+        elif unit.param['u_active']:
+            lim, c_max = unit.param['lim_' + n], unit.param['cap_' + n][1]
+            add_con(system, unit, n + '_min1', [(1, q), (-lim[0], cap), (-lim[0] * c_max, seq['u'])],
+                    lo=-lim[0] * c_max)
+            add_con(system, unit, n + '_max1', [(1, q), (-1, cap)], hi=0)
+            add_con(system, unit, n + '_max2', [(1, q), (-lim[1] * c_max, seq['u'])], hi=0)
+        else:
+            # q >= 0 is already the lower bound of the column
+            add_con(system, unit, n + '_max', [(1, q), (-1, cap)], hi=0)
+
+
+def add_ramp_con(system, unit, varname):
+    seq = unit.var['seq']
+    cap = unit.var['scalar']['cap']
+    tss = system.param['tss']
+    for n in varname:
+        if unit.param.get('ramp_' + n):
+            ramp, susd, c_max = unit.param['ramp_' + n], unit.param['max_susd'], unit.param['cap_' + n][1]
+            q = seq[n]
+            up = [(1, nxt(q)), (-1, q), (-ramp[0] * tss, cap)]
+            down = [(-1, nxt(q)), (1, q), (-ramp[1] * tss, cap)]
+            if unit.param['v_w_active']:
+                up.append((-susd[0] * c_max, seq['v']))
+                down.append((-susd[1] * c_max, nxt(seq['w'])))
+            wrap = last_step(system)
+            add_con(system, unit, 'ramp_up1_' + n, up, hi=0, wrap=wrap)
+            add_con(system, unit, 'ramp_up2_' + n, [(1, nxt(q)), (-1, q), (-susd[0], cap)], hi=0, wrap=wrap)
+            add_con(system, unit, 'ramp_down1_' + n, down, hi=0, wrap=wrap)
+            add_con(system, unit, 'ramp_down2_' + n, [(-1, nxt(q)), (1, q), (-susd[1], cap)], hi=0, wrap=wrap)
+
+
+def add_lin_dep(system, unit, varname):
+    seq = unit.var['seq']
+    c1, c2 = np.round(np.polyfit(unit.param['lim_' + varname[0]], unit.param['lim_' + varname[1]], 1), 2)
+    terms = [(1, seq[varname[1]]), (-c1, seq[varname[0]])]
+    if unit.param['u_active']:
+        terms.append((-c2, seq['u']))
+    add_con(system, unit, varname[1] + '(_)' + varname[0] + ')', terms, 0, 0)
+
+
+def add_es_balance(system, unit, varname):
+    seq = unit.var['seq']
+    tss = system.param['tss']
+    soc = seq[varname[2]][:, :system.param['n_ts_sc']]
+    add_con(system, unit, 'con_' + unit.name + '_es_balance_' + varname[2],
+            [(1, nxt(soc)), (-(1 - tss * unit.param['loss_soc']), soc), (-unit.param['eta_c/d'][0] * tss, seq[varname[0]]),
+             (tss / unit.param['eta_c/d'][1], seq[varname[1]])], 0, 0, last_step(system))
+
+
+def annual(system, weight_factor=1):
+    # weight of a single (s, t) entry in the annual objectives
+    return system.matrix.weight * weight_factor / system.param['dur_sc'] * 8760
+
+
+def add_obj_inv(system, unit):
+    i = unit.param['interest_rate']
+    n = unit.param['depreciation_period']
+    if i > 0:
+        annuity_factor = ((1 + i) ** n * i) / ((1 + i) ** n - 1)
+    else:
+        annuity_factor = 1 / n
+    sc = unit.var['scalar']
+    terms = [(unit.param['inv_var'] * annuity_factor, sc['cap'])]
+    if unit.param['i_active']:
+        terms.append((unit.param['inv_fix'] * annuity_factor, sc['i']))
+    obj = LinExpr.from_terms(terms)
+    if unit.param.get('exists') == 'True':
+        obj = LinExpr()
+    unit.obj['inv'] = obj
+
+
+def add_obj_u_v_w(system, unit):
+    seq = unit.var['seq']
+    if 'opex_fix' in unit.param and unit.param.get('opex_fix') > 0:
+        unit.obj['opex_fix'] = LinExpr.from_terms(
+            [(unit.param['opex_fix'] * annual(system, system.param['tss']), seq['u'])])
+    else:
+        unit.obj['opex_fix'] = LinExpr()
+
+    for k, (key, var) in enumerate([('cost_SU', 'v'), ('cost_SD', 'w')]):
+        if 'cost_susd' in unit.param and unit.param['cost_susd'][k] > 0:
+            unit.obj[key] = LinExpr.from_terms([(unit.param['cost_susd'][k] * annual(system), seq[var])])
+        else:
+            unit.obj[key] = LinExpr()
+
+
+def add_obj_total(unit, keys):
+    obj = LinExpr()
+    for k in keys:
+        obj = obj + unit.obj[k]
+    unit.obj['total'] = obj
+
+
+def init_unit(unit):
+    unit.var['seq'] = dict()
+    unit.var['scalar'] = dict()
+
+
+# --- units ------------------------------------------------------------------------------------------------------------
+
+def gas_boiler(system, unit):
+    da.init_uvwi_param(unit)
+    p = unit.param
+    if p['lim_q'][0] > 0 or p['lim_f'][0] > 0:
+        p['u_active'] = True
+    if p['cap_q'][0] > 0:
+        p['i_active'] = True
+    if 'max_susd' not in p:
+        p['max_susd'] = (p['lim_q'][0], p['lim_q'][0]) if p['v_w_active'] else (1, 1)
+    p['h_in'] = fp.PropsSI('H', 'T', p['T_in'] + 273.15, 'P', p['pressure'], p['medium']) * 1e3
+    p['h_out'] = fp.PropsSI('H', 'T', p['T_out'] + 273.15, 'P', p['pressure'], p['medium']) * 1e3
+
+    init_unit(unit)
+    for v in ['q', 'm', 'f']:
+        unit.port[v] = add_seq(system, unit, v)
+    add_scalar(system, unit, 'cap')
+    add_var_uvwi(system, unit)
+    add_var_a_v(system, unit)
+
+    add_logic_uvw(system, unit)
+    add_op_lim(system, unit, ['q'])
+    add_cap_lim(system, unit, ['q'])
+    add_ramp_con(system, unit, ['q'])
+    add_lin_dep(system, unit, ['q', 'f'])
+    add_simple_m_q(system, unit)
+    add_con_a_v(system, unit)
+
+    add_obj_u_v_w(system, unit)
+    add_obj_inv(system, unit)
+    add_obj_total(unit, ['opex_fix', 'cost_SU', 'cost_SD', 'inv'])
+
+
+def _turbine_param(unit, lim_in):
+    da.init_uvwi_param(unit)
+    p = unit.param
+    if 'lim_p' in p and p['lim_p'][0] > 0:
+        p['u_active'] = True
+    if 'lim_f' in p and p[lim_in][0] > 0:
+        p['u_active'] = True
+    if p['cap_p'][0] > 0:
+        p['i_active'] = True
+    if 'max_susd' not in p:
+        p['max_susd'] = (p['lim_p'][0], p['lim_p'][0]) if p['v_w_active'] else (1, 1)
+
+
+def _turbine_cons(system, unit, dep):
+    add_logic_uvw(system, unit)
+    add_op_lim(system, unit, ['p'])
+    add_cap_lim(system, unit, ['p'])
+    add_ramp_con(system, unit, ['p'])
+    if dep is not None:
+        add_lin_dep(system, unit, ['p', dep])
+    add_con_a_v(system, unit)
+
+
+def _turbine_obj(system, unit):
+    add_obj_u_v_w(system, unit)
+    add_obj_inv(system, unit)
+    add_obj_total(unit, ['opex_fix', 'cost_SU', 'cost_SD', 'inv'])
+
+
+def gas_turbine(system, unit):
+    _turbine_param(unit, 'lim_f')
+    init_unit(unit)
+    for v in ['q', 'p', 'f']:
+        unit.port[v] = add_seq(system, unit, v)
+    add_scalar(system, unit, 'cap')
+    add_var_uvwi(system, unit)
+    add_var_a_v(system, unit)
+
+    _turbine_cons(system, unit, 'f' if 'lim_f' in unit.param else None)
+    seq = unit.var['seq']
+    add_con(system, unit, 'energy_balance', [(1, seq['q']), (-0.95, seq['f']), (0.95, seq['p'])], 0, 0)
+    _turbine_obj(system, unit)
+
+
+def back_pressure_steam_turbine(system, unit):
+    _turbine_param(unit, 'lim_q_in')
+    init_unit(unit)
+    for v in ['q_out', 'p', 'q_in']:
+        unit.port[v] = add_seq(system, unit, v)
+    add_scalar(system, unit, 'cap')
+    add_var_uvwi(system, unit)
+    add_var_a_v(system, unit)
+
+    _turbine_cons(system, unit, 'q_in')
+    seq = unit.var['seq']
+    eta = unit.param['eta_th']
+    add_con(system, unit, 'energy_balance', [(1, seq['q_out']), (-eta, seq['q_in']), (eta, seq['p'])], 0, 0)
+    _turbine_obj(system, unit)
+
+
+def condensing_steam_turbine(system, unit):
+    p = unit.param
+    p['h_out'] = fp.PropsSI('H', 'T', p['T_cond'] + 273.15, 'Q', 0, 'Water') / 1e6
+    p['h_in'] = fp.PropsSI('H', 'T', p['T_in'] + 273.15, 'P', p['P_in'], 'Water') / 1e6
+    _turbine_param(unit, 'lim_q_in')
+    init_unit(unit)
+    for v in ['q_out', 'p', 'q_in', 'm']:
+        unit.port[v] = add_seq(system, unit, v)
+    add_scalar(system, unit, 'cap')
+    add_var_uvwi(system, unit)
+    add_var_a_v(system, unit)
+
+    _turbine_cons(system, unit, 'q_in')
+    seq = unit.var['seq']
+    add_con(system, unit, 'el_production', [(1, seq['p']), (-p['eta_el'], seq['q_in'])], 0, 0)
+    add_con(system, unit, 'mass_q_in', [(1 / p['h_in'], seq['q_in']), (-1, seq['m'])], 0, 0)
+    add_con(system, unit, 'mass_q_out', [(1, seq['q_out']), (-p['h_out'], seq['m'])], 0, 0)
+    _turbine_obj(system, unit)
+
+
+def heat_pump(system, unit):
+    da.init_uvwi_param(unit)
+    p = unit.param
+    h = fp.PropsSI('H', 'T', np.add(p['T_sink_in'], 273.15), 'P', p['pressure_sink'], p['medium_sink']) / 1e6
+    p['h_sink_in'] = dict(zip(p['T_sink_in'], h.tolist()))
+    h = fp.PropsSI('H', 'T', np.add(p['T_source_in'], 273.15), 'P', p['pressure_source'], p['medium_source']) / 1e6
+    p['h_source_in'] = dict(zip(p['T_source_in'], h.tolist()))
+    p['h_sink_out'] = fp.PropsSI('H', 'T', p['T_sink_out'] + 273.15, 'P', p['pressure_sink'], p['medium_sink']) / 1e6
+    p['h_source_out'] = fp.PropsSI('H', 'T', p['T_source_out'] + 273.15, 'P', p['pressure_source'],
+                                   p['medium_source']) / 1e6
+    p['COP'] = tuple(
+        p['eta_comp'][k] * (p['T_sink_out'] + p['delta_T_sink'][k] + 273.15) /
+        (p['T_sink_out'] + p['delta_T_sink'][k] - p['T_source_out'] + p['delta_T_source'][k])
+        for k in range(2)
+    )
+    p['lim_p'] = tuple(p['lim_q_sink'][k] / p['COP'][k] for k in range(2))
+    if p['lim_q_sink'][0] > 0 or p['lim_p'][0] > 0:
+        p['u_active'] = True
+    if p['cap_q_sink'][0] > 0:
+        p['i_active'] = True
+    if 'max_susd' not in p:
+        p['max_susd'] = (p['lim_q_sink'][0], p['lim_q_sink'][0]) if p['v_w_active'] else (1, 1)
+
+    init_unit(unit)
+    seq = unit.var['seq']
+    add_seq(system, unit, 'q_sink')
+    add_seq(system, unit, 'q_source')
+    add_seq(system, unit, 'm_sink_in', extra=len(p['T_sink_in']))
+    add_seq(system, unit, 'm_source_in', extra=len(p['T_source_in']))
+    add_seq(system, unit, 'p')
+    add_scalar(system, unit, 'cap')
+    add_var_uvwi(system, unit)
+    add_var_a_v(system, unit)
+
+    for v in ['q_sink', 'q_source', 'p']:
+        unit.port[v] = seq[v]
+    for side in ['sink', 'source']:
+        levels = p['T_' + side + '_in']
+        for k, n in enumerate(levels):
+            namestr = 'm_' + side + '_in' if len(levels) == 1 else 'm_' + side + '_in_' + str(n)
+            unit.port[namestr] = seq['m_' + side + '_in'][:, :, k]
+        # trailing axis is summed wherever the port is used
+        unit.port['m_' + side + '_out'] = seq['m_' + side + '_in']
+
+    add_logic_uvw(system, unit)
+    add_op_lim(system, unit, ['q_sink'])
+    add_cap_lim(system, unit, ['q_sink'])
+    add_ramp_con(system, unit, ['q_sink'])
+    add_lin_dep(system, unit, ['q_sink', 'p'])
+    add_con_a_v(system, unit)
+
+    add_con(system, unit, 'energy_balance', [(1, seq['q_sink']), (-1, seq['q_source']), (-1, seq['p'])], 0, 0)
+    dh = np.array([p['h_sink_out'] - p['h_sink_in'][n] for n in p['T_sink_in']])
+    add_con(system, unit, 'm_sink(q_sink)', [(1, seq['q_sink']), (-dh, seq['m_sink_in'])], 0, 0)
+    dh = np.array([p['h_source_in'][n] - p['h_source_out'] for n in p['T_source_in']])
+    add_con(system, unit, 'm_source(q_source)', [(1, seq['q_source']), (-dh, seq['m_source_in'])], 0, 0)
+
+    add_obj_u_v_w(system, unit)
+    add_obj_inv(system, unit)
+    add_obj_total(unit, ['opex_fix', 'cost_SU', 'cost_SD', 'inv'])
+
+
+def storage(system, unit):
+    da.init_uvwi_param(unit)
+    p = unit.param
+    if p['cap_soc'][0] > 0:
+        p['i_active'] = True
+
+    init_unit(unit)
+    seq = unit.var['seq']
+    add_seq(system, unit, 'c')
+    add_seq(system, unit, 'd')
+    if p['u_active']:
+        add_seq(system, unit, 'u', binary=True)
+    add_seq(system, unit, 'soc', n_ts=system.param['n_ts_sc'] + 1)
+    add_scalar(system, unit, 'cap')
+    if p['v_w_active']:
+        add_seq(system, unit, 'v', ub=1)
+        add_seq(system, unit, 'w', ub=1)
+    if p['i_active']:
+        if 'exists' in p:
+            add_scalar(system, unit, 'i', lb=1 if p['exists'] else 0, ub=1)
+        else:
+            add_scalar(system, unit, 'i', binary=True)
+    add_var_a_v(system, unit)
+
+    for v in ['c', 'd', 'soc']:
+        unit.port[v] = seq[v]
+
+    add_op_lim(system, unit, ['soc'])
+    add_cap_lim(system, unit, ['soc'])
+    add_es_balance(system, unit, ['c', 'd', 'soc'])
+    add_con_a_v(system, unit)
+
+    # max charging / discharging power
+    if p['u_active']:
+        system.con['con_' + unit.name + '_c_max'] = system.matrix.add_rows(
+            unit.name, 'c_max', [(1, seq['c']), (-p['lim_c/d'][0], seq['u'])], hi=0)
+        system.con['con_' + unit.name + '_d_max'] = system.matrix.add_rows(
+            unit.name, 'd_max', [(1, seq['d']), (p['lim_c/d'][1], seq['u'])], hi=p['lim_c/d'][1])
+    else:
+        system.matrix.set_bounds(seq['c'], ub=p['lim_c/d'][0])
+        system.matrix.set_bounds(seq['d'], ub=p['lim_c/d'][1])
+
+    add_obj_inv(system, unit)
+    add_obj_total(unit, ['inv'])
+
+
+def demand(system, unit):
+    unit.var['seq'] = dict()
+    add_seq(system, unit, 'd', lb=-np.inf)  # negative values are admissible, since demand may be negative too.
+    unit.port['d'] = unit.var['seq']['d']
+    if 'seq' in unit.param.keys():
+        fixed = np.array([unit.param['seq'][s] for s in system.matrix.sc], dtype=float)[:, :system.param['n_ts_sc']]
+        system.matrix.lb[unit.var['seq']['d']] = fixed
+        system.matrix.ub[unit.var['seq']['d']] = fixed
+    unit.obj['total'] = LinExpr()
+
+
+def supply(system, unit):
+    p = unit.param
+    if 'cap_s' not in p:
+        p['cap_s'] = (0, np.inf)
+    p['u_active'] = False
+    p['v_w_active'] = False
+    p['i_active'] = p['cap_s'][0] > 0
+
+    price = np.array([p['seq'][s] for s in system.matrix.sc], dtype=float)[:, :system.param['n_ts_sc']]
+
+    init_unit(unit)
+    seq, sc = unit.var['seq'], unit.var['scalar']
+    add_seq(system, unit, 's')
+    add_scalar(system, unit, 'cap')
+    if 'cap_existing' in p:
+        add_scalar(system, unit, 'cap_expansion')
+        add_scalar(system, unit, 'dec_cap_expansion', binary=True)
+    for co2 in ['co2_biogen', 'co2_fossil']:
+        if co2 in p:
+            add_seq(system, unit, 'm_' + co2)
+
+    unit.port['s'] = seq['s']
+    for co2 in ['co2_fossil', 'co2_biogen']:
+        if co2 in p:
+            unit.port['m_' + co2] = seq['m_' + co2]
+
+    add_op_lim(system, unit, ['s'])
+    add_cap_lim(system, unit, ['s'])
+
+    if 'flexbound' in p:
+        fb = np.array([p['flexbound'][s] for s in system.matrix.sc], dtype=float)[:, :system.param['n_ts_sc']]
+        add_con(system, unit, '_flexbound_UB', [(1, seq['s']), (-fb, sc['cap'])], hi=0)
+        add_con(system, unit, '_flexbound_LB', [(1, seq['s']), (-0.99 * fb, sc['cap'])], lo=0)
+
+    if 'cap_existing' in p:
+        add_con(system, unit, '_cap_expansion', [(1, sc['cap_expansion']), (-1, sc['cap'])], lo=-p['cap_existing'])
+        add_con(system, unit, '_dec_expansion', [(1, sc['cap_expansion']), (-1000, sc['dec_cap_expansion'])], hi=0)
+
+    for co2 in ['co2_biogen', 'co2_fossil']:
+        if co2 in p:
+            add_con(system, unit, '_calc_' + co2, [(1, seq['m_' + co2]), (-p[co2], seq['s'])], 0, 0)
+
+    # Objectives
+    unit.obj['energy'] = LinExpr.from_terms([(price * annual(system), seq['s'])])
+    if 'cap_existing' in p:
+        unit.obj['inv'] = LinExpr.from_terms([(p['cost_fix_ex'] / system.param['depreciation_period'],
+                                               sc['dec_cap_expansion']),
+                                              (p['cost_max_ex'] / system.param['depreciation_period'],
+                                               sc['cap_expansion'])])
+    for co2, mass in [('co2_biogen', 'mass_biogen'), ('co2_fossil', 'mass_fossil')]:
+        if co2 in p:
+            unit.obj[co2] = LinExpr.from_terms([(annual(system, system.param['cost_' + co2]), seq['m_' + co2])])
+            unit.obj[mass] = LinExpr.from_terms([(annual(system), seq['m_' + co2])])
+    if 'cost_max_load' in p:
+        unit.obj['max_s'] = LinExpr.from_terms([(p['cost_max_load'], sc['cap'])])
+
+    add_obj_total(unit, [k for k in ['energy', 'max_s', 'inv', 'co2_biogen', 'co2_fossil'] if k in unit.obj])
+    unit.obj['co2_total_bio'] = unit.obj.get('mass_biogen', LinExpr()) + 0
+    unit.obj['co2_total_fossil'] = unit.obj.get('mass_fossil', LinExpr()) + 0
+
+
+def coupler(system, unit):
+    unit.var['seq'] = dict()
+    for side in ['in', 'out']:
+        add_seq(system, unit, side, extra=len(unit.param[side]))
+        for k, n in enumerate(unit.param[side]):
+            unit.port[side + '_' + str(n)] = unit.var['seq'][side][:, :, k]
+    add_con(system, unit, '_balance', [(1, unit.var['seq']['in']), (-1, unit.var['seq']['out'])], 0, 0)
+    unit.obj['total'] = LinExpr()
+
+
+def node(system, unit):
+    unit.var['seq'] = dict()
+    seq = unit.var['seq']
+    add_seq(system, unit, 'slack_lhs')
+    add_seq(system, unit, 'slack_rhs')
+
+    terms = [(1, seq['slack_lhs']), (-1, seq['slack_rhs'])]
+    for side, sign in [('lhs', 1), ('rhs', -1)]:
+        for n in unit.param[side]:
+            if len(n) < 3:
+                n.append(1)
+            terms.append((sign * n[2], system.unit[n[0]].port[n[1]][:, :system.param['n_ts_sc']]))
+    bounds = {'==': (0, 0), '>=': (0, np.inf), '<=': (-np.inf, 0)}
+    if unit.param['type'] not in bounds:
+        raise ValueError('Unsupported node type {} in node {}.'.format(unit.param['type'], unit.name))
+    add_con(system, unit, '_node', terms, *bounds[unit.param['type']])
+
+    big_m = 1e8
+    unit.obj['slack'] = LinExpr.from_terms([(big_m, seq['slack_lhs']), (big_m, seq['slack_rhs'])])
+    add_obj_total(unit, ['slack'])
+
+
+assemble = {
+    'Supply': supply,
+    'GasBoiler': gas_boiler,
+    'GasTurbine': gas_turbine,
+    'BackPressureSteamTurbine': back_pressure_steam_turbine,
+    'CondensingSteamTurbine': condensing_steam_turbine,
+    'HeatPump': heat_pump,
+    'Storage': storage,
+    'Demand': demand,
+    'Coupler': coupler,
+    'Node': node,
+}
+
+
+def add_unit(system, param):
+    if param['classname'] not in assemble:
+        raise NotImplementedError('Class {} of unit {} has no array assembly. Use assembly "pyomo".'.format(
+            param['classname'], param['name']))
+    unit = ArrayUnit(param, system)
+    assemble[param['classname']](system, unit)
+    return unit
@@ -0,0 +1,235 @@
+import os
+import json
+import time
+import resource
+from collections import defaultdict
+from contextlib import contextmanager
+import diskcache
+import numpy as np
+import data_dirs as dd
+
+# Metrics of simulation runs. Every run of simulation_jobs.run_simulation produces one record with the time of each
+# pipeline phase (read_timelines, read_parameters, ..., solve, extract), the time spent creating units per classname
+# and nodes (classes.System.timing), the size of the model per unit (variables, binaries, constraints, nonzeros), the
+# solver outcome (status, gap, branch and bound nodes) and the peak memory of the worker during the run.
+# Records are appended as json lines to metrics.jsonl in METRICS_DIR (see data_dirs.py). Running totals and the last
+# record of a run that built a model are kept in a diskcache next to it and rendered as Prometheus text by
+# prometheus_text (served by /dash-server/metrics and exposed by the flask server under /metrics).
+#
+#   run = Run(job=..., user=...)
+#   with run.phase('read_timelines'):
+#       ...
+#   run.model(system)
+#   run.finish('done')
+
+METRICS_DIR = dd.data_dir('metrics')
+LOG = os.path.join(METRICS_DIR, 'metrics.jsonl')
+PREFIX = 'dekarpio'
+
+_cache = None
+
+
+def get_cache():
+    global _cache
+    if _cache is None:
+        _cache = diskcache.Cache(METRICS_DIR)
+    return _cache
+
+
+def reset_peak_memory():
+    # resets the peak resident set size (VmHWM) of this process, workers run many jobs one after another
+    try:
+        with open('/proc/self/clear_refs', 'w') as f:
+            f.write('5')
+    except OSError:
+        pass
+
+
+def peak_memory():
+    # peak resident set size in MB since the last reset_peak_memory, lifetime peak where /proc is not available
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def unit_sizes(system):
+    # {unit or node: {classname, variables, binaries, constraints, nonzeros}} of a built System
+    units = dict(system.unit, **system.node)
+    sizes = {name: {'classname': unit.param.get('classname', type(unit).__name__), 'variables': 0, 'binaries': 0,
+                    'constraints': 0, 'nonzeros': 0} for name, unit in units.items()}
+    if getattr(system, 'assembly', 'pyomo') == 'matrix':
+        matrix = system.matrix
+        for owner, name, shape, offset in matrix.col_names:
+            if owner in sizes:
+                n = int(np.prod(shape))
+                sizes[owner]['variables'] += n
+                sizes[owner]['binaries'] += int(matrix.integrality[offset:offset + n].sum())
+        row_nnz = np.diff(matrix.A.indptr)
+        for owner, name, first, n in matrix.row_names:
+            if owner in sizes:
+                sizes[owner]['constraints'] += n
+                sizes[owner]['nonzeros'] += int(row_nnz[first:first + n].sum())
+        return sizes
+
+    from pyomo.core.expr.visitor import identify_variables
+    for name, unit in units.items():
+        for group in unit.var.values():
+            for var in group.values():
+                for v in var.values():
+                    sizes[name]['variables'] += 1
+                    sizes[name]['binaries'] += int(v.is_binary() or v.is_integer())
+        for con in unit.con.values():
+            for c in con.values():
+                sizes[name]['constraints'] += 1
+                sizes[name]['nonzeros'] += sum(1 for _ in identify_variables(c.body, include_fixed=False))
+    return sizes
+
+
+def solver_outcome(system):
+    # status, relative gap and branch and bound nodes of the last solve
+    if getattr(system, 'assembly', 'pyomo') == 'matrix':
+        matrix = system.matrix
+        highs = getattr(system, 'highs', None)
+        return {'status': getattr(matrix, 'status', None), 'gap': getattr(matrix, 'mip_gap', None),
+                'nodes': int(highs.getInfo().mip_node_count) if highs is not None else None,
+                'objective': getattr(matrix, 'objective', None)}
+    results = getattr(system.model, 'results', None) or getattr(system.model, 'result', None)
+    if results is None:
+        return {'status': None, 'gap': None, 'nodes': None, 'objective': None}
+    if hasattr(results, 'termination_condition'):
+        objective = results.best_feasible_objective
+        bound = results.best_objective_bound
+        gap = None
+        if objective is not None and bound is not None:
+            gap = abs(objective - bound) / max(abs(objective), 1e-9)
+        return {'status': str(results.termination_condition), 'gap': gap, 'nodes': None, 'objective': objective}
+    return {'status': str(results.solver.termination_condition), 'gap': None, 'nodes': None, 'objective': None}
+
+
+class Run:
+    def __init__(self, **info):
+        reset_peak_memory()
+        self.record = {'time': time.time(), 'status': None, 'error': None, 'phases': {}, 'unit_creation': {},
+                       'node_creation': None, 'units': {}, 'total': {}, 'solver': None, 'peak_memory_mb': None}
+        self.record.update(info)
+
+    @contextmanager
+    def phase(self, name):
+        tic = time.perf_counter()
+        try:
+            yield
+        finally:
+            phases = self.record['phases']
+            phases[name] = phases.get(name, 0.0) + time.perf_counter() - tic
+
+    def creation(self, system):
+        # time spent in System.add_unit per classname and in System.add_node
+        timing = dict(getattr(system, 'timing', {}))
+        node = timing.pop('Node', None)
+        self.record['unit_creation'] = {classname: {'count': count, 'seconds': seconds}
+                                        for classname, (count, seconds) in timing.items()}
+        if node is not None:
+            self.record['node_creation'] = {'count': node[0], 'seconds': node[1]}
+
+    def model(self, system):
+        sizes = unit_sizes(system)
+        self.record['units'] = sizes
+        self.record['total'] = {key: sum(unit[key] for unit in sizes.values())
+                                for key in ['variables', 'binaries', 'constraints', 'nonzeros']}
+        if getattr(system, 'assembly', 'pyomo') == 'matrix':
+            self.record['total'] = dict(system.matrix.size(), **self.record['total'])
+
+    def solver(self, system):
+        self.record['solver'] = solver_outcome(system)
+
+    def finish(self, status, error=None):
+        self.record.update(status=status, error=error, duration=time.time() - self.record['time'],
+                           peak_memory_mb=peak_memory())
+        try:
+            append(self.record)
+        except Exception as e:      # metrics never fail a simulation
+            print('Metrics of the run could not be stored: {}'.format(e))
+        return self.record
+
+
+def append(record):
+    cache = get_cache()
+    with cache.transact():
+        with open(LOG, 'a') as f:
+            f.write(json.dumps(record, default=float) + '\n')
+        totals = cache.get('totals', {})
+        count(totals, 'runs', record['status'])
+        for name, seconds in record['phases'].items():
+            count(totals, 'phase', name, seconds)
+        for classname, creation in record['unit_creation'].items():
+            count(totals, 'unit_creation', classname, creation['seconds'], creation['count'])
+        if record['node_creation'] is not None:
+            count(totals, 'unit_creation', 'Node', record['node_creation']['seconds'], record['node_creation']['count'])
+        cache.set('totals', totals)
+        if record['units']:     # runs answered from the result cache build no model
+            cache.set('last', record)
+
+
+def count(totals, metric, label, seconds=0.0, n=1):
+    entry = totals.setdefault(metric, {}).setdefault(label, [0, 0.0])
+    entry[0] += n
+    entry[1] += seconds
+
+
+def records(limit=None):
+    # the last `limit` records of the log
+    if not os.path.exists(LOG):
+        return []
+    with open(LOG) as f:
+        lines = f.readlines()
+    return [json.loads(line) for line in lines[-limit if limit else 0:]]
+
+
+def prometheus_text():
+    cache = get_cache()
+    totals = cache.get('totals', {})
+    last = cache.get('last')
+    lines = []
+
+    def metric(name, kind, help, samples):
+        lines.append('# HELP {}_{} {}'.format(PREFIX, name, help))
+        lines.append('# TYPE {}_{} {}'.format(PREFIX, name, kind))
+        for suffix, labels, value in samples:
+            if value is None:
+                continue
+            label_str = ','.join('{}="{}"'.format(k, str(v).replace('"', "'")) for k, v in labels.items())
+            lines.append('{}_{}{}{} {}'.format(PREFIX, name, suffix, '{' + label_str + '}' if label_str else '',
+                                               value if isinstance(value, int) else float(value)))
+
+    metric('simulation_runs_total', 'counter', 'Simulation runs by final status.',
+           [('', {'status': status}, n) for status, (n, _) in sorted(totals.get('runs', {}).items())])
+    metric('phase_seconds', 'summary', 'Time per pipeline phase.',
+           [s for phase, (n, seconds) in sorted(totals.get('phase', {}).items())
+            for s in [('_sum', {'phase': phase}, seconds), ('_count', {'phase': phase}, n)]])
+    metric('unit_creation_seconds', 'summary', 'Time creating units (count: units created) per classname.',
+           [s for classname, (n, seconds) in sorted(totals.get('unit_creation', {}).items())
+            for s in [('_sum', {'classname': classname}, seconds), ('_count', {'classname': classname}, n)]])
+    if last is None:
+        return '\n'.join(lines) + '\n'
+
+    by_class = defaultdict(lambda: defaultdict(int))
+    for unit in last['units'].values():
+        for key in ['variables', 'binaries', 'constraints', 'nonzeros']:
+            by_class[unit['classname']][key] += unit[key]
+    for key in ['variables', 'binaries', 'constraints', 'nonzeros']:
+        metric('last_model_' + key, 'gauge', 'Model {} of the last run per unit classname.'.format(key),
+               [('', {'classname': classname}, values[key]) for classname, values in sorted(by_class.items())])
+    solver = last['solver'] or {}
+    metric('last_run_timestamp_seconds', 'gauge', 'Start of the last run.', [('', {}, last['time'])])
+    metric('last_run_seconds', 'gauge', 'Duration of the last run.', [('', {}, last.get('duration'))])
+    metric('last_peak_memory_bytes', 'gauge', 'Peak resident memory of the worker during the last run.',
+           [('', {}, last['peak_memory_mb'] * 1024 ** 2 if last['peak_memory_mb'] is not None else None)])
+    metric('last_mip_gap', 'gauge', 'Relative MIP gap of the last solve.',
+           [('', {'status': solver.get('status')}, solver.get('gap'))])
+    metric('last_mip_nodes', 'gauge', 'Branch and bound nodes of the last solve.', [('', {}, solver.get('nodes'))])
+    return '\n'.join(lines) + '\n'
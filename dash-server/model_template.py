@@ -0,0 +1,136 @@
+import copy
+import time
+from collections import OrderedDict
+import numpy as np
+import classes as dc
+import json_auxiliary as ja
+
+# A worker process assembles the System of a structure once (the template) and applies every further configuration of
+# the same structure as changes to it. prune_structure and add_units_and_nodes run on a json_auxiliary.Recorder, which
+# keeps the parameters of all units, nodes and system constraints in call order without assembling anything. Calls with
+# the same parameters as in the template keep their blocks, the others are assembled again in place
+# (matrix_model.MatrixModel.reassemble), which only overwrites bounds, costs, coefficients and row bounds. The loaded
+# HiGHS model of the template (highs_backend.get_persistent_model) then only receives these differences. A
+# configuration that changes the layout (e.g. other integrated units, or a cost that activates an investment binary)
+# builds a new template. Pyomo systems are built from the recorded calls every time.
+
+templates = OrderedDict()       # template key -> Template, per worker process
+max_templates = 4
+
+SYSTEM_CONS = ['add_share_con', 'add_obj_limit_con']
+
+
+def same(a, b):
+    # parameter values: dicts, lists, tuples, numpy arrays and scalars
+    if a is b:
+        return True
+    if isinstance(a, dict) or isinstance(b, dict):
+        return isinstance(a, dict) and isinstance(b, dict) and a.keys() == b.keys() and all(same(a[k], b[k]) for k in a)
+    if isinstance(a, np.ndarray) or isinstance(b, np.ndarray):
+        return np.array_equal(a, b)
+    if isinstance(a, (list, tuple)) or isinstance(b, (list, tuple)):
+        return (isinstance(a, (list, tuple)) and isinstance(b, (list, tuple)) and len(a) == len(b)
+                and all(same(x, y) for x, y in zip(a, b)))
+    return bool(a == b)
+
+
+def system_param(param):
+    # parameters of the system that units and constraints read, without the solver settings
+    return {k: v for k, v in param.items() if k != 'opt'}
+
+
+def template_key(recorder):
+    # systems with the same periods, weights, time steps and calls have the same layout, apart from parameters that
+    # add or remove variables (checked by MatrixModel.reassemble). The calls are those of the pruned structure, so
+    # every combination of integrated units has its own template.
+    param = recorder.param
+    periods = tuple((s, tuple(w)) for s, w in param['sc'].items())
+    return (param.get('assembly', 'pyomo'), periods, param['n_ts_sc'], param['tss'],
+            tuple(call[:2] for call in recorder.calls))
+
+
+def call_system(system, call):
+    method, name, args = call
+    getattr(system, method)(*copy.deepcopy(args))
+
+
+class Template:
+    def __init__(self, recorder):
+        self.param = copy.deepcopy(recorder.param)
+        self.calls = recorder.calls
+        self.system = dc.System(copy.deepcopy(recorder.param))
+        for call in self.calls:
+            call_system(self.system, call)
+        self.system.pruned = recorder.pruned
+        ja.build_pyomo_model(self.system)
+        self.n_applied = 0
+
+    def apply(self, recorder):
+        # configuration of recorder as changes to the template system, returns the number of calls assembled again or
+        # None if it needs a new template: the layout changed or the system parameters (e.g. CO2 prices, interest
+        # rate), which all units read
+        if not same(system_param(recorder.param), system_param(self.param)):
+            return None
+        system = self.system
+        matrix = system.matrix
+        system.param['opt'] = copy.deepcopy(recorder.param['opt'])
+        system.timing = dict()
+
+        changed = []
+        for call, old in zip(recorder.calls, self.calls):
+            method, name, args = call
+            # the emission limits sum the objectives of the units, which can change with the units
+            if same(args, old[2]) and not (method == 'add_obj_limit_con' and changed):
+                continue
+            if method in SYSTEM_CONS:
+                ok = matrix.reassemble('system', lambda: call_system(system, call), name)
+            else:
+                ok = matrix.reassemble(name, lambda: call_system(system, call))
+            if not ok:
+                return None
+            changed.append(name)
+
+        if changed:
+            matrix.set_objective(system.matrix_objective())
+        system.pruned = recorder.pruned
+        self.param = copy.deepcopy(recorder.param)
+        self.calls = recorder.calls
+        self.n_applied += 1
+        return len(changed)
+
+
+def initialize_model(sysParam):
+    tic = time.time()
+    recorder = ja.Recorder(sysParam)
+    toc = time.time()
+    out_str = "Initialized model in {:.2f} seconds.".format(toc-tic)
+    return out_str, recorder
+
+
+def build_model(recorder):
+    # System of the recorded configuration: the template of its structure with the configuration applied, a new
+    # template, or for pyomo assembly a new System
+    tic = time.time()
+    if recorder.param.get('assembly', 'pyomo') != 'matrix':
+        system = dc.System(recorder.param)
+        for call in recorder.calls:
+            call_system(system, call)
+        system.pruned = recorder.pruned
+        ja.build_pyomo_model(system)
+        out_str = "Built model in {:.2f} seconds.\n ".format(time.time() - tic)
+        return out_str, system
+
+    key = template_key(recorder)
+    template = templates.get(key)
+    n_changed = template.apply(recorder) if template is not None else None
+    if n_changed is None:
+        template = Template(recorder)
+        templates[key] = template
+        while len(templates) > max_templates:
+            templates.popitem(last=False)
+        out_str = "Built model in {:.2f} seconds.\n ".format(time.time() - tic)
+    else:
+        templates.move_to_end(key)
+        out_str = "Applied configuration to the loaded model in {:.2f} seconds ({} of {} units, nodes and " \
+                  "constraints assembled again).\n ".format(time.time() - tic, n_changed, len(recorder.calls))
+    return out_str, template.system
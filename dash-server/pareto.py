@@ -0,0 +1,114 @@
+import time
+import numpy as np
+import highspy
+import highs_backend as hb
+import matrix_model as mm
+
+# Cost / CO2 frontier of a System with matrix assembly (epsilon-constraint method). The emission limit row added by
+# json_auxiliary (con_limit_fos_emissions or con_limit_bio_emissions) is the mutable cap: one HiGHS instance is
+# loaded and every point only changes costs or bounds of it.
+#   1. cost optimum without cap -> highest emissions of the front
+#   2. minimum emissions -> lowest emissions that can be reached (full decarbonization if 0)
+#   3. cost optimum for caps between both, in increasing order, each point starts from the solution of the previous
+#      one, which is feasible for the next (looser) cap
+# The node slacks of 2. and 3. are capped at the total slack of the cost optimum (fixed to 0 if it needs none), so the
+# front does not buy emission reductions with big-M slack.
+
+LIMIT_CONS = {'co2_total_fossil': 'con_limit_fos_emissions', 'co2_total_bio': 'con_limit_bio_emissions'}
+EMISSIONS = {'co2_total_fossil': 'em_fos', 'co2_total_bio': 'em_bio'}
+
+
+def emissions(system, key):
+    return sum(hb.value(system, u.obj[key]) for u in system.unit.values() if key in u.obj)
+
+
+def read_point(system, h, cap, solve_time):
+    point = {'cap': cap, 'time': solve_time}
+    try:
+        hb.read_solution(system, h)
+    except RuntimeError:        # no feasible solution within the time limit
+        point.update(status=h.modelStatusToString(h.getModelStatus()), feasible=False)
+        return point
+    matrix = system.matrix
+    point.update({
+        'status': matrix.status,
+        'feasible': True,
+        'mip_gap': matrix.mip_gap,
+        'total': matrix.objective,
+        'total_real': hb.value(system, system.obj['total_real']),
+        'em_fos': emissions(system, 'co2_total_fossil'),
+        'em_bio': emissions(system, 'co2_total_bio'),
+        'slack': sum(hb.value(system, n.obj['slack']) for n in system.node.values() if 'slack' in n.obj),
+        'cap_units': {name: hb.value(system, u.var['scalar']['cap']) for name, u in system.unit.items()
+                      if 'cap' in u.var.get('scalar', {})},
+    })
+    return point
+
+
+def pareto_front(system, n_points=10, key='co2_total_fossil', options=None):
+    if getattr(system, 'assembly', 'pyomo') != 'matrix':
+        raise ValueError('Pareto fronts need a system with matrix assembly.')
+    if LIMIT_CONS[key] not in system.con:
+        raise ValueError('System has no emission limit {} for {}.'.format(LIMIT_CONS[key], key))
+    matrix = system.matrix
+    row = system.con[LIMIT_CONS[key]][0]
+    expr = sum((u.obj[key] for u in system.unit.values() if key in u.obj), mm.LinExpr())
+
+    highs_options = dict(time_limit=float(system.param['opt']['timelimit']), log_to_console=False)
+    highs_options.update(options or {})
+    h = hb.make_highs(system, highs_options)
+    tic = time.time()
+
+    def solve(cap, start=None):
+        h.changeRowBounds(row, -np.inf, cap - expr.const)
+        if start is not None:
+            solution = highspy.HighsSolution()
+            solution.col_value = start
+            h.setSolution(solution)
+        t = time.time()
+        h.run()
+        return read_point(system, h, cap, time.time() - t)
+
+    optimum = solve(np.inf)
+    if not optimum['feasible']:
+        raise RuntimeError('HiGHS did not find a feasible solution without emission cap.')
+    x_optimum = matrix.x
+    em_max = optimum[EMISSIONS[key]]
+
+    slack = sum((n.obj['slack'] for n in system.node.values() if 'slack' in n.obj), mm.LinExpr())
+    if optimum['slack'] == 0:
+        cols = np.unique(slack.cols)
+        h.changeColsBounds(len(cols), cols, matrix.lb[cols], np.zeros(len(cols)))
+    else:
+        coefs = slack.to_dense(matrix.n_col)
+        cols = np.flatnonzero(coefs)
+        h.addRow(-np.inf, optimum['slack'] * (1 + 1e-6) - slack.const, len(cols), cols, coefs[cols])
+
+    # lowest emissions, with the emissions as objective
+    cols = np.arange(matrix.n_col)
+    h.changeColsCost(matrix.n_col, cols, expr.to_dense(matrix.n_col))
+    h.changeObjectiveOffset(expr.const)
+    lowest = solve(np.inf)
+    h.changeColsCost(matrix.n_col, cols, matrix.c)
+    h.changeObjectiveOffset(matrix.c0)
+    em_min = min(lowest[EMISSIONS[key]], em_max) if lowest['feasible'] else 0.0
+    start = matrix.x if lowest['feasible'] else None
+
+    points = []
+    for cap in np.linspace(em_min, em_max, n_points)[:-1]:
+        point = solve(float(cap), start)
+        points.append(point)
+        if point['feasible']:
+            start = matrix.x
+    optimum['cap'] = em_max
+    points.append(optimum)
+    matrix.x = x_optimum
+
+    return {
+        'key': key,
+        'n_points': n_points,
+        'em_min': em_min,
+        'em_max': em_max,
+        'points': points,
+        'time': time.time() - tic,
+    }
@@ -452,7 +452,16 @@ def add_obj_u_v_w(system, unit):
     unit.obj['cost_SD'] = system.model.component(namestr)
 
 
-def solve_model(system, solver='glpk'):
+def solve_model(system, solver='glpk', threads=1, tee=True):
+    if solver == 'highs':
+        from pyomo.contrib import appsi
+        opt = appsi.solvers.Highs()
+        opt.highs_options = dict(time_limit=float(system.param['opt']['timelimit']),
+                                 threads=threads,
+                                 log_to_console=tee,
+                                 )
+        system.model.result = opt.solve(system.model)
+        return system
     opt = pyo.SolverFactory(solver)
     print('Starting optimization...')
     if solver=='cplex':
@@ -2181,17 +2181,46 @@ class PeriodStorage(Unit):
         namestr = 'con_' + self.name + '_es_balance_' + 'soc_p'
         system.model.add_component(namestr, pyo.Constraint(self.param['set_n_period'], rule=con_rule))
 
-        # op_lim
+        # op_lim, soc at t2 of every period from the soc at its start and the charging of its typical period up to t2
+        # soc_p_form 'sum': each row sums the charging up to t2 itself, O(n_period * n_ts_sc**2) nonzeros
+        # soc_p_form 'cumulative': the discounted sums are states soc_cum of the typical periods, shared by all periods
+        # mapped to them, O((n_period + n_sc) * n_ts_sc) nonzeros. Without losses soc_cum is the intraperiod soc.
+        a = 1 - system.param['tss'] * self.param['loss_soc']
+        if self.param.get('soc_p_form', 'sum') == 'cumulative':
+            if self.param['loss_soc'] == 0:
+                def soc_cum(s, t2):
+                    return self.var['seq']['soc'][s, t2] - self.var['seq']['soc'][s, 0]
+            else:
+                self.var['seq']['soc_cum'] = pyo.Var(system.model.set_sc, system.model.set_t, domain=pyo.Reals)
+                namestr = 'var_' + self.name + '_soc_cum'
+                system.model.add_component(namestr, self.var['seq']['soc_cum'])
+
+                def con_rule(m, s, t):
+                    if t == 0:
+                        return self.var['seq']['soc_cum'][s, t] == 0
+                    return self.var['seq']['soc_cum'][s, t] - self.var['seq']['soc_cum'][s, t - 1] == a**(t - 1) * (
+                        self.param['eta_c/d'][0] * self.var['seq']['c'][s, t - 1] - 1 / self.param['eta_c/d'][1] *
+                        self.var['seq']['d'][s, t - 1]) * system.param['tss']
+                namestr = 'con_' + self.name + '_' + 'soc_cum'
+                system.model.add_component(namestr, pyo.Constraint(system.model.set_sc, system.model.set_t, rule=con_rule))
+
+                def soc_cum(s, t2):
+                    return self.var['seq']['soc_cum'][s, t2]
+
+            def soc_p_t2(t_p, t2):
+                return a**t2 * self.var['seq']['soc_p'][t_p] + soc_cum(self.param['set_period'][t_p], t2)
+        else:
+            def soc_p_t2(t_p, t2):
+                return a**t2 * self.var['seq']['soc_p'][t_p] + sum(a**t * (self.param['eta_c/d'][0] * self.var['seq']['c'][self.param['set_period'][t_p], t] - 1 / self.param['eta_c/d'][1] * self.var['seq']['d'][self.param['set_period'][t_p], t]) for t in range(t2)) * system.param['tss']
+
         def con_rule(m, t_p, t2):
-            # return (1 - system.param['tss'] * self.param['loss_soc'])**(t2) * self.var['seq']['soc_p'][t_p] + sum((1 - system.param['tss'] * self.param['loss_soc'])**(t2) * (self.param['eta_c/d'][0] * self.var['seq']['c'][self.param['set_period'][t_p], t] - 1 / self.param['eta_c/d'][1] * self.var['seq']['d'][self.param['set_period'][t_p], t]) for t in range(t2)) * system.param['tss'] <= self.var['scalar']['cap']
-            return (1 - system.param['tss'] * self.param['loss_soc'])**t2 * self.var['seq']['soc_p'][t_p] + sum((1 - system.param['tss'] * self.param['loss_soc'])**t * (self.param['eta_c/d'][0] * self.var['seq']['c'][self.param['set_period'][t_p], t] - 1 / self.param['eta_c/d'][1] * self.var['seq']['d'][self.param['set_period'][t_p], t]) for t in range(t2)) * system.param['tss'] <= self.var['scalar']['cap']
+            return soc_p_t2(t_p, t2) <= self.var['scalar']['cap']
         namestr = 'con_' + self.name + '_' + 'soc_p_max'
         system.model.add_component(namestr, pyo.Constraint(self.param['set_n_period'], system.model.set_t, rule=con_rule))
 
         # op_lim1
         def con_rule(m, t_p, t2):
-            # return (1 - system.param['tss'] * self.param['loss_soc'])**(t2) * self.var['seq']['soc_p'][t_p] + sum((1 - system.param['tss'] * self.param['loss_soc'])**(t2) * (self.param['eta_c/d'][0] * self.var['seq']['c'][self.param['set_period'][t_p], t] - 1 / self.param['eta_c/d'][1] * self.var['seq']['d'][self.param['set_period'][t_p], t]) for t in range(t2)) * system.param['tss'] <= self.var['scalar']['cap']
-            return (1 - system.param['tss'] * self.param['loss_soc'])**t2 * self.var['seq']['soc_p'][t_p] + sum((1 - system.param['tss'] * self.param['loss_soc'])**t * (self.param['eta_c/d'][0] * self.var['seq']['c'][self.param['set_period'][t_p], t] - 1 / self.param['eta_c/d'][1] * self.var['seq']['d'][self.param['set_period'][t_p], t]) for t in range(t2)) * system.param['tss'] >= 0
+            return soc_p_t2(t_p, t2) >= 0
         namestr = 'con_' + self.name + '_' + 'soc_p_max2'
         system.model.add_component(namestr, pyo.Constraint(self.param['set_n_period'], system.model.set_t, rule=con_rule))
 
@@ -15,8 +15,9 @@ sys.path
 import pi_framework.DOOM.classes as dc
 import pi_framework.DOOM.auxiliary as da
 
-def run_case():
-    print('import finished')
+def build_case(soc_p_form='cumulative', classes=dc, loss_soc=0.001):
+    # system of the example with its model built, classes: module with System and the unit classes (this one or the
+    # dash-server classes), loss_soc: relative losses of the period storage per hour
     # Get Data
     n_tsp = 24
 
@@ -56,6 +57,7 @@ def run_case():
     # Create system and ConcreteModel
 
     sysParam = {'sc': u_w_dict, 'tss': 1, 'n_ts_sc': 24, 'interest_rate': 0.05, 'depreciation_period': 10,
+                'free_certificate_fossil': 0, 'free_certificate_bio': 0,  # read by the dash-server System
                 'opt': {
                     'timelimit': 60,
                 }, 'seq': dict()}
@@ -70,7 +72,7 @@ def run_case():
     for i in u_w_dict.keys():
         sysParam['seq'][j][i] = np.ones(sysParam['n_ts_sc']) * 40
 
-    res = dc.System(sysParam)
+    res = classes.System(sysParam)
 
     # Units
 
@@ -106,7 +108,8 @@ def run_case():
         'exists': True,
         'lim_c/d': (10, 10),
         'eta_c/d': (1, 1),
-        'loss_soc': 0.001,  # relative losses proportional to soc per hour
+        'loss_soc': loss_soc,  # relative losses proportional to soc per hour
+        'soc_p_form': soc_p_form,  # 'sum': soc_p limits summing the charging explicitly, size grows with n_ts_sc**2
         'inv_var': 50 * (1 + 0.01 * sysParam['depreciation_period']),
         'inv_fix': 0,
     }
@@ -157,6 +160,12 @@ def run_case():
     res.add_node(tempParam)
 
     res.build_model()
+    return res, df, set_period
+
+
+def run_case():
+    print('import finished')
+    res, df, set_period = build_case()
 
     # Additional Constraints
 
@@ -0,0 +1,103 @@
+import os
+import sys
+import time
+import threading
+import tracemalloc
+
+# Opt-in profiling of a single simulation run (job field 'profiling', see simulation_jobs.submit). A sampler thread
+# records the Python stack of the profiled thread every INTERVAL seconds and tracemalloc traces the allocations. The
+# profile is attached to the stored results (results['profiling']):
+#
+#   folded      collapsed stacks 'outer;inner;innermost milliseconds' per line, wall time weighted, input of
+#               flamegraph.pl, speedscope or inferno (GET /dash-server/jobs/<job_id>/profile?format=folded)
+#   allocations top allocation sites of the memory still allocated at the end of the run and the traced peak
+#
+# Runs without profiling never create a Profiler, no thread is started and tracemalloc stays off.
+# While C code holds the GIL (e.g. parts of a HiGHS solve) no samples are taken. The time between two samples beyond
+# MAX_GAP intervals is recorded under the separate stack NATIVE, not under the stack seen next.
+
+INTERVAL = 0.005            # seconds between samples
+TOP_ALLOCATIONS = 30
+TRACE_FRAMES = 1            # frames per allocation traceback, 1: allocation site only
+MAX_GAP = 2                 # intervals between two samples charged to the sampled stack
+NATIVE = '<native/GIL held>'
+
+
+def frame_label(code):
+    return '{} ({}:{})'.format(code.co_name, os.path.basename(code.co_filename), code.co_firstlineno).replace(';', ',')
+
+
+class Profiler:
+    def __init__(self, interval=INTERVAL):
+        self.interval = interval
+        self.stacks = {}        # tuple of frame labels (outermost first) -> seconds
+        self.samples = 0
+        self.result = None
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        # profiles the calling thread
+        self.target = threading.get_ident()
+        self.started = time.perf_counter()
+        tracemalloc.start(TRACE_FRAMES)
+        self._thread = threading.Thread(target=self._sample, daemon=True)
+        self._thread.start()
+        return self
+
+    def _sample(self):
+        last = time.perf_counter()
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.target)
+            now = time.perf_counter()
+            elapsed, last = now - last, now
+            if frame is None:
+                continue
+            stack = []
+            while frame is not None:
+                stack.append(frame_label(frame.f_code))
+                frame = frame.f_back
+            key = tuple(reversed(stack))
+            gap = max(elapsed - MAX_GAP * self.interval, 0.0)
+            if gap > 0:
+                self.stacks[(NATIVE,)] = self.stacks.get((NATIVE,), 0.0) + gap
+            self.stacks[key] = self.stacks.get(key, 0.0) + elapsed - gap
+            self.samples += 1
+
+    def stop(self):
+        # stops sampling and tracing and returns the profile, only the first call stops
+        if self.result is not None or self._thread is None:
+            return self.result
+        self._stop.set()
+        self._thread.join()
+        snapshot = tracemalloc.take_snapshot()
+        current, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        snapshot = snapshot.filter_traces([tracemalloc.Filter(False, tracemalloc.__file__),
+                                           tracemalloc.Filter(False, '<frozen importlib._bootstrap>'),
+                                           tracemalloc.Filter(False, __file__)])
+        self.result = {
+            'interval': self.interval,
+            'duration': time.perf_counter() - self.started,
+            'samples': self.samples,
+            'folded': '\n'.join('{} {}'.format(';'.join(stack), int(round(seconds * 1000)))
+                                for stack, seconds in sorted(self.stacks.items()) if seconds >= 0.0005),
+            'allocations': {
+                'current_mb': current / 1024 ** 2,
+                'peak_mb': peak / 1024 ** 2,
+                'top': [{'file': stat.traceback[0].filename, 'line': stat.traceback[0].lineno,
+                         'size_mb': stat.size / 1024 ** 2, 'count': stat.count}
+                        for stat in snapshot.statistics('lineno')[:TOP_ALLOCATIONS]],
+            },
+        }
+        return self.result
+
+
+def hot_functions(folded, n=10):
+    # [(frame label, milliseconds)] with the most self time (innermost frame of a stack) of a folded profile
+    total = {}
+    for line in folded.splitlines():
+        stack, ms = line.rsplit(' ', 1)
+        label = stack.rsplit(';', 1)[-1]
+        total[label] = total.get(label, 0) + int(ms)
+    return sorted(total.items(), key=lambda item: -item[1])[:n]
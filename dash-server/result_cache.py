@@ -0,0 +1,116 @@
+import io
+import os
+import json
+import zlib
+import hashlib
+import diskcache
+import numpy as np
+import data_dirs as dd
+
+# Simulation results keyed by the content of everything that determines them: the structure json, the timelines, the
+# timeline map and the solver settings. Opening the same configId twice or a shared link is answered from here.
+# The cache evicts least recently used entries above size_limit. Simulation results (json_auxiliary.return_results) are
+# stored as npz archives: all numpy arrays in one float member, everything else in a json header (member '__meta__').
+# Only the key is sent to the browser, the plots read the arrays from here. Small json results (e.g. pareto fronts)
+# and the figures built from the results (key: result key and figure id) are stored as zlib compressed json strings.
+
+CACHE_DIR = dd.data_dir('result_cache')
+SIZE_LIMIT = 2 * 1024 ** 3      # bytes
+VERSION = 2                     # increase when return_results changes its layout
+
+_cache = None
+
+
+def get_cache():
+    global _cache
+    if _cache is None:
+        _cache = diskcache.Cache(CACHE_DIR, size_limit=SIZE_LIMIT, eviction_policy='least-recently-used')
+    return _cache
+
+
+def canonical(obj):
+    return json.dumps(obj, sort_keys=True, separators=(',', ':'), ensure_ascii=False, default=str)
+
+
+def result_key(structure, timelines, timeline_map, settings):
+    h = hashlib.sha256()
+    for part in [VERSION, structure, timelines, timeline_map, settings]:
+        h.update(canonical(part).encode('utf-8'))
+        h.update(b'\0')
+    return h.hexdigest()
+
+
+def solver_settings(sysParam, solver='highs'):
+    return {'solver': solver, 'opt': sysParam['opt'], 'assembly': sysParam.get('assembly', 'pyomo'), 'sc': sysParam['sc']}
+
+
+def get(key):
+    data = get_cache().get(key)
+    if data is None:
+        return None
+    return zlib.decompress(data).decode('utf-8')
+
+
+def put(key, results_json):
+    get_cache().set(key, zlib.compress(results_json.encode('utf-8'), 6))
+
+
+def has(key):
+    return key in get_cache()
+
+
+def pack(results):
+    # all arrays are concatenated into one float member 'values', the header keeps offset and shape of each of them
+    arrays = []
+    offset = 0
+
+    def strip(obj):
+        nonlocal offset
+        if isinstance(obj, np.ndarray):
+            arrays.append(np.asarray(obj, dtype=float).ravel())
+            offset += obj.size
+            return {'__array__': [offset - obj.size, list(obj.shape)]}
+        if isinstance(obj, dict):
+            return {k: strip(v) for k, v in obj.items()}
+        return obj
+
+    meta = json.dumps(strip(results)).encode('utf-8')
+    values = np.concatenate(arrays) if arrays else np.zeros(0)
+    buf = io.BytesIO()
+    np.savez_compressed(buf, __meta__=np.frombuffer(meta, dtype=np.uint8), values=values)
+    return buf.getvalue()
+
+
+def unpack(data):
+    with np.load(io.BytesIO(data)) as npz:
+        meta = json.loads(npz['__meta__'].tobytes().decode('utf-8'))
+        values = npz['values']
+
+    def fill(obj):
+        if isinstance(obj, dict):
+            if '__array__' in obj:
+                offset, shape = obj['__array__']
+                return values[offset:offset + int(np.prod(shape))].reshape(shape)
+            return {k: fill(v) for k, v in obj.items()}
+        return obj
+
+    return fill(meta)
+
+
+def get_results(key):
+    data = get_cache().get(key)
+    if data is None:
+        return None
+    return unpack(data)
+
+
+def put_results(key, results):
+    get_cache().set(key, pack(results))
+
+
+def get_figures(key, figure_id):
+    return get(key + '/' + figure_id)
+
+
+def put_figures(key, figure_id, figures_json):
+    put(key + '/' + figure_id, figures_json)
@@ -0,0 +1,437 @@
+import os
+import json
+import time
+import uuid
+import signal
+import argparse
+import traceback
+import multiprocessing
+from collections import Counter
+import diskcache
+import data_dirs as dd
+import auxiliary as da
+import json_auxiliary as ja
+import model_template as tp
+import result_cache as rc
+import metrics as mt
+import profiling as pr
+import pareto as pa
+
+# Simulation jobs. The Dash server (and the status api in app.py) only submit jobs and read their status, the
+# simulations run in a pool of worker processes started with
+#
+#   python simulation_jobs.py --workers 2
+#
+# Jobs and their status are kept in a diskcache shared by all processes. A free worker takes the next queued job:
+# highest priority first, within a priority the users take turns (a user's n-th waiting job comes after the n-th
+# waiting job of every other user) and at most MAX_RUNNING_PER_USER jobs of a user run at once.
+# Cancelled jobs stop right away: the pool terminates the worker process solving it and starts a new one. Jobs whose
+# status was not polled with touch for ABANDON_AFTER seconds (e.g. the browser tab was closed) are cancelled as well.
+# Workers are forked from the pool process, json_auxiliary, pyomo and highspy are already imported. A worker keeps the
+# assembled models of the structures it solved and applies further configurations as changes (model_template.py).
+# While HiGHS solves, job['solver'] holds its latest progress (incumbent, bound, gap, nodes, see
+# highs_backend.set_progress_callback). accept() stops the solve and keeps the current incumbent as the result.
+# Before the MIP, the LP relaxation is solved (matrix assembly, at most highs_backend.RELAXATION_TIME_LIMIT). Its
+# results are stored under job['preview_key'] and shown as a preview until the MIP is solved.
+# Every run stores a metrics record (phase times, model size per unit, solver outcome, peak memory, see metrics.py).
+# Jobs submitted with profiling=True run the whole simulation (no result cache lookup) under profiling.Profiler, the
+# profile is stored with the results and served by /dash-server/jobs/<job_id>/profile.
+# Jobs submitted with pareto=n_points compute the cost / CO2 front of the structure instead (pareto.py, run_pareto),
+# the front is stored as json under job['result_key'].
+# Only optimal results (or results within the MIP gap of the solver profile) are stored under the key of the settings
+# and found by later jobs. Accepted incumbents and solves stopped by the time limit are stored under a key of their
+# own run (incumbent_key), which rc.has(cache_key) does not find.
+#
+# Job status: queued -> running -> done | failed | cancelled
+
+JOBS_DIR = dd.data_dir('jobs')
+TIMELINES = os.path.join(os.path.dirname(os.path.realpath(__file__)), 'tool_dekarpio_timelines.json')
+WORKERS = 2
+MAX_RUNNING_PER_USER = 2
+ABANDON_AFTER = 120         # seconds without status poll
+EXPIRE = 24 * 3600          # seconds finished jobs are kept
+POLL = 0.5                  # seconds
+TOTAL_STEPS = 9
+PARETO_STEPS = 5
+
+_cache = None
+
+
+def get_cache():
+    global _cache
+    if _cache is None:
+        _cache = diskcache.Cache(JOBS_DIR)
+    return _cache
+
+
+def all_jobs():
+    cache = get_cache()
+    jobs = [cache.get(key) for key in cache.iterkeys() if key.startswith('job/')]
+    return [job for job in jobs if job is not None]
+
+
+def update(job_id, **fields):
+    cache = get_cache()
+    with cache.transact():
+        job = cache.get('job/' + job_id)
+        if job is None:
+            return None
+        job.update(fields)
+        expire = EXPIRE if job['status'] in ['done', 'failed', 'cancelled'] else None
+        cache.set('job/' + job_id, job, expire=expire)
+    return job
+
+
+def queue_order(jobs):
+    # queued jobs in the order they are taken by the workers
+    running = Counter(job['user'] for job in jobs if job['status'] == 'running')
+    waiting = Counter()
+    order = []
+    for job in sorted((job for job in jobs if job['status'] == 'queued'), key=lambda job: job['submitted']):
+        order.append((-job['priority'], running[job['user']] + waiting[job['user']], job['submitted'], job['id']))
+        waiting[job['user']] += 1
+    return [key[-1] for key in sorted(order)]
+
+
+def incumbent_key(cache_key):
+    # key of results that are not optimal, unique per run so that later jobs solve the settings again
+    return cache_key + '/incumbent/' + uuid.uuid4().hex
+
+
+def solved_to_gap(system):
+    # optimal, or within the MIP gap of the solver profile; not an accepted incumbent or a time limit solve
+    outcome = mt.solver_outcome(system)
+    status = str(outcome['status']).lower()
+    if status.endswith('optimal'):          # HiGHS 'Optimal', pyomo 'TerminationCondition.optimal'
+        return True
+    if status == 'interrupted by user' or outcome['gap'] is None:
+        return False
+    return outcome['gap'] <= system.solver_settings['options'].get('mip_rel_gap', 0.0)
+
+
+def job_key(structure, timelines, timeline_map, sysParam, pareto=None):
+    # pareto fronts are solved with matrix assembly and stored under their number of points
+    if pareto is None:
+        return rc.result_key(structure, timelines, timeline_map, rc.solver_settings(sysParam))
+    sysParam['assembly'] = 'matrix'
+    return rc.result_key(structure, timelines, timeline_map, dict(rc.solver_settings(sysParam), pareto=pareto))
+
+
+def simulation_key(structure, profile=None, strategy=None, pareto=None):
+    timelines, period_list, label_list, no_timesteps, timeline_map, weights = ja.read_timelines(TIMELINES)
+    sysParam = ja.read_parameters(structure['par'], structure['eco'], period_list, label_list, no_timesteps, weights,
+                                  profile, strategy)
+    return job_key(structure, timelines, timeline_map, sysParam, pareto), period_list
+
+
+def submit(settings, user='', priority=0, profile=None, strategy=None, profiling=False, pareto=None):
+    # settings: structure json string as stored by the api, profile and strategy: see auxiliary.SOLVER_PROFILES and
+    # auxiliary.SOLVE_STRATEGIES, profiling: run under profiling.Profiler, pareto: number of points of a cost / CO2
+    # front instead of a simulation
+    job_id = uuid.uuid4().hex
+    now = time.time()
+    steps = TOTAL_STEPS if pareto is None else PARETO_STEPS
+    job = {'id': job_id, 'user': str(user), 'priority': priority, 'profile': profile, 'strategy': strategy, 'profiling': bool(profiling) and pareto is None, 'pareto': pareto, 'status': 'queued', 'submitted': now,
+           'started': None, 'finished': None, 'seen': now, 'cancel': False, 'worker': None,
+           'progress': [0, steps], 'message': 'Simulation is queued...',
+           'solver': None, 'accept': False, 'preview_key': None, 'preview_info': '', 'result_key': None, 'period_list': None, 'info': ''}
+
+    # same structure, timelines and solver settings were solved before (e.g. reopened configId or shared link)
+    cache_key, period_list = simulation_key(json.loads(settings), profile, strategy, pareto)
+    if rc.has(cache_key) and not job['profiling']:
+        job.update(status='done', started=now, finished=now, progress=[steps, steps],
+                   message='Simulation is Finished! Building Diagrams ...', result_key=cache_key,
+                   period_list=period_list, info='Results loaded from cache (key {}).'.format(cache_key[:12]))
+        get_cache().set('job/' + job_id, job, expire=EXPIRE)
+        return job_id
+
+    cache = get_cache()
+    with cache.transact():
+        cache.set('settings/' + job_id, settings)
+        cache.set('job/' + job_id, job)
+    return job_id
+
+
+def status(job_id, touch=False):
+    # job record with its position in the queue (1: next), touch: the client is still waiting for the job
+    job = update(job_id, seen=time.time()) if touch else get_cache().get('job/' + job_id)
+    if job is None:
+        return None
+    job = dict(job, position=None)
+    if job['status'] == 'queued':
+        order = queue_order(all_jobs())
+        job['position'] = order.index(job_id) + 1 if job_id in order else None
+    return job
+
+
+def cancel(job_id):
+    # queued jobs are cancelled here, running ones by the pool (terminates the worker)
+    cache = get_cache()
+    with cache.transact():
+        job = cache.get('job/' + job_id)
+        if job is None or job['status'] not in ['queued', 'running']:
+            return job
+        job['cancel'] = True
+        if job['status'] == 'queued':
+            job.update(status='cancelled', finished=time.time(), message='Simulation was cancelled.')
+            cache.delete('settings/' + job_id)
+        cache.set('job/' + job_id, job, expire=EXPIRE if job['status'] == 'cancelled' else None)
+    return job
+
+
+def accept(job_id):
+    # stop the solve of a running job with its current incumbent
+    cache = get_cache()
+    with cache.transact():
+        job = cache.get('job/' + job_id)
+        if job is None or job['status'] != 'running':
+            return job
+        job['accept'] = True
+        cache.set('job/' + job_id, job)
+    return job
+
+
+def claim(worker):
+    cache = get_cache()
+    with cache.transact():
+        jobs = all_jobs()
+        running = Counter(job['user'] for job in jobs if job['status'] == 'running')
+        for job_id in queue_order(jobs):
+            job = cache.get('job/' + job_id)
+            if running[job['user']] >= MAX_RUNNING_PER_USER:
+                continue
+            job.update(status='running', started=time.time(), worker=worker, message='Simulation is running...')
+            cache.set('job/' + job_id, job)
+            return job, cache.get('settings/' + job_id)
+    return None, None
+
+
+def run_simulation(settings, progress, solver_progress=None, profile=None, preview=None, strategy=None, run=None,
+                   profiler=None):
+    # the simulation of startSimulation, progress(count, total_steps) after every step, solver_progress: see
+    # highs_backend.set_progress_callback, preview(result_key, period_list, info) with the results of the LP relaxation,
+    # run: metrics.Run collecting the phase times and model statistics, profiler: profiling.Profiler started here and
+    # stopped before the results are stored
+    run = run or mt.Run()
+    count = 1
+    progress(count, TOTAL_STEPS)
+    with run.phase('read_timelines'):
+        timelines, period_list, label_list, no_timesteps, timeline_map, weights = ja.read_timelines(TIMELINES)
+
+    #structure = ja.read_structure('tool_dekarpio_structure.json')
+    structure = json.loads(settings)
+
+    count += 1
+    progress(count, TOTAL_STEPS)
+    with run.phase('read_parameters'):
+        sysParam = ja.read_parameters(structure['par'], structure['eco'], period_list, label_list, no_timesteps, weights,
+                                      profile, strategy)
+    run.record.update(assembly=sysParam.get('assembly', 'pyomo'), n_ts=no_timesteps, periods=len(period_list))
+    cache_key = job_key(structure, timelines, timeline_map, sysParam)
+    if rc.has(cache_key) and profiler is None:
+        run.record['cached'] = True
+        return cache_key, period_list, "Results loaded from cache (key {}).".format(cache_key[:12])
+
+    if profiler is not None:
+        profiler.start()
+
+    count += 1
+    progress(count, TOTAL_STEPS)
+    with run.phase('initialize'):
+        ini_out_str, res = tp.initialize_model(sysParam)
+    with run.phase('prune'):
+        pru_out_str, structure = ja.prune_structure(res, structure, timelines, timeline_map)
+
+    count += 1
+    progress(count, TOTAL_STEPS)
+    with run.phase('add_units_and_nodes'):
+        add_out_str, res = ja.add_units_and_nodes(res, structure, timelines, timeline_map)
+
+    count += 1
+    progress(count, TOTAL_STEPS)
+    with run.phase('build_model'):
+        bui_out_str, res = tp.build_model(res)
+    run.creation(res)
+    run.model(res)
+
+    count += 1
+    progress(count, TOTAL_STEPS)
+    bound = None
+    if preview is not None and getattr(res, 'assembly', 'pyomo') == 'matrix':
+        with run.phase('lp_relaxation'):
+            try:
+                lp_out_str, res = ja.solve_lp_relaxation(res)
+            except RuntimeError as e:       # not solved within its short time limit, the MIP runs without preview
+                print('No preview: {}'.format(e))
+            else:
+                bound = res.matrix.objective
+                rc.put_results(cache_key + '/lp', ja.return_results(res))
+        if bound is not None:
+            preview(cache_key + '/lp', period_list, lp_out_str)
+    with run.phase('solve'):
+        sol_out_str, slack_out_str, res = ja.solve_pyomo_model(res, progress=solver_progress)
+    run.solver(res)
+    if bound is not None:
+        sol_out_str += "LP relaxation (preview): {:,.0f} EUR, MIP: {:,.0f} EUR, difference {:.2%}. ".format(
+            bound, res.matrix.objective, (res.matrix.objective - bound) / max(abs(res.matrix.objective), 1e-9))
+
+    count += 1
+    progress(count, TOTAL_STEPS)
+    with run.phase('extract'):
+        results = ja.return_results(res)
+    if profiler is not None:
+        results['profiling'] = profiler.stop()
+
+    count += 1
+    progress(count, TOTAL_STEPS)
+    outString = ini_out_str + "\n" + pru_out_str + "\n" + add_out_str + "\n" + bui_out_str + "\n" + sol_out_str + "\n\n" + slack_out_str
+    if not solved_to_gap(res):
+        cache_key = incumbent_key(cache_key)
+    with run.phase('store'):
+        rc.put_results(cache_key, results)
+    return cache_key, period_list, outString
+
+
+def run_pareto(settings, progress, n_points, profile=None, run=None):
+    # cost / CO2 front with n_points points (see pareto.py), one HiGHS model for all emission caps instead of one
+    # simulation per cap
+    run = run or mt.Run()
+    progress(1, PARETO_STEPS)
+    with run.phase('read_timelines'):
+        timelines, period_list, label_list, no_timesteps, timeline_map, weights = ja.read_timelines(TIMELINES)
+    structure = json.loads(settings)
+    with run.phase('read_parameters'):
+        sysParam = ja.read_parameters(structure['par'], structure['eco'], period_list, label_list, no_timesteps, weights,
+                                      profile)
+    cache_key = job_key(structure, timelines, timeline_map, sysParam, n_points)
+    run.record.update(assembly='matrix', n_ts=no_timesteps, periods=len(period_list), pareto=n_points)
+    if rc.has(cache_key):
+        run.record['cached'] = True
+        return cache_key, period_list, "Pareto front loaded from cache (key {}).".format(cache_key[:12])
+
+    progress(2, PARETO_STEPS)
+    with run.phase('initialize'):
+        ini_out_str, res = tp.initialize_model(sysParam)
+    with run.phase('prune'):
+        pru_out_str, structure = ja.prune_structure(res, structure, timelines, timeline_map)
+    progress(3, PARETO_STEPS)
+    with run.phase('add_units_and_nodes'):
+        add_out_str, res = ja.add_units_and_nodes(res, structure, timelines, timeline_map)
+    with run.phase('build_model'):
+        bui_out_str, res = tp.build_model(res)
+    run.creation(res)
+    run.model(res)
+
+    progress(4, PARETO_STEPS)
+    with run.phase('solve'):
+        front = pa.pareto_front(res, n_points, options=da.solver_options('highs', da.solver_profile(profile)))
+    with run.phase('store'):
+        rc.put(cache_key, json.dumps(front))
+    return cache_key, period_list, ini_out_str + "\n" + pru_out_str + "\n" + add_out_str + "\n" + bui_out_str
+
+
+def run_job(job, settings):
+    job_id = job['id']
+    run = mt.Run(job=job_id, user=job['user'], profile=job['profile'], strategy=job['strategy'])
+    profiler = pr.Profiler() if job.get('profiling') else None
+
+    def solver_progress(info):
+        job = update(job_id, solver=info)
+        return job is not None and job['accept']
+
+    def preview(result_key, period_list, info):
+        update(job_id, preview_key=result_key, period_list=period_list, preview_info=info)
+
+    def progress(count, total):
+        update(job_id, progress=[count, total])
+
+    try:
+        if job.get('pareto') is not None:
+            result_key, period_list, info = run_pareto(settings, progress, job['pareto'], job['profile'], run)
+        else:
+            result_key, period_list, info = run_simulation(settings, progress, solver_progress, job['profile'], preview,
+                                                           job['strategy'], run, profiler)
+    except Exception as e:
+        traceback.print_exc()
+        if profiler is not None:
+            profiler.stop()
+        run.finish('failed', str(e))
+        update(job_id, status='failed', finished=time.time(), message='Simulation failed: {}'.format(e))
+    else:
+        run.finish('cached' if run.record.get('cached') else 'done')
+        if profiler is not None:
+            hot = pr.hot_functions(profiler.result['folded'], 5)
+            info += "\n\nProfile of {} samples attached, most time in: {}.".format(
+                profiler.result['samples'], ", ".join("{} ({:.1f} s)".format(label, ms / 1000) for label, ms in hot))
+        steps = TOTAL_STEPS if job.get('pareto') is None else PARETO_STEPS
+        update(job_id, status='done', finished=time.time(), progress=[steps, steps],
+               message='Simulation is Finished! Building Diagrams ...',
+               result_key=result_key, period_list=period_list, info=info)
+    get_cache().delete('settings/' + job_id)
+
+
+def worker_loop():
+    global _cache
+    _cache = None       # no sqlite connection of the pool process in the fork
+    mt._cache = None
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    while True:
+        job, settings = claim(os.getpid())
+        if job is None:
+            time.sleep(POLL)
+            continue
+        run_job(job, settings)
+
+
+def start_worker():
+    worker = multiprocessing.get_context('fork').Process(target=worker_loop, daemon=True)
+    worker.start()
+    return worker
+
+
+def run_pool(workers=WORKERS):
+    os.chdir(os.path.dirname(os.path.realpath(__file__)))
+    # jobs of a pool that was stopped before they finished
+    for job in all_jobs():
+        if job['status'] == 'running':
+            update(job['id'], status='failed', finished=time.time(), message='Simulation was interrupted.')
+    pool = {}
+    for _ in range(workers):
+        worker = start_worker()
+        pool[worker.pid] = worker
+    print('{} simulation workers started.'.format(workers))
+
+    try:
+        while True:
+            time.sleep(POLL)
+            now = time.time()
+            for job in all_jobs():
+                if job['status'] not in ['queued', 'running']:
+                    continue
+                if now - job['seen'] > ABANDON_AFTER and not job['cancel']:
+                    job = cancel(job['id'])
+                    if job is None:
+                        continue
+                if job['status'] == 'running' and job['cancel'] and job['worker'] in pool:
+                    pool.pop(job['worker']).terminate()
+                    update(job['id'], status='cancelled', finished=now, message='Simulation was cancelled.')
+                    get_cache().delete('settings/' + job['id'])
+            for pid, worker in list(pool.items()):
+                if not worker.is_alive():
+                    pool.pop(pid)
+                    for job in all_jobs():
+                        if job['status'] == 'running' and job['worker'] == pid:
+                            update(job['id'], status='failed', finished=now, message='Simulation worker stopped.')
+            while len(pool) < workers:
+                worker = start_worker()
+                pool[worker.pid] = worker
+    finally:
+        for worker in pool.values():
+            worker.terminate()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Worker pool for Dash simulations.')
+    parser.add_argument('--workers', type=int, default=WORKERS)
+    args = parser.parse_args()
+    run_pool(args.workers)
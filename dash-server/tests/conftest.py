@@ -0,0 +1,65 @@
+import os
+import sys
+import atexit
+import shutil
+import tempfile
+import pytest
+
+# The dash-server modules are imported as top-level modules and read their data files relative to the working
+# directory (as app.py and simulation_jobs.py do). Caches, jobs and metrics of the tests go to a temporary directory.
+DASH_SERVER = os.path.dirname(os.path.dirname(os.path.realpath(__file__)))
+sys.path.insert(0, DASH_SERVER)
+os.environ['DEKARPIO_DATA_DIR'] = tempfile.mkdtemp(prefix='dekarpio-tests-')
+atexit.register(shutil.rmtree, os.environ['DEKARPIO_DATA_DIR'], True)
+
+import json_auxiliary as ja
+import result_cache as rc
+
+
+@pytest.fixture(scope='session', autouse=True)
+def dash_server_dir():
+    cwd = os.getcwd()
+    os.chdir(DASH_SERVER)
+    yield DASH_SERVER
+    os.chdir(cwd)
+
+
+def shipped_system(assembly, eco=None, opt=None):
+    # solved System of tool_dekarpio_structure.json with the shipped timelines, eco: changed economic settings, opt:
+    # changed solver settings (profile, strategy, timelimit)
+    timelines, period_list, label_list, no_timesteps, timeline_map, weights = ja.read_timelines('tool_dekarpio_timelines.json')
+    structure = ja.read_structure('tool_dekarpio_structure.json')
+    structure['eco']['eco1']['param'][0].update(eco or {})
+    sysParam = ja.read_parameters(structure['par'], structure['eco'], period_list, label_list, no_timesteps, weights)
+    sysParam['assembly'] = assembly
+    sysParam['opt'].update(opt or {})
+    ini_out_str, res = ja.initialize_model(sysParam)
+    pru_out_str, structure = ja.prune_structure(res, structure, timelines, timeline_map)
+    add_out_str, res = ja.add_units_and_nodes(res, structure, timelines, timeline_map)
+    bui_out_str, res = ja.build_pyomo_model(res)
+    sol_out_str, slack_out_str, res = ja.solve_pyomo_model(res)
+    return res
+
+
+@pytest.fixture(scope='session')
+def matrix_system():
+    return shipped_system('matrix')
+
+
+@pytest.fixture(scope='session')
+def pyomo_system():
+    return shipped_system('pyomo')
+
+
+@pytest.fixture(scope='session')
+def build_shipped():
+    return shipped_system
+
+
+@pytest.fixture
+def cache(tmp_path, monkeypatch):
+    # result cache of this test only
+    monkeypatch.setattr(rc, 'CACHE_DIR', str(tmp_path))
+    monkeypatch.setattr(rc, '_cache', None)
+    yield rc
+    rc.get_cache().close()
@@ -0,0 +1,42 @@
+import numpy as np
+import pytest
+import pyomo.environ as pyo
+import auxiliary as da
+import json_auxiliary as ja
+
+
+def test_cost_vector_arithmetic():
+    a = ja.mm.LinExpr.from_terms([(2.0, np.array([[0, 1]])), (np.array([1.0, 3.0]), np.array([1, 2]))], const=1.0)
+    b = ja.mm.LinExpr([2], [1.0], 0.5)
+    expr = 2 * (a - b) + 1
+    x = np.array([1.0, 2.0, 3.0])
+    assert expr.value(x) == pytest.approx(2 * ((2 * 1 + 2 * 2 + 2 + 9 + 1) - (3 + 0.5)) + 1)
+    assert np.allclose(expr.to_dense(4), [4.0, 6.0, 4.0, 0.0])
+    assert expr.const == pytest.approx(2 * (1.0 - 0.5) + 1)
+    assert ja.mm.LinExpr.from_terms([]).value(x) == 0
+
+
+def test_unit_costs_are_cost_vectors(pyomo_system):
+    system = pyomo_system
+    # the system objective is the only objective component, the unit costs are sparse cost vectors
+    objectives = list(system.model.component_objects(pyo.Objective))
+    assert [o.name for o in objectives] == ['obj_system_total']
+    for unit in system.unit.values():
+        for expr in unit.obj.values():
+            assert isinstance(expr, ja.mm.LinExpr)
+            assert da.obj_value(system, expr) == pytest.approx(pyo.value(da.linear_expression(system, expr)),
+                                                               rel=1e-9, abs=1e-6)
+
+    total = sum(da.obj_value(system, u.obj['total']) for u in system.unit.values() if 'total' in u.obj)
+    assert total == pytest.approx(da.obj_value(system, system.obj['total_real']), rel=1e-9)
+    assert da.obj_value(system, system.obj['total']) == pytest.approx(pyo.value(system.model.obj_system_total), rel=1e-9)
+
+
+def test_unit_costs_match_between_assemblies(matrix_system, pyomo_system):
+    matrix = ja.return_results(matrix_system)['units']
+    pyomo = ja.return_results(pyomo_system)['units']
+    assert matrix.keys() == pyomo.keys()
+    for name in matrix:
+        assert matrix[name]['obj'].keys() == pyomo[name]['obj'].keys()
+    total = {name: u['obj']['total'] for name, u in matrix.items() if 'total' in u['obj']}
+    assert sum(total.values()) == pytest.approx(sum(pyomo[name]['obj']['total'] for name in total), rel=1e-6)
@@ -0,0 +1,36 @@
+import os
+import pytest
+import delfort_sweep as ds
+import delfort_system_simple as dss
+
+
+def test_grid_of_cases():
+    cases = ds.make_grid([0, 4], cost_co2=[70, 150], interest_rate=[0.05])
+    assert [c['case'] for c in cases] == [0, 1, 2, 3]
+    assert [(c['scenario'], c['cost_co2']) for c in cases] == [(0, 70), (0, 150), (4, 70), (4, 150)]
+    assert all(c['interest_rate'] == 0.05 for c in cases)
+    with pytest.raises(ValueError):
+        ds.make_grid([0], price_coal=[10])
+
+
+def test_price_overrides_keep_the_certificates():
+    el, gas, h2, biomass, biogas = dss.get_scenario_prices(0)
+    base = dict(zip(dss.price_names, dss.get_scenario_prices(0, {'cost_co2': 0})))
+
+    prices = dict(zip(dss.price_names, dss.get_scenario_prices(0, {'cost_co2': 100})))
+    assert prices['price_gas'] == pytest.approx(base['price_gas'] + dss.ef_gas * 100)
+    assert prices['price_el'] == el
+
+    # an overridden gas price is the price without certificates, the certificates of the scenario are added
+    prices = dict(zip(dss.price_names, dss.get_scenario_prices(0, {'price_gas': 30})))
+    assert prices['price_gas'] == pytest.approx(30 + gas - base['price_gas'])
+    prices = dict(zip(dss.price_names, dss.get_scenario_prices(0, {'price_gas': 30, 'cost_co2': 100})))
+    assert prices['price_gas'] == pytest.approx(30 + dss.ef_gas * 100)
+    assert prices['price_h2'] == h2 and prices['price_biomass'] == biomass and prices['price_biogas'] == biogas
+
+
+def test_failed_case_is_reported(tmp_path):
+    row = ds.solve_case({'case': 7, 'scenario': 999}, str(tmp_path))
+    assert row['case'] == 7 and row['status'].startswith('error: ')
+    assert os.path.exists(tmp_path / 'case_7.log')
+    assert not os.path.exists(tmp_path / 'case_7.npz')
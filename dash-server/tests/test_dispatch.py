@@ -0,0 +1,59 @@
+import numpy as np
+import pandas as pd
+import pytest
+import json_auxiliary as ja
+import dispatch as dp
+
+
+def test_wrap_rows_are_the_cyclic_rows(matrix_system):
+    # a row of timestep t wraps if it refers to a later timestep than t + 1 (minimum up and down times of the first
+    # timesteps) or if the last timestep refers to the first one (nxt terms)
+    matrix = matrix_system.matrix
+    n_ts = matrix.n_ts
+    step = dp.column_steps(matrix)
+    wraps = np.zeros(matrix.n_row, dtype=bool)
+    for owner, name, first, n in matrix.row_names:
+        if n % n_ts:
+            continue
+        block = matrix.A[first:first + n]
+        row = np.repeat(np.arange(n), np.diff(block.indptr))
+        t, col_step = row % n_ts, step[block.indices]
+        wrapped = (col_step > t + 1) | ((t == n_ts - 1) & (col_step == 0))
+        wraps[first + np.unique(row[wrapped])] = True
+    rows = dp.wrap_rows(matrix)
+    assert len(rows) > 0
+    assert np.array_equal(rows, np.flatnonzero(wraps))
+    names = {name for owner, name, first, n in matrix.row_names if matrix.wrap[first:first + n].any()}
+    assert {'logic', 'MIN_UT', 'MIN_DT'} <= names
+
+
+def test_dispatch_of_three_days(matrix_system):
+    timelines, period_list, label_list, no_timesteps, timeline_map, weights = ja.read_timelines('tool_dekarpio_timelines.json')
+    structure = ja.read_structure('tool_dekarpio_structure.json')
+    sysParam = ja.read_parameters(structure['par'], structure['eco'], period_list, label_list, no_timesteps, weights)
+    sysParam['assembly'] = 'matrix'
+    ini_out_str, res = ja.initialize_model(sysParam)
+    pru_out_str, structure = ja.prune_structure(res, structure, timelines, timeline_map)
+
+    profiles = {column: v[:72] for column, v in dp.year_profiles('tool_dekarpio_timelines.json').items()}
+    year = dp.dispatch_year(matrix_system, structure, timeline_map, profiles, window=48, commit=24)
+    assert year['n_ts'] == 72 and year['windows'] == 3 and year['reused'] >= 1
+    assert all(len(v) == 72 for unit in year['seq'].values() for v in unit.values())
+    assert year['operating_costs'] > 0
+
+
+def test_read_year_profiles(tmp_path):
+    index = pd.date_range('2019-01-01', periods=48, freq='h')
+    weather = pd.DataFrame({'Temperatur': np.arange(48.0)}, index=index)
+    prices = pd.DataFrame({'Strompreis': np.ones(48), 'Nachfrage': 2 * np.ones(48)}, index=index)
+    weather.to_csv(tmp_path / 'weather.csv', sep=';')
+    prices.iloc[::-1].to_csv(tmp_path / 'prices.csv', sep=';')
+    paths = [str(tmp_path / 'weather.csv'), str(tmp_path / 'prices.csv')]
+
+    timelines = [{'T': [0.0], 'Strompreis': [0.0], 'Nachfrage': [0.0], 'Konstant': [1.0]}]
+    profiles = dp.read_year_profiles(paths, timelines, {'T': 'Temperatur'})
+    assert list(profiles) == ['T', 'Strompreis', 'Nachfrage', 'Konstant']
+    assert np.array_equal(profiles['T'], np.arange(48.0))
+    assert np.all(profiles['Nachfrage'] == 2) and np.all(profiles['Konstant'] == 1)
+    with pytest.raises(ValueError):
+        dp.read_year_profiles(paths, timelines)
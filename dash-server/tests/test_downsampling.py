@@ -0,0 +1,81 @@
+import base64
+import numpy as np
+import downsampling as ds
+
+
+def reference_lttb(x, y, n_out):
+    # straightforward LTTB of one series on the same buckets
+    n = len(y)
+    width = -(-(n - 2) // (n_out - 2))
+    buckets = [np.arange(1 + b, min(1 + b + width, n - 1)) for b in range(0, n - 2, width)]
+    selected = [0]
+    for b, bucket in enumerate(buckets):
+        nxt = buckets[b + 1] if b + 1 < len(buckets) else np.array([n - 1])
+        xm, ym = x[nxt].mean(), y[nxt].mean()
+        a = selected[-1]
+        area = np.abs((x[a] - xm) * (y[bucket] - y[a]) - (x[a] - x[bucket]) * (ym - y[a]))
+        selected.append(bucket[area.argmax()])
+    return np.array(selected + [n - 1])
+
+
+def test_lttb_matches_reference():
+    rng = np.random.default_rng(0)
+    x = np.arange(1001, dtype=float)
+    y = np.cumsum(rng.normal(size=(3, 1001)), axis=1)
+    idx = ds.lttb(x, y, 50)
+    assert idx.shape[0] == 3 and idx.shape[1] <= 50
+    for row, yk in zip(idx, y):
+        assert np.array_equal(row, reference_lttb(x, yk, 50))
+    # short series are kept
+    assert np.array_equal(ds.lttb(x[:10], y[:, :10], 50), np.tile(np.arange(10), (3, 1)))
+
+
+def test_lttb_keeps_peaks():
+    x = np.arange(10000, dtype=float)
+    y = np.zeros(10000)
+    y[[1234, 7777]] = [5.0, -3.0]
+    idx = ds.lttb(x, y, 100)[0]
+    assert {0, 1234, 7777, 9999} <= set(idx.tolist())
+    assert np.all(np.diff(idx) > 0)
+
+
+def test_min_max_keeps_extremes_of_every_bucket():
+    rng = np.random.default_rng(1)
+    y = rng.normal(size=5000)
+    idx = ds.min_max(np.arange(5000), y, 200)
+    assert len(idx) <= 200 and idx[0] == 0 and idx[-1] == 4999
+    assert y.argmax() in idx and y.argmin() in idx
+    assert np.all(np.diff(idx) > 0)
+    assert np.array_equal(ds.min_max(np.arange(10), y[:10], 200), np.arange(10))
+
+
+def test_reduce_figure():
+    n = 8760
+    x = np.arange(n)
+    y = np.sin(x / 100.0)
+    typed = {'dtype': 'f8', 'bdata': base64.b64encode(y.tobytes()).decode()}
+    fig = {'data': [{'type': 'scatter', 'x': x.tolist(), 'y': typed, 'name': 'line'},
+                     {'type': 'scatter', 'x': x.tolist(), 'y': (y + 1).tolist(), 'stackgroup': 'one'},
+                     {'type': 'scatter', 'x': x.tolist(), 'y': (y + 2).tolist(), 'stackgroup': 'one'},
+                     {'type': 'bar', 'x': x.tolist(), 'y': y.tolist()}],
+           'layout': {}}
+    assert ds.is_long(fig)
+    reduced = ds.reduce_figure(fig, points_per_trace=500)
+    line, stack1, stack2, bar = reduced['data']
+    assert line['type'] == 'scattergl' and len(line['y']) <= 500
+    assert stack1['type'] == 'scatter' and stack1['x'] == stack2['x'] and len(stack1['x']) <= 500
+    assert bar['y'] == fig['data'][3]['y']
+    assert fig['data'][0]['y'] is typed        # the figure itself is not changed
+
+    # zoomed in: more detail inside the range, full resolution for a short range
+    zoomed = ds.reduce_figure(fig, points_per_trace=500, x_range=[1000, 1300])
+    assert zoomed['data'][0]['x'] == list(range(999, 1302))
+    assert not ds.is_long(reduced, 500)
+
+
+def test_zoom_range():
+    assert ds.zoom_range({'xaxis.range[0]': 10, 'xaxis.range[1]': 20}) == [10, 20]
+    assert ds.zoom_range({'xaxis2.range': [1, 2]}) == [1, 2]
+    assert ds.zoom_range({'xaxis.autorange': True}) is None
+    assert ds.zoom_range({'autosize': True}) is False
+    assert ds.zoom_range(None) is False
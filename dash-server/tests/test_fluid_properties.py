@@ -0,0 +1,52 @@
+import numpy as np
+import pytest
+import CoolProp.CoolProp as CP
+import fluid_properties as fp
+
+
+@pytest.fixture
+def props(tmp_path, monkeypatch):
+    # empty memory and disk cache of this test only
+    monkeypatch.setattr(fp, 'CACHE_DIR', str(tmp_path))
+    monkeypatch.setattr(fp, '_disk', None)
+    monkeypatch.setattr(fp, '_memory', {})
+    monkeypatch.setattr(fp, 'counters', dict.fromkeys(fp.counters, 0))
+    yield fp
+    fp.get_disk_cache().close()
+
+
+def test_scalar_and_trivial_lookups_match_coolprop(props):
+    assert props.PropsSI('H', 'T', 373.15, 'P', 1e5, 'Water') == CP.PropsSI('H', 'T', 373.15, 'P', 1e5, 'Water')
+    assert props.PropsSI('D', 'T', 473.15, 'Q', 1, 'IF97::Water') == CP.PropsSI('D', 'T', 473.15, 'Q', 1, 'IF97::Water')
+    assert props.PropsSI('pcrit', 'Water') == CP.PropsSI('pcrit', 'Water')
+    assert isinstance(props.PropsSI('H', 'T', 373.15, 'P', 1e5, 'Water'), float)
+
+
+def test_arrays_are_cached_per_state(props):
+    T = np.array([[300.0, 350.0], [375.0, 400.0]])
+    values = props.PropsSI('H', 'T', T, 'P', 2e5, 'Water')
+    assert values.shape == T.shape
+    assert np.array_equal(values, [[CP.PropsSI('H', 'T', t, 'P', 2e5, 'Water') for t in row] for row in T])
+    stats = props.stats()
+    assert stats['states'] == 4 and stats['computed'] == 4 and stats['memory'] == 0
+
+    props.PropsSI('H', 'T', np.array([350.0, 360.0]), 'P', 2e5, 'Water')
+    assert props.stats()['computed'] == 5
+    assert props.stats()['hit_rate'] == pytest.approx(1 / 6)
+
+
+def test_disk_cache_is_shared_between_processes(props):
+    h = props.PropsSI('H', 'T', 330.0, 'P', 1e5, 'Water')
+    props._memory.clear()        # as a new worker process
+    assert props.PropsSI('H', 'T', 330.0, 'P', 1e5, 'Water') == h
+    assert props.stats()['disk'] == 1 and props.stats()['computed'] == 1
+
+
+def test_tables_only_for_large_batches(props, monkeypatch):
+    monkeypatch.setattr(props, 'table_backend', None)
+    props.use_tables('BICUBIC&HEOS', min_batch=100)
+    T = np.linspace(300, 360, 200)
+    values = props.PropsSI('H', 'T', T, 'P', 1e5, 'Water')
+    assert np.allclose(values, CP.PropsSI('H', 'T', T, 'P', 1e5, 'Water'), rtol=1e-4)
+    # a single state is still evaluated with HEOS
+    assert props.PropsSI('H', 'T', 301.5, 'P', 1e5, 'Water') == CP.PropsSI('H', 'T', 301.5, 'P', 1e5, 'Water')
@@ -0,0 +1,41 @@
+import numpy as np
+import pytest
+import highs_backend as hb
+
+
+def test_matrix_model_solved_by_highspy(matrix_system):
+    matrix = matrix_system.matrix
+    assert matrix.status == 'Optimal'
+    assert matrix.objective == pytest.approx(hb.value(matrix_system, matrix_system.obj['total']), rel=1e-9)
+    assert matrix.A.shape == (matrix.n_row, matrix.n_col)
+
+
+def test_solution_is_feasible(matrix_system):
+    matrix = matrix_system.matrix
+    x = matrix.x
+    assert x.shape == (matrix.n_col,)
+    assert np.all(x >= matrix.lb - 1e-6) and np.all(x <= matrix.ub + 1e-6)
+    activity = matrix.A @ x
+    scale = 1 + np.abs(activity)
+    assert np.all(activity >= matrix.row_lo - 1e-6 * scale)
+    assert np.all(activity <= matrix.row_hi + 1e-6 * scale)
+    integer = matrix.integrality.astype(bool)
+    assert np.allclose(x[integer], np.round(x[integer]), atol=1e-6)
+    assert matrix.c @ x + matrix.c0 == pytest.approx(matrix.objective, rel=1e-9)
+
+
+def test_node_balances_hold(matrix_system):
+    # node rows are balances (equalities), output nodes of demands may take a surplus
+    matrix = matrix_system.matrix
+    rows = [(first, n) for owner, name, first, n in matrix.row_names if owner in matrix_system.node]
+    assert rows
+    activity = matrix.A @ matrix.x
+    n_balance = 0
+    for first, n in rows:
+        lo, hi = matrix.row_lo[first:first + n], matrix.row_hi[first:first + n]
+        assert np.all(hi == 0) and np.all((lo == 0) | (lo == -np.inf))
+        balance = lo == hi
+        n_balance += balance.sum()
+        assert np.allclose(activity[first:first + n][balance], 0, atol=1e-5)
+        assert np.all(activity[first:first + n] <= 1e-5)
+    assert n_balance > 0
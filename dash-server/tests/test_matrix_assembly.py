@@ -0,0 +1,55 @@
+import numpy as np
+import pytest
+import auxiliary as da
+import classes as dc
+import json_auxiliary as ja
+import matrix_model as mm
+
+SHIPPED_TOTAL = 12285698.09        # EUR, total annual costs of the shipped structure and timelines
+CAPPED = {'decarbonization_fossil': 'option2', 'free_certificate_fossil': 50000}    # fossil emission limit 50001 t
+
+
+def test_matrix_objective_equals_pyomo(matrix_system, pyomo_system):
+    matrix = ja.return_results(matrix_system)['objectives']
+    pyomo = ja.return_results(pyomo_system)['objectives']
+    assert matrix['total_real'] == pytest.approx(SHIPPED_TOTAL, abs=0.01)
+    assert pyomo['total_real'] == pytest.approx(SHIPPED_TOTAL, abs=0.01)
+    assert matrix['em_fos'] == pytest.approx(pyomo['em_fos'], rel=1e-6)
+
+
+@pytest.mark.parametrize('assembly', ['matrix', 'pyomo'])
+def test_emission_limit_binds_on_sum(build_shipped, assembly):
+    system = build_shipped(assembly, CAPPED)
+    units = [u for u in system.unit.values() if 'co2_total_fossil' in u.obj]
+    em_fos = sum(da.obj_value(system, u.obj['co2_total_fossil']) for u in units)
+    assert em_fos == pytest.approx(50001, rel=1e-6)
+    assert ja.return_results(system)['objectives']['total_real'] > SHIPPED_TOTAL
+
+    if assembly == 'matrix':
+        # one row over the emissions of all units
+        first, n = system.con['con_limit_fos_emissions']
+        assert n == 1
+        expr = sum((u.obj['co2_total_fossil'] for u in units), mm.LinExpr())
+        row = system.matrix.A[first].toarray().ravel()
+        assert np.allclose(row, expr.to_dense(system.matrix.n_col))
+        assert system.matrix.row_hi[first] == pytest.approx(50001 - expr.const)
+    else:
+        assert not system.con['con_limit_fos_emissions'].is_indexed()
+
+
+@pytest.mark.parametrize('assembly', ['matrix', 'pyomo'])
+def test_heat_pump_start_up_limits(matrix_system, assembly):
+    # start-up costs activate v and w, the start-up limit defaults to the minimum load of the heat sink
+    param = dict(matrix_system.param, assembly=assembly)
+    param.pop('opt')
+    system = dc.System(dict(param, opt={'timelimit': 60}))
+    system.add_unit({
+        'classname': 'HeatPump', 'name': 'hp', 'cap_q_sink': (0, 10), 'eta_comp': (0.5, 0.5),
+        'lim_q_sink': (0.3, 1), 'ramp_q_sink': (1, 1), 'cost_susd': (10, 10), 'min_utdt_ts': (1, 1),
+        'T_sink_in': (90,), 'T_sink_out': 95, 'T_source_in': (50,), 'T_source_out': 30,
+        'delta_T_sink': (3, 3), 'delta_T_source': (3, 3), 'pressure_sink': 2e5, 'pressure_source': 1e5,
+        'medium_sink': 'Water', 'medium_source': 'Water', 'inv_var': 1000, 'inv_fix': 0,
+    })
+    unit = system.unit['hp']
+    assert unit.param['v_w_active']
+    assert unit.param['max_susd'] == (0.3, 0.3)
@@ -0,0 +1,65 @@
+import json
+import pytest
+import metrics as mt
+
+
+@pytest.fixture
+def metrics(tmp_path, monkeypatch):
+    # metrics log and totals of this test only
+    monkeypatch.setattr(mt, 'METRICS_DIR', str(tmp_path))
+    monkeypatch.setattr(mt, 'LOG', str(tmp_path / 'metrics.jsonl'))
+    monkeypatch.setattr(mt, '_cache', None)
+    yield mt
+    mt.get_cache().close()
+
+
+def test_unit_sizes_add_up_to_the_matrix(matrix_system):
+    matrix = matrix_system.matrix
+    sizes = mt.unit_sizes(matrix_system)
+    assert set(sizes) == set(matrix_system.unit) | set(matrix_system.node)
+    system_rows = sum(n for owner, name, first, n in matrix.row_names if owner not in sizes)
+    assert sum(unit['constraints'] for unit in sizes.values()) + system_rows == matrix.n_row
+    assert sum(unit['variables'] for unit in sizes.values()) <= matrix.n_col
+    assert sum(unit['binaries'] for unit in sizes.values()) == matrix.integrality.sum()
+    assert sum(unit['nonzeros'] for unit in sizes.values()) <= matrix.A.nnz
+
+
+def test_unit_sizes_of_pyomo_models(pyomo_system):
+    sizes = mt.unit_sizes(pyomo_system)
+    assert sum(unit['variables'] for unit in sizes.values()) == pyomo_system.model.nvariables()
+    assert all(unit['nonzeros'] >= unit['constraints'] for unit in sizes.values())
+
+
+def test_runs_are_logged_and_exported(metrics, matrix_system):
+    run = metrics.Run(job='a', user='1')
+    with run.phase('solve'):
+        pass
+    with run.phase('solve'):
+        pass
+    run.model(matrix_system)
+    run.solver(matrix_system)
+    record = run.finish('done')
+    assert record['total']['n_col'] == matrix_system.matrix.n_col and record['solver']['status'] == 'Optimal'
+    assert record['duration'] >= record['phases']['solve'] >= 0
+
+    cached = metrics.Run(job='b', user='1')
+    with cached.phase('read_timelines'):
+        pass
+    cached.finish('cached')
+    assert [r['job'] for r in metrics.records()] == ['a', 'b']
+    assert [r['job'] for r in metrics.records(1)] == ['b']
+    assert json.loads(open(metrics.LOG).readline())['job'] == 'a'
+
+    text = metrics.prometheus_text()
+    assert 'dekarpio_simulation_runs_total{status="done"} 1' in text
+    assert 'dekarpio_simulation_runs_total{status="cached"} 1' in text
+    assert 'dekarpio_phase_seconds_count{phase="solve"} 1' in text       # both solve phases of one run
+    # the cached run built no model, the model metrics are those of the first run
+    nodes = sum(unit['variables'] for unit in record['units'].values() if unit['classname'] == 'Node')
+    assert 'dekarpio_last_model_variables{{classname="Node"}} {}'.format(nodes) in text
+    assert 'dekarpio_last_mip_gap{status="Optimal"}' in text
+
+
+def test_metrics_without_runs(metrics):
+    assert metrics.records() == []
+    assert 'dekarpio_simulation_runs_total' in metrics.prometheus_text()
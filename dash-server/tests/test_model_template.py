@@ -0,0 +1,83 @@
+import copy
+import numpy as np
+import pytest
+import highs_backend as hb
+import json_auxiliary as ja
+import model_template as tp
+
+
+@pytest.fixture
+def recorded(monkeypatch):
+    # recorder of the shipped structure with changed unit parameters, templates and loaded models of this test only
+    monkeypatch.setattr(tp, 'templates', type(tp.templates)())
+    monkeypatch.setattr(hb, 'persistent_models', type(hb.persistent_models)())
+    timelines, period_list, label_list, no_timesteps, timeline_map, weights = ja.read_timelines('tool_dekarpio_timelines.json')
+    shipped = ja.read_structure('tool_dekarpio_structure.json')
+
+    def record(changes=None):
+        structure = copy.deepcopy(shipped)
+        for (group, key), values in (changes or {}).items():
+            structure[group][key]['param'][0].update(values)
+        sysParam = ja.read_parameters(structure['par'], structure['eco'], period_list, label_list, no_timesteps, weights)
+        sysParam['assembly'] = 'matrix'
+        ini_out_str, res = tp.initialize_model(sysParam)
+        pru_out_str, structure = ja.prune_structure(res, structure, timelines, timeline_map)
+        add_out_str, res = ja.add_units_and_nodes(res, structure, timelines, timeline_map)
+        return res
+    return record
+
+
+def assert_same_matrix(a, b):
+    assert a.col_names == b.col_names and a.row_names == b.row_names
+    assert (a.A != b.A).nnz == 0
+    for name in ['lb', 'ub', 'c', 'row_lo', 'row_hi', 'integrality']:
+        assert np.array_equal(getattr(a, name), getattr(b, name)), name
+    assert a.c0 == b.c0
+
+
+def test_apply_equals_fresh_build(recorded):
+    out_str, template = tp.build_model(recorded())
+    assert len(tp.templates) == 1
+
+    recorder = recorded({('ecu', 'ecu1'): {'inv_cap': 2e5, 'fullload_efficiency': 0.8},
+                         ('ecu', 'ecu4'): {'max_capacity': 7}})
+    out_str, applied = tp.build_model(recorder)
+    assert applied is template
+    assert out_str.startswith('Applied configuration')
+    assert 0 < tp.templates[tp.template_key(recorder)].n_applied
+
+    fresh = tp.Template(recorder).system
+    assert_same_matrix(applied.matrix, fresh.matrix)
+
+
+def test_persistent_model_solves_like_a_new_one(recorded):
+    out_str, system = tp.build_model(recorded())
+    hb.solve_model(system, dict(log_to_console=False), persistent=True)
+
+    recorder = recorded({('ecu', 'ecu1'): {'inv_cap': 2e5, 'fullload_efficiency': 0.8}})
+    out_str, system = tp.build_model(recorder)
+    hb.solve_model(system, dict(log_to_console=False), persistent=True)
+    assert system.matrix.persistent['reused'] == 1
+    assert system.matrix.persistent['changes']['costs'] > 0
+    assert system.matrix.persistent['changes']['coefficients'] > 0
+
+    fresh = tp.Template(recorder).system
+    hb.solve_model(fresh, dict(log_to_console=False))
+    assert system.matrix.objective == pytest.approx(fresh.matrix.objective, rel=1e-6)
+
+
+def test_layout_change_builds_new_template(recorded):
+    out_str, template = tp.build_model(recorded())
+    # start-up costs add the start-up and shut-down binaries of the boiler
+    out_str, system = tp.build_model(recorded({('ecu', 'ecu4'): {'opex_start': 100}}))
+    assert system is not template
+    assert out_str.startswith('Built model')
+
+
+def test_integrated_units_key_the_template(recorded):
+    base, other = recorded(), recorded({('ecu', 'ecu2'): {'integrate': True}})
+    assert tp.template_key(base) != tp.template_key(other)
+    out_str, template = tp.build_model(base)
+    out_str, system = tp.build_model(other)
+    assert system is not template and len(tp.templates) == 2
+    assert 'ecu_ecu2_sbo2' in system.unit and 'ecu_ecu2_sbo2' not in template.unit
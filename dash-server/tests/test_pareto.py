@@ -0,0 +1,41 @@
+import pytest
+import json_auxiliary as ja
+import pareto
+
+
+@pytest.fixture(scope='module')
+def front(build_shipped):
+    system = build_shipped('matrix')
+    return system, pareto.pareto_front(system, n_points=4, options=dict(mip_rel_gap=1e-4))
+
+
+def test_front_is_monotonic(front):
+    system, result = front
+    points = result['points']
+    assert len(points) == 4 and all(p['feasible'] for p in points)
+    assert [p['cap'] for p in points] == sorted(p['cap'] for p in points)
+    assert points[0]['cap'] == pytest.approx(result['em_min']) and points[-1]['cap'] == result['em_max']
+    for p in points:
+        assert p['em_fos'] <= p['cap'] + 1e-3 * max(p['cap'], 1)
+        assert p['slack'] == pytest.approx(0, abs=1e-6)
+    # lower caps never cost less, up to the MIP gap of the points
+    for tighter, looser in zip(points, points[1:]):
+        assert tighter['total_real'] >= looser['total_real'] * (1 - 1e-3)
+    assert points[0]['total_real'] > points[-1]['total_real']
+    assert result['em_min'] < result['em_max']
+
+
+def test_cost_optimum_is_the_loose_end(front, matrix_system):
+    system, result = front
+    optimum = result['points'][-1]
+    expected = ja.return_results(matrix_system)['objectives']
+    assert optimum['total_real'] == pytest.approx(expected['total_real'], rel=1e-4)
+    assert result['em_max'] == pytest.approx(expected['em_fos'], rel=1e-4)
+    # the solution of the system is the cost optimum again
+    matrix = system.matrix
+    assert matrix.c @ matrix.x + matrix.c0 == pytest.approx(optimum['total'], rel=1e-9)
+
+
+def test_pyomo_systems_are_rejected(pyomo_system):
+    with pytest.raises(ValueError):
+        pareto.pareto_front(pyomo_system)
@@ -0,0 +1,53 @@
+import os
+import importlib.util
+import pytest
+import pyomo.environ as pyo
+from pyomo.contrib import appsi
+from pyomo.repn import generate_standard_repn
+import auxiliary as da
+import classes
+import pi_framework.DOOM.classes as doom_classes
+import pi_framework.DOOM.auxiliary as doom_auxiliary
+
+EXAMPLE = os.path.join('pi_framework', 'DOOM', 'example cases', 'example_period_storage.py')
+
+
+@pytest.fixture(scope='module')
+def example():
+    spec = importlib.util.spec_from_file_location('example_period_storage', EXAMPLE)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def objective(example, soc_p_form, unit_classes, loss_soc=0.001):
+    # the MIP of the example does not close its gap within the time limit, both formulations are compared on the LP
+    # relaxation, which they share exactly
+    res, df, set_period = example.build_case(soc_p_form, unit_classes, loss_soc)
+    pyo.TransformationFactory('core.relax_integer_vars').apply_to(res.model)
+    doom_auxiliary.solve_model(res, solver='highs', tee=False)
+    assert res.model.result.termination_condition == appsi.base.TerminationCondition.optimal
+    return da.obj_value(res, res.obj['total_real']), res
+
+
+@pytest.mark.parametrize('unit_classes', [classes, doom_classes], ids=['dash-server', 'DOOM'])
+def test_cumulative_soc_p_equals_sum(example, unit_classes):
+    total_sum, res_sum = objective(example, 'sum', unit_classes)
+    total_cumulative, res_cumulative = objective(example, 'cumulative', unit_classes)
+    assert total_cumulative == pytest.approx(total_sum, rel=1e-7)
+
+    # O((n_period + n_sc) * n_ts) instead of O(n_period * n_ts**2) nonzeros in the soc_p limits
+    def nonzeros(res):
+        con = res.model.component('con_ps_soc_p_max')
+        return sum(len(generate_standard_repn(c.body).linear_vars) for c in con.values())
+    assert nonzeros(res_cumulative) < nonzeros(res_sum) / 4
+
+
+@pytest.mark.parametrize('unit_classes', [classes, doom_classes], ids=['dash-server', 'DOOM'])
+def test_lossless_cumulative_soc_p_uses_soc(example, unit_classes):
+    # without losses the discounted sums are the intraperiod soc itself, no soc_cum states are added
+    total_sum, res_sum = objective(example, 'sum', unit_classes, loss_soc=0)
+    total_cumulative, res_cumulative = objective(example, 'cumulative', unit_classes, loss_soc=0)
+    assert total_cumulative == pytest.approx(total_sum, rel=1e-7)
+    assert total_cumulative < objective(example, 'cumulative', unit_classes)[0]
+    assert 'soc_cum' not in res_cumulative.unit['ps'].var['seq']
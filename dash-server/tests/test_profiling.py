@@ -0,0 +1,48 @@
+import time
+import profiling as pr
+
+
+def spin(seconds):
+    end = time.perf_counter() + seconds
+    while time.perf_counter() < end:
+        pass
+
+
+def hold_gil():
+    # C code that does not release the GIL, the sampler thread cannot run meanwhile
+    return sum(range(3_000_000))
+
+
+def test_hot_functions_of_a_busy_loop():
+    profiler = pr.Profiler().start()
+    spin(0.3)
+    kept = [bytearray(1024) for _ in range(2000)]
+    result = profiler.stop()
+    assert profiler.stop() is result
+    assert result['samples'] > 10
+    label, ms = pr.hot_functions(result['folded'], 1)[0]
+    assert label.startswith('spin (test_profiling.py:') and 150 <= ms <= 600
+    for line in result['folded'].splitlines():
+        stack, ms = line.rsplit(' ', 1)
+        assert int(ms) >= 0 and stack
+    assert any(site['file'].endswith('test_profiling.py') for site in result['allocations']['top'])
+    assert result['allocations']['peak_mb'] >= result['allocations']['current_mb'] > 1
+    del kept
+
+
+def test_time_with_the_gil_held_is_native():
+    profiler = pr.Profiler().start()
+    tic = time.perf_counter()
+    hold_gil()
+    held = time.perf_counter() - tic
+    spin(0.05)
+    result = profiler.stop()
+    times = dict(pr.hot_functions(result['folded'], 100))
+    # the whole time of the sum is seen as one long gap, it is not charged to the stack sampled after it
+    assert times[pr.NATIVE] >= 1000 * (held - pr.MAX_GAP * pr.INTERVAL) * 0.5
+    assert times.get('spin (test_profiling.py:5)', 0) < 1000 * held / 2
+
+
+def test_unstarted_profiler():
+    assert pr.Profiler().stop() is None
+    assert pr.hot_functions('a;b 3\na;c 2\nb 4', 2) == [('b', 7), ('c', 2)]
@@ -0,0 +1,79 @@
+import copy
+import numpy as np
+import pytest
+import classes as dc
+import json_auxiliary as ja
+
+
+@pytest.fixture(scope='module')
+def shipped():
+    timelines, period_list, label_list, no_timesteps, timeline_map, weights = ja.read_timelines('tool_dekarpio_timelines.json')
+    structure = ja.read_structure('tool_dekarpio_structure.json')
+    sysParam = ja.read_parameters(structure['par'], structure['eco'], period_list, label_list, no_timesteps, weights)
+    sysParam['assembly'] = 'matrix'
+    return structure, timelines, timeline_map, sysParam
+
+
+@pytest.fixture(scope='module')
+def unpruned(shipped):
+    # all units of the structure assembled, the not integrated ones with zero capacities
+    structure, timelines, timeline_map, sysParam = shipped
+    system = dc.System(copy.deepcopy(sysParam))
+    ja.add_units_and_nodes(system, structure, timelines, timeline_map)
+    ja.build_pyomo_model(system)
+    ja.solve_pyomo_model(system)
+    return system
+
+
+def test_pruned_structure(shipped):
+    structure, timelines, timeline_map, sysParam = shipped
+    system = dc.System(copy.deepcopy(sysParam))
+    out_str, pruned = ja.prune_structure(system, structure, timelines, timeline_map)
+    assert system.pruned['units'] and system.pruned['con']
+    ids = set()
+    for group in ['eso', 'ecu', 'esu', 'dem']:
+        for obj in pruned[group].values():
+            assert obj['param'][0]['integrate'] == True
+            ids.add(obj['ID'])
+        assert len(pruned[group]) + sum(structure[group][k]['ID'] in system.pruned['units'] for k in structure[group]) \
+            == len(structure[group])
+    ids.update(obj['ID'] for obj in pruned['col'].values())
+    for con in pruned['con'].values():
+        _, left, right = con['ID'].split('-')
+        assert left in ids and right in ids
+    # the structure itself is not changed
+    assert len(structure['con']) == len(pruned['con']) + len(system.pruned['con'])
+
+
+def test_pruned_units_are_not_assembled(matrix_system, unpruned):
+    assert matrix_system.matrix.n_col < unpruned.matrix.n_col / 2
+    assert matrix_system.matrix.n_row < unpruned.matrix.n_row
+    for name in matrix_system.pruned['units']:
+        assert name not in matrix_system.unit
+    assert ja.return_results(matrix_system)['objectives']['total_real'] == pytest.approx(
+        ja.return_results(unpruned)['objectives']['total_real'], rel=1e-6)
+
+
+def test_pruned_units_reported_as_zeros(matrix_system, unpruned):
+    pruned, full = ja.return_results(matrix_system), ja.return_results(unpruned)
+    assert list(pruned['units']) == list(full['units'])
+    assert list(pruned['nodes']) == list(full['nodes'])
+    zeros = [name for name in full['units'] if name not in matrix_system.unit]
+    # demands are added as one unit per input and output of the process
+    assert all(any(z == i or z.startswith(i + '_') for z in zeros) for i in matrix_system.pruned['units'])
+    for name in zeros:
+        unit = pruned['units'][name]
+        assert unit['obj'].keys() == full['units'][name]['obj'].keys()
+        assert all(v == 0 for v in unit['obj'].values())
+        assert unit['var']['scalar'] == {k: 0.0 for k in full['units'][name]['var']['scalar']}
+        for var, arr in full['units'][name]['var']['seq'].items():
+            if arr is None:
+                assert unit['var']['seq'][var] is None
+            else:
+                assert unit['var']['seq'][var].shape == arr.shape
+                assert not unit['var']['seq'][var].any()
+    for name, node in full['nodes'].items():
+        for side in ['lhs', 'rhs']:
+            assert list(pruned['nodes'][name][side]) == list(node[side])
+            for port, arr in node[side].items():
+                assert np.allclose(pruned['nodes'][name][side][port], np.nan_to_num(arr), atol=1e-3)
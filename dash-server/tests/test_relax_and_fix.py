@@ -0,0 +1,48 @@
+import numpy as np
+import pytest
+import auxiliary as da
+import highs_backend as hb
+
+
+@pytest.fixture(scope='module')
+def heuristic_system(build_shipped):
+    return build_shipped('matrix', opt={'strategy': 'relax-and-fix'})
+
+
+def test_relax_and_fix_is_feasible(heuristic_system):
+    matrix = heuristic_system.matrix
+    x = matrix.x
+    assert matrix.status.startswith('Relax-and-fix')
+    assert np.all(x >= matrix.lb - 1e-6) and np.all(x <= matrix.ub + 1e-6)
+    activity = matrix.A @ x
+    scale = 1 + np.abs(activity)
+    assert np.all(activity >= matrix.row_lo - 1e-6 * scale)
+    assert np.all(activity <= matrix.row_hi + 1e-6 * scale)
+    integer = matrix.integrality.astype(bool)
+    assert np.allclose(x[integer], np.round(x[integer]), atol=1e-6)
+    assert matrix.c @ x + matrix.c0 == pytest.approx(matrix.objective, rel=1e-9)
+
+
+def test_relax_and_fix_costs_at_least_the_optimum(heuristic_system, matrix_system):
+    optimum = matrix_system.matrix.objective
+    objective = heuristic_system.matrix.objective
+    assert objective >= optimum * (1 - da.SOLVER_PROFILES['balanced']['mipgap'])
+    # the gap is reported against the bound of the first stage, which is below the optimum
+    bound = objective * (1 - heuristic_system.matrix.mip_gap)
+    assert bound <= optimum * (1 + 1e-6)
+
+
+def test_integer_columns_split_investment_and_periods(matrix_system):
+    matrix = matrix_system.matrix
+    invest, periods = hb.integer_columns(matrix)
+    assert len(periods) == matrix.n_sc
+    columns = np.concatenate([invest] + periods)
+    assert len(np.unique(columns)) == len(columns)
+    assert np.array_equal(np.sort(columns), np.flatnonzero(matrix.integrality))
+
+
+def test_relax_and_fix_only_for_matrix_assembly(pyomo_system, monkeypatch):
+    monkeypatch.setitem(pyomo_system.param['opt'], 'strategy', 'relax-and-fix')
+    monkeypatch.setattr(pyomo_system, 'solver_settings', pyomo_system.solver_settings)
+    with pytest.raises(ValueError):
+        da.solve_model(pyomo_system, solver='highs')
@@ -0,0 +1,30 @@
+import json
+import pytest
+import auxiliary as da
+import json_auxiliary as ja
+import simulation_jobs as sj
+
+
+def test_relaxation_bounds_the_mip(build_shipped, matrix_system):
+    system = build_shipped('matrix')
+    out_str, system = ja.solve_lp_relaxation(system)
+    assert system.solver_settings['relaxed'] and system.solver_settings['strategy'] == 'lp-relaxation'
+    assert system.matrix.objective <= matrix_system.matrix.objective * (1 + 1e-9)
+    assert system.matrix.objective > 0
+
+
+def test_relaxation_only_for_matrix_assembly(pyomo_system):
+    with pytest.raises(ValueError):
+        da.solve_relaxation(pyomo_system)
+
+
+def test_preview_is_stored_before_the_mip(cache):
+    settings = json.dumps(ja.read_structure('tool_dekarpio_structure.json'))
+    previews = []
+    cache_key, period_list, info = sj.run_simulation(settings, lambda count, total: None,
+                                                     preview=lambda *args: previews.append(args))
+    assert [key for key, periods, lp_info in previews] == [cache_key + '/lp']
+    assert 'LP relaxation (preview)' in info
+    lp = cache.get_results(cache_key + '/lp')
+    assert lp['general']['solver']['strategy'] == 'lp-relaxation' and lp['general']['solver']['relaxed']
+    assert cache.get_results(cache_key)['general']['solver']['strategy'] == 'mip'
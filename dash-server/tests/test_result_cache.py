@@ -0,0 +1,27 @@
+import json
+import result_cache as rc
+
+
+def test_result_key_is_canonical():
+    structure = {'par': {'a': 1, 'b': [1, 2]}, 'eco': {}}
+    settings = {'solver': 'highs', 'opt': {'timelimit': 600}}
+    key = rc.result_key(structure, [{'x': [1.0]}], {}, settings)
+    assert rc.result_key({'eco': {}, 'par': {'b': [1, 2], 'a': 1}}, [{'x': [1.0]}], {}, settings) == key
+    assert rc.result_key(structure, [{'x': [1.0]}], {}, dict(settings, opt={'timelimit': 60})) != key
+    assert rc.result_key(dict(structure, par={'a': 2, 'b': [1, 2]}), [{'x': [1.0]}], {}, settings) != key
+
+
+def test_solver_settings_are_part_of_the_key():
+    sysParam = {'opt': {'timelimit': 600}, 'assembly': 'matrix', 'sc': {'p1': [0.5, 182]}}
+    settings = rc.solver_settings(sysParam)
+    key = rc.result_key({}, [], {}, settings)
+    assert rc.result_key({}, [], {}, rc.solver_settings(dict(sysParam, assembly='pyomo'))) != key
+    assert rc.result_key({}, [], {}, rc.solver_settings(dict(sysParam, sc={'p1': [0.6, 219]}))) != key
+
+
+def test_json_roundtrip(cache):
+    cache.put('front', json.dumps({'points': [1, 2]}))
+    assert json.loads(cache.get('front')) == {'points': [1, 2]}
+    assert cache.has('front')
+    assert cache.get('missing') is None
+
@@ -0,0 +1,39 @@
+import json
+import numpy as np
+import json_auxiliary as ja
+import result_cache as rc
+
+
+def test_pack_keeps_shapes_and_values():
+    results = {'periods': ['0', '1'], 'objectives': {'total': 1.5},
+               'units': {'a': {'seq': {'x': np.arange(6.0).reshape(2, 3), 'y': None, 'soc_p': np.array([1.0, np.nan])},
+                               'scalar': {'cap': 2.0}, 'integ': 'Considered as integrated'}},
+               'nodes': {'n': {'lhs': {'a_x': np.zeros((2, 0))}, 'rhs': {}}}}
+    stored = rc.unpack(rc.pack(results))
+    assert stored['periods'] == ['0', '1'] and stored['objectives'] == {'total': 1.5}
+    unit = stored['units']['a']
+    assert np.array_equal(unit['seq']['x'], results['units']['a']['seq']['x'])
+    assert unit['seq']['y'] is None
+    assert np.array_equal(unit['seq']['soc_p'], [1.0, np.nan], equal_nan=True)
+    assert unit['scalar'] == {'cap': 2.0} and unit['integ'] == 'Considered as integrated'
+    assert stored['nodes']['n']['lhs']['a_x'].shape == (2, 0)
+    assert rc.unpack(rc.pack({})) == {}
+
+
+def test_results_roundtrip(cache, matrix_system):
+    results = ja.return_results(matrix_system)
+    cache.put_results('key', results)
+    assert cache.has('key')
+    stored = cache.get_results('key')
+    assert stored['objectives'] == results['objectives']
+    for name, unit in results['units'].items():
+        for var, arr in unit['var']['seq'].items():
+            if arr is None:
+                assert stored['units'][name]['var']['seq'][var] is None
+            else:
+                assert np.array_equal(stored['units'][name]['var']['seq'][var], arr, equal_nan=True)
+    assert cache.get_results('other') is None
+
+
+def test_pack_is_smaller_than_json(matrix_system):
+    assert len(rc.pack(ja.return_results(matrix_system))) < len(json.dumps(ja.return_results_dict(matrix_system))) / 4
@@ -0,0 +1,69 @@
+import json
+import numpy as np
+import json_auxiliary as ja
+
+
+def test_result_arrays(matrix_system):
+    results = ja.return_results(matrix_system)
+    n_periods, n_ts = len(matrix_system.param['sc']), matrix_system.param['n_ts_sc']
+    assert results['periods'] == [str(s) for s in matrix_system.param['sc']]
+    for unit in results['units'].values():
+        for arr in unit['var']['seq'].values():
+            # storage states have n_ts + 1 values, soc_p of period storages one per period
+            assert arr is None or arr.shape in [(n_periods, n_ts), (n_periods, n_ts + 1), (n_periods,)]
+    for node in results['nodes'].values():
+        for side in ['lhs', 'rhs']:
+            for arr in node[side].values():
+                assert arr.shape == (n_periods, n_ts)
+
+
+def test_results_dict_layout(matrix_system):
+    # json layout of the results before they were extracted as arrays
+    arrays = ja.return_results(matrix_system)
+    results = ja.return_results_dict(matrix_system)
+    json.dumps(results)
+    assert 'periods' not in results
+    for name, unit in results['units'].items():
+        for var, seq in unit['var']['seq'].items():
+            assert list(seq) == arrays['periods']
+            arr = arrays['units'][name]['var']['seq'][var]
+            if arr is None or arr.ndim == 1:
+                continue
+            for k, period in enumerate(arrays['periods']):
+                assert seq[period]['timesteps'] == list(range(arr.shape[1]))
+                values = np.array([np.nan if v is None else v for v in seq[period]['values']])
+                assert np.array_equal(values, arr[k], equal_nan=True)
+
+
+def test_results_match_between_assemblies(matrix_system, pyomo_system):
+    matrix = ja.return_results_dict(matrix_system)
+    pyomo = ja.return_results_dict(pyomo_system)
+    assert matrix['nodes'].keys() == pyomo['nodes'].keys()
+    for name, node in matrix['nodes'].items():
+        for side in ['lhs', 'rhs']:
+            assert node[side].keys() == pyomo['nodes'][name][side].keys()
+
+
+def test_seq_results_layout():
+    periods = ['0', '1']
+    arr = np.array([[1.0, np.nan], [3.0, 4.0]])
+    assert ja.seq_results(periods, arr) == {'0': {'timesteps': [0, 1], 'values': [1.0, None]},
+                                            '1': {'timesteps': [0, 1], 'values': [3.0, 4.0]}}
+    # one value per period (soc_p of period storages) and variables that are not exported
+    assert ja.seq_results(periods, np.array([5.0, np.nan])) == {'0': {'timesteps': [], 'values': [5.0]},
+                                                                 '1': {'timesteps': [], 'values': [None]}}
+    assert ja.seq_results(periods, None) == {p: {'timesteps': [], 'values': []} for p in periods}
+
+
+def test_node_ports_are_port_values(matrix_system):
+    # ports with a level axis (e.g. heat pump levels) are summed over the levels
+    results = ja.return_results(matrix_system)
+    x = matrix_system.matrix.x
+    for name, node in matrix_system.node.items():
+        for side in ['lhs', 'rhs']:
+            for unit_name, port, *_ in node.param[side]:
+                values = x[matrix_system.unit[unit_name].port[port]]
+                if values.ndim == 3:
+                    values = values.sum(axis=2)
+                arr = results['nodes'][name][side][unit_name + '_' + port]
+                assert np.allclose(np.nan_to_num(arr), values)
@@ -0,0 +1,67 @@
+import json
+import pytest
+import json_auxiliary as ja
+import simulation_jobs as sj
+
+
+@pytest.fixture
+def jobs(tmp_path, monkeypatch):
+    # job queue of this test only
+    monkeypatch.setattr(sj, 'JOBS_DIR', str(tmp_path))
+    monkeypatch.setattr(sj, '_cache', None)
+    yield sj
+    sj.get_cache().close()
+
+
+def job(job_id, user, submitted, status='queued', priority=0):
+    return {'id': job_id, 'user': user, 'priority': priority, 'status': status, 'submitted': submitted,
+            'cancel': False, 'worker': None, 'finished': None, 'message': ''}
+
+
+def test_queue_order_takes_turns_between_users():
+    jobs = [job('a1', 'a', 1), job('a2', 'a', 2), job('a3', 'a', 3), job('b1', 'b', 4), job('c1', 'c', 5),
+            job('b2', 'b', 6)]
+    assert sj.queue_order(jobs) == ['a1', 'b1', 'c1', 'a2', 'b2', 'a3']
+
+
+def test_queue_order_priority_and_running_jobs():
+    jobs = [job('a0', 'a', 0, status='running'), job('a1', 'a', 1), job('b1', 'b', 2), job('c1', 'c', 3, priority=1),
+            job('b0', 'b', 0, status='done')]
+    # priority first, then a's waiting job counts its running job
+    assert sj.queue_order(jobs) == ['c1', 'b1', 'a1']
+
+
+def test_cancel(jobs):
+    cache = jobs.get_cache()
+    for record in [job('q', 'a', 1), job('r', 'a', 2, status='running'), job('d', 'a', 3, status='done')]:
+        cache.set('job/' + record['id'], record)
+    cache.set('settings/q', '{}')
+
+    queued = jobs.cancel('q')
+    assert queued['status'] == 'cancelled' and queued['cancel'] and queued['finished'] is not None
+    assert cache.get('settings/q') is None
+    # running jobs are only flagged, the pool terminates their worker
+    running = jobs.cancel('r')
+    assert running['status'] == 'running' and running['cancel']
+    assert jobs.cancel('d')['status'] == 'done' and not jobs.cancel('d')['cancel']
+    assert jobs.cancel('unknown') is None
+    assert jobs.queue_order(jobs.all_jobs()) == []
+
+
+def test_only_optimal_results_are_found_by_later_jobs(cache, jobs):
+    settings = json.dumps(ja.read_structure('tool_dekarpio_structure.json'))
+    cache_key = sj.simulation_key(json.loads(settings))[0]
+
+    # accept the first incumbent: stored under a key of its own
+    accepted, period_list, info = sj.run_simulation(settings, lambda count, total: None,
+                                                    lambda solver: solver['objective'] is not None)
+    assert accepted.startswith(cache_key + '/incumbent/')
+    assert cache.get_results(accepted) is not None
+    assert not cache.has(cache_key)
+    job_id = sj.submit(settings)
+    assert sj.status(job_id)['status'] == 'queued'
+
+    solved, period_list, info = sj.run_simulation(settings, lambda count, total: None)
+    assert solved == cache_key and cache.has(cache_key)
+    assert sj.run_simulation(settings, lambda count, total: None)[2].startswith('Results loaded from cache')
+    assert sj.status(sj.submit(settings))['result_key'] == cache_key
@@ -0,0 +1,33 @@
+import pytest
+import auxiliary as da
+import result_cache as rc
+
+
+def test_profiles_translate_to_highs_options():
+    assert da.solver_profile() == da.SOLVER_PROFILES[da.DEFAULT_PROFILE]
+    exact = da.solver_options('highs', da.solver_profile('exact'))
+    assert exact['mip_rel_gap'] == 0.0 and exact['threads'] == 1 and exact['parallel'] == 'off'
+    preview = da.solver_options('highs', da.solver_profile('fast-preview', threads=4, mipgap=0.05))
+    assert preview == {'mip_rel_gap': 0.05, 'threads': 4, 'presolve': 'on', 'mip_heuristic_effort': 0.3,
+                       'parallel': 'on'}
+    for solver in ['cplex', 'cbc', 'glpk']:
+        assert da.solver_options(solver, da.solver_profile('exact'))
+    with pytest.raises(ValueError):
+        da.solver_profile('fastest')
+
+
+def test_profile_is_part_of_the_key():
+    sysParam = {'opt': {'timelimit': 600, 'profile': 'balanced', 'strategy': 'mip'}, 'assembly': 'matrix', 'sc': {}}
+    key = rc.result_key({}, [], {}, rc.solver_settings(sysParam))
+    exact = dict(sysParam, opt=dict(sysParam['opt'], profile='exact'))
+    assert rc.result_key({}, [], {}, rc.solver_settings(exact)) != key
+
+
+def test_profile_reaches_highs(build_shipped, matrix_system):
+    system = build_shipped('matrix', opt={'profile': 'exact'})
+    assert system.solver_settings['profile'] == 'exact'
+    assert system.highs.getOptionValue('mip_rel_gap')[1] == 0.0
+    assert system.highs.getOptionValue('threads')[1] == 1
+    assert system.matrix.status == 'Optimal'
+    assert system.matrix.objective == pytest.approx(matrix_system.matrix.objective,
+                                                    rel=da.SOLVER_PROFILES['balanced']['mipgap'])
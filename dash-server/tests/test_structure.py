@@ -0,0 +1,23 @@
+import pytest
+import json_auxiliary as ja
+
+
+@pytest.mark.parametrize('assembly', ['matrix', 'pyomo'])
+def test_gas_turbine_heat_reaches_the_collector(assembly):
+    # gas turbines (not integrated in the shipped case) feed their exhaust heat to col3_lis1 through con91 and con93
+    timelines, period_list, label_list, no_timesteps, timeline_map, weights = ja.read_timelines('tool_dekarpio_timelines.json')
+    structure = ja.read_structure('tool_dekarpio_structure.json')
+    for ecu in ['ecu10', 'ecu11']:
+        structure['ecu'][ecu]['param'][0]['integrate'] = True
+    sysParam = ja.read_parameters(structure['par'], structure['eco'], period_list, label_list, no_timesteps, weights)
+    sysParam['assembly'] = assembly
+    ini_out_str, res = ja.initialize_model(sysParam)
+    pru_out_str, structure = ja.prune_structure(res, structure, timelines, timeline_map)
+    assert {'con91', 'con93'} <= set(structure['con'])
+    add_out_str, res = ja.add_units_and_nodes(res, structure, timelines, timeline_map)
+    for gtu in ['ecu_ecu10_gtu1', 'ecu_ecu11_gtu2']:
+        assert [port[:2] for port in res.node[gtu + '_heat_out_node'].param['lhs']] == [[gtu, 'q']]
+        assert 'coupler_' + gtu + '_heat_out_node_to_col_col3_lis1_node' in res.unit
+    bui_out_str, res = ja.build_pyomo_model(res)
+    sol_out_str, slack_out_str, res = ja.solve_pyomo_model(res)
+    assert ja.value_function(res)(res.obj['total']) > 0
@@ -0,0 +1,51 @@
+import os
+import sys
+import numpy as np
+import json_auxiliary as ja
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.realpath(__file__))), 'benchmarks'))
+import synthetic as sy
+
+
+def test_unit_counts_keep_the_proportions():
+    template = sy.load(sy.STRUCTURE)
+    counts = sy.unit_counts(200, template)
+    assert abs(sum(counts[:4]) - 200) <= 4 and min(counts) >= 1
+    assert counts[4] >= len(template['col'])
+    sizes = [len(template[group]) for group in sy.UNITS]
+    assert np.argmax(counts[:4]) == np.argmax(sizes)
+    assert min(sy.unit_counts(1, template)[:4]) == 1
+
+
+def test_structure_is_connected_and_reproducible():
+    structure, timelines, timeline_map = sy.make_system(*sy.unit_counts(40), n_periods=2, n_ts=12, seed=3)
+    again = sy.make_system(*sy.unit_counts(40), n_periods=2, n_ts=12, seed=3)
+    assert (structure, timelines, timeline_map) == again
+    assert sy.make_system(*sy.unit_counts(40), n_periods=2, n_ts=12, seed=4)[0] != structure
+
+    ids = {obj['ID'] for group in sy.GROUPS for obj in structure[group].values()}
+    ends = {end for con in structure['con'].values() for end in [con['inp'], con['out']]}
+    assert ends <= ids
+    units = {obj['ID'] for group in ['ecu', 'esu', 'dem'] for obj in structure[group].values()}
+    assert units <= ends
+    assert all(obj['param'][0]['integrate'] for group in sy.UNITS for obj in structure[group].values())
+
+    periods = timelines['Medoid-Zeitreihen']
+    assert len(periods) == 2 and all(len(v) == 12 for period in periods for v in period.values())
+    assert sum(timelines['Gewichte'].values()) == 365
+    assert set(timeline_map.values()) <= set(periods[0])
+
+
+def test_synthetic_system_solves():
+    structure, timelines, timeline_map = sy.make_system(*sy.unit_counts(30), n_periods=2, n_ts=12, seed=1)
+    periods = ['0', '1']
+    sysParam = ja.read_parameters(structure['par'], structure['eco'], periods, periods, 12,
+                                  {period: 365 / 2 for period in periods})
+    sysParam['tss'] = 2.0
+    ini_out_str, res = ja.initialize_model(sysParam)
+    pru_out_str, structure = ja.prune_structure(res, structure, timelines['Medoid-Zeitreihen'], timeline_map)
+    add_out_str, res = ja.add_units_and_nodes(res, structure, timelines['Medoid-Zeitreihen'], timeline_map)
+    assert len(res.unit) > 30
+    bui_out_str, res = ja.build_pyomo_model(res)
+    sol_out_str, slack_out_str, res = ja.solve_pyomo_model(res)
+    assert res.matrix.status == 'Optimal'
@@ -0,0 +1,35 @@
+import pytest
+import json_auxiliary as ja
+import app
+
+
+@pytest.fixture(scope='module')
+def period_list():
+    return ja.read_timelines('tool_dekarpio_timelines.json')[1]
+
+
+@pytest.mark.parametrize('tab_id', list(app.tabs))
+def test_tab_outputs(cache, matrix_system, period_list, tab_id):
+    cache.put_results('key', ja.return_results(matrix_system))
+    figures = app.tabFigures(tab_id, 'key', period_list)
+    build, outputs = app.tabs[tab_id]
+    assert len(figures) == len(outputs)
+    for figure, (component, prop) in zip(figures, outputs):
+        if prop == 'figure':
+            assert 'data' in figure and 'layout' in figure
+
+
+def test_tab_figures_are_cached(cache, matrix_system, period_list, monkeypatch):
+    cache.put_results('key', ja.return_results(matrix_system))
+    figures = app.tabFigures('tab-3', 'key', period_list)
+    assert cache.get_figures('key', 'tab-3') is not None
+    assert cache.get_figures('key', 'tab-2') is None
+
+    def build(jsonStorage, period_list):
+        raise AssertionError('tab built again')
+    monkeypatch.setitem(app.tabs, 'tab-3', (build, app.tabs['tab-3'][1]))
+    assert app.tabFigures('tab-3', 'key', period_list) == figures
+
+
+def test_evicted_results(cache, period_list):
+    assert app.tabFigures('tab-1', 'missing', period_list) is None
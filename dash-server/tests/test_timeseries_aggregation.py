@@ -0,0 +1,88 @@
+import time
+import numpy as np
+import pandas as pd
+import pytest
+import json_auxiliary as ja
+import timeseries_aggregation as ta
+
+PROFILES = 'traun_wetterdaten_2019.csv'
+TEMPERATURE = 'Umgebungstemperatur in °C'
+
+
+@pytest.fixture(scope='module')
+def profiles():
+    df = ta.read_profiles(PROFILES)
+    df['Konstant'] = 1.0
+    return df
+
+
+def test_k_medoids_separates_clusters():
+    rng = np.random.default_rng(1)
+    centres = np.array([[0.0, 0.0], [10.0, 0.0], [0.0, 10.0]])
+    x = np.concatenate([c + rng.normal(scale=0.5, size=(20, 2)) for c in centres])
+    labels, medoids = ta.k_medoids(x, 3)
+    assert len(set(labels)) == 3
+    for c in range(3):
+        assert len(set(labels[20 * c:20 * (c + 1)])) == 1
+    assert np.all(labels[medoids] == np.arange(3))
+
+
+def test_incomplete_days_are_dropped():
+    index = pd.date_range('2019-03-30', '2019-04-02', freq='h', inclusive='left')
+    df = pd.DataFrame({'a': np.arange(len(index), dtype=float)}, index=index).drop(index[30])
+    data, days = ta.daily_array(df, 24)
+    assert data.shape == (2, 24, 1)
+    assert [d.strftime('%Y-%m-%d') for d in days] == ['2019-03-30', '2019-04-01']
+    assert np.array_equal(data[1, :, 0], np.arange(48, 72))
+
+
+@pytest.mark.parametrize('method', ['k_medoids', 'hierarchical'])
+def test_aggregate(profiles, method):
+    tic = time.time()
+    timelines = ta.aggregate(profiles, 6, method=method)
+    assert time.time() - tic < 30
+
+    days = timelines['Label-Sequenz']
+    assert len(days) == 365
+    assert len(timelines['Medoid-Zeitreihen']) == 6
+    assert sum(timelines['Gewichte'].values()) == 365
+    counts = np.bincount(list(days.values()), minlength=6)
+    assert [timelines['Gewichte'][str(c)] for c in range(6)] == counts.tolist()
+    assert list(counts) == sorted(counts, reverse=True)     # periods ordered by occurrence
+
+    # every typical period is a real day of its cluster
+    for c, period in enumerate(timelines['Medoid-Zeitreihen']):
+        assert len(period[TEMPERATURE]) == 24
+        members = [d for d, label in days.items() if label == c]
+        day = [profiles.loc[d, TEMPERATURE].tolist() for d in members]
+        assert period[TEMPERATURE] in day
+
+
+def test_extreme_period(profiles):
+    timelines = ta.aggregate(profiles, 4, extreme_periods=[(TEMPERATURE, 'min')])
+    coldest = profiles[TEMPERATURE].idxmin().strftime('%Y-%m-%d')
+    label = timelines['Label-Sequenz'][coldest]
+    assert label == len(timelines['Medoid-Zeitreihen']) - 1
+    assert timelines['Gewichte'][str(label)] == 1
+    assert min(timelines['Medoid-Zeitreihen'][label][TEMPERATURE]) == profiles[TEMPERATURE].min()
+
+
+def test_more_periods_reduce_error(profiles):
+    rmse = [ta.aggregate(profiles, k, method='hierarchical')['RMSE'][TEMPERATURE] for k in [3, 12]]
+    assert rmse[1] < rmse[0]
+
+
+def test_weights_read_as_period_weights(profiles, tmp_path):
+    timelines = ta.aggregate(profiles, 5)
+    path = tmp_path / 'timelines.json'
+    ta.write_timelines(timelines, str(path))
+    tl, period_list, label_list, no_timesteps, timeline_map, weights = ja.read_timelines(str(path))
+    assert period_list == [str(c) for c in range(5)]
+    assert no_timesteps == 24
+    assert weights == timelines['Gewichte']
+
+    structure = ja.read_structure('tool_dekarpio_structure.json')
+    sysParam = ja.read_parameters(structure['par'], structure['eco'], period_list, label_list, no_timesteps, weights)
+    occurrences = [sysParam['sc'][period][1] for period in period_list]
+    expected = [weights[period] * (365 - sysParam['days_off']) / 365 for period in period_list]
+    assert np.allclose(occurrences, expected, atol=0.5)
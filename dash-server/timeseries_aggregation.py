@@ -0,0 +1,181 @@
+import json
+import argparse
+import numpy as np
+import pandas as pd
+from scipy.spatial.distance import cdist, pdist, squareform
+from scipy.cluster.hierarchy import linkage, fcluster
+
+# Typical periods (days) from full-year profiles, written in the format of tool_dekarpio_timelines.json:
+#   'Medoid-Zeitreihen': one dict {column: values} per typical period, the list index is the period label
+#   'Label-Sequenz':     {date: period label} for every day of the year
+#   'Gewichte':          {period label: number of days represented}, used as period weights by read_parameters
+#   'RMSE':              {column: error of the year reconstructed from the typical periods, in units of the column}
+# Profiles are normalised to [0, 1] per column, each day is one vector of n_steps * n_columns values. Days are
+# clustered with k-medoids or hierarchical (ward) clustering, every cluster is represented by a real day (its medoid).
+# Extreme periods (e.g. the day with the peak demand) are taken out of their cluster and kept as periods of their own.
+#
+#   df = ta.read_profiles('traun_wetterdaten_2019.csv')
+#   timelines = ta.aggregate(df, 6, method='hierarchical', extreme_periods=[('Umgebungstemperatur in °C', 'min')])
+#   ta.write_timelines(timelines, 'tool_dekarpio_timelines.json')
+
+EXTREME_KINDS = ['max', 'min', 'max_mean', 'min_mean']
+
+
+def read_profiles(path, sep=';', decimal='.'):
+    df = pd.read_csv(path, sep=sep, decimal=decimal, index_col=0, parse_dates=True)
+    df.index = pd.to_datetime(df.index)
+    return df.sort_index()
+
+
+def steps_per_day(df):
+    step = df.index.to_series().diff().median()
+    return int(round(pd.Timedelta(days=1) / step))
+
+
+def daily_array(df, n_steps=None):
+    # (n_days, n_steps, n_columns) array of all complete days, incomplete days (e.g. at dst changes) are dropped
+    n_steps = n_steps or steps_per_day(df)
+    df = df.interpolate(limit_direction='both')
+    days = df.index.normalize()
+    counts = pd.Series(1, index=days).groupby(level=0).sum()
+    complete = counts.index[counts.values == n_steps]
+    df = df[days.isin(complete)]
+    return df.values.reshape(len(complete), n_steps, df.shape[1]), complete
+
+
+def normalise(data, column_weights=None):
+    lo = data.min(axis=(0, 1))
+    span = data.max(axis=(0, 1)) - lo
+    span[span == 0] = 1        # constant columns, e.g. 'Konstant'
+    scaled = (data - lo) / span
+    if column_weights is not None:
+        scaled = scaled * np.asarray(column_weights, dtype=float)
+    return scaled.reshape(len(data), -1)
+
+
+def k_medoids(x, k, n_init=10, max_iter=100, seed=0):
+    # alternating k-medoids on the full distance matrix with k-medoids++ starts, the best of n_init runs is returned
+    d = squareform(pdist(x, 'sqeuclidean'))
+    n = len(x)
+    rng = np.random.default_rng(seed)
+    best = (np.inf, None, None)
+    for _ in range(n_init):
+        medoids = [rng.integers(n)]
+        for _ in range(1, k):
+            p = d[:, medoids].min(axis=1)
+            medoids.append(rng.choice(n, p=p / p.sum()) if p.sum() > 0 else rng.integers(n))
+        medoids = np.array(medoids)
+        for _ in range(max_iter):
+            labels = d[:, medoids].argmin(axis=1)
+            new = medoids.copy()
+            for c in range(k):
+                members = np.flatnonzero(labels == c)
+                if len(members):
+                    new[c] = members[d[np.ix_(members, members)].sum(axis=0).argmin()]
+            if np.array_equal(new, medoids):
+                break
+            medoids = new
+        labels = d[:, medoids].argmin(axis=1)
+        cost = d[np.arange(n), medoids[labels]].sum()
+        if cost < best[0]:
+            best = (cost, labels, medoids)
+    return best[1], best[2]
+
+
+def hierarchical(x, k, method='ward'):
+    labels = fcluster(linkage(x, method=method), k, criterion='maxclust') - 1
+    return labels, medoids_of(x, labels)
+
+
+def medoid(x, members):
+    # member closest to the centroid of the cluster
+    centroid = x[members].mean(axis=0, keepdims=True)
+    return members[cdist(x[members], centroid, 'sqeuclidean').argmin()]
+
+
+def medoids_of(x, labels):
+    return np.array([medoid(x, np.flatnonzero(labels == c)) for c in np.unique(labels)])
+
+
+def extreme_day(data, col, kind):
+    if kind not in EXTREME_KINDS:
+        raise ValueError('Unknown extreme period kind {}, use one of {}.'.format(kind, EXTREME_KINDS))
+    profile = data[:, :, col]
+    per_day = profile.mean(axis=1) if kind.endswith('_mean') else (
+        profile.max(axis=1) if kind.startswith('max') else profile.min(axis=1))
+    return int(per_day.argmax() if kind.startswith('max') else per_day.argmin())
+
+
+def add_extreme_periods(x, labels, medoids, days):
+    # every extreme day becomes a period of its own, its former cluster keeps the remaining days
+    labels = labels.copy()
+    medoids = list(medoids)
+    for day in days:
+        c = labels[day]
+        members = np.flatnonzero(labels == c)
+        if len(members) == 1:   # already a period of its own
+            continue
+        labels[day] = len(medoids)
+        medoids.append(day)
+        if medoids[c] == day:
+            medoids[c] = medoid(x, np.flatnonzero(labels == c))
+    return labels, np.array(medoids)
+
+
+def aggregate(df, n_periods, method='k_medoids', extreme_periods=(), column_weights=None, n_steps=None, seed=0):
+    data, dates = daily_array(df, n_steps)
+    x = normalise(data, column_weights)
+    if n_periods >= len(x):
+        raise ValueError('{} typical periods requested for {} days.'.format(n_periods, len(x)))
+
+    if method == 'k_medoids':
+        labels, medoids = k_medoids(x, n_periods, seed=seed)
+    elif method == 'hierarchical':
+        labels, medoids = hierarchical(x, n_periods)
+    else:
+        raise ValueError('Unknown clustering method {}, use k_medoids or hierarchical.'.format(method))
+
+    # typical periods ordered by occurrence, extreme periods last
+    counts = np.bincount(labels, minlength=len(medoids))
+    order = np.argsort(-counts, kind='stable')
+    labels = np.argsort(order)[labels]
+    medoids = medoids[order]
+
+    columns = list(df.columns)
+    extreme = [extreme_day(data, columns.index(col), kind) for col, kind in extreme_periods]
+    labels, medoids = add_extreme_periods(x, labels, medoids, extreme)
+
+    counts = np.bincount(labels, minlength=len(medoids))
+    rmse = np.sqrt(((data - data[medoids][labels]) ** 2).mean(axis=(0, 1)))
+    return {
+        'Medoid-Zeitreihen': [{col: data[m, :, j].tolist() for j, col in enumerate(columns)} for m in medoids],
+        'Label-Sequenz': {d.strftime('%Y-%m-%d'): int(l) for d, l in zip(dates, labels)},
+        'Gewichte': {str(c): int(n) for c, n in enumerate(counts)},
+        'RMSE': {col: float(e) for col, e in zip(columns, rmse)},
+    }
+
+
+def write_timelines(timelines, path):
+    with open(path, 'w') as f:
+        json.dump(timelines, f, indent=2, ensure_ascii=False)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Typical days from full-year profiles.')
+    parser.add_argument('profiles', help='csv with a timestamp column and one column per profile')
+    parser.add_argument('n_periods', type=int)
+    parser.add_argument('--method', default='k_medoids', choices=['k_medoids', 'hierarchical'])
+    parser.add_argument('--extreme', action='append', default=[], metavar='COLUMN:KIND',
+                        help='keep an extreme day, KIND is one of ' + ', '.join(EXTREME_KINDS))
+    parser.add_argument('--sep', default=';')
+    parser.add_argument('-o', '--output', default='timelines.json')
+    args = parser.parse_args()
+
+    df = read_profiles(args.profiles, sep=args.sep)
+    if 'Konstant' not in df:
+        df['Konstant'] = 1.0
+    timelines = aggregate(df, args.n_periods, method=args.method,
+                          extreme_periods=[tuple(e.rsplit(':', 1)) for e in args.extreme])
+    write_timelines(timelines, args.output)
+    print('{} periods, days per period: {}'.format(len(timelines['Gewichte']), list(timelines['Gewichte'].values())))
+    print('RMSE: {}'.format(timelines['RMSE']))
@@ -1,5 +1,5 @@
 from flask import Flask
-from flask import request, jsonify
+from flask import request, jsonify, Response
 from flask_socketio import SocketIO, emit
 import requests
 import json
@@ -150,6 +150,46 @@ def demandsRule(jsondata):
 # def test_disconnect():
 #     print('Client disconnected')
 
+JOB_PROGRESS_INTERVAL = 1.0        # seconds
+
+def jobProgress(sid, job_id, jwt):
+    '''
+    Forward the status of a simulation job of the dash-server (progress and HiGHS incumbent, bound, gap and nodes in
+    job['solver']) to the client until the job is finished, jwt: token of the user of the job
+    '''
+    while True:
+        response = requests.get("http://dash-server:3002/dash-server/jobs/"+str(job_id), params={'touch': 1, 'jwt': jwt})
+        if response.status_code != 200:
+            socketio.emit('job_progress', {'id': job_id, 'status': 'unknown'}, to=sid)
+            return
+        job = response.json()
+        socketio.emit('job_progress', job, to=sid)
+        if job['status'] not in ['queued', 'running']:
+            return
+        socketio.sleep(JOB_PROGRESS_INTERVAL)
+
+@socketio.on('subscribe_job')
+def subscribeJob(data):
+    socketio.start_background_task(jobProgress, request.sid, data['job_id'], data.get('jwt', ''))
+
+@socketio.on('accept_job')
+def acceptJob(data):
+    '''
+    Stop the solver of a running job and keep its current solution, data['jwt']: token of the user of the job
+    '''
+    response = requests.post("http://dash-server:3002/dash-server/jobs/"+str(data['job_id'])+"/accept",
+                             params={'jwt': data.get('jwt', '')})
+    emit('job_progress', response.json())
+
+@app.route('/metrics', methods=['GET'])
+def prometheusMetrics():
+    '''
+    Metrics of the simulation runs of the dash-server (phase times, model size, solver outcome, peak memory) as
+    Prometheus text
+    '''
+    response = requests.get("http://dash-server:3002/dash-server/metrics")
+    return Response(response.text, status=response.status_code, content_type='text/plain; version=0.0.4')
+
 if __name__=='__main__':
     # app.run_server(host="0.0.0.0", port=3003, debug=True)
     socketio.run(app, host="0.0.0.0", port=3003, debug=True)